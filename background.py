@@ -0,0 +1,142 @@
+import queue
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+# How often the Tk thread checks for finished tasks (milliseconds)
+POLL_INTERVAL_MS = 30
+MAX_WORKERS = 2
+
+# Run tasks synchronously on the calling thread (used by the test suite,
+# where there is no Tk main loop to deliver results)
+INLINE = False
+
+
+class TaskRunner:
+    """Runs callables on worker threads and hands results back to the Tk thread.
+
+    Workers put results on a queue that a root.after poll drains, so the
+    callbacks always run on the Tk thread.  Tasks are submitted under a
+    key: submitting again under the same key supersedes the earlier task,
+    which is cancelled if it has not started yet and has its result
+    dropped if it has.
+    """
+
+    def __init__(self, root, max_workers=MAX_WORKERS):
+        self.root = root
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='landlord-worker')
+        self._results = queue.Queue()
+        # key -> (generation, future, on_done, on_error); only touched on the Tk thread
+        self._pending = {}
+        self._generation = 0
+        self._polling = False
+
+    def submit(self, key, func, on_done, on_error=None):
+        """Run func() off-thread, then on_done(result) or on_error(exception) on the Tk thread"""
+        self.cancel(key)
+        self._generation += 1
+        generation = self._generation
+        future = self._executor.submit(self._run, key, generation, func)
+        self._pending[key] = (generation, future, on_done, on_error)
+        self._schedule_poll()
+        return generation
+
+    def cancel(self, key):
+        """Forget the task submitted under `key`, cancelling it if it has not started"""
+        pending = self._pending.pop(key, None)
+        if pending:
+            pending[1].cancel()
+
+    def is_pending(self, key):
+        return key in self._pending
+
+    def shutdown(self):
+        """Stop accepting work and drop anything still queued"""
+        self._pending.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, key, generation, func):
+        try:
+            self._results.put((key, generation, func(), None))
+        except Exception as e:
+            self._results.put((key, generation, None, e))
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self):
+        self._polling = False
+        while True:
+            try:
+                key, generation, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            pending = self._pending.get(key)
+            if pending is None or pending[0] != generation:
+                # Superseded or cancelled while it was running
+                continue
+            del self._pending[key]
+            try:
+                _deliver(pending[2], pending[3], result, error)
+            except Exception as e:
+                # A failing callback must not stop the poll, or every other
+                # screen's result would wait in the queue
+                print(f"Background task callback failed: {e}")
+
+        if self._pending:
+            self._schedule_poll()
+
+
+def _deliver(on_done, on_error, result, error):
+    try:
+        if error is None:
+            on_done(result)
+        elif on_error:
+            on_error(error)
+        else:
+            print(f"Background task failed: {error}")
+    except tk.TclError:
+        # The screen that asked for the data has been closed
+        pass
+
+
+_runner = None
+
+
+def get_runner(root):
+    """Return the task runner for a Tk root, creating it on first use"""
+    global _runner
+    if _runner is None or _runner.root is not root:
+        if _runner is not None:
+            _runner.shutdown()
+        _runner = TaskRunner(root)
+    return _runner
+
+
+def submit(widget, key, func, on_done, on_error=None):
+    """Run func() in the background on behalf of `widget`; see TaskRunner.submit"""
+    if INLINE:
+        try:
+            result = func()
+        except Exception as e:
+            _deliver(on_done, on_error, None, e)
+        else:
+            _deliver(on_done, on_error, result, None)
+        return None
+    return get_runner(widget._root()).submit(key, func, on_done, on_error)
+
+
+def cancel(key):
+    """Forget the task submitted under `key`, if any; see TaskRunner.cancel"""
+    if _runner is not None:
+        _runner.cancel(key)
+
+
+def shutdown():
+    """Shut down the shared task runner"""
+    global _runner
+    if _runner is not None:
+        _runner.shutdown()
+        _runner = None
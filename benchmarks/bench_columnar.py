@@ -0,0 +1,95 @@
+"""Compare the CSV and columnar exports: write time, size on disk and read-back time.
+
+Usage:
+    python benchmarks/bench_columnar.py [--payments 200000]
+"""
+import argparse
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import columnar
+import db
+import exporter
+from bench_dashboard import build_database
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def sum_csv(export_dir):
+    """Total amount_paid the way a CSV consumer has to: parse every row and convert"""
+    with open(os.path.join(export_dir, "rent_payments.csv"), newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        column = next(reader).index('amount_paid')
+        return sum(float(row[column]) for row in reader if row[column])
+
+
+def sum_columnar(export_dir):
+    """Total amount_paid by decoding only that column"""
+    with columnar.ColumnarReader(os.path.join(export_dir, "rent_payments" + columnar.EXTENSION)) as reader:
+        return sum(value for value in reader.column('amount_paid') if value is not None)
+
+
+def sum_mapped(export_dir):
+    """Total amount_paid straight from an uncompressed file's mapping"""
+    total = 0
+    with columnar.ColumnarReader(os.path.join(export_dir, "rent_payments" + columnar.EXTENSION)) as reader:
+        for block in reader.numeric_blocks('amount_paid'):
+            total += sum(block)
+            block.release()
+    return total
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--payments', type=int, default=200000)
+    args = parser.parse_args()
+
+    # Measure the stdlib format; Arrow has its own readers
+    columnar.pyarrow = None
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, "columnar.db")
+    try:
+        build_database(path, args.payments)
+        print(f"payments={args.payments}")
+        exports = (
+            ("csv", lambda out: exporter.export_all(path, out, workers=1), sum_csv),
+            ("columnar", lambda out: exporter.export_all(path, out, workers=1, fmt='columnar'), sum_columnar),
+            ("uncompressed", lambda out: uncompressed_export(path, out), sum_mapped),
+        )
+        totals = set()
+        for name, export, read in exports:
+            out = os.path.join(temp_dir, name)
+            os.mkdir(out)
+            _, write_time = timed(export, out)
+            total, read_time = timed(read, out)
+            totals.add(round(total, 2))
+            print(f"{name:12s}: write {write_time * 1000:8.1f} ms, {directory_size(out) / 1024 / 1024:7.2f} MiB, "
+                  f"sum amount_paid {read_time * 1000:7.1f} ms")
+        assert len(totals) == 1
+    finally:
+        db.close_all()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def uncompressed_export(db_file, export_dir):
+    with db.read_connection(db_file) as conn:
+        for table in exporter.EXPORT_TABLES:
+            columnar.export_table(conn, table, os.path.join(export_dir, table + columnar.EXTENSION), compress=False)
+
+
+if __name__ == "__main__":
+    main()
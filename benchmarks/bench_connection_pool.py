@@ -0,0 +1,85 @@
+"""Compare per-operation latency of fresh connections against the pool.
+
+Usage:
+    python benchmarks/bench_connection_pool.py [--rows 100000] [--ops 2000]
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+
+
+def build_database(path, rows):
+    """Create a schema-initialised database with `rows` rent payments"""
+    schema = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), db.SCHEMA_FILE)
+    with sqlite3.connect(path) as conn:
+        with open(schema, 'r') as f:
+            conn.executescript(f.read())
+        conn.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('Bench', '1 Bench St', 1000)")
+        conn.execute("INSERT INTO tenants (name, property_id) VALUES ('Bench Tenant', 1)")
+        conn.execute("INSERT INTO leases (tenant_id, property_id, start_date, rent_amount) VALUES (1, 1, '2020-01-01', 1000)")
+        conn.executemany(
+            "INSERT INTO rent_payments (lease_id, tenant_id, property_id, month, amount_due, amount_paid, due_date, status) "
+            "VALUES (1, 1, 1, ?, 1000, 0, ?, 'Pending')",
+            ((f"{2000 + i // 12:04d}-{i % 12 + 1:02d}", f"{2000 + i // 12:04d}-{i % 12 + 1:02d}-01")
+             for i in range(rows)))
+        conn.commit()
+
+
+def run_query(conn, payment_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, month, amount_due, status FROM rent_payments WHERE id = ?", (payment_id,))
+    return cursor.fetchone()
+
+
+def bench_fresh(path, ids):
+    start = time.perf_counter()
+    for payment_id in ids:
+        with sqlite3.connect(path) as conn:
+            run_query(conn, payment_id)
+        conn.close()
+    return time.perf_counter() - start
+
+
+def bench_pooled(path, ids):
+    start = time.perf_counter()
+    for payment_id in ids:
+        with db.read_connection(path) as conn:
+            run_query(conn, payment_id)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--ops', type=int, default=2000)
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, "bench.db")
+    try:
+        build_database(path, args.rows)
+        ids = [random.randint(1, args.rows) for _ in range(args.ops)]
+
+        fresh = bench_fresh(path, ids)
+        pooled = bench_pooled(path, ids)
+
+        print(f"rows={args.rows} ops={args.ops}")
+        print(f"fresh connection : {fresh / args.ops * 1e6:8.1f} us/op")
+        print(f"pooled connection: {pooled / args.ops * 1e6:8.1f} us/op")
+        print(f"speedup          : {fresh / pooled:8.1f}x")
+    finally:
+        db.close_all()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Compare the old per-card dashboard queries with the single summary query.
+
+Usage:
+    python benchmarks/bench_dashboard.py [--payments 1000000] [--repeat 5]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+import reports
+
+# Indexes added for the summary query; dropped to measure the old path
+SUMMARY_INDEXES = ('idx_rent_payments_status_paid', 'idx_rent_payments_payment_date', 'idx_properties_status')
+
+
+def build_database(path, payments):
+    """Create a migrated database with `payments` rent rows spread over 1000 leases.
+
+    The leases are split across 100 ten-unit properties.
+    """
+    schema = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), db.SCHEMA_FILE)
+    leases = 1000
+    units = 10
+    with sqlite3.connect(path) as conn:
+        with open(schema, 'r') as f:
+            conn.executescript(f.read())
+        db.migrate(conn)
+        conn.executemany("INSERT INTO properties (name, address, rent_amount, status) VALUES (?, 'Bench St', 1000, ?)",
+                         ((f"Property {i}", 'Occupied' if i % 4 else 'Vacant') for i in range(leases // units)))
+        conn.executemany("INSERT INTO tenants (name, property_id) VALUES (?, ?)",
+                         ((f"Tenant {i}", i // units + 1) for i in range(leases)))
+        conn.executemany("INSERT INTO leases (tenant_id, property_id, start_date, rent_amount) VALUES (?, ?, '2000-01-01', 1000)",
+                         ((i + 1, i // units + 1) for i in range(leases)))
+
+        def rows():
+            for i in range(payments):
+                lease = i % leases + 1
+                property_id = (lease - 1) // units + 1
+                month_index = i // leases
+                year, month = 2000 + month_index // 12, month_index % 12 + 1
+                status = ('Paid', 'Paid', 'Paid', 'Pending', 'Overdue')[i % 5]
+                paid = 1000 if status == 'Paid' else 0
+                payment_date = f"{year:04d}-{month:02d}-05" if status == 'Paid' else None
+                yield (lease, lease, property_id, f"{year:04d}-{month:02d}", f"{year:04d}-{month:02d}-01",
+                       paid, status, payment_date)
+
+        conn.executemany("""
+            INSERT INTO rent_payments (lease_id, tenant_id, property_id, month, due_date,
+                                       amount_due, amount_paid, status, payment_date)
+            VALUES (?, ?, ?, ?, ?, 1000, ?, ?, ?)
+        """, rows())
+        conn.executemany("INSERT INTO expenses (property_id, description, amount, date) VALUES (?, 'Repair', 50, '2020-01-01')",
+                         ((i % (leases // units) + 1,) for i in range(payments // 20)))
+        conn.executemany("INSERT INTO maintenance_requests (property_id, description, status, request_date) VALUES (?, 'Leak', ?, '2020-01-01')",
+                         ((i % (leases // units) + 1, ('Open', 'Completed')[i % 2]) for i in range(5000)))
+        conn.commit()
+    conn.close()
+
+
+def dashboard_per_card(conn):
+    """The previous implementation: one query per card plus the activity lists"""
+    cursor = conn.cursor()
+    for sql in ("SELECT COUNT(*) FROM properties",
+                "SELECT COUNT(*) FROM properties WHERE status = 'Occupied'",
+                "SELECT COUNT(*) FROM tenants",
+                "SELECT COUNT(*) FROM maintenance_requests WHERE status = 'Open'",
+                "SELECT SUM(amount_paid) FROM rent_payments WHERE status = 'Paid'",
+                "SELECT SUM(amount) FROM expenses",
+                "SELECT COUNT(*) FROM rent_payments WHERE status = 'Overdue'"):
+        cursor.execute(sql).fetchone()
+    cursor.execute("""
+        SELECT t.name, rp.amount_paid, rp.payment_date, rp.status
+        FROM rent_payments rp JOIN tenants t ON rp.tenant_id = t.id
+        ORDER BY rp.payment_date DESC LIMIT 5
+    """).fetchall()
+    cursor.execute("""
+        SELECT mr.description, mr.status, mr.request_date
+        FROM maintenance_requests mr ORDER BY mr.request_date DESC LIMIT 5
+    """).fetchall()
+
+
+def dashboard_summary(conn):
+    reports.dashboard_summary(conn)
+    reports.recent_activity(conn)
+
+
+def best_of(repeat, func):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--payments', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, "dashboard.db")
+    try:
+        build_database(path, args.payments)
+        results = {}
+
+        with sqlite3.connect(path) as conn:
+            for index in SUMMARY_INDEXES:
+                conn.execute(f"DROP INDEX {index}")
+            results["per-card (old indexes)"] = best_of(args.repeat, lambda: dashboard_per_card(conn))
+            conn.executescript(dict((version, sql) for version, description, sql in db.MIGRATIONS)[5])
+            results["per-card"] = best_of(args.repeat, lambda: dashboard_per_card(conn))
+            results["summary query"] = best_of(args.repeat, lambda: dashboard_summary(conn))
+        conn.close()
+
+        reports.clear_dashboard_cache()
+        results["summary (first load)"] = best_of(1, lambda: reports.dashboard_data(path))
+        results["summary (cached)"] = best_of(args.repeat, lambda: reports.dashboard_data(path))
+        with db.write_connection(path) as conn:
+            conn.execute("UPDATE expenses SET amount = amount WHERE id = 1")
+        results["summary (after write)"] = best_of(1, lambda: reports.dashboard_data(path))
+
+        print(f"payments={args.payments}")
+        for name, elapsed in results.items():
+            print(f"{name:24s}: {elapsed * 1000:9.2f} ms")
+        print(f"speedup: {results['per-card (old indexes)'] / results['summary query']:.1f}x uncached")
+    finally:
+        db.close_all()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
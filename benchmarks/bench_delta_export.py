@@ -0,0 +1,64 @@
+"""Compare a full CSV export with a delta export after a day's worth of changes.
+
+Usage:
+    python benchmarks/bench_delta_export.py [--payments 500000] [--changes 300]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+import exporter
+from bench_dashboard import build_database
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--payments', type=int, default=500000)
+    parser.add_argument('--changes', type=int, default=300)
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, "delta.db")
+    try:
+        build_database(path, args.payments)
+        out = os.path.join(temp_dir, "out")
+        os.mkdir(out)
+
+        # The first delta run establishes the watermark
+        exporter.export_changes(path, out)
+        time.sleep(0.01)
+        with db.write_connection(path) as conn:
+            conn.execute("UPDATE rent_payments SET amount_paid = amount_due, status = 'Paid' "
+                         "WHERE id IN (SELECT id FROM rent_payments WHERE status = 'Pending' LIMIT ?)",
+                         (args.changes // 2,))
+            conn.execute("DELETE FROM expenses WHERE id IN (SELECT id FROM expenses LIMIT ?)",
+                         (args.changes - args.changes // 2,))
+
+        full, full_time = timed(exporter.export_all, path, out, workers=1)
+        delta, delta_time = timed(exporter.export_changes, path, out)
+        full_rows = sum(result['rows'] for result in full.values())
+        delta_rows = sum(result['rows'] for result in delta['tables'].values())
+
+        print(f"payments={args.payments} changes={args.changes}")
+        print(f"full export : {full_rows:8d} rows in {full_time * 1000:9.1f} ms")
+        print(f"delta export: {delta_rows:8d} rows + {delta['deleted']} deletions in {delta_time * 1000:9.1f} ms")
+        print(f"speedup: {full_time / delta_time:.0f}x")
+    finally:
+        db.close_all()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
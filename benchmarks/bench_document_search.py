@@ -0,0 +1,87 @@
+"""Time ranked document searches against a LIKE scan of the same rows.
+
+Usage:
+    python benchmarks/bench_document_search.py [--documents 100000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+import document_search
+
+WORDS = ("roof", "boiler", "invoice", "lease", "gutter", "repair", "quote", "receipt", "plumbing", "window",
+         "inspection", "deposit", "agreement", "council", "insurance", "electrical", "paint", "carpet")
+QUERIES = ("roof", "roof inv", "2023 roof invoice", "boil", "insurance 2019", "zzz")
+# Filler vocabulary; about one file in ten mentions one of the named words
+FILLER = [f"w{i}" for i in range(20000)]
+
+
+def paragraph(rng, words=200):
+    return ' '.join(rng.choice(WORDS) if rng.random() < 0.0005 else rng.choice(FILLER) for _ in range(words))
+
+
+def build_database(path, documents):
+    """A migrated database with `documents` documents and a paragraph of text per stored file"""
+    schema = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), db.SCHEMA_FILE)
+    rng = random.Random(1)
+    with sqlite3.connect(path) as conn:
+        with open(schema, 'r') as f:
+            conn.executescript(f.read())
+        db.migrate(conn)
+        conn.executemany("INSERT INTO document_blobs (hash, file_path, size) VALUES (?, ?, 1)",
+                         ((f"{i:064x}", f"documents/{i}") for i in range(documents)))
+        conn.executemany("INSERT INTO document_text (hash, text) VALUES (?, ?)",
+                         ((f"{i:064x}", paragraph(rng) + f" {2000 + i % 25}")
+                          for i in range(documents)))
+        conn.executemany("""
+            INSERT INTO documents (related_type, related_id, file_path, file_name, description, content_hash)
+            VALUES ('Expense', ?, ?, ?, ?, ?)
+        """, ((i, f"documents/{i}", f"{rng.choice(WORDS)}_{2000 + i % 25}.pdf",
+               f"{rng.choice(WORDS)} {rng.choice(WORDS)}", f"{i:064x}") for i in range(documents)))
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--documents', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, "search.db")
+    try:
+        build_database(path, args.documents)
+        print(f"documents={args.documents}")
+        with sqlite3.connect(path) as conn:
+            for query in QUERIES:
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    results = document_search.search(conn, query, limit=200)
+                ranked = (time.perf_counter() - start) / args.repeat
+
+                # The same first page without the index: scan every row, newest first
+                pattern = f"%{query.split()[0]}%"
+                start = time.perf_counter()
+                conn.execute("""
+                    SELECT d.id FROM documents d LEFT JOIN document_text t ON t.hash = d.content_hash
+                    WHERE d.file_name LIKE ? OR d.description LIKE ? OR t.text LIKE ?
+                    ORDER BY d.uploaded_at DESC, d.id DESC LIMIT 200
+                """, (pattern, pattern, pattern)).fetchall()
+                scan = time.perf_counter() - start
+                print(f"{query!r:22s}: ranked {ranked * 1000:7.2f} ms ({len(results):3d} rows), "
+                      f"LIKE scan {scan * 1000:8.2f} ms")
+        conn.close()
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
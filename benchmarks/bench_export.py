@@ -0,0 +1,81 @@
+"""Compare the fetchall, streaming and parallel CSV exports.
+
+Usage:
+    python benchmarks/bench_export.py [--payments 200000]
+"""
+import argparse
+import csv
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+import exporter
+from bench_dashboard import build_database
+
+
+def export_fetchall(db_file, export_dir):
+    """The previous implementation: fetchall() each table, then write it"""
+    with sqlite3.connect(db_file) as conn:
+        cursor = conn.cursor()
+        for table in exporter.EXPORT_TABLES:
+            cursor.execute(f"SELECT * FROM {table}")
+            rows = cursor.fetchall()
+            columns = [column[0] for column in cursor.description]
+            with open(os.path.join(export_dir, f"{table}.csv"), 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                writer.writerows(rows)
+    conn.close()
+
+
+def measure(func, db_file, export_dir):
+    """Return (seconds, peak bytes); timed without tracemalloc, which slows Python down"""
+    start = time.perf_counter()
+    func(db_file, export_dir)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(db_file, export_dir)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--payments', type=int, default=200000)
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, "export.db")
+    try:
+        build_database(path, args.payments)
+        print(f"payments={args.payments} cpus={os.cpu_count()}")
+        exports = (
+            ("fetchall", export_fetchall),
+            ("streaming", lambda db_file, out: exporter.export_all(db_file, out, workers=1)),
+            ("parallel", lambda db_file, out: exporter.export_all(db_file, out, workers=4)),
+        )
+        for name, func in exports:
+            out = os.path.join(temp_dir, name)
+            os.mkdir(out)
+            elapsed, peak = measure(func, path, out)
+            print(f"{name:10s}: {elapsed * 1000:9.1f} ms, peak {peak / 1024 / 1024:8.1f} MiB")
+
+        out = os.path.join(temp_dir, "summary")
+        os.mkdir(out)
+        print(exporter.format_summary(exporter.export_all(path, out)))
+    finally:
+        db.close_all()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Compare per-lease and set-based monthly rent generation.
+
+Usage:
+    python benchmarks/bench_generate_rent.py [--leases 50000]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import billing
+import db
+
+
+def build_database(path, leases):
+    """Create a migrated database with `leases` active leases"""
+    schema = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), db.SCHEMA_FILE)
+    with sqlite3.connect(path) as conn:
+        with open(schema, 'r') as f:
+            conn.executescript(f.read())
+        db.migrate(conn)
+        conn.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('Bench', '1 Bench St', 1000)")
+        conn.executemany("INSERT INTO tenants (name, property_id) VALUES (?, 1)",
+                         ((f"Tenant {i}",) for i in range(leases)))
+        conn.executemany(
+            "INSERT INTO leases (tenant_id, property_id, start_date, rent_amount, status) "
+            "VALUES (?, 1, '2020-01-01', ?, 'Active')",
+            ((i + 1, 1000 + i % 500) for i in range(leases)))
+        conn.commit()
+    conn.close()
+
+
+def generate_per_lease(conn, today):
+    """The previous implementation: SELECT then INSERT for each lease"""
+    cursor = conn.cursor()
+    month = today.strftime("%Y-%m")
+    due_date = billing.next_month_start(today).isoformat()
+    cursor.execute("""
+        SELECT id, tenant_id, property_id, rent_amount FROM leases
+        WHERE status = 'Active' AND start_date <= ?
+    """, (today.isoformat(),))
+    count = 0
+    for lease_id, tenant_id, property_id, rent_amount in cursor.fetchall():
+        cursor.execute("SELECT id FROM rent_payments WHERE lease_id = ? AND month = ?", (lease_id, month))
+        if not cursor.fetchone():
+            cursor.execute("""
+                INSERT INTO rent_payments
+                (lease_id, tenant_id, property_id, month, due_date, amount_due, status)
+                VALUES (?, ?, ?, ?, ?, ?, 'Pending')
+            """, (lease_id, tenant_id, property_id, month, due_date, rent_amount))
+            count += 1
+    return count
+
+
+def timed(path, func, today):
+    with sqlite3.connect(path) as conn:
+        start = time.perf_counter()
+        count = func(conn, today)
+        conn.commit()
+        elapsed = time.perf_counter() - start
+    conn.close()
+    return count, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--leases', type=int, default=50000)
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        results = {}
+        for name, func, month in (("per-lease", generate_per_lease, date(2024, 1, 15)),
+                                  ("set-based", billing.generate_monthly_rent, date(2024, 1, 15))):
+            path = os.path.join(temp_dir, f"{name}.db")
+            build_database(path, args.leases)
+            results[name] = timed(path, func, month)
+            # A second run for the same month should find nothing to do
+            results[f"{name} (rerun)"] = timed(path, func, month)
+
+        print(f"leases={args.leases}")
+        for name, (count, elapsed) in results.items():
+            print(f"{name:20s}: {count:6d} rows in {elapsed * 1000:9.1f} ms")
+        print(f"speedup: {results['per-lease'][1] / results['set-based'][1]:.1f}x")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Time the bulk CSV import of a generated portfolio.
+
+Usage:
+    python benchmarks/bench_import.py [--payments 1000000] [--leases 10000]
+"""
+import argparse
+import csv
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+import importer
+
+
+def write_portfolio(directory, leases, payments):
+    """Write properties/tenants/leases/rent_payments CSVs; ten units per property"""
+    def write(table, header, rows):
+        with open(os.path.join(directory, f"{table}.csv"), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+    properties = leases // 10
+    write('properties', ['name', 'address', 'type', 'rent_amount', 'status'],
+          ((f"Block {i}", f"{i} Bench Road", 'Apartment', 1000, 'Occupied') for i in range(properties)))
+    write('tenants', ['name', 'national_id', 'property'],
+          ((f"Tenant {i}", f"ID{i:07d}", f"Block {i // 10}") for i in range(leases)))
+    write('leases', ['national_id', 'property', 'start_date', 'rent_amount'],
+          ((f"ID{i:07d}", f"Block {i // 10}", '2000-01-01', 1000) for i in range(leases)))
+
+    def payment_rows():
+        for i in range(payments):
+            lease = i % leases
+            month_index = i // leases
+            year, month = 2000 + month_index // 12, month_index % 12 + 1
+            paid = i % 5 < 3
+            yield (f"ID{lease:07d}", f"Block {lease // 10}", f"{year:04d}-{month:02d}", f"{year:04d}-{month:02d}-01",
+                   1000, 1000 if paid else '', 'Paid' if paid else 'Pending',
+                   f"{year:04d}-{month:02d}-05" if paid else '', 'Cash' if paid else '')
+
+    write('rent_payments', ['national_id', 'property', 'month', 'due_date', 'amount_due', 'amount_paid', 'status',
+                            'payment_date', 'payment_method'], payment_rows())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--payments', type=int, default=1000000)
+    parser.add_argument('--leases', type=int, default=10000)
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, "import.db")
+    try:
+        write_portfolio(temp_dir, args.leases, args.payments)
+        schema = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), db.SCHEMA_FILE)
+        with sqlite3.connect(path) as conn:
+            with open(schema, 'r') as f:
+                conn.executescript(f.read())
+            db.migrate(conn)
+        conn.close()
+
+        start = time.perf_counter()
+        results = importer.import_files(path, importer.find_import_files(temp_dir))
+        elapsed = time.perf_counter() - start
+
+        print(f"payments={args.payments} leases={args.leases}")
+        for table, result in results.items():
+            seconds = result['duration_ms'] / 1000
+            print(f"{table:14s}: {result['inserted']:9,} rows in {seconds:6.2f}s "
+                  f"({result['inserted'] / seconds:,.0f} rows/s), {result['rejected']} rejected")
+        print(f"total: {elapsed:.2f}s")
+    finally:
+        db.close_all()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compare the financial reports on raw tables with the rollup-based reports.
+
+Usage:
+    python benchmarks/bench_rollups.py [--payments 1000000] [--repeat 3]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reports
+import rollups
+from bench_dashboard import build_database, best_of
+
+# The aggregate queries the reports ran before the rollup tables existed
+RAW_QUERIES = {
+    'rent_income_report': [
+        """SELECT month, SUM(amount_paid), COUNT(*) FROM rent_payments
+           WHERE status = 'Paid' AND payment_date >= date('now', '-12 months')
+           GROUP BY month ORDER BY month DESC""",
+        "SELECT status, SUM(amount_paid), COUNT(*) FROM rent_payments GROUP BY status",
+    ],
+    'expense_analysis_report': [
+        "SELECT category, SUM(amount) as total, COUNT(*) FROM expenses GROUP BY category ORDER BY total DESC",
+        """SELECT COALESCE(p.name, 'Property #' || p.id) as property_name, SUM(e.amount) as total, COUNT(*)
+           FROM expenses e JOIN properties p ON e.property_id = p.id
+           GROUP BY e.property_id, property_name ORDER BY total DESC""",
+        """SELECT strftime('%Y-%m', date) as month, SUM(amount) FROM expenses
+           WHERE date >= date('now', '-12 months') GROUP BY month ORDER BY month DESC""",
+    ],
+    'financial_summary_report': [
+        "SELECT SUM(amount_paid) FROM rent_payments WHERE status = 'Paid'",
+        "SELECT SUM(amount) FROM expenses",
+        "SELECT SUM(amount_due - amount_paid) FROM rent_payments WHERE amount_due > amount_paid",
+        """SELECT strftime('%Y-%m', payment_date) as month, SUM(amount_paid) FROM rent_payments
+           WHERE status = 'Paid' AND strftime('%Y', payment_date) = strftime('%Y', 'now')
+           GROUP BY month ORDER BY month""",
+        """SELECT strftime('%Y-%m', date) as month, SUM(amount) FROM expenses
+           WHERE strftime('%Y', date) = strftime('%Y', 'now') GROUP BY month ORDER BY month""",
+    ],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--payments', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, "rollups.db")
+    try:
+        build_database(path, args.payments)
+        with sqlite3.connect(path) as conn:
+            rent_rows = conn.execute("SELECT COUNT(*) FROM rent_rollup").fetchone()[0]
+            print(f"payments={args.payments} rent_rollup rows={rent_rows}")
+
+            for name, queries in RAW_QUERIES.items():
+                raw = best_of(args.repeat, lambda: [conn.execute(sql).fetchall() for sql in queries])
+                rolled = best_of(args.repeat, lambda: getattr(reports, name)(conn))
+                print(f"{name:26s}: raw {raw * 1000:8.1f} ms  rollup {rolled * 1000:8.1f} ms  "
+                      f"({raw / rolled:.1f}x)")
+
+            start = time.perf_counter()
+            rollups.rebuild(conn)
+            print(f"{'rebuild':26s}: {(time.perf_counter() - start) * 1000:8.1f} ms")
+            start = time.perf_counter()
+            assert rollups.check(conn) == []
+            print(f"{'check':26s}: {(time.perf_counter() - start) * 1000:8.1f} ms")
+        conn.close()
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""Build a synthetic portfolio database for benchmarks.
+
+Usage:
+    python benchmarks/dataset.py PATH [--scale 10k | --properties N] [--years 3] [--seed 1]
+
+The same seed, scale and --as-of date always produce the same rows.  Each
+property gets a run of leases (a new tenant each), monthly rent rows for
+every month leased up to the end of last month, and a scattering of
+expenses and maintenance requests.  Most leases and invoiced expenses get
+a document row (with no file behind it) for the document list and search.
+This month's rent is left for billing.generate_monthly_rent to create, so
+that can be benchmarked too.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+from billing import month_end, next_month_start
+from services import ExpenseRepo, LeaseRepo, MaintenanceRepo, PaymentRepo, PropertyRepo, TenantRepo
+
+# Named scales, in properties
+SCALES = {'1k': 1000, '10k': 10000, '100k': 100000}
+DEFAULT_YEARS = 3
+DEFAULT_SEED = 1
+# Properties generated, inserted and committed together
+CHUNK = 1000
+
+FIRST_NAMES = ("Ahmed Ali Ayesha Bilal Fatima Hamza Hassan Hina Imran Iqra Kamran Maryam Noor Omar "
+               "Saad Sana Sara Tariq Usman Zainab Zara Faisal Nadia Rabia Waqas Asma Junaid Mehwish").split()
+LAST_NAMES = ("Khan Ahmed Malik Butt Chaudhry Qureshi Sheikh Siddiqui Raza Hussain Shah Mirza Javed "
+              "Iqbal Aslam Anwar Baig Abbasi Hashmi Rana").split()
+PLACES = ("Gulberg Johar Model Canal Garden Faisal Clifton Shadman Iqbal Cantt Bahria Askari "
+          "Township Wapda Valencia Defence Samanabad Muslim Jinnah Liberty").split()
+BUILDINGS = "Residency Heights Villa Towers Apartments Plaza Court House Arcade Lodge".split()
+STREETS = ("Canal Road", "Mall Road", "Jail Road", "Main Boulevard", "Ferozepur Road", "Khayaban-e-Iqbal",
+           "Shahrah-e-Faisal", "University Road", "Club Road", "Circular Road", "College Road", "Park Lane")
+CITIES = ("Lahore", "Karachi", "Islamabad", "Rawalpindi", "Faisalabad", "Multan", "Peshawar")
+TYPES = ('Apartment', 'Apartment', 'Apartment', 'House', 'House', 'Shop', 'Office', 'Other')
+NATIONAL_ID_PREFIXES = ('35202', '42101', '61101', '37405', '33100', '36302')
+LEASE_MONTHS = (6, 12, 12, 12, 12, 24)
+METHODS = ('Cash', 'Bank Transfer', 'Bank Transfer', 'Cheque', 'Online', 'Online')
+# category: (descriptions, smallest and largest amount in rupees)
+EXPENSES = {
+    'Maintenance': (("Plumbing service", "Electrical inspection", "Generator service", "Pest control",
+                     "Water tank cleaning"), 1500, 25000),
+    'Utility': (("Electricity bill", "Gas bill", "Water bill", "Internet bill"), 800, 15000),
+    'Repair': (("Roof leak repair", "Door lock replacement", "Window glass", "Wall painting",
+                "Kitchen cabinet repair"), 2000, 120000),
+    'Tax': (("Property tax", "Withholding tax", "Municipal fee"), 5000, 90000),
+    'Other': (("Legal fees", "Cleaning", "Security guard", "Advertising"), 1000, 30000),
+}
+REQUESTS = ("Leaking tap in kitchen", "Air conditioner not cooling", "Blocked drain", "Broken window latch",
+            "Geyser not heating", "Ceiling fan noise", "Power socket sparking", "Damp patch on wall",
+            "Main gate stuck", "Water pressure low")
+
+
+def month_start(as_of, offset):
+    """The first day of the month `offset` months from the one holding `as_of`"""
+    index = as_of.year * 12 + as_of.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def day_in(rng, month, as_of):
+    """A random day of `month`, no later than `as_of`"""
+    day = month + timedelta(days=rng.randrange(28))
+    return min(day, as_of)
+
+
+def rupees(rng, low, high, step=100):
+    """A random amount between `low` and `high` rupees, in paisa"""
+    return rng.randrange(low // step, high // step + 1) * step * 100
+
+
+class Builder:
+    """Generates rows property by property; ids are counted here, as a new table numbers rows from 1"""
+
+    def __init__(self, rng, years, as_of):
+        self.rng = rng
+        self.months = years * 12
+        self.as_of = as_of
+        self.next_id = {'properties': 1, 'tenants': 1, 'leases': 1, 'expenses': 1}
+        self.rows = {table: [] for table in ('properties', 'tenants', 'leases', 'rent_payments',
+                                              'expenses', 'maintenance_requests', 'documents')}
+
+    def take_id(self, table):
+        self.next_id[table] += 1
+        return self.next_id[table] - 1
+
+    def add_property(self):
+        rng = self.rng
+        property_id = self.take_id('properties')
+        kind = rng.choice(TYPES)
+        rent = rupees(rng, 15000, 250000) if kind != 'Shop' else rupees(rng, 30000, 400000)
+        leases = self.add_leases(property_id, rent)
+        occupied = any(status == 'Active' for (lease_id, tenant_id, status, start, end) in leases)
+        self.rows['properties'].append({
+            # About one in ten is known by its address alone
+            'name': f"{rng.choice(PLACES)} {rng.choice(BUILDINGS)} {rng.randrange(1, 100)}"
+                    if rng.random() < 0.9 else None,
+            'address': f"{rng.randrange(1, 500)} {rng.choice(STREETS)}, {rng.choice(CITIES)}",
+            'type': kind,
+            'size': float(rng.randrange(400, 4000, 50)),
+            'bedrooms': rng.randrange(1, 6) if kind in ('Apartment', 'House') else None,
+            'bathrooms': rng.randrange(1, 4),
+            'rent_amount': rent,
+            'deposit_amount': rent * 2,
+            'status': 'Occupied' if occupied else rng.choice(('Vacant', 'Vacant', 'Under Maintenance')),
+            'furnished': int(rng.random() < 0.3),
+        })
+        self.add_expenses(property_id)
+        self.add_requests(property_id, leases)
+
+    def add_leases(self, property_id, rent):
+        """Back-to-back leases from the start of the history; returns (id, tenant, status, start, end) each"""
+        rng = self.rng
+        leases = []
+        start = -self.months + rng.randrange(6)
+        while start <= 0:
+            end = start + rng.choice(LEASE_MONTHS) - 1
+            status = 'Active' if end >= 0 else 'Expired'
+            if rng.random() < 0.08 and end > start:
+                # Left early
+                end = rng.randrange(start, end)
+                status = 'Terminated'
+                if end >= 0:
+                    end = -1
+            if end < start:
+                break
+            lease_id = self.take_id('leases')
+            tenant_id = self.add_tenant(property_id)
+            self.rows['leases'].append({
+                'tenant_id': tenant_id,
+                'property_id': property_id,
+                'start_date': month_start(self.as_of, start).isoformat(),
+                'end_date': month_end(month_start(self.as_of, end)).isoformat(),
+                'rent_amount': rent,
+                'deposit_amount': rent * 2,
+                'status': status,
+            })
+            self.add_payments(lease_id, tenant_id, property_id, rent, start, min(end, -1))
+            leases.append((lease_id, tenant_id, status, start, end))
+            if rng.random() < 0.7:
+                self.add_document('Lease', lease_id, f"lease_agreement_{lease_id}.pdf", "Signed lease agreement",
+                                  month_start(self.as_of, start))
+
+            rent = rent * rng.randrange(100, 111) // 100 // 10000 * 10000
+            start = end + 1 + rng.choice((0, 0, 0, 1, 2, 3))
+        return leases
+
+    def add_tenant(self, property_id):
+        rng = self.rng
+        tenant_id = self.take_id('tenants')
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        self.rows['tenants'].append({
+            'name': f"{first} {last}",
+            'property_id': property_id,
+            'phone': f"03{rng.randrange(50):02d}-{rng.randrange(10 ** 7):07d}",
+            'email': f"{first.lower()}.{last.lower()}{tenant_id}@example.com" if rng.random() < 0.7 else None,
+            'national_id': f"{rng.choice(NATIONAL_ID_PREFIXES)}-{tenant_id:07d}-{rng.randrange(10)}",
+            'emergency_contact': f"{rng.choice(FIRST_NAMES)} {last} - 03{rng.randrange(50):02d}-"
+                                 f"{rng.randrange(10 ** 7):07d}",
+            'notes': None,
+        })
+        return tenant_id
+
+    def add_payments(self, lease_id, tenant_id, property_id, rent, first, last):
+        rng = self.rng
+        for offset in range(first, last + 1):
+            month = month_start(self.as_of, offset)
+            due = next_month_start(month)
+            roll = rng.random()
+            # Recent months are still being collected
+            paid_share = 0.92 if offset < -2 else 0.6
+            if roll < paid_share:
+                status, paid = 'Paid', rent
+            elif roll < paid_share + 0.03:
+                status, paid = 'Partial', rent // 2
+            elif offset < -2 or roll > 0.9:
+                status, paid = 'Overdue', 0
+            else:
+                status, paid = 'Pending', 0
+            payment_date = min(due + timedelta(days=rng.randrange(-7, 10)), self.as_of) if paid else None
+            self.rows['rent_payments'].append({
+                'lease_id': lease_id,
+                'tenant_id': tenant_id,
+                'property_id': property_id,
+                'month': month.strftime("%Y-%m"),
+                'due_date': due.isoformat(),
+                'amount_due': rent,
+                'amount_paid': paid,
+                'payment_date': payment_date.isoformat() if payment_date else None,
+                'payment_method': rng.choice(METHODS) if paid else None,
+                'status': status,
+                'notes': None,
+            })
+
+    def add_expenses(self, property_id):
+        rng = self.rng
+        for offset in range(-self.months, 1):
+            if rng.random() >= 0.35:
+                continue
+            expense_id = self.take_id('expenses')
+            category = rng.choice(tuple(EXPENSES))
+            descriptions, low, high = EXPENSES[category]
+            description = rng.choice(descriptions)
+            day = day_in(rng, month_start(self.as_of, offset), self.as_of)
+            invoice = f"INV-{rng.randrange(10 ** 7):07d}" if rng.random() < 0.6 else None
+            self.rows['expenses'].append({
+                'property_id': property_id,
+                'description': description,
+                'category': category,
+                'amount': rupees(rng, low, high, step=50),
+                'date': day.isoformat(),
+                'paid_by': 'Landlord' if rng.random() < 0.9 else 'Tenant',
+                'invoice_number': invoice,
+                'notes': None,
+            })
+            if invoice and rng.random() < 0.5:
+                self.add_document('Expense', expense_id, f"{invoice}.pdf", f"Invoice for {description.lower()}", day)
+
+    def add_requests(self, property_id, leases):
+        rng = self.rng
+        for offset in range(-self.months, 1):
+            if rng.random() >= 0.08:
+                continue
+            requested = day_in(rng, month_start(self.as_of, offset), self.as_of)
+            tenant_id = next((tenant for (lease, tenant, status, start, end) in leases if start <= offset <= end),
+                             None)
+            estimate = rupees(rng, 1000, 60000)
+            status = rng.choice(('Completed',) * 6 + ('Cancelled',)) if offset < -2 else \
+                rng.choice(('Open', 'Open', 'In Progress', 'Completed'))
+            completed = min(requested + timedelta(days=rng.randrange(1, 21)), self.as_of) \
+                if status == 'Completed' else None
+            self.rows['maintenance_requests'].append({
+                'property_id': property_id,
+                'tenant_id': tenant_id,
+                'request_date': requested.isoformat(),
+                'description': rng.choice(REQUESTS),
+                'status': status,
+                'cost_estimate': estimate,
+                'actual_cost': estimate * rng.randrange(70, 131) // 100 // 100 * 100 if completed else None,
+                'completed_date': completed.isoformat() if completed else None,
+                'notes': None,
+            })
+
+    def add_document(self, related_type, related_id, file_name, description, day):
+        rng = self.rng
+        self.rows['documents'].append({
+            'related_type': related_type,
+            'related_id': related_id,
+            'file_path': f"documents/{file_name}",
+            'file_name': file_name,
+            'description': description,
+            'uploaded_at': f"{day.isoformat()} {rng.randrange(9, 18):02d}:{rng.randrange(60):02d}:00",
+        })
+
+    def flush(self, conn):
+        """Insert the rows generated so far, parents first; returns the count per table"""
+        counts = {}
+        for repo in (PropertyRepo, TenantRepo, LeaseRepo, PaymentRepo, ExpenseRepo, MaintenanceRepo):
+            repo = repo(conn)
+            counts[repo.table] = repo.add_many(self.rows[repo.table])
+            self.rows[repo.table] = []
+        # Documents have no repository (document_store.add_document also stores a file)
+        conn.executemany("""
+            INSERT INTO documents (related_type, related_id, file_path, file_name, description, uploaded_at)
+            VALUES (:related_type, :related_id, :file_path, :file_name, :description, :uploaded_at)
+        """, self.rows['documents'])
+        counts['documents'] = len(self.rows['documents'])
+        self.rows['documents'] = []
+        return counts
+
+
+def build(path, properties, years=DEFAULT_YEARS, seed=DEFAULT_SEED, as_of=None):
+    """Create a migrated database at `path` holding `properties` properties.
+
+    Returns the number of rows added to each table.
+    """
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} already exists")
+    as_of = as_of or date.today()
+    schema = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), db.SCHEMA_FILE)
+    builder = Builder(random.Random(seed), years, as_of)
+    counts = {}
+
+    conn = sqlite3.connect(path)
+    try:
+        with open(schema, 'r') as f:
+            conn.executescript(f.read())
+        db.migrate(conn)
+        # The file is deleted if the build fails, so it needs no journal or fsyncs
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute(f"PRAGMA cache_size = {db.CONNECTION_PRAGMAS['cache_size']}")
+        for first in range(0, properties, CHUNK):
+            for _ in range(min(CHUNK, properties - first)):
+                builder.add_property()
+            for table, rows in builder.flush(conn).items():
+                counts[table] = counts.get(table, 0) + rows
+            conn.commit()
+    except BaseException:
+        conn.close()
+        os.remove(path)
+        raise
+    conn.close()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path')
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument('--scale', choices=SCALES, default='1k')
+    size.add_argument('--properties', type=int)
+    parser.add_argument('--years', type=int, default=DEFAULT_YEARS, help="months of history, in years")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--as-of', type=date.fromisoformat, default=None,
+                        help="YYYY-MM-DD the history ends on (default: today)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    counts = build(args.path, args.properties or SCALES[args.scale], args.years, args.seed, args.as_of)
+    elapsed = time.perf_counter() - start
+    for table, rows in counts.items():
+        print(f"{table:22s}: {rows:10,d}")
+    print(f"built {args.path} in {elapsed:.1f} s ({os.path.getsize(args.path):,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""Time the list screens, reports, rent generation and export on a synthetic portfolio.
+
+Usage:
+    python benchmarks/suite.py [--scale 1k | --properties N | --db FILE] [--repeat 5] [-o results.json]
+
+Without --db a database is built with dataset.py and removed afterwards;
+build one once (python benchmarks/dataset.py big.db --scale 100k) to reuse
+it across runs.  The database itself is never changed: rent generation runs
+on copies.  Results go to standard output (or -o) as JSON, one entry per
+case keyed by a stable name, so runs can be compared over time.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import billing
+import db
+import document_search
+import exporter
+import reports
+from benchmarks import dataset
+from landlord.__main__ import _slug
+from listings import (document_pager, expense_pager, lease_pager, maintenance_pager, payment_pager,
+                      property_pager, tenant_pager)
+from services import LeaseRepo, PropertyRepo, TenantRepo
+
+TABLES = ('properties', 'tenants', 'leases', 'rent_payments', 'expenses', 'maintenance_requests', 'documents')
+
+
+def measure(repeat, func, setup=None):
+    """Run `func` `repeat` times; returns its last result and each run's seconds.
+
+    `setup`, if given, runs untimed before each call and its result is
+    passed to `func`.
+    """
+    times = []
+    for _ in range(repeat):
+        args = (setup(),) if setup else ()
+        start = time.perf_counter()
+        result = func(*args)
+        times.append(time.perf_counter() - start)
+    return result, times
+
+
+def summary(times, rows=None):
+    entry = {'best_ms': round(min(times) * 1000, 3),
+             'median_ms': round(statistics.median(times) * 1000, 3),
+             'runs': len(times)}
+    if rows is not None:
+        entry['rows'] = rows
+    return entry
+
+
+def list_cases(conn):
+    """(name, pager) for each manager's list as first shown and with each filter set.
+
+    The property filters pick a named property and an unnamed one from the
+    middle of the combobox, as a user would.
+    """
+    labels = PropertyRepo(conn).labels()
+    named = next((label for label in labels[len(labels) // 2:] if not label.startswith('Property #')),
+                 'All Properties')
+    unnamed = next((label for label in labels if label.startswith('Property #')), named)
+    property_id = PropertyRepo(conn).id_for_label(named)
+    return [
+        ('properties', property_pager()),
+        ('properties.status', property_pager('Occupied')),
+        ('tenants', tenant_pager()),
+        ('tenants.property', tenant_pager(property_id)),
+        ('leases', lease_pager()),
+        ('leases.status', lease_pager('Expired')),
+        ('payments', payment_pager()),
+        ('payments.status', payment_pager('Overdue')),
+        ('expenses', expense_pager()),
+        ('expenses.property', expense_pager(named)),
+        ('expenses.unnamed_property', expense_pager(unnamed)),
+        ('expenses.category', expense_pager(category='Tax')),
+        ('expenses.property_category', expense_pager(named, 'Repair')),
+        ('maintenance', maintenance_pager()),
+        ('maintenance.property', maintenance_pager(named)),
+        ('maintenance.status', maintenance_pager(status='Open')),
+        ('maintenance.property_status', maintenance_pager(named, 'Completed')),
+        ('documents', document_pager()),
+        ('documents.type', document_pager('Lease')),
+        ('documents.search', document_search.search_pager("lease agreement")),
+        ('documents.search_type', document_search.search_pager("invoice", 'Expense')),
+    ]
+
+
+def run_queries(db_file, repeat):
+    """Time each list's first page and next page, the combobox labels and every report"""
+    results = {}
+    with db.read_connection(db_file) as conn:
+        for name, pager in list_cases(conn):
+            rows, times = measure(repeat, lambda: pager.page(conn))
+            results[f'list.{name}'] = summary(times, len(rows))
+            if rows:
+                following, times = measure(repeat, lambda: pager.page(conn, after=rows[-1][1]))
+                results[f'list.{name}.next'] = summary(times, len(following))
+
+        for name, func in (('properties', PropertyRepo(conn).labels),
+                           ('tenants', TenantRepo(conn).labels),
+                           ('active_leases', LeaseRepo(conn).active_labels)):
+            labels, times = measure(repeat, func)
+            results[f'labels.{name}'] = summary(times, len(labels))
+
+        for title, builder in reports.REPORTS:
+            text, times = measure(repeat, lambda: builder(conn))
+            results[f'report.{_slug(title)}'] = summary(times, text.count('\n') + 1)
+    return results
+
+
+def billing_day(db_file):
+    """A day in the month after the latest rent row, which a generated dataset leaves unbilled"""
+    with db.read_connection(db_file) as conn:
+        month = conn.execute("SELECT MAX(month) FROM rent_payments").fetchone()[0]
+    if month is None:
+        return date.today()
+    return billing.next_month_start(date.fromisoformat(f"{month}-01"))
+
+
+def run_jobs(db_file, repeat, work_dir):
+    """Time generate_monthly_rent on copies of the database, then export_all in each format"""
+    results = {}
+    today = billing_day(db_file)
+    copy = os.path.join(work_dir, "billing.db")
+
+    def fresh_copy():
+        db.close_all()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(copy + suffix):
+                os.remove(copy + suffix)
+        exporter.snapshot(db_file, copy)
+        return copy
+
+    def generate(path):
+        with db.write_connection(path) as conn:
+            return billing.generate_monthly_rent(conn, today)
+
+    created, times = measure(repeat, generate, setup=fresh_copy)
+    results['billing.generate_monthly_rent'] = summary(times, created)
+    # Run again on the last copy: every lease is billed already
+    created, times = measure(repeat, lambda: generate(copy))
+    results['billing.generate_monthly_rent.rerun'] = summary(times, created)
+    db.close_all()
+
+    for fmt in exporter.EXPORT_FORMATS:
+        export_dir = os.path.join(work_dir, fmt)
+        os.makedirs(export_dir, exist_ok=True)
+        exported, times = measure(repeat, lambda: exporter.export_all(db_file, export_dir, fmt=fmt))
+        results[f'export.{fmt}'] = summary(times, sum(result['rows'] for result in exported.values()))
+    return results
+
+
+def row_counts(db_file):
+    with db.read_connection(db_file) as conn:
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in TABLES}
+
+
+def run(db_file, repeat, job_repeat, work_dir):
+    """Run every case against `db_file`; returns {name: timings}"""
+    results = run_queries(db_file, repeat)
+    results.update(run_jobs(db_file, job_repeat, work_dir))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--scale', choices=dataset.SCALES, default='1k')
+    source.add_argument('--properties', type=int)
+    source.add_argument('--db', help="benchmark this database instead of building one")
+    parser.add_argument('--years', type=int, default=dataset.DEFAULT_YEARS)
+    parser.add_argument('--seed', type=int, default=dataset.DEFAULT_SEED)
+    parser.add_argument('--repeat', type=int, default=5, help="runs of each query and report")
+    parser.add_argument('--job-repeat', type=int, default=1, help="runs of rent generation and each export")
+    parser.add_argument('-o', '--output', help="write the JSON here instead of standard output")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        build = None
+        db_file = args.db
+        if db_file is None:
+            db_file = os.path.join(work_dir, "landlord.db")
+            properties = args.properties or dataset.SCALES[args.scale]
+            start = time.perf_counter()
+            dataset.build(db_file, properties, args.years, args.seed)
+            build = {'properties': properties, 'years': args.years, 'seed': args.seed,
+                     'seconds': round(time.perf_counter() - start, 3)}
+        elif not os.path.exists(db_file):
+            parser.error(f"No database at {db_file}")
+
+        results = run(db_file, args.repeat, args.job_repeat, work_dir)
+        document = {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'database': args.db,
+            'build': build,
+            'rows': row_counts(db_file),
+            'results': results,
+        }
+    finally:
+        db.close_all()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    text = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    for name, entry in results.items():
+        print(f"{name:42s}: {entry['best_ms']:10.2f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
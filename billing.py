@@ -0,0 +1,203 @@
+import calendar
+import time
+from datetime import date
+from money import Money
+
+
+def next_month_start(day):
+    """Return the first day of the month after `day`"""
+    if day.month == 12:
+        return date(day.year + 1, 1, 1)
+    return date(day.year, day.month + 1, 1)
+
+
+def generate_monthly_rent(conn, today=None):
+    """Create this month's Pending rent row for every active lease.
+
+    All rows are produced by one INSERT ... SELECT; leases that already
+    have a row for the month are skipped via the (lease_id, month) index.
+    Returns the number of rows created.
+    """
+    today = today or date.today()
+    month = today.strftime("%Y-%m")
+    due_date = next_month_start(today).isoformat()
+
+    cursor = conn.execute("""
+        INSERT INTO rent_payments
+        (lease_id, tenant_id, property_id, month, due_date, amount_due, status)
+        SELECT l.id, l.tenant_id, l.property_id, ?, ?, l.rent_amount, 'Pending'
+        FROM leases l
+        WHERE l.status = 'Active' AND l.start_date <= ?
+          AND NOT EXISTS (
+              SELECT 1 FROM rent_payments p
+              WHERE p.lease_id = l.id AND p.month = ?
+          )
+    """, (month, due_date, today.isoformat(), month))
+    return cursor.rowcount
+
+
+def month_end(day):
+    """Return the last day of the month containing `day`"""
+    return date(day.year, day.month, calendar.monthrange(day.year, day.month)[1])
+
+
+def due_date_for(period_start, due_day=None):
+    """Return the due date for a billing month.
+
+    By default rent is due on the 1st of the following month.  With
+    `due_day`, it is due on that day of the billing month, clamped to the
+    month end (so 31 means "last day" in short months).
+    """
+    if due_day is None:
+        return next_month_start(period_start)
+    last_day = calendar.monthrange(period_start.year, period_start.month)[1]
+    return date(period_start.year, period_start.month, min(due_day, last_day))
+
+
+def billing_periods(start_date, end_date, horizon):
+    """Yield (period_start, period_end) for each calendar month a lease covers.
+
+    The first and last periods are cut to the lease dates.  The schedule
+    stops at the month containing `horizon` or the lease end, whichever is
+    earlier; the horizon month itself is billed in full.  A lease that
+    ends before it starts covers no periods.
+    """
+    last = min(end_date, horizon) if end_date else horizon
+    current = date(start_date.year, start_date.month, 1)
+    while current <= last:
+        period_start = max(current, start_date)
+        period_end = month_end(current)
+        if end_date and end_date < period_end:
+            period_end = end_date
+        if period_end >= period_start:
+            yield period_start, period_end
+        current = next_month_start(current)
+
+
+def prorated_amount(rent_amount, period_start, period_end):
+    """Return the rent in paisa for a period, prorated by days for partial months"""
+    days_in_month = calendar.monthrange(period_start.year, period_start.month)[1]
+    days = (period_end - period_start).days + 1
+    if days >= days_in_month:
+        return rent_amount
+    return Money(rent_amount).prorate(days, days_in_month).minor
+
+
+def parse_date(value):
+    """Parse a stored ISO date, returning None when it is empty or malformed"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def schedule_rent(conn, horizon=None, due_day=None, batch_size=5000):
+    """Materialise every missing rent row for active leases up to `horizon`.
+
+    Covers each calendar month from the lease start to the lease end or
+    the horizon (default: today), prorating partial first and last months.
+    Rows are inserted in batches, committing after each one, and existing
+    (lease_id, month) rows are left untouched.  Returns the number of rows
+    created.
+    """
+    horizon = horizon or date.today()
+    leases = conn.execute("""
+        SELECT id, tenant_id, property_id, start_date, end_date, rent_amount
+        FROM leases
+        WHERE status = 'Active' AND start_date <= ?
+    """, (horizon.isoformat(),)).fetchall()
+
+    insert_sql = """
+        INSERT INTO rent_payments
+        (lease_id, tenant_id, property_id, month, due_date, amount_due, status)
+        VALUES (?, ?, ?, ?, ?, ?, 'Pending')
+        ON CONFLICT(lease_id, month) DO NOTHING
+    """
+    created = 0
+    batch = []
+
+    def flush():
+        # rowcount skips conflicting rows and the rollup trigger writes
+        inserted = conn.executemany(insert_sql, batch).rowcount
+        conn.commit()
+        batch.clear()
+        return inserted
+
+    for lease_id, tenant_id, property_id, start_value, end_value, rent_amount in leases:
+        start_date = parse_date(start_value)
+        if start_date is None:
+            continue
+        end_date = parse_date(end_value)
+
+        for period_start, period_end in billing_periods(start_date, end_date, horizon):
+            batch.append((lease_id, tenant_id, property_id,
+                          period_start.strftime("%Y-%m"),
+                          due_date_for(period_start, due_day).isoformat(),
+                          prorated_amount(rent_amount, period_start, period_end)))
+            if len(batch) >= batch_size:
+                created += flush()
+
+    if batch:
+        created += flush()
+    return created
+
+
+OVERDUE_JOB = 'overdue_sweep'
+# How often the application re-runs the overdue sweep (milliseconds)
+SWEEP_INTERVAL_MS = 60 * 60 * 1000
+
+
+def sweep_overdue(conn, today=None, full=False):
+    """Mark Pending/Partial rent rows whose due date has passed as Overdue.
+
+    A single UPDATE walks the (status, due_date) index.  Unless `full` is
+    set, only rows that could have changed since the last run are looked
+    at: due dates from the previous cutoff onwards, rows inserted since
+    then (e.g. by a backfill) and rows edited since then (e.g. a payment
+    corrected back to Pending), found by their updated_at.  The run is
+    recorded in job_state and {'rows': ..., 'duration_ms': ...} is
+    returned.
+    """
+    today = (today or date.today()).isoformat()
+    start = time.perf_counter()
+
+    state = conn.execute("SELECT last_cutoff, last_max_id, last_run_at FROM job_state WHERE name = ?",
+                         (OVERDUE_JOB,)).fetchone()
+    if state is None or full:
+        last_cutoff, last_max_id, last_run_at = '', 0, ''
+    else:
+        last_cutoff, last_max_id, last_run_at = state[0] or '', state[1] or 0, state[2] or ''
+    max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM rent_payments").fetchone()[0]
+
+    # last_run_at has whole seconds and updated_at milliseconds, so rows
+    # changed in the same second as the last run are looked at again
+    cursor = conn.execute("""
+        UPDATE rent_payments SET status = 'Overdue'
+        WHERE status IN ('Pending', 'Partial') AND due_date < ?
+          AND (due_date >= ? OR id > ? OR updated_at >= ?)
+    """, (today, last_cutoff, last_max_id, last_run_at))
+    rows = cursor.rowcount
+
+    duration_ms = (time.perf_counter() - start) * 1000
+    conn.execute("""
+        INSERT INTO job_state (name, last_run_at, last_cutoff, last_max_id, last_rows, last_duration_ms)
+        VALUES (?, CURRENT_TIMESTAMP, ?, ?, ?, ?)
+        ON CONFLICT(name) DO UPDATE SET
+            last_run_at = excluded.last_run_at, last_cutoff = excluded.last_cutoff,
+            last_max_id = excluded.last_max_id, last_rows = excluded.last_rows,
+            last_duration_ms = excluded.last_duration_ms
+    """, (OVERDUE_JOB, today, max_id, rows, duration_ms))
+    conn.commit()
+    return {'rows': rows, 'duration_ms': duration_ms}
+
+
+def job_metrics(conn, name=OVERDUE_JOB):
+    """Return the last recorded run of a background job, or None"""
+    row = conn.execute("""
+        SELECT last_run_at, last_rows, last_duration_ms FROM job_state WHERE name = ?
+    """, (name,)).fetchone()
+    if row is None:
+        return None
+    return {'last_run_at': row[0], 'rows': row[1], 'duration_ms': row[2]}
@@ -0,0 +1,396 @@
+"""Typed, compressed columnar export of the main tables.
+
+Tables are written column by column in row groups, keeping each column's
+declared type: amounts (INTEGER paisa) come back as ints, REAL columns as
+floats and DATE/DATETIME columns as date/datetime objects rather than
+strings.  When pyarrow is installed the export is an Arrow IPC file;
+otherwise it uses a small stdlib format:
+
+    MAGIC | segment ... | footer JSON | footer length (u64 LE) | MAGIC
+
+Each column of a row group is stored as typed array segments (values,
+plus a null mask and string offsets where needed), compressed with zlib
+unless compression is turned off.  The footer records every segment's
+offset, so ColumnarReader can memory-map the file and decode one column
+at a time; uncompressed numeric segments are handed out as zero-copy
+memoryviews over the mapping.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+MAGIC = b'LLCOL01\n'
+EXTENSION = '.llcol'
+ARROW_EXTENSION = '.arrow'
+# Rows per row group; bounds the memory used while writing
+ROW_GROUP_SIZE = 65536
+# zlib level 1 keeps writes as fast as CSV; higher levels shrink files a little more
+COMPRESSION_LEVEL = 1
+
+EPOCH = date(1970, 1, 1)
+EPOCH_TIME = datetime(1970, 1, 1)
+
+# Declared SQLite column type -> logical column type
+DECLARED_TYPES = {
+    'INTEGER': 'int64',
+    'BOOLEAN': 'int64',
+    'REAL': 'float64',
+    'DATE': 'date32',
+    'DATETIME': 'timestamp',
+}
+
+# Typed encoding -> array typecode of its values segment
+TYPECODES = {'int64': 'q', 'float64': 'd', 'date32': 'i', 'timestamp': 'q'}
+
+
+def column_types(conn, table):
+    """Return [(name, logical type)] for a table from its declared column types"""
+    return [(name, DECLARED_TYPES.get((declared or '').upper(), 'utf8'))
+            for cid, name, declared, notnull, default, pk in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _to_storage(kind, value):
+    """Convert a value for a typed segment; raises if it does not fit exactly"""
+    if kind == 'int64':
+        if type(value) is not int:
+            raise TypeError(value)
+        return value
+    if kind == 'float64':
+        if type(value) not in (int, float):
+            raise TypeError(value)
+        return float(value)
+    if kind == 'date32':
+        parsed = date.fromisoformat(value)
+        if parsed.isoformat() != value:
+            raise ValueError(value)
+        return (parsed - EPOCH).days
+    if kind == 'timestamp':
+        delta = datetime.fromisoformat(value) - EPOCH_TIME
+        return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+    raise TypeError(kind)
+
+
+def _from_storage(kind, value):
+    if kind == 'date32':
+        return EPOCH + timedelta(days=value)
+    if kind == 'timestamp':
+        return EPOCH_TIME + timedelta(microseconds=value)
+    return value
+
+
+def _encode_column(kind, values):
+    """Return (encoding, {segment name: raw bytes}) for one column of a row group"""
+    segments = {}
+    if None in values:
+        segments['mask'] = bytes([value is None for value in values])
+
+    try:
+        if kind in ('int64', 'float64'):
+            # array() rejects strings and, for int64, floats by itself
+            typed = array(TYPECODES[kind], [0 if value is None else value for value in values]
+                          if 'mask' in segments else values)
+        elif kind in TYPECODES:
+            # Dates repeat heavily, so convert each distinct string once
+            converted = {value: _to_storage(kind, value) for value in set(values) if value is not None}
+            converted[None] = 0
+            typed = array(TYPECODES[kind], [converted[value] for value in values])
+        else:
+            encoded = [b'' if value is None else value.encode('utf-8') for value in values]
+            offsets = array('q', accumulate(map(len, encoded), initial=0))
+            segments['values'] = b''.join(encoded)
+            if sys.byteorder == 'big':
+                offsets.byteswap()
+            segments['offsets'] = offsets.tobytes()
+            return 'utf8', segments
+    except (TypeError, ValueError, OverflowError, AttributeError):
+        # Values SQLite's dynamic typing let in that don't fit the declared
+        # type; keep them as they are
+        return 'json', {'values': json.dumps(values).encode('utf-8')}
+
+    if sys.byteorder == 'big':
+        typed.byteswap()
+    segments['values'] = typed.tobytes()
+    return kind, segments
+
+
+class ColumnarWriter:
+    """Writes row groups to a columnar file; use as a context manager"""
+
+    def __init__(self, path, columns, table=None, compress=True):
+        self.columns = columns
+        self.table = table
+        self.compress = compress
+        self.row_groups = []
+        self.num_rows = 0
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC)
+        self._offset = len(MAGIC)
+
+    def _write_segment(self, raw):
+        data = zlib.compress(raw, COMPRESSION_LEVEL) if self.compress else raw
+        # Keep segments 8-byte aligned so uncompressed arrays can be cast in place
+        padding = -self._offset % 8
+        if padding:
+            self._file.write(b'\0' * padding)
+            self._offset += padding
+        self._file.write(data)
+        segment = [self._offset, len(data), len(raw)]
+        self._offset += len(data)
+        return segment
+
+    def write_rows(self, rows):
+        """Append one row group"""
+        if not rows:
+            return
+        group = {'rows': len(rows), 'columns': []}
+        for index, (name, kind) in enumerate(self.columns):
+            encoding, segments = _encode_column(kind, [row[index] for row in rows])
+            group['columns'].append({
+                'encoding': encoding,
+                'segments': {key: self._write_segment(raw) for key, raw in segments.items()},
+            })
+        self.row_groups.append(group)
+        self.num_rows += len(rows)
+
+    def close(self):
+        footer = json.dumps({
+            'version': 1,
+            'table': self.table,
+            'codec': 'zlib' if self.compress else 'none',
+            'columns': [{'name': name, 'type': kind} for name, kind in self.columns],
+            'num_rows': self.num_rows,
+            'row_groups': self.row_groups,
+        }).encode('utf-8')
+        self._file.write(footer)
+        self._file.write(struct.pack('<Q', len(footer)))
+        self._file.write(MAGIC)
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+
+class ColumnarReader:
+    """Memory-mapped reader for files written by ColumnarWriter"""
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Not a columnar export: {path}")
+        self._view = memoryview(self._map)
+
+        tail = len(MAGIC) + 8
+        if len(self._map) < len(MAGIC) + tail or self._map[:len(MAGIC)] != MAGIC \
+                or self._map[-len(MAGIC):] != MAGIC:
+            self.close()
+            raise ValueError(f"Not a columnar export: {path}")
+        footer_length = struct.unpack('<Q', self._map[-tail:-len(MAGIC)])[0]
+        footer_start = len(self._map) - tail - footer_length
+        meta = json.loads(bytes(self._map[footer_start:footer_start + footer_length]))
+
+        self.table = meta['table']
+        self.codec = meta['codec']
+        self.columns = [(column['name'], column['type']) for column in meta['columns']]
+        self.num_rows = meta['num_rows']
+        self.row_groups = meta['row_groups']
+
+    def _segment(self, segment):
+        offset, length, raw_length = segment
+        data = self._view[offset:offset + length]
+        if self.codec == 'zlib':
+            return memoryview(zlib.decompress(data))
+        return data
+
+    def _index(self, name):
+        for index, (column, kind) in enumerate(self.columns):
+            if column == name:
+                return index
+        raise KeyError(name)
+
+    def _decode(self, chunk, count):
+        encoding = chunk['encoding']
+        segments = chunk['segments']
+        if encoding == 'json':
+            return json.loads(bytes(self._segment(segments['values'])))
+
+        mask = bytes(self._segment(segments['mask'])) if 'mask' in segments else None
+        if encoding == 'utf8':
+            offsets = self._array('q', segments['offsets'])
+            data = bytes(self._segment(segments['values']))
+            values = [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(count)]
+        else:
+            values = [_from_storage(encoding, value)
+                      for value in self._array(TYPECODES[encoding], segments['values'])]
+        if mask:
+            values = [None if missing else value for missing, value in zip(mask, values)]
+        return values
+
+    def _array(self, typecode, segment):
+        values = self._segment(segment)
+        if sys.byteorder == 'big':
+            swapped = array(typecode, bytes(values))
+            swapped.byteswap()
+            return swapped
+        return values.cast(typecode)
+
+    def column(self, name):
+        """Return every value of a column as a list"""
+        index = self._index(name)
+        values = []
+        for group in self.row_groups:
+            values.extend(self._decode(group['columns'][index], group['rows']))
+        return values
+
+    def numeric_blocks(self, name):
+        """Yield each row group's raw values for a numeric column.
+
+        Null slots hold 0.  In an uncompressed file on a little-endian
+        machine the views point straight into the mapping; release them
+        before closing the reader.
+        """
+        index = self._index(name)
+        for group in self.row_groups:
+            chunk = group['columns'][index]
+            if chunk['encoding'] not in ('int64', 'float64'):
+                raise TypeError(f"Column {name} is not numeric in every row group")
+            yield self._array(TYPECODES[chunk['encoding']], chunk['segments']['values'])
+
+    def rows(self):
+        """Yield each row as a tuple"""
+        for group in self.row_groups:
+            columns = [self._decode(chunk, group['rows']) for chunk in group['columns']]
+            yield from zip(*columns)
+
+    def close(self):
+        self._view.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+ARROW_TYPES = {
+    'int64': lambda: pyarrow.int64(),
+    'float64': lambda: pyarrow.float64(),
+    'date32': lambda: pyarrow.date32(),
+    'timestamp': lambda: pyarrow.timestamp('us'),
+    'utf8': lambda: pyarrow.string(),
+}
+
+
+def _arrow_column(kind, values):
+    """Build an Arrow array, falling back to strings for values that don't fit"""
+    try:
+        return pyarrow.array([None if value is None else _from_storage(kind, _to_storage(kind, value))
+                              if kind in ('date32', 'timestamp') else value for value in values],
+                             type=ARROW_TYPES[kind]())
+    except (TypeError, ValueError, OverflowError, pyarrow.ArrowException):
+        return pyarrow.array([None if value is None else str(value) for value in values], type=pyarrow.string())
+
+
+def _row_groups(cursor, table, batch_size, progress, row_group_size):
+    """Yield lists of about `row_group_size` rows, checking for cancellation per fetch"""
+    from exporter import ExportCancelled
+
+    pending = []
+    while True:
+        if progress and progress.cancelled.is_set():
+            raise ExportCancelled(f"Export cancelled while writing {table}")
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            break
+        # Small row groups compress poorly, so gather several fetches
+        pending.extend(batch)
+        if len(pending) >= row_group_size:
+            yield pending
+            pending = []
+        if progress:
+            progress.advance(table, len(batch))
+    if pending:
+        yield pending
+
+
+def _write_arrow(groups, columns, path):
+    schema = pyarrow.schema([(name, ARROW_TYPES[kind]()) for name, kind in columns])
+    options = pyarrow.ipc.IpcWriteOptions(compression='zstd')
+    rows = 0
+    with pyarrow.OSFile(path, 'wb') as sink, pyarrow.ipc.new_file(sink, schema, options=options) as writer:
+        for group in groups:
+            arrays = [_arrow_column(kind, [row[index] for row in group])
+                      for index, (name, kind) in enumerate(columns)]
+            # Columns that fell back to strings are cast back to the file's schema
+            writer.write_batch(pyarrow.RecordBatch.from_arrays(arrays, names=schema.names).cast(schema))
+            rows += len(group)
+    return rows
+
+
+def _write_columnar(groups, columns, table, path, compress):
+    rows = 0
+    with ColumnarWriter(path, columns, table=table, compress=compress) as writer:
+        for group in groups:
+            writer.write_rows(group)
+            rows += len(group)
+    return rows
+
+
+def export_table(conn, table, path, batch_size=1000, progress=None, where=None, params=(),
+                 compress=True, row_group_size=ROW_GROUP_SIZE):
+    """Write one table to a columnar file and return the number of rows written.
+
+    Writes Arrow IPC when pyarrow is available and the stdlib format
+    otherwise, so `path` should end in file_extension().  Like the CSV
+    export, the file only appears under its final name once complete.
+    """
+    from exporter import EXPORT_TABLES
+
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown table: {table}")
+    columns = column_types(conn, table)
+    sql = f"SELECT {', '.join(name for name, kind in columns)} FROM {table}"
+    if where:
+        sql += f" WHERE {where}"
+    cursor = conn.execute(sql, params)
+    partial = path + '.part'
+    try:
+        groups = _row_groups(cursor, table, batch_size, progress, row_group_size)
+        if pyarrow is not None:
+            rows = _write_arrow(groups, columns, partial)
+        else:
+            rows = _write_columnar(groups, columns, table, partial, compress)
+        os.replace(partial, path)
+    except BaseException:
+        cursor.close()
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return rows
+
+
+def file_extension():
+    """Extension of the files export_table writes in this environment"""
+    return ARROW_EXTENSION if pyarrow is not None else EXTENSION
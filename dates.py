@@ -0,0 +1,48 @@
+"""Dates stored as ISO 'YYYY-MM-DD' text.
+
+Every DATE column holds ISO dates (migration 12 normalizes older rows and
+its triggers refuse anything else), so they sort as text and a date filter
+can be a plain range that SQLite answers from an index:
+
+    payment_date >= '2024-01-01' AND payment_date < '2025-01-01'
+
+rather than strftime('%Y', payment_date) = '2024', which has to compute
+the year of every row.
+"""
+import re
+from datetime import date
+
+_ISO = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})(?:[ T][\d:.]+)?')
+# Day first, as dates are written locally: 15/01/2024, 15-1-2024, 15.01.2024
+_DAY_FIRST = re.compile(r'(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})')
+
+
+class DateError(ValueError):
+    """A value that can't be read as a date"""
+
+
+def to_iso(value):
+    """Return `value` as an ISO date string, or raise DateError.
+
+    Accepts ISO dates, ISO timestamps (the time is dropped) and day-first
+    dates such as 15/01/2024.
+    """
+    text = str(value).strip()
+    match = _ISO.fullmatch(text)
+    if match:
+        year, month, day = match.groups()
+    else:
+        match = _DAY_FIRST.fullmatch(text)
+        if not match:
+            raise DateError(f"{value!r} is not a date; use YYYY-MM-DD")
+        day, month, year = match.groups()
+    try:
+        return date(int(year), int(month), int(day)).isoformat()
+    except ValueError:
+        raise DateError(f"{value!r} is not a date; use YYYY-MM-DD") from None
+
+
+def optional(value):
+    """to_iso() for an entry that may be left blank; blank gives None"""
+    text = (value or '').strip()
+    return to_iso(text) if text else None
@@ -1,16 +1,902 @@
 import sqlite3
 import os
+import re
+import threading
+import configparser
+import itertools
+from contextlib import contextmanager
+import dates
+import querylog
+
 DB_FILE = "landlord.db"
 SCHEMA_FILE = "schema.sql"
 
-def init_db():
-    if not os.path.exists(DB_FILE):
-        with sqlite3.connect(DB_FILE) as conn:
+# Optional INI file with [pragmas] and [diagnostics] sections overriding the settings below
+CONFIG_ENV = "LANDLORD_DB_CONFIG"
+CONFIG_FILE = "landlord.ini"
+# Individual overrides, e.g. LANDLORD_PRAGMA_CACHE_SIZE=-131072
+PRAGMA_ENV_PREFIX = "LANDLORD_PRAGMA_"
+
+# PRAGMAs applied to every pooled connection when it is opened.
+# WAL lets readers keep working while the writer commits; with WAL,
+# synchronous=NORMAL is still crash-safe and avoids an fsync per commit.
+CONNECTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'foreign_keys': 'ON',
+    'busy_timeout': 5000,
+    'cache_size': -65536,        # 64 MiB page cache (negative = KiB)
+    'mmap_size': 268435456,      # 256 MiB memory-mapped I/O
+    'temp_store': 'MEMORY',
+    'wal_autocheckpoint': 1000,  # pages; the writer checkpoints as it goes
+}
+
+# Compiled statements each pooled connection keeps for reuse, keyed by their
+# SQL text (sqlite3's default of 128 is smaller than the statements one
+# session runs; see statements.py)
+CACHED_STATEMENTS = 512
+
+# How often the application runs a passive checkpoint (milliseconds)
+CHECKPOINT_INTERVAL_MS = 5 * 60 * 1000
+
+_PRAGMA_NAME = re.compile(r'^[a-z_]+$')
+_PRAGMA_VALUE = re.compile(r'^-?[A-Za-z0-9_]+$')
+
+# Statement timing on pooled connections (see querylog.py), overridden by a
+# [diagnostics] section in the config file
+DIAGNOSTICS = {
+    'timing': 'on',
+    'row_timing': 'off',                    # also time rows read by iterating a cursor
+    'slow_query_ms': '250',                 # calls at least this slow are logged
+    'slow_query_log': 'slow_queries.log',   # empty to keep no log; relative to the database
+}
+# Threshold override, e.g. LANDLORD_SLOW_QUERY_MS=50
+SLOW_QUERY_ENV = "LANDLORD_SLOW_QUERY_MS"
+
+
+def load_pragmas(config_file=None):
+    """Return the PRAGMA profile with config file and environment overrides applied"""
+    pragmas = dict(CONNECTION_PRAGMAS)
+    
+    path = config_file or os.environ.get(CONFIG_ENV) or CONFIG_FILE
+    if os.path.exists(path):
+        parser = configparser.ConfigParser()
+        parser.read(path)
+        if parser.has_section('pragmas'):
+            pragmas.update(parser.items('pragmas'))
+    
+    for key, value in os.environ.items():
+        if key.startswith(PRAGMA_ENV_PREFIX):
+            pragmas[key[len(PRAGMA_ENV_PREFIX):].lower()] = value
+    
+    # Names and values are interpolated into SQL, so only allow plain tokens
+    for name, value in pragmas.items():
+        if not _PRAGMA_NAME.match(name) or not _PRAGMA_VALUE.match(str(value)):
+            raise ValueError(f"Invalid PRAGMA setting: {name} = {value}")
+    return pragmas
+
+
+def load_diagnostics(config_file=None):
+    """Return the statement timing settings with config file and environment overrides applied"""
+    parser = configparser.ConfigParser()
+    parser.read_dict({'diagnostics': DIAGNOSTICS})
+    parser.read(config_file or os.environ.get(CONFIG_ENV) or CONFIG_FILE)
+    if os.environ.get(SLOW_QUERY_ENV):
+        parser.set('diagnostics', 'slow_query_ms', os.environ[SLOW_QUERY_ENV])
+    
+    section = parser['diagnostics']
+    try:
+        return {
+            'timing': section.getboolean('timing'),
+            'row_timing': section.getboolean('row_timing'),
+            'slow_query_ms': section.getfloat('slow_query_ms'),
+            'slow_query_log': section.get('slow_query_log') or None,
+        }
+    except ValueError as e:
+        raise ValueError(f"Invalid [diagnostics] setting: {str(e)}") from e
+
+
+# Source of write generations; unique across pools so a pool that is closed
+# and reopened never repeats a value
+_generations = itertools.count(1)
+
+
+class ConnectionPool:
+    """Long-lived connections to a single database file.
+
+    There is one shared writer connection, serialised by a lock, and one
+    reader connection per thread.  Connections are opened lazily and kept
+    for the life of the process, so callers no longer pay the cost of
+    opening the file and loading the schema on every operation.
+    """
+
+    def __init__(self, db_file, pragmas=None, diagnostics=None, cached_statements=CACHED_STATEMENTS):
+        self.db_file = db_file
+        self.pragmas = pragmas if pragmas is not None else load_pragmas()
+        self.diagnostics = diagnostics if diagnostics is not None else load_diagnostics()
+        self.cached_statements = cached_statements
+        # A relative log path is taken from the database's directory, not the working directory
+        log = self.diagnostics.get('slow_query_log')
+        self.slow_query_log = os.path.join(os.path.dirname(os.path.abspath(db_file)), log) if log else None
+        self._writer = None
+        self._writer_lock = threading.RLock()
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        # Changes after every commit through the writer; lets callers tell
+        # whether anything they cached from this database may be stale
+        self.generation = next(_generations)
+
+    def _open(self, check_same_thread=True):
+        """Open a new connection with the configured PRAGMAs applied"""
+        if self.diagnostics['timing']:
+            conn = sqlite3.connect(self.db_file, check_same_thread=check_same_thread,
+                                   cached_statements=self.cached_statements, factory=querylog.TimedConnection)
+            conn.slow_query_ms = self.diagnostics['slow_query_ms']
+            conn.slow_query_log = self.slow_query_log
+            if self.diagnostics.get('row_timing'):
+                conn.cursor_class = querylog.RowTimedCursor
+            conn.statement_cache = querylog.StatementCache(self.cached_statements)
+        else:
+            conn = sqlite3.connect(self.db_file, check_same_thread=check_same_thread,
+                                   cached_statements=self.cached_statements)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    @contextmanager
+    def reader(self):
+        """Yield this thread's reader connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Only this thread uses it, but close() may run on another
+            conn = self._open(check_same_thread=False)
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        try:
+            yield conn
+        finally:
+            # Never leave a read transaction open on a pooled connection
+            if conn.in_transaction:
+                conn.rollback()
+
+    @contextmanager
+    def writer(self):
+        """Yield the shared writer connection, committing on success"""
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self._open(check_same_thread=False)
+            conn = self._writer
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+                self.generation = next(_generations)
+
+    def checkpoint(self, mode='PASSIVE'):
+        """Checkpoint the WAL into the main database file.
+
+        PASSIVE runs on this thread's reader, so it never waits for the
+        writer or for readers; it copies what it can and leaves the rest
+        for the next run.  That makes it safe to run from a timer while the
+        application is in use.  The other modes wait for the writer.
+        """
+        mode = mode.upper()
+        if mode not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+            raise ValueError(f"Invalid checkpoint mode: {mode}")
+        if mode == 'PASSIVE':
+            with self.reader() as conn:
+                return conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self._open(check_same_thread=False)
+            # (busy, wal pages, pages checkpointed)
+            return self._writer.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+
+    def close(self):
+        """Close every connection held by the pool"""
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers = []
+        self._local = threading.local()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_file=None):
+    """Return the connection pool for a database file, creating it on first use"""
+    path = os.path.abspath(db_file or DB_FILE)
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = ConnectionPool(path)
+            _pools[path] = pool
+        return pool
+
+
+def read_connection(db_file=None):
+    """Context manager yielding a pooled, thread-local reader connection"""
+    return get_pool(db_file).reader()
+
+
+def write_connection(db_file=None):
+    """Context manager yielding the pooled writer connection"""
+    return get_pool(db_file).writer()
+
+
+def write_generation(db_file=None):
+    """Return a counter that changes whenever this process writes to `db_file`"""
+    return get_pool(db_file).generation
+
+
+def checkpoint(db_file=None, mode='PASSIVE'):
+    """Run a WAL checkpoint on a database file this process has opened"""
+    with _pools_lock:
+        pool = _pools.get(os.path.abspath(db_file or DB_FILE))
+    if pool is None:
+        # Nothing written through the pool, so there is nothing to checkpoint
+        return None
+    return pool.checkpoint(mode)
+
+
+def close_all():
+    """Close all pooled connections (used on shutdown and between tests)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+# Millisecond UTC timestamps, so changes within one second still order
+CHANGE_TIMESTAMP = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+def _change_tracking_sql(table, backfill):
+    """SQL adding an updated_at column, touch triggers and a delete tombstone to `table`"""
+    return f"""
+        ALTER TABLE {table} ADD COLUMN updated_at DATETIME;
+        UPDATE {table} SET updated_at = COALESCE({backfill}, {CHANGE_TIMESTAMP});
+        CREATE INDEX idx_{table}_updated_at ON {table}(updated_at);
+
+        CREATE TRIGGER {table}_touch_insert AFTER INSERT ON {table}
+        WHEN NEW.updated_at IS NULL
+        BEGIN
+            UPDATE {table} SET updated_at = {CHANGE_TIMESTAMP} WHERE id = NEW.id;
+        END;
+
+        -- Leaves updated_at alone when the statement sets it explicitly
+        CREATE TRIGGER {table}_touch_update AFTER UPDATE ON {table}
+        WHEN NEW.updated_at IS OLD.updated_at
+        BEGIN
+            UPDATE {table} SET updated_at = {CHANGE_TIMESTAMP} WHERE id = NEW.id;
+        END;
+
+        CREATE TRIGGER {table}_tombstone AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO deleted_rows (table_name, row_id, deleted_at)
+            VALUES ('{table}', OLD.id, {CHANGE_TIMESTAMP});
+        END;
+    """
+
+
+# search_index rowids are id * SEARCH_ID_SLOTS + the source table's slot,
+# so every searchable table shares one index and a match's table and id
+# come from its rowid alone
+SEARCH_ID_SLOTS = 8
+
+
+def _compact(expression):
+    """SQL for `expression` without spaces and punctuation, so '0300-123 4567' also matches '03001234567'"""
+    expression = f"COALESCE({expression}, '')"
+    for char in " -()+./":
+        expression = f"replace({expression}, '{char}', '')"
+    return expression
+
+
+def _search_index_sql(slot, table, title, detail, keywords, columns):
+    """SQL keeping search_index in step with `table`.
+
+    `title`, `detail` and `keywords` are expressions over {row}, which is
+    NEW or OLD in the triggers and the table itself in the backfill;
+    `columns` lists the columns they read.
+    """
+    rowid = f"{{row}}.id * {SEARCH_ID_SLOTS} + {slot}"
+    values = ", ".join(f"COALESCE({expression or 'NULL'}, '')" for expression in (title, detail, keywords))
+    return f"""
+        CREATE TRIGGER {table}_search_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO search_index (rowid, title, detail, keywords)
+            VALUES ({rowid.format(row='NEW')}, {values.format(row='NEW')});
+        END;
+        CREATE TRIGGER {table}_search_update AFTER UPDATE OF {', '.join(columns)} ON {table}
+        BEGIN
+            DELETE FROM search_index WHERE rowid = {rowid.format(row='OLD')};
+            INSERT INTO search_index (rowid, title, detail, keywords)
+            VALUES ({rowid.format(row='NEW')}, {values.format(row='NEW')});
+        END;
+        CREATE TRIGGER {table}_search_delete AFTER DELETE ON {table}
+        BEGIN
+            DELETE FROM search_index WHERE rowid = {rowid.format(row='OLD')};
+        END;
+        INSERT INTO search_index (rowid, title, detail, keywords)
+        SELECT {rowid.format(row=table)}, {values.format(row=table)} FROM {table};
+    """
+
+
+# Amount columns, stored as INTEGER paisa from migration 11 on (see money.py)
+MONEY_COLUMNS = {
+    'properties': ('rent_amount', 'deposit_amount'),
+    'leases': ('rent_amount', 'deposit_amount'),
+    'rent_payments': ('amount_due', 'amount_paid'),
+    'expenses': ('amount',),
+    'maintenance_requests': ('cost_estimate', 'actual_cost'),
+    'rent_rollup': ('amount_due', 'amount_paid', 'outstanding'),
+    'expense_rollup': ('amount',),
+}
+
+
+def _minor_units_sql(conn, table, columns):
+    """SQL rebuilding `table` with `columns` as INTEGER paisa instead of REAL rupees.
+
+    SQLite can't change a column's type in place, so this creates the new
+    table, copies the rows across, drops the old one and renames, then
+    recreates the table's indexes and triggers from the live schema and
+    restores its AUTOINCREMENT counter so deleted ids are never reused.
+    The legacy rename leaves other tables' triggers that name `table`
+    alone instead of failing on them while it is missing.
+    """
+    create = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()[0]
+    create, count = re.subn(rf'^CREATE TABLE "?{table}"?', f"CREATE TABLE {table}_new", create)
+    for column in columns:
+        create, found = re.subn(rf'\b{column}\s+REAL\b', f"{column} INTEGER", create)
+        count += found
+    if count != len(columns) + 1:
+        raise sqlite3.DatabaseError(f"Unexpected definition of {table}")
+
+    names = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    # Text that was never a number is copied as it is rather than turned into 0;
+    # migration 13 records and clears it
+    values = [f"CASE WHEN typeof({name}) IN ('integer', 'real') THEN CAST(ROUND({name} * 100) AS INTEGER) "
+              f"ELSE {name} END" if name in columns else name for name in names]
+    dependents = [sql for sql, in conn.execute("""
+        SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL
+    """, (table,))]
+    # schema.sql's AUTOINCREMENT tables guarantee sqlite_sequence exists
+    sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+
+    sql = f"""
+        {create};
+        INSERT INTO {table}_new ({', '.join(names)}) SELECT {', '.join(values)} FROM {table};
+        DROP TABLE {table};
+        PRAGMA legacy_alter_table = ON;
+        ALTER TABLE {table}_new RENAME TO {table};
+        PRAGMA legacy_alter_table = OFF;
+    """ + "".join(f"{statement};\n" for statement in dependents)
+    if sequence:
+        sql += f"""
+        DELETE FROM sqlite_sequence WHERE name = '{table}';
+        INSERT INTO sqlite_sequence (name, seq) VALUES ('{table}', {int(sequence[0])});
+        """
+    return sql
+
+
+# Recomputes both rollups from the raw tables (run inside a migration)
+_REBUILD_ROLLUPS_SQL = """
+        DELETE FROM rent_rollup;
+        INSERT INTO rent_rollup (property_id, month, paid_month, status,
+                                 payment_count, amount_due, amount_paid, outstanding)
+        SELECT property_id, month, COALESCE(strftime('%Y-%m', payment_date), ''), COALESCE(status, ''),
+               COUNT(*), COALESCE(SUM(amount_due), 0), COALESCE(SUM(amount_paid), 0),
+               SUM(CASE WHEN amount_due > amount_paid THEN amount_due - amount_paid ELSE 0 END)
+        FROM rent_payments
+        GROUP BY 1, 2, 3, 4;
+        DELETE FROM expense_rollup;
+        INSERT INTO expense_rollup (property_id, month, category, expense_count, amount)
+        SELECT property_id, COALESCE(strftime('%Y-%m', date), ''), COALESCE(category, ''),
+               COUNT(*), COALESCE(SUM(amount), 0)
+        FROM expenses
+        GROUP BY 1, 2, 3;
+"""
+
+
+def _money_migration_sql(conn):
+    """Migration 11: every amount column to INTEGER paisa, with the rollups recomputed exactly"""
+    return "".join(_minor_units_sql(conn, table, columns)
+                   for table, columns in MONEY_COLUMNS.items()) + _REBUILD_ROLLUPS_SQL
+
+
+def _unreadable_amounts_sql(conn):
+    """Migration 13: move amounts that are not whole paisa into unreadable_amounts.
+
+    Migration 11 kept text that was never a number.  Money only holds whole
+    paisa, so such a value is copied to unreadable_amounts (table, row id,
+    column and the value as text) and cleared: NULL, or 0 in a NOT NULL
+    column.  A stray REAL is rounded to the nearest paisa instead.
+    """
+    sql = """
+        CREATE TABLE unreadable_amounts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            column_name TEXT NOT NULL,
+            value TEXT,
+            cleared_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+    """
+    for table, columns in MONEY_COLUMNS.items():
+        if table in ('rent_rollup', 'expense_rollup'):
+            continue
+        notnull = {row[1]: row[3] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for column in columns:
+            sql += f"""
+        INSERT INTO unreadable_amounts (table_name, row_id, column_name, value)
+        SELECT '{table}', id, '{column}', CAST({column} AS TEXT) FROM {table}
+        WHERE typeof({column}) IN ('text', 'blob');
+        UPDATE {table} SET {column} = {'0' if notnull[column] else 'NULL'}
+        WHERE typeof({column}) IN ('text', 'blob');
+        UPDATE {table} SET {column} = CAST(ROUND({column}) AS INTEGER) WHERE typeof({column}) = 'real';
+            """
+    return sql + _REBUILD_ROLLUPS_SQL
+
+
+# DATE columns, held as ISO 'YYYY-MM-DD' text from migration 12 on (see dates.py)
+DATE_COLUMNS = {
+    'leases': ('start_date', 'end_date'),
+    'rent_payments': ('due_date', 'payment_date'),
+    'expenses': ('date',),
+    'maintenance_requests': ('request_date', 'completed_date'),
+}
+
+
+def _sql_literal(value):
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _iso_dates_sql(conn, table, columns):
+    """SQL rewriting `table`'s dates in other formats as ISO and refusing non-ISO dates from now on.
+
+    Values dates.to_iso() can't read are left as they are.
+    """
+    sql = ""
+    for column in columns:
+        for value, in conn.execute(f"""
+            SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL AND date({column}) IS NOT {column}
+        """):
+            try:
+                iso = dates.to_iso(value)
+            except ValueError:
+                continue
+            sql += f"UPDATE {table} SET {column} = '{iso}' WHERE {column} = {_sql_literal(str(value))};\n"
+
+    invalid = " OR ".join(f"(NEW.{column} IS NOT NULL AND date(NEW.{column}) IS NOT NEW.{column})"
+                          for column in columns)
+    return sql + f"""
+        CREATE TRIGGER {table}_dates_insert BEFORE INSERT ON {table}
+        WHEN {invalid}
+        BEGIN
+            SELECT RAISE(ABORT, '{table}: dates must be YYYY-MM-DD');
+        END;
+        CREATE TRIGGER {table}_dates_update BEFORE UPDATE OF {', '.join(columns)} ON {table}
+        WHEN {invalid}
+        BEGIN
+            SELECT RAISE(ABORT, '{table}: dates must be YYYY-MM-DD');
+        END;
+    """
+
+
+def _date_migration_sql(conn):
+    """Migration 12: ISO dates everywhere, and indexes for the reports' date ranges"""
+    return "".join(_iso_dates_sql(conn, table, columns) for table, columns in DATE_COLUMNS.items()) + """
+        -- Overdue rent: only rows still owing, by due date
+        CREATE INDEX idx_rent_payments_unpaid ON rent_payments(due_date) WHERE amount_due > amount_paid;
+        -- Leases ending within, or before, a date range
+        CREATE INDEX idx_leases_status_end ON leases(status, end_date);
+        -- Expenses by month without reading every property's rows
+        CREATE INDEX idx_expense_rollup_month ON expense_rollup(month, amount);
+    """
+
+
+# Forward-only schema migrations applied on top of schema.sql.
+# Each entry is (version, description, sql) and runs once, in its own
+# transaction; sql may also be a function of the connection returning the
+# script, for changes that depend on the live schema.  Never edit a
+# migration that has shipped - add a new one.
+MIGRATIONS = [
+    (1, "Secondary indexes for lookups, filters and foreign keys", """
+        CREATE INDEX IF NOT EXISTS idx_tenants_property ON tenants(property_id);
+        CREATE INDEX IF NOT EXISTS idx_leases_tenant ON leases(tenant_id);
+        CREATE INDEX IF NOT EXISTS idx_leases_property ON leases(property_id);
+        CREATE INDEX IF NOT EXISTS idx_leases_status_start ON leases(status, start_date);
+        CREATE INDEX IF NOT EXISTS idx_rent_payments_status_due ON rent_payments(status, due_date);
+        CREATE INDEX IF NOT EXISTS idx_rent_payments_due_date ON rent_payments(due_date);
+        CREATE INDEX IF NOT EXISTS idx_rent_payments_tenant ON rent_payments(tenant_id);
+        CREATE INDEX IF NOT EXISTS idx_rent_payments_property ON rent_payments(property_id);
+        CREATE INDEX IF NOT EXISTS idx_expenses_property_date ON expenses(property_id, date);
+        CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses(date);
+        CREATE INDEX IF NOT EXISTS idx_maintenance_property_status_date
+            ON maintenance_requests(property_id, status, request_date);
+        CREATE INDEX IF NOT EXISTS idx_maintenance_status_date ON maintenance_requests(status, request_date);
+        CREATE INDEX IF NOT EXISTS idx_documents_related ON documents(related_type, related_id);
+    """),
+    (2, "One rent payment per lease and month", """
+        -- Drop unpaid duplicates, keeping a paid row or else the oldest one.
+        -- Duplicates that both carry payments are left alone, so the index
+        -- below fails and the migration rolls back rather than losing money.
+        DELETE FROM rent_payments
+        WHERE COALESCE(amount_paid, 0) = 0
+          AND EXISTS (
+              SELECT 1 FROM rent_payments other
+              WHERE other.lease_id = rent_payments.lease_id
+                AND other.month = rent_payments.month
+                AND other.id != rent_payments.id
+                AND (COALESCE(other.amount_paid, 0) > 0 OR other.id < rent_payments.id)
+          );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_rent_payments_lease_month ON rent_payments(lease_id, month);
+    """),
+    (3, "Background job state", """
+        CREATE TABLE IF NOT EXISTS job_state (
+            name TEXT PRIMARY KEY,
+            last_run_at DATETIME,
+            last_cutoff DATE,
+            last_max_id INTEGER DEFAULT 0,
+            last_rows INTEGER DEFAULT 0,
+            last_duration_ms REAL DEFAULT 0
+        );
+    """),
+    (4, "Indexes matching the list screens' sort order", """
+        CREATE INDEX IF NOT EXISTS idx_expenses_list ON expenses(COALESCE(date, ''));
+        CREATE INDEX IF NOT EXISTS idx_maintenance_list ON maintenance_requests(COALESCE(request_date, ''));
+        CREATE INDEX IF NOT EXISTS idx_documents_list ON documents(COALESCE(uploaded_at, ''));
+    """),
+    (5, "Covering indexes for the dashboard summary", """
+        CREATE INDEX IF NOT EXISTS idx_rent_payments_status_paid ON rent_payments(status, amount_paid);
+        CREATE INDEX IF NOT EXISTS idx_rent_payments_payment_date ON rent_payments(payment_date);
+        CREATE INDEX IF NOT EXISTS idx_properties_status ON properties(status);
+    """),
+    (6, "Financial rollup tables maintained by triggers", """
+        -- Rent totals per property, rent month, payment month and status.
+        -- Empty strings stand in for NULLs so every row has a usable key.
+        CREATE TABLE rent_rollup (
+            property_id INTEGER NOT NULL,
+            month TEXT NOT NULL,
+            paid_month TEXT NOT NULL,
+            status TEXT NOT NULL,
+            payment_count INTEGER NOT NULL DEFAULT 0,
+            amount_due REAL NOT NULL DEFAULT 0,
+            amount_paid REAL NOT NULL DEFAULT 0,
+            outstanding REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (property_id, month, paid_month, status)
+        ) WITHOUT ROWID;
+
+        -- Income by payment month without touching the per-property rows
+        CREATE INDEX idx_rent_rollup_status_paid_month
+            ON rent_rollup(status, paid_month, amount_paid, payment_count);
+
+        -- Expense totals per property, expense month and category
+        CREATE TABLE expense_rollup (
+            property_id INTEGER NOT NULL,
+            month TEXT NOT NULL,
+            category TEXT NOT NULL,
+            expense_count INTEGER NOT NULL DEFAULT 0,
+            amount REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (property_id, month, category)
+        ) WITHOUT ROWID;
+
+        CREATE TRIGGER rent_rollup_insert AFTER INSERT ON rent_payments
+        BEGIN
+            INSERT INTO rent_rollup (property_id, month, paid_month, status,
+                                     payment_count, amount_due, amount_paid, outstanding)
+            VALUES (NEW.property_id, NEW.month, COALESCE(strftime('%Y-%m', NEW.payment_date), ''),
+                    COALESCE(NEW.status, ''), 1, COALESCE(NEW.amount_due, 0), COALESCE(NEW.amount_paid, 0),
+                    CASE WHEN NEW.amount_due > NEW.amount_paid THEN NEW.amount_due - NEW.amount_paid ELSE 0 END)
+            ON CONFLICT (property_id, month, paid_month, status) DO UPDATE SET
+                payment_count = payment_count + 1,
+                amount_due = amount_due + excluded.amount_due,
+                amount_paid = amount_paid + excluded.amount_paid,
+                outstanding = outstanding + excluded.outstanding;
+        END;
+
+        CREATE TRIGGER rent_rollup_delete AFTER DELETE ON rent_payments
+        BEGIN
+            UPDATE rent_rollup SET
+                payment_count = payment_count - 1,
+                amount_due = amount_due - COALESCE(OLD.amount_due, 0),
+                amount_paid = amount_paid - COALESCE(OLD.amount_paid, 0),
+                outstanding = outstanding - CASE WHEN OLD.amount_due > OLD.amount_paid
+                                                 THEN OLD.amount_due - OLD.amount_paid ELSE 0 END
+            WHERE property_id = OLD.property_id AND month = OLD.month
+              AND paid_month = COALESCE(strftime('%Y-%m', OLD.payment_date), '')
+              AND status = COALESCE(OLD.status, '');
+            DELETE FROM rent_rollup
+            WHERE property_id = OLD.property_id AND month = OLD.month
+              AND paid_month = COALESCE(strftime('%Y-%m', OLD.payment_date), '')
+              AND status = COALESCE(OLD.status, '') AND payment_count <= 0;
+        END;
+
+        CREATE TRIGGER rent_rollup_update
+        AFTER UPDATE OF property_id, month, payment_date, status, amount_due, amount_paid ON rent_payments
+        BEGIN
+            UPDATE rent_rollup SET
+                payment_count = payment_count - 1,
+                amount_due = amount_due - COALESCE(OLD.amount_due, 0),
+                amount_paid = amount_paid - COALESCE(OLD.amount_paid, 0),
+                outstanding = outstanding - CASE WHEN OLD.amount_due > OLD.amount_paid
+                                                 THEN OLD.amount_due - OLD.amount_paid ELSE 0 END
+            WHERE property_id = OLD.property_id AND month = OLD.month
+              AND paid_month = COALESCE(strftime('%Y-%m', OLD.payment_date), '')
+              AND status = COALESCE(OLD.status, '');
+            DELETE FROM rent_rollup
+            WHERE property_id = OLD.property_id AND month = OLD.month
+              AND paid_month = COALESCE(strftime('%Y-%m', OLD.payment_date), '')
+              AND status = COALESCE(OLD.status, '') AND payment_count <= 0;
+            INSERT INTO rent_rollup (property_id, month, paid_month, status,
+                                     payment_count, amount_due, amount_paid, outstanding)
+            VALUES (NEW.property_id, NEW.month, COALESCE(strftime('%Y-%m', NEW.payment_date), ''),
+                    COALESCE(NEW.status, ''), 1, COALESCE(NEW.amount_due, 0), COALESCE(NEW.amount_paid, 0),
+                    CASE WHEN NEW.amount_due > NEW.amount_paid THEN NEW.amount_due - NEW.amount_paid ELSE 0 END)
+            ON CONFLICT (property_id, month, paid_month, status) DO UPDATE SET
+                payment_count = payment_count + 1,
+                amount_due = amount_due + excluded.amount_due,
+                amount_paid = amount_paid + excluded.amount_paid,
+                outstanding = outstanding + excluded.outstanding;
+        END;
+
+        CREATE TRIGGER expense_rollup_insert AFTER INSERT ON expenses
+        BEGIN
+            INSERT INTO expense_rollup (property_id, month, category, expense_count, amount)
+            VALUES (NEW.property_id, COALESCE(strftime('%Y-%m', NEW.date), ''),
+                    COALESCE(NEW.category, ''), 1, COALESCE(NEW.amount, 0))
+            ON CONFLICT (property_id, month, category) DO UPDATE SET
+                expense_count = expense_count + 1,
+                amount = amount + excluded.amount;
+        END;
+
+        CREATE TRIGGER expense_rollup_delete AFTER DELETE ON expenses
+        BEGIN
+            UPDATE expense_rollup SET
+                expense_count = expense_count - 1,
+                amount = amount - COALESCE(OLD.amount, 0)
+            WHERE property_id = OLD.property_id AND month = COALESCE(strftime('%Y-%m', OLD.date), '')
+              AND category = COALESCE(OLD.category, '');
+            DELETE FROM expense_rollup
+            WHERE property_id = OLD.property_id AND month = COALESCE(strftime('%Y-%m', OLD.date), '')
+              AND category = COALESCE(OLD.category, '') AND expense_count <= 0;
+        END;
+
+        CREATE TRIGGER expense_rollup_update AFTER UPDATE OF property_id, date, category, amount ON expenses
+        BEGIN
+            UPDATE expense_rollup SET
+                expense_count = expense_count - 1,
+                amount = amount - COALESCE(OLD.amount, 0)
+            WHERE property_id = OLD.property_id AND month = COALESCE(strftime('%Y-%m', OLD.date), '')
+              AND category = COALESCE(OLD.category, '');
+            DELETE FROM expense_rollup
+            WHERE property_id = OLD.property_id AND month = COALESCE(strftime('%Y-%m', OLD.date), '')
+              AND category = COALESCE(OLD.category, '') AND expense_count <= 0;
+            INSERT INTO expense_rollup (property_id, month, category, expense_count, amount)
+            VALUES (NEW.property_id, COALESCE(strftime('%Y-%m', NEW.date), ''),
+                    COALESCE(NEW.category, ''), 1, COALESCE(NEW.amount, 0))
+            ON CONFLICT (property_id, month, category) DO UPDATE SET
+                expense_count = expense_count + 1,
+                amount = amount + excluded.amount;
+        END;
+
+        -- Backfill from existing rows
+        INSERT INTO rent_rollup (property_id, month, paid_month, status,
+                                 payment_count, amount_due, amount_paid, outstanding)
+        SELECT property_id, month, COALESCE(strftime('%Y-%m', payment_date), ''), COALESCE(status, ''),
+               COUNT(*), TOTAL(amount_due), TOTAL(amount_paid),
+               TOTAL(CASE WHEN amount_due > amount_paid THEN amount_due - amount_paid ELSE 0 END)
+        FROM rent_payments
+        GROUP BY 1, 2, 3, 4;
+        INSERT INTO expense_rollup (property_id, month, category, expense_count, amount)
+        SELECT property_id, COALESCE(strftime('%Y-%m', date), ''), COALESCE(category, ''),
+               COUNT(*), TOTAL(amount)
+        FROM expenses
+        GROUP BY 1, 2, 3;
+    """),
+    (7, "Change tracking for delta exports", """
+        CREATE TABLE deleted_rows (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            deleted_at DATETIME NOT NULL
+        );
+        CREATE INDEX idx_deleted_rows_deleted_at ON deleted_rows(deleted_at);
+    """ + "".join(_change_tracking_sql(table, backfill) for table, backfill in (
+        ('properties', 'created_at'),
+        ('tenants', 'created_at'),
+        ('leases', 'created_at'),
+        ('rent_payments', 'created_at'),
+        ('expenses', 'created_at'),
+        ('maintenance_requests', 'request_date'),
+    ))),
+    (8, "Content-addressed document store", """
+        -- One row per stored file, keyed by its SHA-256; ref_count is the
+        -- number of documents rows pointing at it and is kept by triggers.
+        CREATE TABLE document_blobs (
+            hash TEXT PRIMARY KEY,
+            file_path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        ALTER TABLE documents ADD COLUMN content_hash TEXT REFERENCES document_blobs(hash);
+        ALTER TABLE documents ADD COLUMN file_name TEXT;
+        CREATE INDEX idx_documents_content_hash ON documents(content_hash);
+        CREATE INDEX idx_document_blobs_unreferenced ON document_blobs(ref_count) WHERE ref_count <= 0;
+
+        CREATE TRIGGER document_blobs_ref AFTER INSERT ON documents
+        WHEN NEW.content_hash IS NOT NULL
+        BEGIN
+            UPDATE document_blobs SET ref_count = ref_count + 1 WHERE hash = NEW.content_hash;
+        END;
+        CREATE TRIGGER document_blobs_unref AFTER DELETE ON documents
+        WHEN OLD.content_hash IS NOT NULL
+        BEGIN
+            UPDATE document_blobs SET ref_count = ref_count - 1 WHERE hash = OLD.content_hash;
+        END;
+        CREATE TRIGGER document_blobs_reref AFTER UPDATE OF content_hash ON documents
+        WHEN OLD.content_hash IS NOT NEW.content_hash
+        BEGIN
+            UPDATE document_blobs SET ref_count = ref_count - 1 WHERE hash = OLD.content_hash;
+            UPDATE document_blobs SET ref_count = ref_count + 1 WHERE hash = NEW.content_hash;
+        END;
+    """),
+    (9, "Full-text search over documents", """
+        -- Text extracted from each stored file, once per distinct content
+        CREATE TABLE document_text (
+            hash TEXT PRIMARY KEY,
+            text TEXT NOT NULL,
+            extracted_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TRIGGER document_blobs_delete_text AFTER DELETE ON document_blobs
+        BEGIN
+            DELETE FROM document_text WHERE hash = OLD.hash;
+        END;
+
+        -- rowid is documents.id; file names and descriptions outrank body text
+        CREATE VIRTUAL TABLE documents_fts USING fts5(
+            file_name, description, body,
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        );
+        INSERT INTO documents_fts (documents_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)');
+
+        CREATE TRIGGER documents_fts_insert AFTER INSERT ON documents
+        BEGIN
+            INSERT INTO documents_fts (rowid, file_name, description, body)
+            VALUES (NEW.id, COALESCE(NEW.file_name, NEW.file_path), NEW.description,
+                    (SELECT text FROM document_text WHERE hash = NEW.content_hash));
+        END;
+        CREATE TRIGGER documents_fts_delete AFTER DELETE ON documents
+        BEGIN
+            DELETE FROM documents_fts WHERE rowid = OLD.id;
+        END;
+        CREATE TRIGGER documents_fts_update AFTER UPDATE OF file_name, file_path, description, content_hash
+        ON documents
+        BEGIN
+            UPDATE documents_fts SET
+                file_name = COALESCE(NEW.file_name, NEW.file_path),
+                description = NEW.description,
+                body = (SELECT text FROM document_text WHERE hash = NEW.content_hash)
+            WHERE rowid = NEW.id;
+        END;
+        CREATE TRIGGER document_text_insert AFTER INSERT ON document_text
+        BEGIN
+            UPDATE documents_fts SET body = NEW.text
+            WHERE rowid IN (SELECT id FROM documents WHERE content_hash = NEW.hash);
+        END;
+        CREATE TRIGGER document_text_update AFTER UPDATE OF text ON document_text
+        BEGIN
+            UPDATE documents_fts SET body = NEW.text
+            WHERE rowid IN (SELECT id FROM documents WHERE content_hash = NEW.hash);
+        END;
+
+        INSERT INTO documents_fts (rowid, file_name, description)
+        SELECT id, COALESCE(file_name, file_path), description FROM documents;
+    """),
+    (10, "Global search index", """
+        -- title and detail are what a result shows; keywords only help matching
+        CREATE VIRTUAL TABLE search_index USING fts5(
+            title, detail, keywords,
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        );
+        INSERT INTO search_index (search_index, rank) VALUES ('rank', 'bm25(10.0, 4.0, 2.0)');
+    """ + "".join(_search_index_sql(*source) for source in (
+        (0, 'properties', "COALESCE(NULLIF({row}.name, ''), {row}.address)", "{row}.address", None,
+         ('name', 'address')),
+        (1, 'tenants', "{row}.name",
+         "trim(COALESCE({row}.phone, '') || '  ' || COALESCE({row}.email, ''))",
+         f"{_compact('{row}.phone')} || ' ' || COALESCE({{row}}.national_id, '') || ' ' || "
+         f"{_compact('{row}.national_id')}",
+         ('name', 'phone', 'email', 'national_id')),
+        (2, 'expenses', "{row}.description", "{row}.invoice_number", _compact('{row}.invoice_number'),
+         ('description', 'invoice_number')),
+        (3, 'maintenance_requests', "{row}.description", None, None, ('description',)),
+    ))),
+    (11, "Amounts as integer paisa", _money_migration_sql),
+    (12, "ISO dates and indexes for date ranges", _date_migration_sql),
+    (13, "Unreadable amounts recorded and cleared", _unreadable_amounts_sql),
+]
+
+
+def schema_version(conn):
+    """Return the highest migration version applied to a database"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply any pending migrations and return the list of versions applied"""
+    if conn.in_transaction:
+        conn.commit()
+    current = schema_version(conn)
+    conn.commit()
+    
+    applied = []
+    # Foreign key enforcement can only be toggled outside a transaction; it is
+    # off while migrating so table rebuilds don't cascade, and checked after.
+    foreign_keys = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        for version, description, sql in MIGRATIONS:
+            if version <= current:
+                continue
+            try:
+                if callable(sql):
+                    sql = sql(conn)
+                conn.executescript(f"""
+                    BEGIN;
+                    {sql}
+                    INSERT INTO schema_version (version, description) VALUES ({int(version)}, '{description.replace("'", "''")}');
+                    COMMIT;
+                """)
+            except sqlite3.Error as e:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise sqlite3.DatabaseError(f"Migration {version} ({description}) failed: {str(e)}") from e
+            applied.append(version)
+        
+        violations = conn.execute("PRAGMA foreign_key_check").fetchall() if applied else []
+        if violations:
+            raise sqlite3.IntegrityError(f"Foreign key violations after migration: {violations[:5]}")
+    finally:
+        conn.execute(f"PRAGMA foreign_keys = {'ON' if foreign_keys else 'OFF'}")
+    return applied
+
+
+def init_db(db_file=None):
+    """Create the database from schema.sql if needed and apply migrations"""
+    db_file = db_file or DB_FILE
+    is_new = not os.path.exists(db_file)
+    with write_connection(db_file) as conn:
+        if is_new:
             with open(SCHEMA_FILE, 'r') as f:
                 conn.executescript(f.read())
+        migrate(conn)
+    
+    if is_new:
         print("Database initialized.")
     else:
         print("Database already exists.")
 
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    init_db()
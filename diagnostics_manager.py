@@ -0,0 +1,164 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+import querylog
+from db import DB_FILE, get_pool
+
+# Statements listed, most total time first
+TOP_STATEMENTS = 100
+
+
+def bucket_label(index):
+    """'<= 5 ms' for histogram bucket `index`, '> 5000 ms' for the last"""
+    if index < len(querylog.BUCKETS_MS):
+        return f"<= {querylog.BUCKETS_MS[index]} ms"
+    return f"> {querylog.BUCKETS_MS[-1]} ms"
+
+
+def format_cache(hits, misses):
+    """'90 hits, 10 compiled (90% reused)'"""
+    text = f"{hits:,} hits, {misses:,} compiled"
+    if hits + misses:
+        text += f" ({hits * 100 // (hits + misses)}% reused)"
+    return text
+
+
+def format_details(stats):
+    """The full statement, its latency histogram, statement cache use and call sites"""
+    lines = [stats.sql, "", "Latency:"]
+    for index, count in enumerate(stats.histogram):
+        if count:
+            lines.append(f"  {bucket_label(index):>12}  {count:8d}  {'#' * max(1, count * 40 // stats.calls)}")
+    lines += ["", f"Statement cache: {format_cache(stats.cache_hits, stats.cache_misses)}", "", "Called from:"]
+    for site, count in sorted(stats.sites.items(), key=lambda item: item[1], reverse=True):
+        lines.append(f"  {count:8d}  {site}")
+    return "\n".join(lines)
+
+
+class DiagnosticsManager:
+    def __init__(self, parent_frame):
+        self.parent_frame = parent_frame
+        self.statements = []
+        self.setup_ui()
+        self.load_statements()
+
+    def setup_ui(self):
+        """Setup the diagnostics UI"""
+        main_container = tk.Frame(self.parent_frame, bg='white')
+        main_container.pack(fill='both', expand=True, padx=10, pady=10)
+
+        # Header
+        header_frame = tk.Frame(main_container, bg='white')
+        header_frame.pack(fill='x', pady=(0, 10))
+
+        tk.Label(header_frame, text="Query Diagnostics",
+                font=('Arial', 18, 'bold'), bg='white').pack(side='left')
+
+        tk.Button(header_frame, text="Reset", command=self.reset_statements,
+                 bg='#f44336', fg='white', padx=20).pack(side='right')
+        tk.Button(header_frame, text="Refresh", command=self.load_statements,
+                 bg='#2196F3', fg='white', padx=20).pack(side='right', padx=(0, 10))
+
+        self.settings_label = tk.Label(main_container, text="", bg='white', anchor='w', justify='left')
+        self.settings_label.pack(fill='x', pady=(0, 10))
+
+        # Statements list
+        list_frame = tk.Frame(main_container, bg='white')
+        list_frame.pack(fill='both', expand=True)
+
+        columns = ('Total (ms)', 'Calls', 'Mean (ms)', 'p95 (ms)', 'Max (ms)', 'Rows', 'Called From', 'Statement')
+        self.tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=12)
+
+        for col in columns:
+            self.tree.heading(col, text=col)
+            if col == 'Statement':
+                self.tree.column(col, width=400)
+            elif col == 'Called From':
+                self.tree.column(col, width=220)
+            else:
+                self.tree.column(col, width=80, anchor='e')
+
+        v_scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.tree.yview)
+        h_scrollbar = ttk.Scrollbar(list_frame, orient='horizontal', command=self.tree.xview)
+        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+
+        self.tree.pack(side='left', fill='both', expand=True)
+        v_scrollbar.pack(side='right', fill='y')
+        h_scrollbar.pack(side='bottom', fill='x')
+
+        self.tree.bind('<<TreeviewSelect>>', self.show_details)
+
+        # Details of the selected statement
+        details_frame = tk.LabelFrame(main_container, text="Statement Details", bg='white')
+        details_frame.pack(fill='both', expand=True, pady=(10, 0))
+
+        self.details_text = tk.Text(details_frame, wrap='word', state='disabled', height=12,
+                                    font=('Courier', 10))
+        details_scrollbar = ttk.Scrollbar(details_frame, orient='vertical', command=self.details_text.yview)
+        self.details_text.configure(yscrollcommand=details_scrollbar.set)
+
+        self.details_text.pack(side='left', fill='both', expand=True, padx=10, pady=10)
+        details_scrollbar.pack(side='right', fill='y')
+
+    def describe_settings(self):
+        """Whether statements are timed, where slow ones go and how often compiled statements are reused"""
+        pool = get_pool(DB_FILE)
+        settings = pool.diagnostics
+        if not settings['timing']:
+            return "Statement timing is off (timing = off in the [diagnostics] section of landlord.ini)."
+        text = "Timing every statement since the application started"
+        if not settings.get('row_timing'):
+            text += " (rows read by iterating are not counted; set row_timing = on to include them)"
+        if not pool.slow_query_log:
+            text += ". No slow-query log is kept."
+        else:
+            text += (f". Calls taking {settings['slow_query_ms']:g} ms or more are logged to "
+                     f"{pool.slow_query_log}.")
+        return (f"{text}\nStatement cache ({pool.cached_statements} per connection): "
+                f"{format_cache(*querylog.cache_counts())}")
+
+    def load_statements(self):
+        """List the statements that have taken the most time"""
+        try:
+            self.settings_label.config(text=self.describe_settings())
+            self.statements = querylog.top_statements(TOP_STATEMENTS)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load statements: {str(e)}")
+            return
+
+        for item in self.tree.get_children():
+            self.tree.delete(item)
+        for index, stats in enumerate(self.statements):
+            self.tree.insert('', 'end', iid=str(index), values=self.format_statement(stats))
+        self.set_details("")
+
+    def format_statement(self, stats):
+        """Format a statement's totals for display"""
+        p95 = stats.percentile_ms(0.95)
+        busiest_site = max(stats.sites, key=stats.sites.get) if stats.sites else ''
+        return (f"{stats.total * 1000:.1f}",
+                stats.calls,
+                f"{stats.mean_ms:.2f}",
+                f"<= {p95}" if p95 is not None else f"> {querylog.BUCKETS_MS[-1]}",
+                f"{stats.slowest * 1000:.1f}",
+                stats.rows,
+                busiest_site,
+                stats.sql)
+
+    def show_details(self, event=None):
+        """Show the histogram and call sites of the selected statement"""
+        selection = self.tree.selection()
+        if not selection:
+            return
+        self.set_details(format_details(self.statements[int(selection[0])]))
+
+    def set_details(self, text):
+        self.details_text.config(state='normal')
+        self.details_text.delete(1.0, tk.END)
+        self.details_text.insert(1.0, text)
+        self.details_text.config(state='disabled')
+
+    def reset_statements(self):
+        """Start timing afresh"""
+        if messagebox.askyesno("Confirm Reset", "Clear the timings collected so far?"):
+            querylog.reset()
+            self.load_statements()
@@ -1,15 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import sqlite3
 import os
-import shutil
-from datetime import datetime
-from db import DB_FILE
+import background
+import document_search
+import document_store
+from db import DB_FILE, read_connection, write_connection
+from listings import document_pager
+from virtual_list import VirtualListMixin
 
-class DocumentManager:
+class DocumentManager(VirtualListMixin):
     def __init__(self, parent_frame):
         self.parent_frame = parent_frame
-        self.documents_dir = "documents"
+        self.documents_dir = document_store.DOCUMENTS_DIR
         self.setup_ui()
         self.load_documents()
         
@@ -44,6 +46,15 @@ class DocumentManager:
         self.type_filter.pack(side='left', padx=(10, 20))
         self.type_filter.bind('<<ComboboxSelected>>', self.filter_documents)
         
+        tk.Label(filter_frame, text="Search:", bg='white').pack(side='left')
+        
+        self.search_entry = tk.Entry(filter_frame, width=30)
+        self.search_entry.pack(side='left', padx=(10, 5))
+        self.search_entry.bind('<Return>', self.filter_documents)
+        
+        tk.Button(filter_frame, text="Search", command=self.filter_documents,
+                 bg='#4CAF50', fg='white').pack(side='left')
+        
         tk.Button(filter_frame, text="Refresh", command=self.load_documents,
                  bg='#2196F3', fg='white').pack(side='right')
         
@@ -74,7 +85,8 @@ class DocumentManager:
         # Scrollbars
         v_scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.tree.yview)
         h_scrollbar = ttk.Scrollbar(list_frame, orient='horizontal', command=self.tree.xview)
-        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.tree.configure(xscrollcommand=h_scrollbar.set)
+        self.attach_virtual_scroll(v_scrollbar)
         
         # Pack treeview and scrollbars
         self.tree.pack(side='left', fill='both', expand=True)
@@ -97,71 +109,40 @@ class DocumentManager:
         
     def load_documents(self):
         """Load documents from database"""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT id, related_type, related_id, file_path, description, uploaded_at
-                    FROM documents
-                    ORDER BY uploaded_at DESC
-                """)
-                
-                documents = cursor.fetchall()
-                
-                for doc in documents:
-                    # Format the data for display
-                    formatted_doc = list(doc)
-                    file_name = os.path.basename(doc[3]) if doc[3] else 'Unknown'
-                    formatted_doc[3] = file_name
-                    if doc[5]:  # uploaded_at
-                        formatted_doc[5] = doc[5][:10]  # Just the date part
-                    
-                    self.tree.insert('', 'end', values=formatted_doc)
-                    
+            self.show_documents(None)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load documents: {str(e)}")
             
+    def show_documents(self, related_type, search_text=''):
+        """Show documents, optionally of one type; newest first, or best match first when searching"""
+        if document_search.match_query(search_text):
+            pager = document_search.search_pager(search_text, related_type)
+            self.show_rows(pager, self.format_document, DB_FILE, on_error=self.show_load_error)
+            return
+        
+        self.show_rows(document_pager(related_type), self.format_document, DB_FILE,
+                       on_error=self.show_load_error)
+        
+    def show_load_error(self, error):
+        """Report a failed background load"""
+        messagebox.showerror("Error", f"Failed to load documents: {str(error)}")
+        
+    def format_document(self, doc):
+        """Format a document row for display"""
+        formatted_doc = list(doc)
+        file_name = os.path.basename(doc[3]) if doc[3] else 'Unknown'
+        formatted_doc[3] = file_name
+        if doc[5]:  # uploaded_at
+            formatted_doc[5] = doc[5][:10]  # Just the date part
+        return formatted_doc
+            
     def filter_documents(self, event=None):
-        """Filter documents by type"""
+        """Filter documents by type and search text"""
         selected_type = self.type_filter.get()
-        
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
             
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                
-                if selected_type == 'All':
-                    cursor.execute("""
-                        SELECT id, related_type, related_id, file_path, description, uploaded_at
-                        FROM documents
-                        ORDER BY uploaded_at DESC
-                    """)
-                else:
-                    cursor.execute("""
-                        SELECT id, related_type, related_id, file_path, description, uploaded_at
-                        FROM documents
-                        WHERE related_type = ?
-                        ORDER BY uploaded_at DESC
-                    """, (selected_type,))
-                
-                documents = cursor.fetchall()
-                
-                for doc in documents:
-                    formatted_doc = list(doc)
-                    file_name = os.path.basename(doc[3]) if doc[3] else 'Unknown'
-                    formatted_doc[3] = file_name
-                    if doc[5]:  # uploaded_at
-                        formatted_doc[5] = doc[5][:10]
-                    
-                    self.tree.insert('', 'end', values=formatted_doc)
+            self.show_documents(None if selected_type == 'All' else selected_type, self.search_entry.get())
                     
         except Exception as e:
             messagebox.showerror("Error", f"Failed to filter documents: {str(e)}")
@@ -181,7 +162,7 @@ class DocumentManager:
         doc_id = item['values'][0]
         
         try:
-            with sqlite3.connect(DB_FILE) as conn:
+            with read_connection(DB_FILE) as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT file_path FROM documents WHERE id = ?", (doc_id,))
                 result = cursor.fetchone()
@@ -226,7 +207,7 @@ class DocumentManager:
         def save_description():
             new_description = text_widget.get(1.0, tk.END).strip()
             try:
-                with sqlite3.connect(DB_FILE) as conn:
+                with write_connection(DB_FILE) as conn:
                     cursor = conn.cursor()
                     cursor.execute("UPDATE documents SET description = ? WHERE id = ?", 
                                  (new_description, doc_id))
@@ -260,22 +241,11 @@ class DocumentManager:
         
         if messagebox.askyesno("Confirm Delete", 
                               f"Are you sure you want to delete '{file_name}'?\n\n"
-                              "This will remove the document from the database and delete the file."):
+                              "This will remove the document from the database and delete the file "
+                              "unless another document uses it."):
             try:
-                with sqlite3.connect(DB_FILE) as conn:
-                    cursor = conn.cursor()
-                    
-                    # Get file path before deleting
-                    cursor.execute("SELECT file_path FROM documents WHERE id = ?", (doc_id,))
-                    result = cursor.fetchone()
-                    
-                    # Delete from database
-                    cursor.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
-                    conn.commit()
-                    
-                    # Delete file if it exists
-                    if result and result[0] and os.path.exists(result[0]):
-                        os.remove(result[0])
+                with write_connection(DB_FILE) as conn:
+                    document_store.delete_document(conn, doc_id)
                     
                 messagebox.showinfo("Success", "Document deleted successfully")
                 self.load_documents()
@@ -394,7 +364,7 @@ class DocumentUploadDialog:
         
         try:
             # Validate related ID exists
-            with sqlite3.connect(DB_FILE) as conn:
+            with write_connection(DB_FILE) as conn:
                 cursor = conn.cursor()
                 
                 # Check if related ID exists in the appropriate table
@@ -413,22 +383,16 @@ class DocumentUploadDialog:
                         messagebox.showerror("Error", f"Invalid {doc_type} ID")
                         return
                 
-                # Copy file to documents directory
-                file_name = os.path.basename(file_path)
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                new_file_name = f"{timestamp}_{file_name}"
-                new_file_path = os.path.join(self.document_manager.documents_dir, new_file_name)
-                
-                shutil.copy2(file_path, new_file_path)
-                
-                # Insert record into database
-                cursor.execute("""
-                    INSERT INTO documents (related_type, related_id, file_path, description)
-                    VALUES (?, ?, ?, ?)
-                """, (doc_type, related_id, new_file_path, description))
+                # Store the file once per distinct content and record it
+                doc_id = document_store.add_document(conn, file_path, doc_type, related_id, description,
+                                                     root=self.document_manager.documents_dir)
                 
                 conn.commit()
                 
+            # Index the file's text off the Tk thread; it shows up in search once done
+            background.submit(self.document_manager.tree, (document_search, doc_id),
+                              lambda: document_search.index_document(DB_FILE, doc_id), lambda count: None)
+            
             messagebox.showinfo("Success", "Document uploaded successfully")
             self.dialog.destroy()
             self.document_manager.load_documents()
@@ -0,0 +1,177 @@
+"""Full-text search over documents.
+
+documents_fts (migration 9) indexes each document's file name,
+description and the text extracted from its file, with prefix indexes so
+typed-ahead terms stay fast.  Triggers keep it in step with documents and
+document_text; text is extracted once per stored blob, off the Tk thread,
+after an upload commits.
+
+Plain-text files are read directly.  PDFs use pypdf when it is installed
+and otherwise a small stdlib reader that handles the text of simple,
+unencrypted PDFs.  Run ``python document_search.py extract`` to extract
+text for files stored before the index existed.
+"""
+import argparse
+import os
+import re
+import zlib
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+from db import DB_FILE, read_connection, write_connection
+from listings import KeysetPager
+from search import match_query
+
+TEXT_EXTENSIONS = ('.txt', '.text', '.csv', '.md', '.log', '.json', '.xml', '.html', '.htm')
+
+# Text kept per file; enough for any invoice or lease, and it bounds the
+# index for large exports that happen to be uploaded
+MAX_TEXT_CHARS = 200000
+
+SEARCH_COLUMNS = ("documents.id, documents.related_type, documents.related_id, "
+                  "COALESCE(documents.file_name, documents.file_path), documents.description, documents.uploaded_at")
+
+_PDF_STREAM = re.compile(rb'stream\r?\n(.*?)endstream', re.S)
+_PDF_TEXT_BLOCK = re.compile(rb'\bBT\b(.*?)\bET\b', re.S)
+# A text-showing operator (Tj, TJ, ' or ") and its string or array operand
+_PDF_SHOW = re.compile(rb'(\[(?:\\.|[^\]\\])*\]|\((?:\\.|[^\\)])*\)|<[0-9A-Fa-f\s]*>)\s*(?:Tj|TJ|\'|")', re.S)
+_PDF_STRING = re.compile(rb'\(((?:\\.|[^\\)])*)\)|<([0-9A-Fa-f\s]*)>', re.S)
+_PDF_ESCAPE = re.compile(rb'\\([0-7]{1,3}|.)', re.S)
+_PDF_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f'}
+_UNPRINTABLE = re.compile(r'[^\w\s.,:;/@#%&()+\-\'"]+')
+
+
+def _unescape(match):
+    escape = match.group(1)
+    if escape[:1].isdigit():
+        return bytes([int(escape, 8) & 0xFF])
+    if escape in (b'\n', b'\r'):
+        return b''
+    return _PDF_ESCAPES.get(escape, escape)
+
+
+def _pdf_string(literal, hexadecimal):
+    if literal is not None:
+        raw = _PDF_ESCAPE.sub(_unescape, literal)
+    else:
+        digits = re.sub(rb'\s', b'', hexadecimal)
+        raw = bytes.fromhex((digits + b'0' * (len(digits) % 2)).decode('ascii'))
+    if raw.startswith(b'\xfe\xff'):
+        return raw[2:].decode('utf-16-be', 'replace')
+    return raw.decode('latin-1')
+
+
+def _pdf_text_stdlib(data):
+    """Text shown by the BT/ET blocks of every content stream"""
+    blocks = []
+    for match in _PDF_STREAM.finditer(data):
+        stream = match.group(1)
+        try:
+            stream = zlib.decompress(stream)
+        except zlib.error:
+            pass
+        for block in _PDF_TEXT_BLOCK.finditer(stream):
+            shown = [''.join(_pdf_string(*string.groups()) for string in _PDF_STRING.finditer(operand.group(1)))
+                     for operand in _PDF_SHOW.finditer(block.group(1))]
+            blocks.append(' '.join(shown))
+    return '\n'.join(block for block in blocks if block.strip())
+
+
+def _pdf_text(path):
+    if pypdf is not None:
+        reader = pypdf.PdfReader(path)
+        return '\n'.join(page.extract_text() or '' for page in reader.pages)
+    with open(path, 'rb') as f:
+        return _pdf_text_stdlib(f.read())
+
+
+def extract_text(path):
+    """Return the searchable text of a file, or '' for unsupported types"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in TEXT_EXTENSIONS:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            text = f.read(MAX_TEXT_CHARS)
+    elif extension == '.pdf':
+        text = _pdf_text(path)
+    else:
+        return ''
+    # Glyph soup from unmapped PDF fonts would only pollute the index
+    return _UNPRINTABLE.sub(' ', text)[:MAX_TEXT_CHARS]
+
+
+def _extract(db_file, blobs):
+    """Extract text for (hash, path) pairs and store it; return how many were stored"""
+    stored = 0
+    for digest, path in blobs:
+        try:
+            text = extract_text(path)
+        except (OSError, ValueError) as e:
+            # Unreadable or malformed: index it as empty rather than retry forever
+            print(f"Text extraction failed for {path}: {str(e)}")
+            text = ''
+        with write_connection(db_file) as conn:
+            conn.execute("INSERT OR REPLACE INTO document_text (hash, text) VALUES (?, ?)", (digest, text))
+            conn.commit()
+        stored += 1
+    return stored
+
+
+def index_document(db_file, doc_id):
+    """Extract the text of one document's file unless its content already has some.
+
+    Meant to run on a worker thread after the upload has committed.
+    """
+    with read_connection(db_file) as conn:
+        blobs = conn.execute("""
+            SELECT b.hash, b.file_path FROM documents d JOIN document_blobs b ON b.hash = d.content_hash
+            WHERE d.id = ? AND NOT EXISTS (SELECT 1 FROM document_text t WHERE t.hash = b.hash)
+        """, (doc_id,)).fetchall()
+    return _extract(db_file, blobs)
+
+
+def index_pending(db_file):
+    """Extract the text of every stored file that has none yet"""
+    with read_connection(db_file) as conn:
+        blobs = conn.execute("""
+            SELECT hash, file_path FROM document_blobs b
+            WHERE NOT EXISTS (SELECT 1 FROM document_text t WHERE t.hash = b.hash)
+        """).fetchall()
+    return _extract(db_file, blobs)
+
+
+def search_pager(text, related_type=None):
+    """A KeysetPager over the documents matching `text`, best match first"""
+    where = ["documents_fts MATCH ?"]
+    params = [match_query(text)]
+    if related_type:
+        where.append("documents.related_type = ?")
+        params.append(related_type)
+    return KeysetPager(
+        columns=SEARCH_COLUMNS,
+        source="documents_fts JOIN documents ON documents.id = documents_fts.rowid",
+        order_by=("documents_fts.rank", "documents.id"),
+        where=where, params=params, descending=False)
+
+
+def search(conn, text, related_type=None, limit=50):
+    """Return up to `limit` documents matching `text`, best match first"""
+    if match_query(text) is None:
+        return []
+    return [values for values, key in search_pager(text, related_type).page(conn, limit=limit)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the document search index")
+    parser.add_argument('command', choices=('extract',))
+    parser.add_argument('--db', default=DB_FILE, help="database file (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    print(f"Text extracted from {index_pending(args.db)} files.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
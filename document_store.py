@@ -0,0 +1,224 @@
+"""Content-addressed document storage.
+
+Uploaded files are stored once per distinct content under
+``documents/ab/cd/<sha256><ext>``: the hash is computed while the file is
+streamed into a temporary file, which is then renamed into place, or
+dropped if that content is already stored.  document_blobs has a row per
+stored file and its ref_count, kept by triggers from migration 8, is the
+number of documents rows pointing at it; a file is removed only when the
+last document using it is deleted.
+
+Documents uploaded before the store existed keep their own file until
+``python document_store.py adopt`` moves them in.  ``python
+document_store.py sweep`` removes files left behind by an interrupted
+upload or delete; run it while the application is closed.
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+
+DOCUMENTS_DIR = "documents"
+
+# Bytes read and hashed per step while copying
+CHUNK_SIZE = 1024 * 1024
+
+# Two levels of two hex digits: 65536 directories, so even a large store
+# keeps a few files per directory
+FANOUT = (2, 2)
+
+TEMP_PREFIX = ".upload-"
+
+
+def blob_path(root, digest, extension=''):
+    """Return where the file with the given SHA-256 is stored under root"""
+    parts, start = [], 0
+    for width in FANOUT:
+        parts.append(digest[start:start + width])
+        start += width
+    return os.path.join(root, *parts, digest + extension.lower())
+
+
+def _copy_to_temp(source, root):
+    """Copy source into a temporary file under root, hashing it on the way.
+
+    Returns (hex digest, size, temporary path).
+    """
+    os.makedirs(root, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(prefix=TEMP_PREFIX, dir=root)
+    try:
+        with open(source, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                dst.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return digest.hexdigest(), size, temp_path
+
+
+def store_file(conn, source, root=DOCUMENTS_DIR):
+    """Store the contents of source and return (hash, blob path).
+
+    Content that is already stored costs no extra disk.  Does not commit;
+    run inside write_connection so a concurrent delete cannot remove the
+    blob between this call and the documents insert that references it.
+    """
+    digest, size, temp_path = _copy_to_temp(source, root)
+    try:
+        row = conn.execute("SELECT file_path FROM document_blobs WHERE hash = ?", (digest,)).fetchone()
+        if row and os.path.exists(row[0]):
+            return digest, row[0]
+
+        path = blob_path(root, digest, os.path.splitext(source)[1])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+        conn.execute("""
+            INSERT INTO document_blobs (hash, file_path, size) VALUES (?, ?, ?)
+            ON CONFLICT (hash) DO UPDATE SET file_path = excluded.file_path
+        """, (digest, path, size))
+        return digest, path
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def add_document(conn, source, related_type, related_id, description=None, root=DOCUMENTS_DIR):
+    """Store source and add a documents row for it; return the new id.
+
+    Does not commit.
+    """
+    digest, path = store_file(conn, source, root)
+    cursor = conn.execute("""
+        INSERT INTO documents (related_type, related_id, file_path, description, content_hash, file_name)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (related_type, related_id, path, description, digest, os.path.basename(source)))
+    return cursor.lastrowid
+
+
+def remove_document(conn, doc_id):
+    """Delete a documents row; return the files no document uses any more.
+
+    Does not commit, and leaves the files in place: remove them only after
+    the delete has been committed.
+    """
+    row = conn.execute("SELECT file_path, content_hash FROM documents WHERE id = ?", (doc_id,)).fetchone()
+    if not row:
+        return []
+    file_path, digest = row
+    conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+
+    if digest is None:
+        # Uploaded before the store: the file is the row's own copy
+        shared = conn.execute("SELECT 1 FROM documents WHERE file_path = ? LIMIT 1", (file_path,)).fetchone()
+        return [] if shared or not file_path else [file_path]
+
+    unused = conn.execute("SELECT file_path FROM document_blobs WHERE hash = ? AND ref_count <= 0",
+                          (digest,)).fetchall()
+    conn.execute("DELETE FROM document_blobs WHERE hash = ? AND ref_count <= 0", (digest,))
+    return [path for path, in unused]
+
+
+def remove_files(paths):
+    """Remove files, ignoring any already gone"""
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def delete_document(conn, doc_id):
+    """Delete a document, commit, and remove its file if nothing else uses it.
+
+    Returns the files removed.
+    """
+    paths = remove_document(conn, doc_id)
+    conn.commit()
+    remove_files(paths)
+    return paths
+
+
+def adopt(conn, root=DOCUMENTS_DIR):
+    """Move documents uploaded before the store into it and commit.
+
+    Identical files collapse into one blob.  Rows whose file is missing
+    are left as they are.  Returns (documents adopted, bytes freed).
+    """
+    adopted = freed = 0
+    rows = conn.execute("SELECT id, file_path FROM documents WHERE content_hash IS NULL ORDER BY id").fetchall()
+    for doc_id, file_path in rows:
+        if not file_path or not os.path.exists(file_path):
+            continue
+        # Uploads were saved as <timestamp>_<name>; keep the name
+        name = os.path.basename(file_path)
+        prefix, _, rest = name.partition('_')
+        time_part, _, original = rest.partition('_')
+        if prefix.isdigit() and time_part.isdigit() and original:
+            name = original
+
+        size = os.path.getsize(file_path)
+        digest, path = store_file(conn, file_path, root)
+        conn.execute("UPDATE documents SET content_hash = ?, file_path = ?, file_name = COALESCE(file_name, ?) "
+                     "WHERE id = ?", (digest, path, name, doc_id))
+        shared = conn.execute("SELECT 1 FROM documents WHERE file_path = ? LIMIT 1", (file_path,)).fetchone()
+        conn.commit()
+        if not shared and os.path.abspath(file_path) != os.path.abspath(path):
+            remove_files([file_path])
+            freed += size
+        adopted += 1
+    conn.commit()
+    return adopted, freed
+
+
+def sweep(conn, root=DOCUMENTS_DIR):
+    """Remove unreferenced blobs and stray files under root and commit.
+
+    Only safe while nothing else is uploading.  Returns the files removed.
+    """
+    removed = [path for path, in conn.execute("SELECT file_path FROM document_blobs WHERE ref_count <= 0")]
+    conn.execute("DELETE FROM document_blobs WHERE ref_count <= 0")
+    conn.commit()
+    remove_files(removed)
+
+    known = {os.path.normcase(os.path.abspath(path)) for path, in
+             conn.execute("SELECT file_path FROM document_blobs UNION SELECT file_path FROM documents")}
+    depth = len(FANOUT)
+    for directory, _, files in os.walk(root):
+        level = len(os.path.relpath(directory, root).split(os.sep)) if directory != root else 0
+        for name in files:
+            path = os.path.join(directory, name)
+            stray = name.startswith(TEMP_PREFIX) if level < depth else True
+            if stray and os.path.normcase(os.path.abspath(path)) not in known:
+                remove_files([path])
+                removed.append(path)
+    return removed
+
+
+def main(argv=None):
+    import db
+
+    parser = argparse.ArgumentParser(description="Maintain the content-addressed document store")
+    parser.add_argument('command', choices=('adopt', 'sweep'))
+    parser.add_argument('--db', default=db.DB_FILE, help="database file (default: %(default)s)")
+    parser.add_argument('--root', default=DOCUMENTS_DIR, help="document directory (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    with db.write_connection(args.db) as conn:
+        if args.command == 'adopt':
+            adopted, freed = adopt(conn, args.root)
+            print(f"{adopted} documents moved into the store, {freed / 1024 / 1024:.1f} MiB freed.")
+        else:
+            removed = sweep(conn, args.root)
+            print(f"{len(removed)} unused files removed.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
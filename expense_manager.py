@@ -1,10 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
 from datetime import datetime, date
-from db import DB_FILE
+import dates
+from db import DB_FILE, read_connection, write_connection
+import statements
+from money import Money
+from services import ExpenseRepo, PropertyRepo
+from listings import expense_pager
+from virtual_list import VirtualListMixin
 
-class ExpenseManager:
+
+class ExpenseManager(VirtualListMixin):
     def __init__(self, parent_frame):
         self.parent_frame = parent_frame
         self.setup_ui()
@@ -78,7 +84,8 @@ class ExpenseManager:
         # Scrollbars
         v_scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.tree.yview)
         h_scrollbar = ttk.Scrollbar(list_frame, orient='horizontal', command=self.tree.xview)
-        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.tree.configure(xscrollcommand=h_scrollbar.set)
+        self.attach_virtual_scroll(v_scrollbar)
         
         # Pack treeview and scrollbars
         self.tree.pack(side='left', fill='both', expand=True)
@@ -102,17 +109,8 @@ class ExpenseManager:
     def load_property_list(self):
         """Load property list for filter dropdown"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, name, address FROM properties ORDER BY name")
-                properties = cursor.fetchall()
-                
-                property_list = ['All Properties']
-                for prop in properties:
-                    prop_name = prop[1] if prop[1] else f"Property #{prop[0]}"
-                    property_list.append(f"{prop_name} - {prop[2]}")
-                
-                self.property_filter['values'] = property_list
+            with read_connection(DB_FILE) as conn:
+                self.property_filter['values'] = ['All Properties'] + PropertyRepo(conn).labels()
                 self.property_filter.set('All Properties')
                 
         except Exception as e:
@@ -120,37 +118,23 @@ class ExpenseManager:
             
     def load_expenses(self):
         """Load expenses from database"""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT e.id, 
-                           COALESCE(p.name, 'Property #' || p.id) as property_name,
-                           e.description, e.category, e.amount, e.date, e.paid_by, e.invoice_number
-                    FROM expenses e
-                    JOIN properties p ON e.property_id = p.id
-                    ORDER BY e.date DESC
-                """)
-                
-                expenses = cursor.fetchall()
-                
-                for expense in expenses:
-                    # Format the data for display
-                    formatted_expense = list(expense)
-                    if formatted_expense[4]:  # amount
-                        formatted_expense[4] = f"Rs {formatted_expense[4]:.2f}"
-                    if formatted_expense[5]:  # date
-                        formatted_expense[5] = formatted_expense[5][:10]
-                    
-                    self.tree.insert('', 'end', values=formatted_expense)
-                    
+            self.show_rows(expense_pager(), self.format_expense, DB_FILE, on_error=self.show_load_error)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load expenses: {str(e)}")
+        
+    def show_load_error(self, error):
+        """Report a failed background load"""
+        messagebox.showerror("Error", f"Failed to load expenses: {str(error)}")
+        
+    def format_expense(self, expense):
+        """Format an expense row for display"""
+        formatted_expense = list(expense)
+        if formatted_expense[4]:  # amount
+            formatted_expense[4] = str(Money(formatted_expense[4]))
+        if formatted_expense[5]:  # date
+            formatted_expense[5] = formatted_expense[5][:10]
+        return formatted_expense
             
     def load_all_expenses(self):
         """Load all expenses (clear filters)"""
@@ -160,55 +144,9 @@ class ExpenseManager:
         
     def filter_expenses(self, event=None):
         """Filter expenses by property and category"""
-        selected_property = self.property_filter.get()
-        selected_category = self.category_filter.get()
-        
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                
-                # Build query based on filters
-                query = """
-                    SELECT e.id, 
-                           COALESCE(p.name, 'Property #' || p.id) as property_name,
-                           e.description, e.category, e.amount, e.date, e.paid_by, e.invoice_number
-                    FROM expenses e
-                    JOIN properties p ON e.property_id = p.id
-                    WHERE 1=1
-                """
-                params = []
-                
-                if selected_property != 'All Properties':
-                    property_name = selected_property.split(' - ')[0]
-                    if property_name.startswith('Property #'):
-                        property_id = int(property_name.split('#')[1])
-                        query += " AND e.property_id = ?"
-                        params.append(property_id)
-                    else:
-                        query += " AND p.name = ?"
-                        params.append(property_name)
-                
-                if selected_category != 'All':
-                    query += " AND e.category = ?"
-                    params.append(selected_category)
-                
-                query += " ORDER BY e.date DESC"
-                
-                cursor.execute(query, params)
-                expenses = cursor.fetchall()
-                
-                for expense in expenses:
-                    formatted_expense = list(expense)
-                    if formatted_expense[4]:  # amount
-                        formatted_expense[4] = f"Rs {formatted_expense[4]:.2f}"
-                    if formatted_expense[5]:  # date
-                        formatted_expense[5] = formatted_expense[5][:10]
-                    
-                    self.tree.insert('', 'end', values=formatted_expense)
+            pager = expense_pager(self.property_filter.get(), self.category_filter.get())
+            self.show_rows(pager, self.format_expense, DB_FILE, on_error=self.show_load_error)
                     
         except Exception as e:
             messagebox.showerror("Error", f"Failed to filter expenses: {str(e)}")
@@ -253,10 +191,8 @@ class ExpenseManager:
         if messagebox.askyesno("Confirm Delete", 
                               f"Are you sure you want to delete the expense '{description}'?"):
             try:
-                with sqlite3.connect(DB_FILE) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("DELETE FROM expenses WHERE id = ?", (expense_id,))
-                    conn.commit()
+                with write_connection(DB_FILE) as conn:
+                    ExpenseRepo(conn).delete(expense_id)
                     
                 messagebox.showinfo("Success", "Expense deleted successfully")
                 self.load_expenses()
@@ -347,17 +283,8 @@ class ExpenseDialog:
     def load_property_options(self, combobox):
         """Load property options for dropdown"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, name, address FROM properties ORDER BY name")
-                properties = cursor.fetchall()
-                
-                property_options = []
-                for prop in properties:
-                    prop_name = prop[1] if prop[1] else f"Property #{prop[0]}"
-                    property_options.append(f"{prop_name} - {prop[2]}")
-                
-                combobox['values'] = property_options
+            with read_connection(DB_FILE) as conn:
+                combobox['values'] = PropertyRepo(conn).labels()
                 
         except Exception as e:
             print(f"Error loading property options: {e}")
@@ -365,32 +292,27 @@ class ExpenseDialog:
     def load_expense_data(self):
         """Load existing expense data for editing"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT e.property_id, e.description, e.category, e.amount, e.date, 
-                           e.paid_by, e.invoice_number, e.notes
-                    FROM expenses e WHERE e.id = ?
-                """, (self.expense_id,))
+            with read_connection(DB_FILE) as conn:
+                expense = ExpenseRepo(conn).get(self.expense_id)
                 
-                data = cursor.fetchone()
-                if data:
+                if expense:
                     field_names = ['property_id', 'description', 'category', 'amount', 'date',
                                  'paid_by', 'invoice_number', 'notes']
                     
-                    for i, field_name in enumerate(field_names):
-                        if data[i] is not None:
+                    for field_name in field_names:
+                        value = getattr(expense, field_name)
+                        if value is not None:
                             if field_name == 'property_id':
                                 # Load the display value for combobox
-                                cursor.execute("SELECT name, address FROM properties WHERE id = ?", (data[i],))
-                                prop_data = cursor.fetchone()
-                                if prop_data:
-                                    prop_name = prop_data[0] if prop_data[0] else f"Property #{data[i]}"
-                                    self.entries[field_name].set(f"{prop_name} - {prop_data[1]}")
+                                prop_label = PropertyRepo(conn).label(value)
+                                if prop_label:
+                                    self.entries[field_name].set(prop_label)
                             elif field_name == 'notes':
-                                self.entries[field_name].insert(1.0, str(data[i]))
+                                self.entries[field_name].insert(1.0, str(value))
+                            elif field_name == 'amount':
+                                self.entries[field_name].set(str(value.rupees))
                             else:
-                                self.entries[field_name].set(str(data[i]))
+                                self.entries[field_name].set(str(value))
                                 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load expense data: {str(e)}")
@@ -411,63 +333,33 @@ class ExpenseDialog:
                 messagebox.showerror("Error", "Amount is required")
                 return
             
-            # Extract property ID from selection
-            property_selection = self.entries['property_id'].get()
-            property_name = property_selection.split(' - ')[0]
-            property_id = None
-            
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                
-                if property_name.startswith('Property #'):
-                    property_id = int(property_name.split('#')[1])
-                else:
-                    cursor.execute("SELECT id FROM properties WHERE name = ?", (property_name,))
-                    result = cursor.fetchone()
-                    if result:
-                        property_id = result[0]
-                
+            with write_connection(DB_FILE) as conn:
+                # Extract property ID from selection
+                property_id = PropertyRepo(conn).id_for_label(self.entries['property_id'].get())
                 if not property_id:
                     messagebox.showerror("Error", "Invalid property selection")
                     return
-            
-            # Get form data
-            data = {
-                'property_id': property_id,
-                'description': self.entries['description'].get().strip(),
-                'category': self.entries['category'].get() or None,
-                'amount': float(self.entries['amount'].get()),
-                'date': self.entries['date'].get().strip() or date.today().strftime("%Y-%m-%d"),
-                'paid_by': self.entries['paid_by'].get() or 'Landlord',
-                'invoice_number': self.entries['invoice_number'].get().strip() or None,
-                'notes': self.entries['notes'].get(1.0, tk.END).strip() or None
-            }
-            
-            if self.expense_id:
-                # Update existing expense
-                cursor.execute("""
-                    UPDATE expenses SET 
-                    property_id = ?, description = ?, category = ?, amount = ?, date = ?, 
-                    paid_by = ?, invoice_number = ?, notes = ?
-                    WHERE id = ?
-                """, (data['property_id'], data['description'], data['category'], data['amount'],
-                     data['date'], data['paid_by'], data['invoice_number'], data['notes'],
-                     self.expense_id))
-            else:
-                # Insert new expense
-                cursor.execute("""
-                    INSERT INTO expenses 
-                    (property_id, description, category, amount, date, paid_by, invoice_number, notes)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (data['property_id'], data['description'], data['category'], data['amount'],
-                     data['date'], data['paid_by'], data['invoice_number'], data['notes']))
-            
-            conn.commit()
+                
+                # Get form data
+                data = {
+                    'property_id': property_id,
+                    'description': self.entries['description'].get().strip(),
+                    'category': self.entries['category'].get() or None,
+                    'amount': Money.parse(self.entries['amount'].get()),
+                    'date': dates.optional(self.entries['date'].get()) or date.today().strftime("%Y-%m-%d"),
+                    'paid_by': self.entries['paid_by'].get() or 'Landlord',
+                    'invoice_number': self.entries['invoice_number'].get().strip() or None,
+                    'notes': self.entries['notes'].get(1.0, tk.END).strip() or None
+                }
+                
+                ExpenseRepo(conn).save(self.expense_id, **data)
             
             messagebox.showinfo("Success", "Expense saved successfully")
             self.dialog.destroy()
             self.expense_manager.load_expenses()
             
+        except dates.DateError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError as e:
             messagebox.showerror("Error", "Please enter valid numeric value for amount")
         except Exception as e:
@@ -510,19 +402,11 @@ class ExpenseDetailsDialog:
     def load_expense_details(self):
         """Load expense details"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
+            with read_connection(DB_FILE) as conn:
                 cursor = conn.cursor()
                 
                 # Get expense details
-                cursor.execute("""
-                    SELECT e.description, e.category, e.amount, e.date, e.paid_by, 
-                           e.invoice_number, e.notes, e.created_at,
-                           COALESCE(p.name, 'Property #' || p.id) as property_name,
-                           p.address
-                    FROM expenses e
-                    JOIN properties p ON e.property_id = p.id
-                    WHERE e.id = ?
-                """, (self.expense_id,))
+                statements.run(cursor, 'expenses.details', (self.expense_id,))
                 
                 expense_data = cursor.fetchone()
                 if expense_data:
@@ -532,7 +416,7 @@ Property: {expense_data[8]}
 Property Address: {expense_data[9]}
 Description: {expense_data[0]}
 Category: {expense_data[1] or 'N/A'}
-Amount: Rs {expense_data[2]:.2f}
+Amount: {Money(expense_data[2])}
 Date: {expense_data[3][:10] if expense_data[3] else 'N/A'}
 Paid By: {expense_data[4]}
 Invoice Number: {expense_data[5] or 'N/A'}
@@ -0,0 +1,289 @@
+"""Streaming CSV export of the main tables.
+
+Rows are pulled from the cursor in fixed-size batches and written through
+a buffered file, so memory use stays flat however large a table grows.
+The export is meant to run on a worker thread: progress is published on an
+ExportProgress object the Tk thread can poll, and setting its cancel flag
+stops the export between batches.
+
+With several workers, the database is first copied with the backup API so
+every table is read from the same point in time, and the tables are then
+written in parallel, each from its own connection to the copy.
+"""
+import csv
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import columnar
+from db import read_connection, write_connection
+
+EXPORT_TABLES = ('properties', 'tenants', 'leases', 'rent_payments', 'expenses', 'maintenance_requests')
+# Rows fetched from SQLite per round trip
+BATCH_SIZE = 1000
+# Bytes buffered before each write to disk
+BUFFER_SIZE = 1024 * 1024
+# Tables written at once.  SQLite and file writes release the GIL, so
+# workers overlap on multi-core machines; one core exports sequentially.
+EXPORT_WORKERS = min(4, os.cpu_count() or 1)
+# 'csv' for spreadsheets, 'columnar' for typed, compressed files (see columnar.py)
+EXPORT_FORMATS = ('csv', 'columnar')
+
+
+class ExportCancelled(Exception):
+    """Raised when an export is cancelled part way through"""
+
+
+class ExportProgress:
+    """Progress of a running export, shared between the worker and the UI"""
+
+    def __init__(self):
+        self.table = None
+        self.done = 0
+        self.total = 0
+        self.cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    def advance(self, table, rows):
+        """Record `rows` more rows written (safe to call from several workers)"""
+        with self._lock:
+            self.table = table
+            self.done += rows
+
+    def cancel(self):
+        self.cancelled.set()
+
+    @property
+    def fraction(self):
+        return self.done / self.total if self.total else 0
+
+
+def export_table(conn, table, path, batch_size=BATCH_SIZE, progress=None, where=None, params=(),
+                 columns='*'):
+    """Stream one table to a CSV file and return the number of rows written.
+
+    `where` and `params` optionally restrict the rows.  The file is written
+    under a temporary name and only renamed into place once complete, so a
+    failed or cancelled export never leaves a truncated CSV behind.
+    """
+    if table not in EXPORT_TABLES + ('deleted_rows',):
+        raise ValueError(f"Unknown table: {table}")
+
+    sql = f"SELECT {columns} FROM {table}"
+    if where:
+        sql += f" WHERE {where}"
+    cursor = conn.execute(sql, params)
+    partial = path + '.part'
+    rows = 0
+    try:
+        with open(partial, 'w', newline='', encoding='utf-8', buffering=BUFFER_SIZE) as f:
+            writer = csv.writer(f)
+            writer.writerow([column[0] for column in cursor.description])
+            while True:
+                if progress and progress.cancelled.is_set():
+                    raise ExportCancelled(f"Export cancelled while writing {table}")
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                writer.writerows(batch)
+                rows += len(batch)
+                if progress:
+                    progress.advance(table, len(batch))
+        os.replace(partial, path)
+    except BaseException:
+        cursor.close()
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return rows
+
+
+def snapshot(db_file, path):
+    """Copy the database to `path` as of a single point in time"""
+    with read_connection(db_file) as source:
+        target = sqlite3.connect(path)
+        try:
+            # One step copies every page inside a single read transaction
+            source.backup(target)
+            # The copy inherits WAL mode, which read-only connections can't open
+            target.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            target.close()
+
+
+def _write_table(conn, table, export_dir, batch_size, progress, fmt):
+    """Export one table to <export_dir>/<table>.<ext> in the given format"""
+    if fmt == 'columnar':
+        path = os.path.join(export_dir, table + columnar.file_extension())
+        return columnar.export_table(conn, table, path, batch_size, progress)
+    return export_table(conn, table, os.path.join(export_dir, f"{table}.csv"), batch_size, progress)
+
+
+def _export_from(path, table, export_dir, batch_size, progress, fmt='csv'):
+    """Export one table from a snapshot file; returns {'rows', 'duration_ms'}"""
+    start = time.perf_counter()
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    try:
+        rows = _write_table(conn, table, export_dir, batch_size, progress, fmt)
+    except BaseException:
+        # Stop the other workers too
+        if progress:
+            progress.cancel()
+        raise
+    finally:
+        conn.close()
+    return {'rows': rows, 'duration_ms': (time.perf_counter() - start) * 1000}
+
+
+def export_all(db_file, export_dir, tables=EXPORT_TABLES, batch_size=BATCH_SIZE, progress=None,
+               workers=EXPORT_WORKERS, fmt='csv'):
+    """Export each table to <export_dir>/<table>.csv from one consistent snapshot.
+
+    With fmt='columnar' each table is written as a typed, compressed
+    columnar file instead (see columnar.py).  Returns {table: {'rows': ..., 'duration_ms': ...}}.  With more than one
+    worker the tables are written in parallel from a backup copy of the
+    database; otherwise they are read in order inside one read transaction.
+    """
+    for table in tables:
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"Unknown table: {table}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if progress is None:
+        progress = ExportProgress()
+
+    if workers <= 1:
+        results = {}
+        with read_connection(db_file) as conn:
+            conn.execute("BEGIN")
+            progress.total = sum(_count_rows(conn, tables).values())
+            for table in tables:
+                start = time.perf_counter()
+                rows = _write_table(conn, table, export_dir, batch_size, progress, fmt)
+                results[table] = {'rows': rows, 'duration_ms': (time.perf_counter() - start) * 1000}
+        return results
+
+    fd, path = tempfile.mkstemp(prefix='.landlord-snapshot-', suffix='.db', dir=export_dir)
+    os.close(fd)
+    try:
+        snapshot(db_file, path)
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            counts = _count_rows(conn, tables)
+        finally:
+            conn.close()
+        progress.total = sum(counts.values())
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='landlord-export') as pool:
+            # Start the biggest tables first so they don't finish last on their own
+            futures = {table: pool.submit(_export_from, path, table, export_dir, batch_size, progress, fmt)
+                       for table in sorted(tables, key=counts.get, reverse=True)}
+            errors = []
+            results = {}
+            for table in tables:
+                try:
+                    results[table] = futures[table].result()
+                except BaseException as e:
+                    errors.append(e)
+        if errors:
+            # Prefer the error that caused the others to cancel
+            raise next((e for e in errors if not isinstance(e, ExportCancelled)), errors[0])
+        return results
+    finally:
+        os.remove(path)
+
+
+DELTA_JOB = 'delta_export'
+DELETED_FILE = 'deleted_rows.csv'
+
+
+def last_watermark(db_file):
+    """Return the watermark recorded by the last delta export, or None"""
+    with read_connection(db_file) as conn:
+        row = conn.execute("SELECT last_cutoff FROM job_state WHERE name = ?", (DELTA_JOB,)).fetchone()
+    return row[0] if row else None
+
+
+def export_changes(db_file, export_dir, since=None, tables=EXPORT_TABLES, batch_size=BATCH_SIZE,
+                   progress=None, record=True):
+    """Export only rows changed since a watermark.
+
+    Each table's inserted and updated rows (by updated_at) go to
+    <table>.csv, and rows deleted since the watermark go to
+    deleted_rows.csv as (table_name, row_id, deleted_at).  `since` defaults
+    to the watermark of the previous delta export; None exports everything.
+
+    The range is inclusive at the old watermark, so a row changed in the
+    same millisecond may be sent twice - consumers should apply rows as
+    upserts.  Returns {'since', 'watermark', 'tables', 'deleted'} and, if
+    `record` is set, stores the new watermark for the next run.
+    """
+    for table in tables:
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"Unknown table: {table}")
+    if since is None and record:
+        since = last_watermark(db_file)
+    since = since or ''
+    if progress is None:
+        progress = ExportProgress()
+
+    changed = "updated_at >= ? AND updated_at <= ?"
+    removed = "deleted_at >= ? AND deleted_at <= ? AND table_name IN (%s)" % ", ".join("?" * len(tables))
+
+    results = {}
+    with read_connection(db_file) as conn:
+        conn.execute("BEGIN")
+        # The newest change visible in this snapshot bounds every query
+        # below, so anything committed meanwhile waits for the next run
+        watermark = since
+        for table, column in [(table, 'updated_at') for table in tables] + [('deleted_rows', 'deleted_at')]:
+            value = conn.execute(f"SELECT MAX({column}) FROM {table}").fetchone()[0]
+            if value and value > watermark:
+                watermark = value
+
+        progress.total = sum(conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {changed}",
+                                          (since, watermark)).fetchone()[0] for table in tables)
+        progress.total += conn.execute(f"SELECT COUNT(*) FROM deleted_rows WHERE {removed}",
+                                       (since, watermark) + tuple(tables)).fetchone()[0]
+
+        for table in tables:
+            start = time.perf_counter()
+            rows = export_table(conn, table, os.path.join(export_dir, f"{table}.csv"), batch_size, progress,
+                                where=changed, params=(since, watermark))
+            results[table] = {'rows': rows, 'duration_ms': (time.perf_counter() - start) * 1000}
+
+        deleted = export_table(conn, 'deleted_rows', os.path.join(export_dir, DELETED_FILE), batch_size, progress,
+                               where=removed, params=(since, watermark) + tuple(tables),
+                               columns="table_name, row_id, deleted_at")
+
+    if record:
+        with write_connection(db_file) as conn:
+            conn.execute("""
+                INSERT INTO job_state (name, last_run_at, last_cutoff, last_rows)
+                VALUES (?, CURRENT_TIMESTAMP, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    last_run_at = excluded.last_run_at, last_cutoff = excluded.last_cutoff,
+                    last_rows = excluded.last_rows
+            """, (DELTA_JOB, watermark, sum(r['rows'] for r in results.values()) + deleted))
+    return {'since': since or None, 'watermark': watermark or None, 'tables': results, 'deleted': deleted}
+
+
+def prune_tombstones(conn, before):
+    """Delete tombstones older than `before` (every consumer has synced past it)"""
+    return conn.execute("DELETE FROM deleted_rows WHERE deleted_at < ?", (before,)).rowcount
+
+
+def _count_rows(conn, tables):
+    return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in tables}
+
+
+def format_summary(results):
+    """Describe an export's per-table row counts and throughput"""
+    lines = []
+    for table, result in results.items():
+        seconds = result['duration_ms'] / 1000
+        rate = result['rows'] / seconds if seconds > 0 else 0
+        lines.append(f"{table}: {result['rows']:,} rows in {seconds:.2f}s ({rate:,.0f} rows/s)")
+    return "\n".join(lines)
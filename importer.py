@@ -0,0 +1,531 @@
+"""Bulk CSV import of properties, tenants, leases and rent payments.
+
+Each file is streamed in chunks: rows are validated against the table's
+column types, NOT NULL columns and CHECK (... IN (...)) lists, references
+are resolved through in-memory maps built once per table, and the chunk is
+inserted with executemany.  Work is committed every COMMIT_ROWS rows, and
+rows that fail validation or a constraint are written with the reason to a
+rejects file next to the input instead of stopping the import.
+
+Re-running an interrupted import is safe: properties (name and address),
+tenants (national ID), leases (tenant, property and start date) and rent
+payments (lease and month) that already exist are rejected as duplicates.
+"""
+import csv
+import math
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+import dates
+import rollups
+from db import CHANGE_TIMESTAMP, MONEY_COLUMNS, write_connection
+from money import Money
+
+IMPORT_ORDER = ('properties', 'tenants', 'leases', 'rent_payments')
+# Rows validated and inserted per executemany
+CHUNK_SIZE = 5000
+# Rows per transaction
+COMMIT_ROWS = 100000
+# Files with at least this many rows are bulk loaded (see _suspend_indexes)
+BULK_ROWS = 100000
+REJECTS_SUFFIX = '.rejects.csv'
+# Extra columns of a rejects file; ignored on import so a corrected
+# rejects file can be imported again as it is
+REJECT_COLUMNS = ('line', 'error')
+
+# CSV columns accepted for each table
+IMPORT_COLUMNS = {
+    'properties': ('name', 'address', 'type', 'size', 'bedrooms', 'bathrooms', 'furnished',
+                   'rent_amount', 'deposit_amount', 'status'),
+    'tenants': ('property', 'name', 'phone', 'email', 'national_id', 'emergency_contact', 'notes'),
+    'leases': ('national_id', 'property', 'start_date', 'end_date', 'rent_amount', 'deposit_amount', 'status'),
+    'rent_payments': ('national_id', 'property', 'month', 'due_date', 'amount_due', 'amount_paid', 'status',
+                      'payment_date', 'payment_method', 'notes'),
+}
+
+# CSV columns holding a property name or address, or a tenant's national
+# ID, and the id column each resolves to
+REFERENCE_COLUMNS = {
+    'tenants': {'property': 'property_id'},
+    'leases': {'property': 'property_id', 'national_id': 'tenant_id'},
+    'rent_payments': {'property': 'property_id', 'national_id': 'tenant_id'},
+}
+
+_CHECK_IN = re.compile(r"CHECK\s*\(\s*(\w+)\s+IN\s*\(([^)]*)\)\s*\)", re.IGNORECASE)
+_QUOTED = re.compile(r"'((?:[^']|'')*)'")
+_MONTH = re.compile(r"\d{4}-(0[1-9]|1[0-2])")
+
+
+class ImportCancelled(Exception):
+    """Raised when an import is cancelled part way through"""
+
+
+def check_constraints(conn, table):
+    """Return {column: allowed values} for the CHECK (column IN (...)) lists of a table"""
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+    if row is None:
+        raise ValueError(f"Unknown table: {table}")
+    return {column: tuple(value.replace("''", "'") for value in _QUOTED.findall(values))
+            for column, values in _CHECK_IN.findall(row[0])}
+
+
+def _key(value):
+    return value.strip().casefold()
+
+
+class References:
+    """Lookups from CSV values to row ids, loaded once and reused for every row"""
+
+    def __init__(self, conn):
+        self.properties = {}
+        for property_id, name, address in conn.execute("SELECT id, name, address FROM properties"):
+            for value in {_key(name or ''), _key(address or '')} - {''}:
+                # A name or address shared by several properties can't be resolved
+                self.properties[value] = None if value in self.properties else property_id
+        self.tenants = {national_id.strip(): tenant_id for tenant_id, national_id in
+                        conn.execute("SELECT id, national_id FROM tenants WHERE national_id IS NOT NULL")}
+        # The latest lease wins when a tenant has rented a property more than once
+        self.leases = {(tenant_id, property_id): lease_id for lease_id, tenant_id, property_id in conn.execute(
+            "SELECT id, tenant_id, property_id FROM leases ORDER BY start_date, id")}
+
+    def property_id(self, value):
+        property_id = self.properties.get(_key(value), 0)
+        if property_id == 0:
+            raise ValueError(f"no property named {value!r}")
+        if property_id is None:
+            raise ValueError(f"{value!r} matches more than one property")
+        return property_id
+
+    def tenant_id(self, value):
+        try:
+            return self.tenants[value]
+        except KeyError:
+            raise ValueError(f"no tenant with national ID {value!r}") from None
+
+    def lease_id(self, tenant_id, property_id):
+        try:
+            return self.leases[tenant_id, property_id]
+        except KeyError:
+            raise ValueError("the tenant has no lease for this property") from None
+
+
+def _integer(raw):
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValueError(f"{raw!r} is not a whole number") from None
+
+
+def _real(raw):
+    try:
+        value = float(raw)
+    except ValueError:
+        raise ValueError(f"{raw!r} is not a number") from None
+    if not math.isfinite(value):
+        raise ValueError(f"{raw!r} is not a number")
+    return value
+
+
+def _money(raw):
+    # Files give amounts in rupees; the tables hold paisa
+    return Money.parse(raw).minor
+
+
+def _boolean(raw):
+    value = raw.casefold()
+    if value in ('1', 'true', 'yes', 'y'):
+        return 1
+    if value in ('0', 'false', 'no', 'n'):
+        return 0
+    raise ValueError(f"{raw!r} is not yes or no")
+
+
+def _date(raw):
+    return dates.to_iso(raw)
+
+
+def _month(raw):
+    if not _MONTH.fullmatch(raw):
+        raise ValueError(f"{raw!r} is not a YYYY-MM month")
+    return raw
+
+
+def _choice(allowed):
+    canonical = {value.casefold(): value for value in allowed}
+
+    def convert(raw):
+        try:
+            return canonical[raw.casefold()]
+        except KeyError:
+            raise ValueError(f"{raw!r} is not one of {', '.join(allowed)}") from None
+    return convert
+
+
+CONVERTERS = {'INTEGER': _integer, 'REAL': _real, 'BOOLEAN': _boolean, 'DATE': _date}
+# Columns whose format is narrower than their declared type
+COLUMN_CONVERTERS = {('rent_payments', 'month'): _month,
+                     **{(table, column): _money for table, columns in MONEY_COLUMNS.items() for column in columns}}
+
+
+def _plan(conn, table, header, references):
+    """Return (insert columns, steps) for a file's header.
+
+    Each step is (CSV index or None, column name, converter, required,
+    default) and produces one value of the staged row.
+    """
+    names = [name.strip().lower() for name in header]
+    unknown = set(names) - set(IMPORT_COLUMNS[table]) - set(REFERENCE_COLUMNS.get(table, {})) \
+        - set(REJECT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown columns for {table}: {', '.join(sorted(unknown))}")
+
+    info = {name: (declared.upper(), notnull, default)
+            for cid, name, declared, notnull, default, pk in conn.execute(f"PRAGMA table_info({table})")}
+    checks = check_constraints(conn, table)
+    references_for = REFERENCE_COLUMNS.get(table, {})
+
+    columns = []
+    steps = []
+    for name in IMPORT_COLUMNS[table]:
+        index = names.index(name) if name in names else None
+        if name in references_for:
+            column = references_for[name]
+            declared, notnull, default = info[column]
+            convert = references.property_id if column == 'property_id' else references.tenant_id
+            if notnull and index is None:
+                raise ValueError(f"Missing required column for {table}: {name}")
+            steps.append((index, name, convert, bool(notnull), None))
+            columns.append(column)
+            continue
+
+        declared, notnull, default = info[name]
+        if name in checks:
+            convert = _choice(checks[name])
+        else:
+            convert = COLUMN_CONVERTERS.get((table, name), CONVERTERS.get(declared, str))
+        if default is not None:
+            # Blank cells take the column default rather than NULL
+            default = conn.execute(f"SELECT {default}").fetchone()[0]
+        required = bool(notnull) and default is None
+        if required and index is None:
+            raise ValueError(f"Missing required column for {table}: {name}")
+        steps.append((index, name, convert, required, default))
+        columns.append(name)
+    return columns, steps
+
+
+def _check_dates(table, columns):
+    """Return a function that rejects a lease ending before it starts"""
+    if table != 'leases':
+        return lambda row: row
+    start, end = columns.index('start_date'), columns.index('end_date')
+
+    def check(row):
+        if row[end] is not None and row[end] < row[start]:
+            raise ValueError("end_date is before start_date")
+        return row
+    return check
+
+
+def _deduplicate(conn, table, columns):
+    """Return a function that rejects rows duplicating an existing or earlier row.
+
+    Tenants and rent payments are covered by unique indexes instead.
+    """
+    if table == 'properties':
+        seen = {(_key(name or ''), _key(address)) for name, address in
+                conn.execute("SELECT name, address FROM properties")}
+        name, address = columns.index('name'), columns.index('address')
+        key = lambda row: (_key(row[name] or ''), _key(row[address]))
+        message = "property already exists"
+    elif table == 'leases':
+        seen = set(conn.execute("SELECT tenant_id, property_id, start_date FROM leases"))
+        positions = [columns.index(column) for column in ('tenant_id', 'property_id', 'start_date')]
+        key = lambda row: tuple(row[i] for i in positions)
+        message = "lease already exists"
+    else:
+        return lambda row: row
+
+    def check(row):
+        value = key(row)
+        if value in seen:
+            raise ValueError(message)
+        seen.add(value)
+        return row
+    return check
+
+
+def _finish(table, columns, references):
+    """Return a function turning a staged row into the inserted tuple"""
+    if table != 'rent_payments':
+        return tuple
+    tenant, prop = columns.index('tenant_id'), columns.index('property_id')
+    return lambda row: (references.lease_id(row[tenant], row[prop]),) + tuple(row)
+
+
+def _insert_chunk(conn, table, sql, rows, sources, reject):
+    """Insert a chunk, rejecting rows that fail a constraint.
+
+    A failing row only undoes its own statement, so the rows before it
+    stay inserted.  New ids are always above the current maximum while we
+    hold the writer, so counting the rows above it tells us where the
+    chunk stopped; the ids themselves may skip values (AUTOINCREMENT
+    never reuses the ids of deleted rows).  The rest of the chunk is then
+    inserted row by row.  A savepoint per chunk would be simpler but makes
+    every insert about three times slower.
+    """
+    before = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+    try:
+        return conn.executemany(sql, rows).rowcount
+    except sqlite3.IntegrityError as e:
+        done = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE id > ?", (before,)).fetchone()[0]
+        reject(*sources[done], str(e))
+
+    inserted = done
+    for row, (line, record) in zip(rows[done + 1:], sources[done + 1:]):
+        try:
+            conn.execute(sql, row)
+            inserted += 1
+        except sqlite3.IntegrityError as e:
+            reject(line, record, str(e))
+    return inserted
+
+
+def _suspend_indexes(conn, table):
+    """Drop a table's non-unique indexes and rollup insert trigger for a bulk load.
+
+    Returns the statements that recreate them.  Building an index once
+    from sorted data is far cheaper than updating it for every row; the
+    unique indexes stay so duplicates are still caught.  Run inside the
+    load's transaction, so other connections never see the table without
+    its indexes.
+    """
+    unique = {row[1] for row in conn.execute(f"PRAGMA index_list({table})") if row[2]}
+    suspended = conn.execute("""
+        SELECT type, name, sql FROM sqlite_master
+        WHERE tbl_name = ? AND sql IS NOT NULL AND (type = 'index' OR name = ?)
+    """, (table, rollups.SOURCES.get(table, (None, None))[1])).fetchall()
+    statements = []
+    for kind, name, sql in suspended:
+        if name not in unique:
+            conn.execute(f"DROP {kind.upper()} {name}")
+            statements.append(sql)
+    return statements
+
+
+def rejects_path_for(path):
+    """Default rejects file for an input file: properties.csv -> properties.rejects.csv"""
+    root, ext = os.path.splitext(path)
+    return root + REJECTS_SUFFIX
+
+
+@contextmanager
+def _transaction(conn):
+    """Commit the block's work on `conn`, or roll it back on an error"""
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+
+def import_file(conn, table, path, rejects_path=None, references=None, chunk_size=CHUNK_SIZE,
+                commit_rows=COMMIT_ROWS, progress=None, bulk=None):
+    """Import one CSV file into `table`.
+
+    Returns {'rows', 'inserted', 'rejected', 'rejects_path', 'duration_ms'};
+    'rejects_path' is None when every row was imported.  Rows committed
+    before a cancellation or error are kept.
+
+    A bulk load (by default, files of BULK_ROWS rows or more) suspends the
+    table's secondary indexes and rollup trigger and runs as a single
+    transaction, so it is all or nothing.
+    """
+    return _import(lambda: _transaction(conn), table, path, rejects_path, references, chunk_size,
+                   commit_rows, progress, bulk)
+
+
+def _import(transaction, table, path, rejects_path, references, chunk_size, commit_rows, progress, bulk):
+    """import_file(), taking each transaction's connection from `transaction()`.
+
+    Rows are validated before the transaction they go into is started, so
+    when `transaction` takes the pooled writer, other threads can write
+    while the next rows are read.
+    """
+    if table not in IMPORT_ORDER:
+        raise ValueError(f"Unknown table: {table}")
+    start = time.perf_counter()
+    rejects_path = rejects_path or rejects_path_for(path)
+    if os.path.exists(rejects_path):
+        os.remove(rejects_path)
+
+    rejects = {'file': None, 'writer': None, 'count': 0}
+    rows = inserted = 0
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return {'rows': 0, 'inserted': 0, 'rejected': 0, 'rejects_path': None, 'duration_ms': 0}
+        with transaction() as conn:
+            references = references or References(conn)
+            columns, steps = _plan(conn, table, header, references)
+            deduplicate = _deduplicate(conn, table, columns)
+        check_dates = _check_dates(table, columns)
+        finish = _finish(table, columns, references)
+        if table == 'rent_payments':
+            columns = ['lease_id'] + columns
+        # Stamping updated_at here saves the change-tracking trigger an
+        # UPDATE of every inserted row
+        sql = (f"INSERT INTO {table} ({', '.join(columns)}, updated_at) "
+               f"VALUES ({', '.join('?' * len(columns))}, {CHANGE_TIMESTAMP})")
+        original = [name for name in header if name.strip().lower() not in REJECT_COLUMNS]
+        kept = [i for i, name in enumerate(header) if name.strip().lower() not in REJECT_COLUMNS]
+        line = 1
+
+        def reject(line, record, error):
+            if rejects['writer'] is None:
+                rejects['file'] = open(rejects_path, 'w', newline='', encoding='utf-8')
+                rejects['writer'] = csv.writer(rejects['file'])
+                rejects['writer'].writerow(original + list(REJECT_COLUMNS))
+            rejects['writer'].writerow([record[i] if i < len(record) else '' for i in kept] + [line, error])
+            rejects['count'] += 1
+
+        def read_chunk():
+            """Validate rows until chunk_size are staged; returns (rows read, staged rows, their sources)"""
+            nonlocal line
+            if progress and progress.cancelled.is_set():
+                raise ImportCancelled(f"Import cancelled while reading {os.path.basename(path)}")
+            read = 0
+            batch = []
+            sources = []
+            for record in reader:
+                line += 1
+                if not any(cell.strip() for cell in record):
+                    continue
+                try:
+                    values = []
+                    for index, name, convert, required, default in steps:
+                        raw = record[index].strip() if index is not None and index < len(record) else ''
+                        if not raw:
+                            if required:
+                                raise ValueError(f"{name} is required")
+                            values.append(default)
+                            continue
+                        try:
+                            values.append(convert(raw))
+                        except ValueError as e:
+                            raise ValueError(f"{name}: {e}") from None
+                    batch.append(finish(deduplicate(check_dates(values))))
+                    sources.append((line, record))
+                except ValueError as e:
+                    reject(line, record, str(e))
+                read += 1
+                if len(batch) >= chunk_size:
+                    break
+            return read, batch, sources
+
+        def insert(conn, chunk):
+            """Insert a chunk from read_chunk(); returns whether the file may have more rows"""
+            nonlocal rows, inserted
+            read, batch, sources = chunk
+            if batch:
+                inserted += _insert_chunk(conn, table, sql, batch, sources, reject)
+            rows += read
+            if progress:
+                progress.advance(table, read)
+            return len(batch) == chunk_size
+
+        if bulk is None:
+            bulk = count_rows(path) >= BULK_ROWS
+        try:
+            if bulk:
+                with transaction() as conn:
+                    if not conn.in_transaction:
+                        conn.execute("BEGIN")
+                    first_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                    suspended = _suspend_indexes(conn, table)
+                    while insert(conn, read_chunk()):
+                        pass
+                    for statement in suspended:
+                        conn.execute(statement)
+                    if table in rollups.SOURCES:
+                        rollups.add_rows(conn, table, "id > ?", (first_id,))
+            else:
+                more = True
+                while more:
+                    chunks = []
+                    staged = 0
+                    while more and staged < commit_rows:
+                        chunks.append(read_chunk())
+                        staged += len(chunks[-1][1])
+                        more = len(chunks[-1][1]) == chunk_size
+                    with transaction() as conn:
+                        if not conn.in_transaction:
+                            conn.execute("BEGIN")
+                        for chunk in chunks:
+                            insert(conn, chunk)
+        finally:
+            if rejects['file']:
+                rejects['file'].close()
+
+    return {'rows': rows, 'inserted': inserted, 'rejected': rejects['count'],
+            'rejects_path': rejects_path if rejects['count'] else None,
+            'duration_ms': (time.perf_counter() - start) * 1000}
+
+
+def count_rows(path):
+    """Count the data rows of a CSV file quickly (for progress); assumes no embedded newlines"""
+    lines = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            lines += block.count(b'\n')
+    return max(lines - 1, 0)
+
+
+def find_import_files(directory):
+    """Return {table: path} for each <table>.csv present in a directory"""
+    paths = {}
+    for table in IMPORT_ORDER:
+        path = os.path.join(directory, f"{table}.csv")
+        if os.path.exists(path):
+            paths[table] = path
+    return paths
+
+
+def import_files(db_file, paths, chunk_size=CHUNK_SIZE, commit_rows=COMMIT_ROWS, progress=None, bulk=None):
+    """Import {table: path} in dependency order; returns {table: result}.
+
+    Properties go first so tenants and leases can refer to them, and so
+    on; each table's lookups are reloaded after the tables before it.
+    Each transaction takes the pooled writer for itself, so the
+    application's own writes get in between them.  A bulk load holds the
+    writer for its whole file; pass bulk=False where that would block a
+    user.
+    """
+    for table in paths:
+        if table not in IMPORT_ORDER:
+            raise ValueError(f"Unknown table: {table}")
+    if progress is not None:
+        progress.total = sum(count_rows(path) for path in paths.values())
+
+    results = {}
+    for table in IMPORT_ORDER:
+        if table in paths:
+            results[table] = _import(lambda: write_connection(db_file), table, paths[table], None, None,
+                                     chunk_size, commit_rows, progress, bulk)
+    return results
+
+
+def format_summary(results):
+    """Describe an import's per-table counts and where rejected rows went"""
+    lines = []
+    for table, result in results.items():
+        line = f"{table}: {result['inserted']:,} of {result['rows']:,} rows imported"
+        if result['rejected']:
+            line += f", {result['rejected']:,} rejected (see {os.path.basename(result['rejects_path'])})"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1 @@
+"""Command-line entry point: python -m landlord --help (see __main__.py)"""
@@ -0,0 +1,203 @@
+"""Batch operations without the GUI, for cron jobs and headless servers.
+
+    python -m landlord generate-rent [--catch-up [--due-day N]]
+    python -m landlord sweep-overdue
+    python -m landlord export DIR [--format columnar | --changes]
+    python -m landlord report [NAME ...] [-o FILE]
+    python -m landlord import DIR
+    python -m landlord vacuum
+    python -m landlord backup [PATH]
+
+Nothing here imports tkinter, and each command imports only the modules it
+uses, so the process starts quickly.  Run from the application directory
+(the one holding schema.sql); --db selects another database file.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import date, datetime
+
+import db
+
+BACKUP_DIR = "backups"
+
+
+def _slug(title):
+    """'Rent Income Report' -> 'rent-income'"""
+    return title.lower().replace(' report', '').replace(' ', '-')
+
+
+def open_database(db_file):
+    """Bring an existing database up to date, as the application does on start"""
+    if not os.path.exists(db_file):
+        raise FileNotFoundError(f"No database at {db_file}; start the application once to create it")
+    with db.write_connection(db_file) as conn:
+        db.migrate(conn)
+
+
+def generate_rent(args):
+    from services import PaymentRepo
+
+    with db.write_connection(args.db) as conn:
+        if args.catch_up:
+            created = PaymentRepo(conn).schedule_rent(horizon=args.horizon, due_day=args.due_day)
+        else:
+            created = PaymentRepo(conn).generate_monthly_rent(today=args.horizon)
+    print(f"Generated {created} rent records")
+    return 0
+
+
+def sweep_overdue(args):
+    import billing
+
+    with db.write_connection(args.db) as conn:
+        result = billing.sweep_overdue(conn, full=args.full)
+    print(f"Marked {result['rows']} payments overdue in {result['duration_ms']:.0f} ms")
+    return 0
+
+
+def export(args):
+    import exporter
+
+    os.makedirs(args.directory, exist_ok=True)
+    if args.changes:
+        result = exporter.export_changes(args.db, args.directory)
+        print(f"Changes since {result['since'] or 'the beginning'} (up to {result['watermark'] or 'now'}):")
+        print(exporter.format_summary(result['tables']))
+        print(f"Deleted rows: {result['deleted']:,}")
+    else:
+        print(exporter.format_summary(exporter.export_all(args.db, args.directory, fmt=args.format)))
+    return 0
+
+
+def report(args):
+    import reports
+
+    builders = {_slug(title): builder for title, builder in reports.REPORTS}
+    names = args.names or list(builders)
+    unknown = [name for name in names if name not in builders]
+    if unknown:
+        raise ValueError(f"Unknown report {', '.join(unknown)}; choose from {', '.join(builders)}")
+
+    with db.read_connection(args.db) as conn:
+        text = "\n\n".join(builders[name](conn) for name in names)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+def import_data(args):
+    import importer
+
+    paths = importer.find_import_files(args.directory)
+    if not paths:
+        raise FileNotFoundError(f"No {', '.join(f'{table}.csv' for table in importer.IMPORT_ORDER)} "
+                                f"in {args.directory}")
+    results = importer.import_files(args.db, paths)
+    print(importer.format_summary(results))
+    # Rejected rows are worth a non-zero exit so a cron job reports them
+    return 1 if any(result['rejected'] for result in results.values()) else 0
+
+
+def vacuum(args):
+    before = os.path.getsize(args.db)
+    db.checkpoint(args.db, 'TRUNCATE')
+    with db.write_connection(args.db) as conn:
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA optimize")
+    db.checkpoint(args.db, 'TRUNCATE')
+    print(f"{args.db}: {before:,} -> {os.path.getsize(args.db):,} bytes")
+    return 0
+
+
+def backup(args):
+    import exporter
+
+    path = args.path or os.path.join(BACKUP_DIR, f"landlord-{datetime.now():%Y%m%d-%H%M%S}.db")
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} already exists")
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    exporter.snapshot(args.db, path)
+
+    copy = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        result = copy.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        copy.close()
+    if result != 'ok':
+        raise sqlite3.DatabaseError(f"Backup {path} failed its check: {result}")
+    print(f"Backed up {args.db} to {path} ({os.path.getsize(path):,} bytes)")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m landlord",
+                                     description="Landlord batch operations without the GUI")
+    parser.add_argument('--db', default=db.DB_FILE, help="database file (default: %(default)s)")
+    commands = parser.add_subparsers(dest='command', required=True, metavar='command')
+
+    command = commands.add_parser('generate-rent', help="create rent records for active leases")
+    command.add_argument('--catch-up', action='store_true',
+                         help="create every missing month since each lease started, not just this one")
+    command.add_argument('--horizon', type=date.fromisoformat, default=None,
+                         help="bill as of this YYYY-MM-DD date instead of today")
+    command.add_argument('--due-day', type=int, default=None,
+                         help="with --catch-up, rent is due on this day of the month")
+    command.set_defaults(handler=generate_rent)
+
+    command = commands.add_parser('sweep-overdue', help="mark past-due Pending and Partial rent Overdue")
+    command.add_argument('--full', action='store_true', help="check every row, not just recent ones")
+    command.set_defaults(handler=sweep_overdue)
+
+    command = commands.add_parser('export', help="export the tables to a directory")
+    command.add_argument('directory')
+    group = command.add_mutually_exclusive_group()
+    group.add_argument('--format', choices=('csv', 'columnar'), default='csv')
+    group.add_argument('--changes', action='store_true', help="only rows changed since the last --changes export")
+    command.set_defaults(handler=export)
+
+    command = commands.add_parser('report', help="print reports (default: all of them)")
+    command.add_argument('names', nargs='*', metavar='name',
+                         help="property-occupancy, rent-income, expense-analysis, overdue-rent, "
+                              "lease-expiration, maintenance-cost or financial-summary")
+    command.add_argument('-o', '--output', help="write to this file instead of standard output")
+    command.set_defaults(handler=report)
+
+    command = commands.add_parser('import', help="import <table>.csv files from a directory")
+    command.add_argument('directory')
+    command.set_defaults(handler=import_data)
+
+    command = commands.add_parser('vacuum', help="checkpoint the WAL and compact the database file")
+    command.set_defaults(handler=vacuum)
+
+    command = commands.add_parser('backup', help="copy the database consistently while it is in use")
+    command.add_argument('path', nargs='?', help=f"backup file (default: {BACKUP_DIR}/landlord-<time>.db)")
+    command.set_defaults(handler=backup)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, 'due_day', None) is not None and not args.catch_up:
+        parser.error("generate-rent: --due-day needs --catch-up")
+    try:
+        open_database(args.db)
+        return args.handler(args)
+    except BrokenPipeError:
+        # Output piped into e.g. head, which has exited; don't fail again flushing at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"landlord: error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.close_all()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
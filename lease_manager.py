@@ -1,10 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
 from datetime import datetime, date
-from db import DB_FILE
+import dates
+from db import DB_FILE, read_connection, write_connection
+import statements
+from money import Money
+from services import LeaseRepo, PropertyRepo, TenantRepo
+from listings import lease_pager
+from virtual_list import VirtualListMixin
 
-class LeaseManager:
+
+class LeaseManager(VirtualListMixin):
     def __init__(self, parent_frame):
         self.parent_frame = parent_frame
         self.setup_ui()
@@ -65,7 +71,8 @@ class LeaseManager:
         # Scrollbars
         v_scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.tree.yview)
         h_scrollbar = ttk.Scrollbar(list_frame, orient='horizontal', command=self.tree.xview)
-        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.tree.configure(xscrollcommand=h_scrollbar.set)
+        self.attach_virtual_scroll(v_scrollbar)
         
         # Pack treeview and scrollbars
         self.tree.pack(side='left', fill='both', expand=True)
@@ -88,58 +95,30 @@ class LeaseManager:
         
     def load_leases(self):
         """Load leases from database"""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                
-                # Get filter status
-                status_filter = self.status_filter.get()
-                
-                if status_filter == 'All':
-                    cursor.execute("""
-                        SELECT l.id, t.name, 
-                               COALESCE(p.name, 'Property #' || p.id) as property_name,
-                               l.start_date, l.end_date, l.rent_amount, l.status, l.created_at
-                        FROM leases l
-                        JOIN tenants t ON l.tenant_id = t.id
-                        JOIN properties p ON l.property_id = p.id
-                        ORDER BY l.created_at DESC
-                    """)
-                else:
-                    cursor.execute("""
-                        SELECT l.id, t.name, 
-                               COALESCE(p.name, 'Property #' || p.id) as property_name,
-                               l.start_date, l.end_date, l.rent_amount, l.status, l.created_at
-                        FROM leases l
-                        JOIN tenants t ON l.tenant_id = t.id
-                        JOIN properties p ON l.property_id = p.id
-                        WHERE l.status = ?
-                        ORDER BY l.created_at DESC
-                    """, (status_filter,))
-                
-                leases = cursor.fetchall()
-                
-                for lease in leases:
-                    # Format the data for display
-                    formatted_lease = list(lease)
-                    if formatted_lease[3]:  # start_date
-                        formatted_lease[3] = formatted_lease[3][:10]
-                    if formatted_lease[4]:  # end_date
-                        formatted_lease[4] = formatted_lease[4][:10]
-                    if formatted_lease[5]:  # rent_amount
-                        formatted_lease[5] = f"Rs {formatted_lease[5]:.2f}"
-                    if formatted_lease[7]:  # created_at
-                        formatted_lease[7] = formatted_lease[7][:10]
-                    
-                    self.tree.insert('', 'end', values=formatted_lease)
+            pager = lease_pager(self.status_filter.get())
+            self.show_rows(pager, self.format_lease, DB_FILE, on_error=self.show_load_error)
                     
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load leases: {str(e)}")
             
+    def show_load_error(self, error):
+        """Report a failed background load"""
+        messagebox.showerror("Error", f"Failed to load leases: {str(error)}")
+        
+    def format_lease(self, lease):
+        """Format a lease row for display"""
+        formatted_lease = list(lease)
+        if formatted_lease[3]:  # start_date
+            formatted_lease[3] = formatted_lease[3][:10]
+        if formatted_lease[4]:  # end_date
+            formatted_lease[4] = formatted_lease[4][:10]
+        if formatted_lease[5]:  # rent_amount
+            formatted_lease[5] = str(Money(formatted_lease[5]))
+        if formatted_lease[7]:  # created_at
+            formatted_lease[7] = formatted_lease[7][:10]
+        return formatted_lease
+            
     def filter_leases(self, event=None):
         """Filter leases by status"""
         self.load_leases()
@@ -185,10 +164,8 @@ class LeaseManager:
                               f"Are you sure you want to terminate the lease for '{tenant_name}'?\n\n"
                               "This will mark the lease as terminated."):
             try:
-                with sqlite3.connect(DB_FILE) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("UPDATE leases SET status = 'Terminated' WHERE id = ?", (lease_id,))
-                    conn.commit()
+                with write_connection(DB_FILE) as conn:
+                    LeaseRepo(conn).terminate(lease_id)
                     
                 messagebox.showinfo("Success", "Lease terminated successfully")
                 self.load_leases()
@@ -279,16 +256,8 @@ class LeaseDialog:
     def load_tenant_options(self, combobox):
         """Load tenant options for dropdown"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, name FROM tenants ORDER BY name")
-                tenants = cursor.fetchall()
-                
-                tenant_options = []
-                for tenant in tenants:
-                    tenant_options.append(f"{tenant[1]} (ID: {tenant[0]})")
-                
-                combobox['values'] = tenant_options
+            with read_connection(DB_FILE) as conn:
+                combobox['values'] = TenantRepo(conn).labels()
                 
         except Exception as e:
             print(f"Error loading tenant options: {e}")
@@ -296,17 +265,8 @@ class LeaseDialog:
     def load_property_options(self, combobox):
         """Load property options for dropdown"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, name, address FROM properties ORDER BY name")
-                properties = cursor.fetchall()
-                
-                property_options = []
-                for prop in properties:
-                    prop_name = prop[1] if prop[1] else f"Property #{prop[0]}"
-                    property_options.append(f"{prop_name} - {prop[2]}")
-                
-                combobox['values'] = property_options
+            with read_connection(DB_FILE) as conn:
+                combobox['values'] = PropertyRepo(conn).labels()
                 
         except Exception as e:
             print(f"Error loading property options: {e}")
@@ -314,34 +274,25 @@ class LeaseDialog:
     def load_lease_data(self):
         """Load existing lease data for editing"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT l.tenant_id, l.property_id, l.start_date, l.end_date, 
-                           l.rent_amount, l.deposit_amount, l.status
-                    FROM leases l WHERE l.id = ?
-                """, (self.lease_id,))
+            with read_connection(DB_FILE) as conn:
+                lease = LeaseRepo(conn).get(self.lease_id)
                 
-                data = cursor.fetchone()
-                if data:
+                if lease:
                     field_names = ['tenant_id', 'property_id', 'start_date', 'end_date',
                                  'rent_amount', 'deposit_amount', 'status']
                     
-                    for i, field_name in enumerate(field_names):
-                        if data[i] is not None:
-                            if field_name in ['tenant_id', 'property_id']:
-                                # Load the display value for combobox
-                                if field_name == 'tenant_id':
-                                    cursor.execute("SELECT name FROM tenants WHERE id = ?", (data[i],))
-                                    tenant_name = cursor.fetchone()[0]
-                                    self.entries[field_name].set(f"{tenant_name} (ID: {data[i]})")
-                                else:
-                                    cursor.execute("SELECT name, address FROM properties WHERE id = ?", (data[i],))
-                                    prop_data = cursor.fetchone()
-                                    prop_name = prop_data[0] if prop_data[0] else f"Property #{data[i]}"
-                                    self.entries[field_name].set(f"{prop_name} - {prop_data[1]}")
+                    for field_name in field_names:
+                        value = getattr(lease, field_name)
+                        if value is not None:
+                            # Load the display value for comboboxes
+                            if field_name == 'tenant_id':
+                                self.entries[field_name].set(TenantRepo(conn).label(value))
+                            elif field_name == 'property_id':
+                                self.entries[field_name].set(PropertyRepo(conn).label(value))
+                            elif field_name in ('rent_amount', 'deposit_amount'):
+                                self.entries[field_name].set(str(value.rupees))
                             else:
-                                self.entries[field_name].set(str(data[i]))
+                                self.entries[field_name].set(str(value))
                                 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load lease data: {str(e)}")
@@ -367,62 +318,36 @@ class LeaseDialog:
                 return
             
             # Extract IDs from selections
-            tenant_selection = self.entries['tenant_id'].get()
-            tenant_id = int(tenant_selection.split('(ID: ')[1].rstrip(')'))
-            
-            property_selection = self.entries['property_id'].get()
-            property_name = property_selection.split(' - ')[0]
+            tenant_id = TenantRepo.id_for_label(self.entries['tenant_id'].get())
             
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
+            with write_connection(DB_FILE) as conn:
+                property_id = PropertyRepo(conn).id_for_label(self.entries['property_id'].get())
+                if not property_id:
+                    messagebox.showerror("Error", "Invalid property selection")
+                    return
                 
-                if property_name.startswith('Property #'):
-                    property_id = int(property_name.split('#')[1])
-                else:
-                    cursor.execute("SELECT id FROM properties WHERE name = ?", (property_name,))
-                    result = cursor.fetchone()
-                    if result:
-                        property_id = result[0]
-                    else:
-                        messagebox.showerror("Error", "Invalid property selection")
-                        return
-            
-            # Get form data
-            data = {
-                'tenant_id': tenant_id,
-                'property_id': property_id,
-                'start_date': self.entries['start_date'].get().strip(),
-                'end_date': self.entries['end_date'].get().strip() or None,
-                'rent_amount': float(self.entries['rent_amount'].get()),
-                'deposit_amount': float(self.entries['deposit_amount'].get()) if self.entries['deposit_amount'].get().strip() else 0,
-                'status': self.entries['status'].get()
-            }
-            
-            if self.lease_id:
-                # Update existing lease
-                cursor.execute("""
-                    UPDATE leases SET 
-                    tenant_id = ?, property_id = ?, start_date = ?, end_date = ?, 
-                    rent_amount = ?, deposit_amount = ?, status = ?
-                    WHERE id = ?
-                """, (data['tenant_id'], data['property_id'], data['start_date'], data['end_date'],
-                     data['rent_amount'], data['deposit_amount'], data['status'],
-                     self.lease_id))
-            else:
-                # Insert new lease
-                cursor.execute("""
-                    INSERT INTO leases 
-                    (tenant_id, property_id, start_date, end_date, rent_amount, deposit_amount, status)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (data['tenant_id'], data['property_id'], data['start_date'], data['end_date'],
-                     data['rent_amount'], data['deposit_amount'], data['status']))
-            
-            conn.commit()
+                # Get form data
+                data = {
+                    'tenant_id': tenant_id,
+                    'property_id': property_id,
+                    'start_date': dates.to_iso(self.entries['start_date'].get()),
+                    'end_date': dates.optional(self.entries['end_date'].get()),
+                    'rent_amount': Money.parse(self.entries['rent_amount'].get()),
+                    'deposit_amount': Money.parse(self.entries['deposit_amount'].get()) if self.entries['deposit_amount'].get().strip() else Money(0),
+                    'status': self.entries['status'].get()
+                }
+                if data['end_date'] and data['end_date'] < data['start_date']:
+                    messagebox.showerror("Error", "End date cannot be before the start date")
+                    return
+                
+                LeaseRepo(conn).save(self.lease_id, **data)
             
             messagebox.showinfo("Success", "Lease saved successfully")
             self.dialog.destroy()
             self.lease_manager.load_leases()
             
+        except dates.DateError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError as e:
             messagebox.showerror("Error", "Please enter valid numeric values for amounts")
         except Exception as e:
@@ -479,20 +404,11 @@ class LeaseDetailsDialog:
     def load_lease_details(self):
         """Load lease details and payment history"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
+            with read_connection(DB_FILE) as conn:
                 cursor = conn.cursor()
                 
                 # Get lease details
-                cursor.execute("""
-                    SELECT l.start_date, l.end_date, l.rent_amount, l.deposit_amount, l.status, l.created_at,
-                           t.name as tenant_name, 
-                           COALESCE(p.name, 'Property #' || p.id) as property_name,
-                           p.address
-                    FROM leases l
-                    JOIN tenants t ON l.tenant_id = t.id
-                    JOIN properties p ON l.property_id = p.id
-                    WHERE l.id = ?
-                """, (self.lease_id,))
+                statements.run(cursor, 'leases.details', (self.lease_id,))
                 
                 lease_data = cursor.fetchone()
                 if lease_data:
@@ -503,8 +419,8 @@ Property: {lease_data[7]}
 Property Address: {lease_data[8]}
 Start Date: {lease_data[0][:10] if lease_data[0] else 'N/A'}
 End Date: {lease_data[1][:10] if lease_data[1] else 'N/A'}
-Rent Amount: Rs {lease_data[2]:.2f}
-Deposit Amount: Rs {lease_data[3]:.2f}
+Rent Amount: {Money(lease_data[2])}
+Deposit Amount: {Money(lease_data[3] or 0)}
 Status: {lease_data[4]}
 Created: {lease_data[5][:10] if lease_data[5] else 'N/A'}
                     """.strip()
@@ -515,11 +431,7 @@ Created: {lease_data[5][:10] if lease_data[5] else 'N/A'}
                     self.info_text.config(state='disabled')
                 
                 # Get payment history
-                cursor.execute("""
-                    SELECT month, due_date, amount_due, amount_paid, status, payment_date
-                    FROM rent_payments WHERE lease_id = ?
-                    ORDER BY due_date DESC
-                """, (self.lease_id,))
+                statements.run(cursor, 'leases.payments', (self.lease_id,))
                 
                 payments = cursor.fetchall()
                 
@@ -528,9 +440,9 @@ Created: {lease_data[5][:10] if lease_data[5] else 'N/A'}
                     if formatted_payment[1]:  # due_date
                         formatted_payment[1] = formatted_payment[1][:10]
                     if formatted_payment[2]:  # amount_due
-                        formatted_payment[2] = f"Rs {formatted_payment[2]:.2f}"
+                        formatted_payment[2] = str(Money(formatted_payment[2]))
                     if formatted_payment[3]:  # amount_paid
-                        formatted_payment[3] = f"Rs {formatted_payment[3]:.2f}"
+                        formatted_payment[3] = str(Money(formatted_payment[3]))
                     if formatted_payment[5]:  # payment_date
                         formatted_payment[5] = formatted_payment[5][:10]
                     
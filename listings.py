@@ -0,0 +1,213 @@
+"""The list screens' queries, without Tkinter.
+
+Each manager shows one of these pagers, built from its filters' choices,
+through VirtualListMixin; the benchmarks time the same pagers without
+opening a window.
+"""
+
+# Rows fetched per query
+PAGE_SIZE = 200
+
+
+class KeysetPager:
+    """Keyset (seek) pagination over a fixed ordering.
+
+    `order_by` lists the sort expressions, ending with a unique column such
+    as the table's id so every row has a distinct key.  Pages continue from
+    the key of the last row seen instead of using OFFSET, so each page
+    costs the same however far down the list it is.
+    """
+
+    def __init__(self, columns, source, order_by, where=None, params=None, descending=True):
+        self.columns = columns
+        self.source = source
+        self.order_by = tuple(order_by)
+        self.where = list(where or [])
+        self.params = list(params or [])
+        self.descending = descending
+        # SQL text by (bounded, backwards), built once so every page sends
+        # the same statement and reuses its compiled form
+        self._sql = {}
+
+    def sql(self, bounded, backwards):
+        """The page query, with or without a key to continue from"""
+        key = (bounded, backwards)
+        if key not in self._sql:
+            keys = ", ".join(self.order_by)
+            where = list(self.where)
+            if bounded:
+                op = '<' if self.descending != backwards else '>'
+                placeholders = ", ".join("?" * len(self.order_by))
+                # The redundant bound on the leading key lets SQLite turn the
+                # row-value comparison into an index range search even when
+                # the key is an expression
+                where.append(f"{self.order_by[0]} {op}= ?")
+                where.append(f"({keys}) {op} ({placeholders})")
+
+            # Walking backwards reads the preceding rows in reverse order
+            direction = 'DESC' if self.descending != backwards else 'ASC'
+            sql = f"SELECT {self.columns}, {keys} FROM {self.source}"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            sql += " ORDER BY " + ", ".join(f"{key} {direction}" for key in self.order_by)
+            self._sql[key] = sql + " LIMIT ?"
+        return self._sql[key]
+
+    def page(self, conn, after=None, before=None, limit=PAGE_SIZE):
+        """Return up to `limit` (values, key) pairs in display order.
+
+        With `after`, rows following that key; with `before`, the rows
+        immediately preceding it; otherwise the first page.
+        """
+        backwards = before is not None
+        bound = after if after is not None else before
+        params = list(self.params)
+        if bound is not None:
+            params.append(bound[0])
+            params.extend(bound)
+        params.append(limit)
+
+        width = len(self.order_by)
+        rows = [(row[:-width], tuple(row[-width:]))
+                for row in conn.execute(self.sql(bound is not None, backwards), params)]
+        if backwards:
+            rows.reverse()
+        return rows
+
+
+def property_pager(status='All'):
+    """The properties list, newest first; `status` is the filter's choice"""
+    where, params = [], []
+    if status != 'All':
+        where.append("status = ?")
+        params.append(status)
+    
+    # id follows creation order and is the primary key
+    return KeysetPager(
+        columns="id, name, address, type, size, rent_amount, status, created_at",
+        source="properties",
+        order_by=("id",),
+        where=where, params=params)
+
+
+def tenant_pager(property_id=None):
+    """The tenants list, newest first, optionally for a single property"""
+    where, params = [], []
+    if property_id is not None:
+        where.append("t.property_id = ?")
+        params.append(property_id)
+    
+    # id follows creation order and is the primary key
+    return KeysetPager(
+        columns="""t.id, t.name, 
+                   COALESCE(p.name, 'Property #' || p.id) as property_name,
+                   t.phone, t.email, t.emergency_contact, t.created_at""",
+        source="tenants t LEFT JOIN properties p ON t.property_id = p.id",
+        order_by=("t.id",),
+        where=where, params=params)
+
+
+def lease_pager(status='All'):
+    """The leases list, newest first; `status` is the filter's choice"""
+    where, params = [], []
+    if status != 'All':
+        where.append("l.status = ?")
+        params.append(status)
+    
+    # id follows creation order and is the primary key
+    return KeysetPager(
+        columns="""l.id, t.name, 
+                   COALESCE(p.name, 'Property #' || p.id) as property_name,
+                   l.start_date, l.end_date, l.rent_amount, l.status, l.created_at""",
+        source="""leases l
+                  JOIN tenants t ON l.tenant_id = t.id
+                  JOIN properties p ON l.property_id = p.id""",
+        order_by=("l.id",),
+        where=where, params=params)
+
+
+def payment_pager(status='All'):
+    """The rent payments list, latest due date first; `status` is the filter's choice"""
+    where, params = [], []
+    if status != 'All':
+        where.append("rp.status = ?")
+        params.append(status)
+    
+    return KeysetPager(
+        columns="""rp.id, t.name, 
+                   COALESCE(p.name, 'Property #' || p.id) as property_name,
+                   rp.month, rp.due_date, rp.amount_due, rp.amount_paid, 
+                   rp.status, rp.payment_date""",
+        source="""rent_payments rp
+                  JOIN tenants t ON rp.tenant_id = t.id
+                  JOIN properties p ON rp.property_id = p.id""",
+        order_by=("rp.due_date", "rp.id"),
+        where=where, params=params)
+
+
+def expense_pager(property_label='All Properties', category='All'):
+    """The expenses list, newest first; the arguments are the filters' choices"""
+    where, params = [], []
+    if property_label != 'All Properties':
+        property_name = property_label.split(' - ')[0]
+        if property_name.startswith('Property #'):
+            where.append("e.property_id = ?")
+            params.append(int(property_name.split('#')[1]))
+        else:
+            where.append("p.name = ?")
+            params.append(property_name)
+    
+    if category != 'All':
+        where.append("e.category = ?")
+        params.append(category)
+    
+    return KeysetPager(
+        columns="""e.id, 
+                   COALESCE(p.name, 'Property #' || p.id) as property_name,
+                   e.description, e.category, e.amount, e.date, e.paid_by, e.invoice_number""",
+        source="expenses e JOIN properties p ON e.property_id = p.id",
+        order_by=("COALESCE(e.date, '')", "e.id"),
+        where=where, params=params)
+
+
+def maintenance_pager(property_label='All Properties', status='All'):
+    """The maintenance requests list, newest first; the arguments are the filters' choices"""
+    where, params = [], []
+    if property_label != 'All Properties':
+        property_name = property_label.split(' - ')[0]
+        if property_name.startswith('Property #'):
+            where.append("mr.property_id = ?")
+            params.append(int(property_name.split('#')[1]))
+        else:
+            where.append("p.name = ?")
+            params.append(property_name)
+    
+    if status != 'All':
+        where.append("mr.status = ?")
+        params.append(status)
+    
+    return KeysetPager(
+        columns="""mr.id, 
+                   COALESCE(p.name, 'Property #' || p.id) as property_name,
+                   COALESCE(t.name, 'N/A') as tenant_name,
+                   mr.request_date, mr.description, mr.status, 
+                   mr.cost_estimate, mr.actual_cost""",
+        source="""maintenance_requests mr
+                  JOIN properties p ON mr.property_id = p.id
+                  LEFT JOIN tenants t ON mr.tenant_id = t.id""",
+        order_by=("COALESCE(mr.request_date, '')", "mr.id"),
+        where=where, params=params)
+
+
+def document_pager(related_type=None):
+    """The documents list, newest first, optionally of one type"""
+    where, params = [], []
+    if related_type:
+        where.append("related_type = ?")
+        params.append(related_type)
+    
+    return KeysetPager(
+        columns="id, related_type, related_id, COALESCE(file_name, file_path), description, uploaded_at",
+        source="documents",
+        order_by=("COALESCE(uploaded_at, '')", "id"),
+        where=where, params=params)
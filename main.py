@@ -1,11 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
 import hashlib
 import os
 from datetime import datetime, date
 import calendar
-from db import init_db, DB_FILE
+import background
+import billing
+import reports
+import statements
+from money import Money
+from search_bar import SearchBar
+from db import init_db, close_all, checkpoint, CHECKPOINT_INTERVAL_MS, DB_FILE, read_connection, write_connection
 
 class PropertyManagementApp:
     def __init__(self):
@@ -37,6 +42,8 @@ class PropertyManagementApp:
         # Create main frames
         self.login_frame = None
         self.main_frame = None
+        self.checkpoint_job = None
+        self.sweep_job = None
         
         # Start with login
         self.show_login()
@@ -137,19 +144,18 @@ class PropertyManagementApp:
             return
             
         try:
-            with sqlite3.connect(DB_FILE) as conn:
+            with write_connection(DB_FILE) as conn:
                 cursor = conn.cursor()
                 
                 # Check if admin already exists
-                cursor.execute("SELECT id FROM admin WHERE username = ?", (username,))
+                statements.run(cursor, 'admin.find', (username,))
                 if cursor.fetchone():
                     messagebox.showerror("Error", "Admin account already exists")
                     return
                 
                 # Create admin account
                 password_hash = self.hash_password(password)
-                cursor.execute("INSERT INTO admin (username, password_hash) VALUES (?, ?)", 
-                             (username, password_hash))
+                statements.run(cursor, 'admin.add', (username, password_hash))
                 conn.commit()
                 
                 messagebox.showinfo("Success", "Admin account created successfully!")
@@ -167,12 +173,11 @@ class PropertyManagementApp:
             return
             
         try:
-            with sqlite3.connect(DB_FILE) as conn:
+            with read_connection(DB_FILE) as conn:
                 cursor = conn.cursor()
                 password_hash = self.hash_password(password)
                 
-                cursor.execute("SELECT id, username FROM admin WHERE username = ? AND password_hash = ?", 
-                             (username, password_hash))
+                statements.run(cursor, 'admin.login', (username, password_hash))
                 user = cursor.fetchone()
                 
                 if user:
@@ -200,9 +205,32 @@ class PropertyManagementApp:
         self.content_frame = tk.Frame(self.main_frame, bg='white')
         self.content_frame.pack(fill='both', expand=True, padx=10, pady=10)
         
+        # Bring overdue statuses up to date before the dashboard counts them
+        self.sweep_overdue(full=True)
+        
         # Show dashboard by default
         self.show_dashboard()
         
+        # Keep the WAL file small while the app is in use
+        self.checkpoint_job = self.root.after(CHECKPOINT_INTERVAL_MS, self.periodic_checkpoint)
+        
+    def periodic_checkpoint(self):
+        """Run a passive WAL checkpoint and schedule the next one"""
+        try:
+            checkpoint(DB_FILE)
+        except Exception as e:
+            print(f"Checkpoint failed: {str(e)}")
+        self.checkpoint_job = self.root.after(CHECKPOINT_INTERVAL_MS, self.periodic_checkpoint)
+        
+    def sweep_overdue(self, full=False):
+        """Mark past-due rent as Overdue and schedule the next sweep"""
+        try:
+            with write_connection(DB_FILE) as conn:
+                billing.sweep_overdue(conn, full=full)
+        except Exception as e:
+            print(f"Overdue sweep failed: {str(e)}")
+        self.sweep_job = self.root.after(billing.SWEEP_INTERVAL_MS, self.sweep_overdue)
+        
     def create_menu_bar(self):
         """Create retro-styled navigation menu"""
         menu_frame = tk.Frame(self.main_frame, bg=self.colors['surface'], height=60)
@@ -228,7 +256,8 @@ class PropertyManagementApp:
             ("📉 Expenses", self.show_expenses, self.colors['primary']),
             ("📂 Documents", self.show_documents, self.colors['accent']),
             ("🔧 Maintenance", self.show_maintenance, self.colors['secondary']),
-            ("📈 Reports", self.show_reports, self.colors['purple'])
+            ("📈 Reports", self.show_reports, self.colors['purple']),
+            ("🩺 Diagnostics", self.show_diagnostics, self.colors['accent'])
         ]
         
         for text, command, color in buttons:
@@ -247,10 +276,48 @@ class PropertyManagementApp:
                               padx=15, pady=8)
         logout_btn.pack(side='right', padx=10)
         
+        # Global search across tenants, properties, expenses and maintenance
+        search_frame = tk.Frame(self.main_frame, bg=self.colors['surface'])
+        search_frame.pack(fill='x')
+        
+        tk.Label(search_frame, text="🔍 Search:", 
+                font=('Courier', 9, 'bold'), 
+                bg=self.colors['surface'], 
+                fg=self.colors['gold']).pack(side='left', padx=(10, 5), pady=(0, 8))
+        
+        self.search_bar = SearchBar(search_frame, self.open_search_result, width=50,
+                                    font=('Courier', 10), bg='white', fg=self.colors['text_dark'])
+        self.search_bar.pack(side='left', pady=(0, 8))
+        
+    def open_search_result(self, kind, record_id):
+        """Show the screen a search result belongs to and open its details"""
+        if kind == 'Tenant':
+            self.show_tenants()
+            from tenant_manager import TenantDetailsDialog
+            TenantDetailsDialog(self.content_frame, record_id)
+        elif kind == 'Property':
+            self.show_properties()
+            from property_manager import PropertyDetailsDialog
+            PropertyDetailsDialog(self.content_frame, record_id)
+        elif kind == 'Expense':
+            self.show_expenses()
+            from expense_manager import ExpenseDetailsDialog
+            ExpenseDetailsDialog(self.content_frame, record_id)
+        elif kind == 'Maintenance':
+            self.show_maintenance()
+            from maintenance_manager import MaintenanceDetailsDialog
+            MaintenanceDetailsDialog(self.content_frame, record_id)
+        
     def logout(self):
         """Handle logout"""
         self.current_user = None
         self.is_logged_in = False
+        for job in (self.checkpoint_job, self.sweep_job):
+            if job:
+                self.root.after_cancel(job)
+        self.checkpoint_job = None
+        self.sweep_job = None
+        checkpoint(DB_FILE, 'TRUNCATE')
         self.show_login()
         
     def clear_content(self):
@@ -281,99 +348,58 @@ class PropertyManagementApp:
         cards_frame.pack(fill='x', pady=20)
         
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                
-                # Get summary data
-                cursor.execute("SELECT COUNT(*) FROM properties")
-                total_properties = cursor.fetchone()[0]
-                
-                cursor.execute("SELECT COUNT(*) FROM properties WHERE status = 'Occupied'")
-                occupied_properties = cursor.fetchone()[0]
-                
-                cursor.execute("SELECT COUNT(*) FROM tenants")
-                total_tenants = cursor.fetchone()[0]
-                
-                cursor.execute("SELECT COUNT(*) FROM maintenance_requests WHERE status = 'Open'")
-                open_maintenance = cursor.fetchone()[0]
-                
-                # Get financial data
-                cursor.execute("SELECT SUM(amount_paid) FROM rent_payments WHERE status = 'Paid'")
-                total_income = cursor.fetchone()[0] or 0
-                
-                cursor.execute("SELECT SUM(amount) FROM expenses")
-                total_expenses = cursor.fetchone()[0] or 0
-                
-                # Get overdue payments
-                cursor.execute("SELECT COUNT(*) FROM rent_payments WHERE status = 'Overdue'")
-                overdue_payments = cursor.fetchone()[0]
-                
-                # Create retro-styled summary cards
-                cards = [
-                    ("🏠 Total Properties", total_properties, self.colors['primary']),
-                    ("✅ Occupied Properties", occupied_properties, self.colors['accent']),
-                    ("👥 Total Tenants", total_tenants, self.colors['secondary']),
-                    ("🔧 Open Maintenance", open_maintenance, self.colors['purple']),
-                    ("💰 Total Income", f"Rs {total_income:.2f}", self.colors['gold']),
-                    ("📉 Total Expenses", f"Rs {total_expenses:.2f}", self.colors['primary']),
-                    ("⚠️ Overdue Payments", overdue_payments, self.colors['primary']),
-                    ("📈 Net Profit", f"Rs {total_income - total_expenses:.2f}", self.colors['accent'])
-                ]
-                
-                for i, (title, value, color) in enumerate(cards):
-                    card = tk.Frame(cards_frame, bg=color, relief='raised', bd=3)
-                    card.grid(row=i//4, column=i%4, padx=8, pady=8, sticky='ew')
-                    cards_frame.grid_columnconfigure(i%4, weight=1)
-                    
-                    tk.Label(card, text=str(value), font=('Courier', 18, 'bold'), 
-                            bg=color, fg='white').pack(pady=10)
-                    tk.Label(card, text=title, font=('Courier', 9, 'bold'), 
-                            bg=color, fg='white').pack(pady=2)
-                
-                # Recent activity section with retro styling
-                activity_frame = tk.LabelFrame(self.content_frame, 
-                                             text="📋 RECENT ACTIVITY", 
-                                             bg=self.colors['surface'],
-                                             fg=self.colors['gold'],
-                                             font=('Courier', 12, 'bold'))
-                activity_frame.pack(fill='both', expand=True, pady=20)
-                
-                # Recent payments
-                cursor.execute("""
-                    SELECT t.name, rp.amount_paid, rp.payment_date, rp.status
-                    FROM rent_payments rp
-                    JOIN tenants t ON rp.tenant_id = t.id
-                    ORDER BY rp.payment_date DESC
-                    LIMIT 5
-                """)
-                recent_payments = cursor.fetchall()
-                
-                payments_text = "Recent Payments:\n"
-                for payment in recent_payments:
-                    payments_text += f"• {payment[0]}: Rs {payment[1]:.2f} ({payment[2][:10]}) - {payment[3]}\n"
-                
-                # Recent maintenance requests
-                cursor.execute("""
-                    SELECT mr.description, mr.status, mr.request_date
-                    FROM maintenance_requests mr
-                    ORDER BY mr.request_date DESC
-                    LIMIT 5
-                """)
-                recent_maintenance = cursor.fetchall()
-                
-                maintenance_text = "\nRecent Maintenance Requests:\n"
-                for maintenance in recent_maintenance:
-                    maintenance_text += f"• {maintenance[0][:50]}... ({maintenance[2][:10]}) - {maintenance[1]}\n"
-                
-                activity_text = payments_text + maintenance_text
+            # One indexed summary query, cached until the next write
+            summary, recent_payments, recent_maintenance = reports.dashboard_data(DB_FILE)
+            total_income = Money(summary['total_income'])
+            total_expenses = Money(summary['total_expenses'])
+            
+            # Create retro-styled summary cards
+            cards = [
+                ("🏠 Total Properties", summary['total_properties'], self.colors['primary']),
+                ("✅ Occupied Properties", summary['occupied_properties'], self.colors['accent']),
+                ("👥 Total Tenants", summary['total_tenants'], self.colors['secondary']),
+                ("🔧 Open Maintenance", summary['open_maintenance'], self.colors['purple']),
+                ("💰 Total Income", str(total_income), self.colors['gold']),
+                ("📉 Total Expenses", str(total_expenses), self.colors['primary']),
+                ("⚠️ Overdue Payments", summary['overdue_payments'], self.colors['primary']),
+                ("📈 Net Profit", str(total_income - total_expenses), self.colors['accent'])
+            ]
+            
+            for i, (title, value, color) in enumerate(cards):
+                card = tk.Frame(cards_frame, bg=color, relief='raised', bd=3)
+                card.grid(row=i//4, column=i%4, padx=8, pady=8, sticky='ew')
+                cards_frame.grid_columnconfigure(i%4, weight=1)
                 
-                activity_display = tk.Text(activity_frame, height=10, wrap='word', state='disabled',
-                                          bg=self.colors['background'], fg=self.colors['text'],
-                                          font=('Courier', 10))
-                activity_display.pack(fill='both', expand=True, padx=10, pady=10)
-                activity_display.config(state='normal')
-                activity_display.insert(1.0, activity_text)
-                activity_display.config(state='disabled')
+                tk.Label(card, text=str(value), font=('Courier', 18, 'bold'), 
+                        bg=color, fg='white').pack(pady=10)
+                tk.Label(card, text=title, font=('Courier', 9, 'bold'), 
+                        bg=color, fg='white').pack(pady=2)
+            
+            # Recent activity section with retro styling
+            activity_frame = tk.LabelFrame(self.content_frame, 
+                                         text="📋 RECENT ACTIVITY", 
+                                         bg=self.colors['surface'],
+                                         fg=self.colors['gold'],
+                                         font=('Courier', 12, 'bold'))
+            activity_frame.pack(fill='both', expand=True, pady=20)
+            
+            payments_text = "Recent Payments:\n"
+            for payment in recent_payments:
+                payments_text += f"• {payment[0]}: {Money(payment[1] or 0)} ({payment[2][:10]}) - {payment[3]}\n"
+            
+            maintenance_text = "\nRecent Maintenance Requests:\n"
+            for maintenance in recent_maintenance:
+                maintenance_text += f"• {maintenance[0][:50]}... ({maintenance[2][:10]}) - {maintenance[1]}\n"
+            
+            activity_text = payments_text + maintenance_text
+            
+            activity_display = tk.Text(activity_frame, height=10, wrap='word', state='disabled',
+                                      bg=self.colors['background'], fg=self.colors['text'],
+                                      font=('Courier', 10))
+            activity_display.pack(fill='both', expand=True, padx=10, pady=10)
+            activity_display.config(state='normal')
+            activity_display.insert(1.0, activity_text)
+            activity_display.config(state='disabled')
                     
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load dashboard: {str(e)}")
@@ -426,9 +452,20 @@ class PropertyManagementApp:
         from reports_manager import ReportsManager
         ReportsManager(self.content_frame)
         
+    def show_diagnostics(self):
+        """Show query timing diagnostics"""
+        self.clear_content()
+        from diagnostics_manager import DiagnosticsManager
+        DiagnosticsManager(self.content_frame)
+        
     def run(self):
         """Start the application"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            # Stop background loads, then release pooled database connections
+            background.shutdown()
+            close_all()
 
 if __name__ == "__main__":
     app = PropertyManagementApp()
@@ -1,10 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
 from datetime import datetime, date
-from db import DB_FILE
+import dates
+from db import DB_FILE, read_connection, write_connection
+import statements
+from money import Money, display
+from services import MaintenanceRepo, PropertyRepo, TenantRepo
+from listings import maintenance_pager
+from virtual_list import VirtualListMixin
 
-class MaintenanceManager:
+
+class MaintenanceManager(VirtualListMixin):
     def __init__(self, parent_frame):
         self.parent_frame = parent_frame
         self.setup_ui()
@@ -78,7 +84,8 @@ class MaintenanceManager:
         # Scrollbars
         v_scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.tree.yview)
         h_scrollbar = ttk.Scrollbar(list_frame, orient='horizontal', command=self.tree.xview)
-        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.tree.configure(xscrollcommand=h_scrollbar.set)
+        self.attach_virtual_scroll(v_scrollbar)
         
         # Pack treeview and scrollbars
         self.tree.pack(side='left', fill='both', expand=True)
@@ -104,17 +111,8 @@ class MaintenanceManager:
     def load_property_list(self):
         """Load property list for filter dropdown"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, name, address FROM properties ORDER BY name")
-                properties = cursor.fetchall()
-                
-                property_list = ['All Properties']
-                for prop in properties:
-                    prop_name = prop[1] if prop[1] else f"Property #{prop[0]}"
-                    property_list.append(f"{prop_name} - {prop[2]}")
-                
-                self.property_filter['values'] = property_list
+            with read_connection(DB_FILE) as conn:
+                self.property_filter['values'] = ['All Properties'] + PropertyRepo(conn).labels()
                 self.property_filter.set('All Properties')
                 
         except Exception as e:
@@ -122,42 +120,25 @@ class MaintenanceManager:
             
     def load_requests(self):
         """Load maintenance requests from database"""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT mr.id, 
-                           COALESCE(p.name, 'Property #' || p.id) as property_name,
-                           COALESCE(t.name, 'N/A') as tenant_name,
-                           mr.request_date, mr.description, mr.status, 
-                           mr.cost_estimate, mr.actual_cost
-                    FROM maintenance_requests mr
-                    JOIN properties p ON mr.property_id = p.id
-                    LEFT JOIN tenants t ON mr.tenant_id = t.id
-                    ORDER BY mr.request_date DESC
-                """)
-                
-                requests = cursor.fetchall()
-                
-                for request in requests:
-                    # Format the data for display
-                    formatted_request = list(request)
-                    if formatted_request[3]:  # request_date
-                        formatted_request[3] = formatted_request[3][:10]
-                    if formatted_request[6]:  # cost_estimate
-                        formatted_request[6] = f"Rs {formatted_request[6]:.2f}"
-                    if formatted_request[7]:  # actual_cost
-                        formatted_request[7] = f"Rs {formatted_request[7]:.2f}"
-                    
-                    self.tree.insert('', 'end', values=formatted_request)
-                    
+            self.show_rows(maintenance_pager(), self.format_request, DB_FILE, on_error=self.show_load_error)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load maintenance requests: {str(e)}")
+        
+    def show_load_error(self, error):
+        """Report a failed background load"""
+        messagebox.showerror("Error", f"Failed to load maintenance requests: {str(error)}")
+        
+    def format_request(self, request):
+        """Format a maintenance request row for display"""
+        formatted_request = list(request)
+        if formatted_request[3]:  # request_date
+            formatted_request[3] = formatted_request[3][:10]
+        if formatted_request[6]:  # cost_estimate
+            formatted_request[6] = str(Money(formatted_request[6]))
+        if formatted_request[7]:  # actual_cost
+            formatted_request[7] = str(Money(formatted_request[7]))
+        return formatted_request
             
     def load_all_requests(self):
         """Load all requests (clear filters)"""
@@ -167,60 +148,9 @@ class MaintenanceManager:
         
     def filter_requests(self, event=None):
         """Filter requests by property and status"""
-        selected_property = self.property_filter.get()
-        selected_status = self.status_filter.get()
-        
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                
-                # Build query based on filters
-                query = """
-                    SELECT mr.id, 
-                           COALESCE(p.name, 'Property #' || p.id) as property_name,
-                           COALESCE(t.name, 'N/A') as tenant_name,
-                           mr.request_date, mr.description, mr.status, 
-                           mr.cost_estimate, mr.actual_cost
-                    FROM maintenance_requests mr
-                    JOIN properties p ON mr.property_id = p.id
-                    LEFT JOIN tenants t ON mr.tenant_id = t.id
-                    WHERE 1=1
-                """
-                params = []
-                
-                if selected_property != 'All Properties':
-                    property_name = selected_property.split(' - ')[0]
-                    if property_name.startswith('Property #'):
-                        property_id = int(property_name.split('#')[1])
-                        query += " AND mr.property_id = ?"
-                        params.append(property_id)
-                    else:
-                        query += " AND p.name = ?"
-                        params.append(property_name)
-                
-                if selected_status != 'All':
-                    query += " AND mr.status = ?"
-                    params.append(selected_status)
-                
-                query += " ORDER BY mr.request_date DESC"
-                
-                cursor.execute(query, params)
-                requests = cursor.fetchall()
-                
-                for request in requests:
-                    formatted_request = list(request)
-                    if formatted_request[3]:  # request_date
-                        formatted_request[3] = formatted_request[3][:10]
-                    if formatted_request[6]:  # cost_estimate
-                        formatted_request[6] = f"Rs {formatted_request[6]:.2f}"
-                    if formatted_request[7]:  # actual_cost
-                        formatted_request[7] = f"Rs {formatted_request[7]:.2f}"
-                    
-                    self.tree.insert('', 'end', values=formatted_request)
+            pager = maintenance_pager(self.property_filter.get(), self.status_filter.get())
+            self.show_rows(pager, self.format_request, DB_FILE, on_error=self.show_load_error)
                     
         except Exception as e:
             messagebox.showerror("Error", f"Failed to filter requests: {str(e)}")
@@ -278,10 +208,8 @@ class MaintenanceManager:
         if messagebox.askyesno("Confirm Delete", 
                               f"Are you sure you want to delete the request '{description}'?"):
             try:
-                with sqlite3.connect(DB_FILE) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("DELETE FROM maintenance_requests WHERE id = ?", (request_id,))
-                    conn.commit()
+                with write_connection(DB_FILE) as conn:
+                    MaintenanceRepo(conn).delete(request_id)
                     
                 messagebox.showinfo("Success", "Maintenance request deleted successfully")
                 self.load_requests()
@@ -380,17 +308,8 @@ class MaintenanceDialog:
     def load_property_options(self, combobox):
         """Load property options for dropdown"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, name, address FROM properties ORDER BY name")
-                properties = cursor.fetchall()
-                
-                property_options = []
-                for prop in properties:
-                    prop_name = prop[1] if prop[1] else f"Property #{prop[0]}"
-                    property_options.append(f"{prop_name} - {prop[2]}")
-                
-                combobox['values'] = property_options
+            with read_connection(DB_FILE) as conn:
+                combobox['values'] = PropertyRepo(conn).labels()
                 
         except Exception as e:
             print(f"Error loading property options: {e}")
@@ -398,16 +317,8 @@ class MaintenanceDialog:
     def load_tenant_options(self, combobox):
         """Load tenant options for dropdown"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, name FROM tenants ORDER BY name")
-                tenants = cursor.fetchall()
-                
-                tenant_options = ['No Tenant']
-                for tenant in tenants:
-                    tenant_options.append(f"{tenant[1]} (ID: {tenant[0]})")
-                
-                combobox['values'] = tenant_options
+            with read_connection(DB_FILE) as conn:
+                combobox['values'] = ['No Tenant'] + TenantRepo(conn).labels()
                 combobox.set('No Tenant')
                 
         except Exception as e:
@@ -416,39 +327,29 @@ class MaintenanceDialog:
     def load_request_data(self):
         """Load existing request data for editing"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT mr.property_id, mr.tenant_id, mr.request_date, mr.description, 
-                           mr.status, mr.cost_estimate, mr.actual_cost, mr.completed_date, mr.notes
-                    FROM maintenance_requests mr WHERE mr.id = ?
-                """, (self.request_id,))
+            with read_connection(DB_FILE) as conn:
+                request = MaintenanceRepo(conn).get(self.request_id)
                 
-                data = cursor.fetchone()
-                if data:
+                if request:
                     field_names = ['property_id', 'tenant_id', 'request_date', 'description',
                                  'status', 'cost_estimate', 'actual_cost', 'completed_date', 'notes']
                     
-                    for i, field_name in enumerate(field_names):
-                        if data[i] is not None:
+                    for field_name in field_names:
+                        value = getattr(request, field_name)
+                        if value is not None:
                             if field_name == 'property_id':
                                 # Load the display value for combobox
-                                cursor.execute("SELECT name, address FROM properties WHERE id = ?", (data[i],))
-                                prop_data = cursor.fetchone()
-                                if prop_data:
-                                    prop_name = prop_data[0] if prop_data[0] else f"Property #{data[i]}"
-                                    self.entries[field_name].set(f"{prop_name} - {prop_data[1]}")
+                                prop_label = PropertyRepo(conn).label(value)
+                                if prop_label:
+                                    self.entries[field_name].set(prop_label)
                             elif field_name == 'tenant_id':
-                                if data[i]:
-                                    cursor.execute("SELECT name FROM tenants WHERE id = ?", (data[i],))
-                                    tenant_name = cursor.fetchone()[0]
-                                    self.entries[field_name].set(f"{tenant_name} (ID: {data[i]})")
-                                else:
-                                    self.entries[field_name].set('No Tenant')
+                                self.entries[field_name].set(TenantRepo(conn).label(value) or 'No Tenant')
                             elif field_name in ['description', 'notes']:
-                                self.entries[field_name].insert(1.0, str(data[i]))
+                                self.entries[field_name].insert(1.0, str(value))
+                            elif field_name in ('cost_estimate', 'actual_cost'):
+                                self.entries[field_name].set(str(value.rupees))
                             else:
-                                self.entries[field_name].set(str(data[i]))
+                                self.entries[field_name].set(str(value))
                                 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load request data: {str(e)}")
@@ -465,72 +366,40 @@ class MaintenanceDialog:
                 messagebox.showerror("Error", "Description is required")
                 return
             
-            # Extract property ID from selection
-            property_selection = self.entries['property_id'].get()
-            property_name = property_selection.split(' - ')[0]
-            property_id = None
-            
             # Extract tenant ID from selection
             tenant_selection = self.entries['tenant_id'].get()
             tenant_id = None
             if tenant_selection != 'No Tenant':
-                tenant_id = int(tenant_selection.split('(ID: ')[1].rstrip(')'))
+                tenant_id = TenantRepo.id_for_label(tenant_selection)
             
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                
-                if property_name.startswith('Property #'):
-                    property_id = int(property_name.split('#')[1])
-                else:
-                    cursor.execute("SELECT id FROM properties WHERE name = ?", (property_name,))
-                    result = cursor.fetchone()
-                    if result:
-                        property_id = result[0]
-                
+            with write_connection(DB_FILE) as conn:
+                # Extract property ID from selection
+                property_id = PropertyRepo(conn).id_for_label(self.entries['property_id'].get())
                 if not property_id:
                     messagebox.showerror("Error", "Invalid property selection")
                     return
-            
-            # Get form data
-            data = {
-                'property_id': property_id,
-                'tenant_id': tenant_id,
-                'request_date': self.entries['request_date'].get().strip() or date.today().strftime("%Y-%m-%d"),
-                'description': self.entries['description'].get(1.0, tk.END).strip(),
-                'status': self.entries['status'].get(),
-                'cost_estimate': float(self.entries['cost_estimate'].get()) if self.entries['cost_estimate'].get().strip() else None,
-                'actual_cost': float(self.entries['actual_cost'].get()) if self.entries['actual_cost'].get().strip() else None,
-                'completed_date': self.entries['completed_date'].get().strip() or None,
-                'notes': self.entries['notes'].get(1.0, tk.END).strip() or None
-            }
-            
-            if self.request_id:
-                # Update existing request
-                cursor.execute("""
-                    UPDATE maintenance_requests SET 
-                    property_id = ?, tenant_id = ?, request_date = ?, description = ?, 
-                    status = ?, cost_estimate = ?, actual_cost = ?, completed_date = ?, notes = ?
-                    WHERE id = ?
-                """, (data['property_id'], data['tenant_id'], data['request_date'], data['description'],
-                     data['status'], data['cost_estimate'], data['actual_cost'], data['completed_date'],
-                     data['notes'], self.request_id))
-            else:
-                # Insert new request
-                cursor.execute("""
-                    INSERT INTO maintenance_requests 
-                    (property_id, tenant_id, request_date, description, status, 
-                     cost_estimate, actual_cost, completed_date, notes)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (data['property_id'], data['tenant_id'], data['request_date'], data['description'],
-                     data['status'], data['cost_estimate'], data['actual_cost'], data['completed_date'],
-                     data['notes']))
-            
-            conn.commit()
+                
+                # Get form data
+                data = {
+                    'property_id': property_id,
+                    'tenant_id': tenant_id,
+                    'request_date': dates.optional(self.entries['request_date'].get()) or date.today().strftime("%Y-%m-%d"),
+                    'description': self.entries['description'].get(1.0, tk.END).strip(),
+                    'status': self.entries['status'].get(),
+                    'cost_estimate': Money.parse(self.entries['cost_estimate'].get()) if self.entries['cost_estimate'].get().strip() else None,
+                    'actual_cost': Money.parse(self.entries['actual_cost'].get()) if self.entries['actual_cost'].get().strip() else None,
+                    'completed_date': dates.optional(self.entries['completed_date'].get()),
+                    'notes': self.entries['notes'].get(1.0, tk.END).strip() or None
+                }
+                
+                MaintenanceRepo(conn).save(self.request_id, **data)
             
             messagebox.showinfo("Success", "Maintenance request saved successfully")
             self.dialog.destroy()
             self.maintenance_manager.load_requests()
             
+        except dates.DateError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError as e:
             messagebox.showerror("Error", "Please enter valid numeric values for costs")
         except Exception as e:
@@ -620,22 +489,18 @@ class StatusUpdateDialog:
             
             if new_status == 'Completed':
                 if self.actual_cost_entry.get().strip():
-                    actual_cost = float(self.actual_cost_entry.get())
-                completed_date = self.completed_date_entry.get().strip() or date.today().strftime("%Y-%m-%d")
+                    actual_cost = Money.parse(self.actual_cost_entry.get())
+                completed_date = dates.optional(self.completed_date_entry.get()) or date.today().strftime("%Y-%m-%d")
             
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    UPDATE maintenance_requests 
-                    SET status = ?, actual_cost = ?, completed_date = ?
-                    WHERE id = ?
-                """, (new_status, actual_cost, completed_date, self.request_id))
-                conn.commit()
+            with write_connection(DB_FILE) as conn:
+                MaintenanceRepo(conn).set_status(self.request_id, new_status, actual_cost, completed_date)
             
             messagebox.showinfo("Success", "Status updated successfully")
             self.dialog.destroy()
             self.maintenance_manager.load_requests()
             
+        except dates.DateError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError as e:
             messagebox.showerror("Error", "Please enter valid numeric value for actual cost")
         except Exception as e:
@@ -678,20 +543,11 @@ class MaintenanceDetailsDialog:
     def load_request_details(self):
         """Load request details"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
+            with read_connection(DB_FILE) as conn:
                 cursor = conn.cursor()
                 
                 # Get request details
-                cursor.execute("""
-                    SELECT mr.request_date, mr.description, mr.status, mr.cost_estimate, 
-                           mr.actual_cost, mr.completed_date, mr.notes,
-                           COALESCE(p.name, 'Property #' || p.id) as property_name,
-                           p.address, COALESCE(t.name, 'N/A') as tenant_name
-                    FROM maintenance_requests mr
-                    JOIN properties p ON mr.property_id = p.id
-                    LEFT JOIN tenants t ON mr.tenant_id = t.id
-                    WHERE mr.id = ?
-                """, (self.request_id,))
+                statements.run(cursor, 'maintenance.details', (self.request_id,))
                 
                 request_data = cursor.fetchone()
                 if request_data:
@@ -703,8 +559,8 @@ Tenant: {request_data[9]}
 Request Date: {request_data[0][:10] if request_data[0] else 'N/A'}
 Status: {request_data[2]}
 Description: {request_data[1]}
-Cost Estimate: Rs {request_data[3]:.2f if request_data[3] else 'N/A'}
-Actual Cost: Rs {request_data[4]:.2f if request_data[4] else 'N/A'}
+Cost Estimate: {display(request_data[3])}
+Actual Cost: {display(request_data[4])}
 Completed Date: {request_data[5][:10] if request_data[5] else 'N/A'}
 Notes: {request_data[6] or 'N/A'}
                     """.strip()
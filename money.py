@@ -0,0 +1,114 @@
+"""Money held as whole paisa.
+
+Every amount column stores integer paisa (migration 11), so SUMs are exact
+integer arithmetic and no total drifts by fractions of a rupee.  Money
+converts at the edges: parsing what the user typed and formatting for
+display.  Money values can be passed straight to sqlite3 as parameters.
+"""
+import sqlite3
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import total_ordering
+
+# Paisa per rupee
+MINOR_UNITS = 100
+SYMBOL = "Rs"
+
+
+@total_ordering
+class Money:
+    """An amount of money in whole paisa"""
+
+    __slots__ = ('minor',)
+
+    def __init__(self, minor=0):
+        if isinstance(minor, bool) or not isinstance(minor, int):
+            raise TypeError(f"Money takes whole paisa, not {minor!r}")
+        self.minor = minor
+
+    @classmethod
+    def parse(cls, text):
+        """Read an amount in rupees as typed, e.g. '1250.5', '1,250.50' or 'Rs 1250'.
+
+        Raises ValueError for anything that isn't an amount; values finer
+        than a paisa are rounded half up.
+        """
+        cleaned = str(text).strip().replace(',', '')
+        if cleaned[:len(SYMBOL)].lower() == SYMBOL.lower():
+            cleaned = cleaned[len(SYMBOL):].strip()
+        try:
+            rupees = Decimal(cleaned)
+        except InvalidOperation:
+            raise ValueError(f"{text!r} is not an amount") from None
+        if not rupees.is_finite():
+            raise ValueError(f"{text!r} is not an amount")
+        return cls(int((rupees * MINOR_UNITS).to_integral_value(ROUND_HALF_UP)))
+
+    @classmethod
+    def from_rupees(cls, value):
+        """Money from a float or int number of rupees, as stored before migration 11"""
+        return cls.parse(repr(value))
+
+    @property
+    def rupees(self):
+        """The amount in rupees as an exact Decimal, e.g. Decimal('1250.50')"""
+        return Decimal(self.minor).scaleb(-2)
+
+    def prorate(self, part, whole):
+        """This amount times part/whole, rounded half up to the paisa"""
+        numerator = 2 * self.minor * part + whole
+        return Money(numerator // (2 * whole))
+
+    def __add__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.minor + other.minor)
+
+    def __radd__(self, other):
+        # Lets sum() start from its default 0
+        if other == 0:
+            return self
+        return NotImplemented
+
+    def __sub__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.minor - other.minor)
+
+    def __neg__(self):
+        return Money(-self.minor)
+
+    def __bool__(self):
+        return self.minor != 0
+
+    def __eq__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.minor == other.minor
+
+    def __lt__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.minor < other.minor
+
+    def __hash__(self):
+        return hash(self.minor)
+
+    def __format__(self, spec):
+        # Format specs apply to the rupee amount: f"RS{amount:.2f}"
+        if not spec:
+            return str(self)
+        return format(self.rupees, spec)
+
+    def __str__(self):
+        return f"{SYMBOL} {self.rupees}"
+
+    def __repr__(self):
+        return f"Money({self.minor})"
+
+
+def display(minor, missing='N/A'):
+    """Format a stored amount for display, or `missing` when there is none"""
+    return missing if minor is None else str(Money(minor))
+
+
+sqlite3.register_adapter(Money, lambda money: money.minor)
@@ -1,11 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
-from datetime import datetime, date
-import calendar
-from db import DB_FILE
+import dates
+from db import DB_FILE, read_connection, write_connection
+import statements
+from money import Money
+from services import LeaseRepo, PaymentRepo
+from listings import payment_pager
+from virtual_list import VirtualListMixin
 
-class PaymentManager:
+
+class PaymentManager(VirtualListMixin):
     def __init__(self, parent_frame):
         self.parent_frame = parent_frame
         self.setup_ui()
@@ -40,6 +44,8 @@ class PaymentManager:
         
         tk.Button(filter_frame, text="Generate Monthly Rent", command=self.generate_monthly_rent,
                  bg='#FF9800', fg='white', padx=15).pack(side='left', padx=(0, 10))
+        tk.Button(filter_frame, text="Catch Up Rent", command=self.catch_up_rent,
+                 bg='#FF9800', fg='white', padx=15).pack(side='left', padx=(0, 10))
         tk.Button(filter_frame, text="Refresh", command=self.load_payments,
                  bg='#2196F3', fg='white').pack(side='right')
         
@@ -68,7 +74,8 @@ class PaymentManager:
         # Scrollbars
         v_scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.tree.yview)
         h_scrollbar = ttk.Scrollbar(list_frame, orient='horizontal', command=self.tree.xview)
-        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.tree.configure(xscrollcommand=h_scrollbar.set)
+        self.attach_virtual_scroll(v_scrollbar)
         
         # Pack treeview and scrollbars
         self.tree.pack(side='left', fill='both', expand=True)
@@ -91,60 +98,30 @@ class PaymentManager:
         
     def load_payments(self):
         """Load payments from database"""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                
-                # Get filter status
-                status_filter = self.status_filter.get()
-                
-                if status_filter == 'All':
-                    cursor.execute("""
-                        SELECT rp.id, t.name, 
-                               COALESCE(p.name, 'Property #' || p.id) as property_name,
-                               rp.month, rp.due_date, rp.amount_due, rp.amount_paid, 
-                               rp.status, rp.payment_date
-                        FROM rent_payments rp
-                        JOIN tenants t ON rp.tenant_id = t.id
-                        JOIN properties p ON rp.property_id = p.id
-                        ORDER BY rp.due_date DESC
-                    """)
-                else:
-                    cursor.execute("""
-                        SELECT rp.id, t.name, 
-                               COALESCE(p.name, 'Property #' || p.id) as property_name,
-                               rp.month, rp.due_date, rp.amount_due, rp.amount_paid, 
-                               rp.status, rp.payment_date
-                        FROM rent_payments rp
-                        JOIN tenants t ON rp.tenant_id = t.id
-                        JOIN properties p ON rp.property_id = p.id
-                        WHERE rp.status = ?
-                        ORDER BY rp.due_date DESC
-                    """, (status_filter,))
-                
-                payments = cursor.fetchall()
-                
-                for payment in payments:
-                    # Format the data for display
-                    formatted_payment = list(payment)
-                    if formatted_payment[4]:  # due_date
-                        formatted_payment[4] = formatted_payment[4][:10]
-                    if formatted_payment[5]:  # amount_due
-                        formatted_payment[5] = f"Rs {formatted_payment[5]:.2f}"
-                    if formatted_payment[6]:  # amount_paid
-                        formatted_payment[6] = f"Rs {formatted_payment[6]:.2f}"
-                    if formatted_payment[8]:  # payment_date
-                        formatted_payment[8] = formatted_payment[8][:10]
-                    
-                    self.tree.insert('', 'end', values=formatted_payment)
+            pager = payment_pager(self.status_filter.get())
+            self.show_rows(pager, self.format_payment, DB_FILE, on_error=self.show_load_error)
                     
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load payments: {str(e)}")
             
+    def show_load_error(self, error):
+        """Report a failed background load"""
+        messagebox.showerror("Error", f"Failed to load payments: {str(error)}")
+        
+    def format_payment(self, payment):
+        """Format a payment row for display"""
+        formatted_payment = list(payment)
+        if formatted_payment[4]:  # due_date
+            formatted_payment[4] = formatted_payment[4][:10]
+        if formatted_payment[5]:  # amount_due
+            formatted_payment[5] = str(Money(formatted_payment[5]))
+        if formatted_payment[6]:  # amount_paid
+            formatted_payment[6] = str(Money(formatted_payment[6]))
+        if formatted_payment[8]:  # payment_date
+            formatted_payment[8] = formatted_payment[8][:10]
+        return formatted_payment
+            
     def filter_payments(self, event=None):
         """Filter payments by status"""
         self.load_payments()
@@ -152,60 +129,34 @@ class PaymentManager:
     def generate_monthly_rent(self):
         """Generate monthly rent due for all active leases"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                
-                # Get current month and year
-                current_date = date.today()
-                current_month = current_date.strftime("%Y-%m")
-                
-                # Get all active leases
-                cursor.execute("""
-                    SELECT l.id, l.tenant_id, l.property_id, l.rent_amount
-                    FROM leases l
-                    WHERE l.status = 'Active' AND l.start_date <= ?
-                """, (current_date,))
-                
-                active_leases = cursor.fetchall()
-                
-                generated_count = 0
+            with write_connection(DB_FILE) as conn:
+                generated_count = PaymentRepo(conn).generate_monthly_rent()
                 
-                for lease in active_leases:
-                    lease_id, tenant_id, property_id, rent_amount = lease
-                    
-                    # Check if payment already exists for this month
-                    cursor.execute("""
-                        SELECT id FROM rent_payments 
-                        WHERE lease_id = ? AND month = ?
-                    """, (lease_id, current_month))
-                    
-                    if not cursor.fetchone():
-                        # Calculate due date (first day of next month)
-                        if current_date.month == 12:
-                            next_month = date(current_date.year + 1, 1, 1)
-                        else:
-                            next_month = date(current_date.year, current_date.month + 1, 1)
-                        
-                        # Insert new payment record
-                        cursor.execute("""
-                            INSERT INTO rent_payments 
-                            (lease_id, tenant_id, property_id, month, due_date, amount_due, status)
-                            VALUES (?, ?, ?, ?, ?, ?, 'Pending')
-                        """, (lease_id, tenant_id, property_id, current_month, next_month, rent_amount))
-                        
-                        generated_count += 1
-                
-                conn.commit()
+            if generated_count > 0:
+                messagebox.showinfo("Success", f"Generated {generated_count} monthly rent records")
+            else:
+                messagebox.showinfo("Info", "No new rent records needed - all current month payments already exist")
+            
+            self.load_payments()
                 
-                if generated_count > 0:
-                    messagebox.showinfo("Success", f"Generated {generated_count} monthly rent records")
-                else:
-                    messagebox.showinfo("Info", "No new rent records needed - all current month payments already exist")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to generate monthly rent: {str(e)}")
+        
+    def catch_up_rent(self):
+        """Create any missing rent records for every month of every active lease"""
+        try:
+            with write_connection(DB_FILE) as conn:
+                generated_count = PaymentRepo(conn).schedule_rent()
                 
-                self.load_payments()
+            if generated_count > 0:
+                messagebox.showinfo("Success", f"Generated {generated_count} missing rent records")
+            else:
+                messagebox.showinfo("Info", "No missing rent records - all lease months are up to date")
+            
+            self.load_payments()
                 
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate monthly rent: {str(e)}")
+            messagebox.showerror("Error", f"Failed to catch up rent: {str(e)}")
         
     def record_payment(self):
         """Open record payment dialog"""
@@ -247,10 +198,8 @@ class PaymentManager:
         if messagebox.askyesno("Confirm Delete", 
                               f"Are you sure you want to delete the payment record for '{tenant_name}'?"):
             try:
-                with sqlite3.connect(DB_FILE) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("DELETE FROM rent_payments WHERE id = ?", (payment_id,))
-                    conn.commit()
+                with write_connection(DB_FILE) as conn:
+                    PaymentRepo(conn).delete(payment_id)
                     
                 messagebox.showinfo("Success", "Payment record deleted successfully")
                 self.load_payments()
@@ -349,23 +298,8 @@ class PaymentDialog:
     def load_lease_options(self, combobox):
         """Load lease options for dropdown"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT l.id, t.name, COALESCE(p.name, 'Property #' || p.id) as property_name
-                    FROM leases l
-                    JOIN tenants t ON l.tenant_id = t.id
-                    JOIN properties p ON l.property_id = p.id
-                    WHERE l.status = 'Active'
-                    ORDER BY t.name
-                """)
-                leases = cursor.fetchall()
-                
-                lease_options = []
-                for lease in leases:
-                    lease_options.append(f"{lease[1]} - {lease[2]} (Lease ID: {lease[0]})")
-                
-                combobox['values'] = lease_options
+            with read_connection(DB_FILE) as conn:
+                combobox['values'] = LeaseRepo(conn).active_labels()
                 
         except Exception as e:
             print(f"Error loading lease options: {e}")
@@ -373,37 +307,27 @@ class PaymentDialog:
     def load_payment_data(self):
         """Load existing payment data for editing"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT rp.lease_id, rp.month, rp.due_date, rp.amount_due, rp.amount_paid,
-                           rp.payment_date, rp.payment_method, rp.status, rp.notes
-                    FROM rent_payments rp WHERE rp.id = ?
-                """, (self.payment_id,))
+            with read_connection(DB_FILE) as conn:
+                payment = PaymentRepo(conn).get(self.payment_id)
                 
-                data = cursor.fetchone()
-                if data:
+                if payment:
                     field_names = ['lease_id', 'month', 'due_date', 'amount_due', 'amount_paid',
                                  'payment_date', 'payment_method', 'status', 'notes']
                     
-                    for i, field_name in enumerate(field_names):
-                        if data[i] is not None:
+                    for field_name in field_names:
+                        value = getattr(payment, field_name)
+                        if value is not None:
                             if field_name == 'lease_id':
                                 # Load the display value for combobox
-                                cursor.execute("""
-                                    SELECT t.name, COALESCE(p.name, 'Property #' || p.id) as property_name
-                                    FROM leases l
-                                    JOIN tenants t ON l.tenant_id = t.id
-                                    JOIN properties p ON l.property_id = p.id
-                                    WHERE l.id = ?
-                                """, (data[i],))
-                                lease_data = cursor.fetchone()
-                                if lease_data:
-                                    self.entries[field_name].set(f"{lease_data[0]} - {lease_data[1]} (Lease ID: {data[i]})")
+                                lease_label = LeaseRepo(conn).label(value)
+                                if lease_label:
+                                    self.entries[field_name].set(lease_label)
                             elif field_name == 'notes':
-                                self.entries[field_name].insert(1.0, str(data[i]))
+                                self.entries[field_name].insert(1.0, str(value))
+                            elif field_name in ('amount_due', 'amount_paid'):
+                                self.entries[field_name].set(str(value.rupees))
                             else:
-                                self.entries[field_name].set(str(data[i]))
+                                self.entries[field_name].set(str(value))
                                 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load payment data: {str(e)}")
@@ -425,63 +349,40 @@ class PaymentDialog:
                 return
             
             # Extract lease ID from selection
-            lease_selection = self.entries['lease_id'].get()
-            lease_id = int(lease_selection.split('(Lease ID: ')[1].rstrip(')'))
+            lease_id = LeaseRepo.id_for_label(self.entries['lease_id'].get())
             
             # Get tenant and property IDs
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT tenant_id, property_id FROM leases WHERE id = ?", (lease_id,))
-                lease_data = cursor.fetchone()
+            with write_connection(DB_FILE) as conn:
+                lease_data = LeaseRepo(conn).parties(lease_id)
                 if not lease_data:
                     messagebox.showerror("Error", "Invalid lease selection")
                     return
                 
                 tenant_id, property_id = lease_data
-            
-            # Get form data
-            data = {
-                'lease_id': lease_id,
-                'tenant_id': tenant_id,
-                'property_id': property_id,
-                'month': self.entries['month'].get().strip(),
-                'due_date': self.entries['due_date'].get().strip() or None,
-                'amount_due': float(self.entries['amount_due'].get()),
-                'amount_paid': float(self.entries['amount_paid'].get()) if self.entries['amount_paid'].get().strip() else 0,
-                'payment_date': self.entries['payment_date'].get().strip() or None,
-                'payment_method': self.entries['payment_method'].get() or None,
-                'status': self.entries['status'].get(),
-                'notes': self.entries['notes'].get(1.0, tk.END).strip() or None
-            }
-            
-            if self.payment_id:
-                # Update existing payment
-                cursor.execute("""
-                    UPDATE rent_payments SET 
-                    lease_id = ?, tenant_id = ?, property_id = ?, month = ?, due_date = ?, 
-                    amount_due = ?, amount_paid = ?, payment_date = ?, payment_method = ?, 
-                    status = ?, notes = ?
-                    WHERE id = ?
-                """, (data['lease_id'], data['tenant_id'], data['property_id'], data['month'],
-                     data['due_date'], data['amount_due'], data['amount_paid'], data['payment_date'],
-                     data['payment_method'], data['status'], data['notes'], self.payment_id))
-            else:
-                # Insert new payment
-                cursor.execute("""
-                    INSERT INTO rent_payments 
-                    (lease_id, tenant_id, property_id, month, due_date, amount_due, 
-                     amount_paid, payment_date, payment_method, status, notes)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (data['lease_id'], data['tenant_id'], data['property_id'], data['month'],
-                     data['due_date'], data['amount_due'], data['amount_paid'], data['payment_date'],
-                     data['payment_method'], data['status'], data['notes']))
-            
-            conn.commit()
+                
+                # Get form data
+                data = {
+                    'lease_id': lease_id,
+                    'tenant_id': tenant_id,
+                    'property_id': property_id,
+                    'month': self.entries['month'].get().strip(),
+                    'due_date': dates.optional(self.entries['due_date'].get()),
+                    'amount_due': Money.parse(self.entries['amount_due'].get()),
+                    'amount_paid': Money.parse(self.entries['amount_paid'].get()) if self.entries['amount_paid'].get().strip() else Money(0),
+                    'payment_date': dates.optional(self.entries['payment_date'].get()),
+                    'payment_method': self.entries['payment_method'].get() or None,
+                    'status': self.entries['status'].get(),
+                    'notes': self.entries['notes'].get(1.0, tk.END).strip() or None
+                }
+                
+                PaymentRepo(conn).save(self.payment_id, **data)
             
             messagebox.showinfo("Success", "Payment saved successfully")
             self.dialog.destroy()
             self.payment_manager.load_payments()
             
+        except dates.DateError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError as e:
             messagebox.showerror("Error", "Please enter valid numeric values for amounts")
         except Exception as e:
@@ -524,21 +425,11 @@ class PaymentDetailsDialog:
     def load_payment_details(self):
         """Load payment details"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
+            with read_connection(DB_FILE) as conn:
                 cursor = conn.cursor()
                 
                 # Get payment details
-                cursor.execute("""
-                    SELECT rp.month, rp.due_date, rp.amount_due, rp.amount_paid, 
-                           rp.payment_date, rp.payment_method, rp.status, rp.notes, rp.created_at,
-                           t.name as tenant_name, 
-                           COALESCE(p.name, 'Property #' || p.id) as property_name,
-                           p.address
-                    FROM rent_payments rp
-                    JOIN tenants t ON rp.tenant_id = t.id
-                    JOIN properties p ON rp.property_id = p.id
-                    WHERE rp.id = ?
-                """, (self.payment_id,))
+                statements.run(cursor, 'payments.details', (self.payment_id,))
                 
                 payment_data = cursor.fetchone()
                 if payment_data:
@@ -549,8 +440,8 @@ Property: {payment_data[10]}
 Property Address: {payment_data[11]}
 Month: {payment_data[0]}
 Due Date: {payment_data[1][:10] if payment_data[1] else 'N/A'}
-Amount Due: Rs {payment_data[2]:.2f}
-Amount Paid: Rs {payment_data[3]:.2f}
+Amount Due: {Money(payment_data[2])}
+Amount Paid: {Money(payment_data[3] or 0)}
 Payment Date: {payment_data[4][:10] if payment_data[4] else 'N/A'}
 Payment Method: {payment_data[5] or 'N/A'}
 Status: {payment_data[6]}
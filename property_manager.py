@@ -1,10 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import sqlite3
 from datetime import datetime
-from db import DB_FILE
+from db import DB_FILE, read_connection, write_connection
+import statements
+from money import Money
+from services import PropertyRepo
+from listings import property_pager
+from virtual_list import VirtualListMixin
 
-class PropertyManager:
+
+class PropertyManager(VirtualListMixin):
     def __init__(self, parent_frame):
         self.parent_frame = parent_frame
         self.setup_ui()
@@ -67,7 +72,8 @@ class PropertyManager:
         # Scrollbars
         v_scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.tree.yview)
         h_scrollbar = ttk.Scrollbar(list_frame, orient='horizontal', command=self.tree.xview)
-        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.tree.configure(xscrollcommand=h_scrollbar.set)
+        self.attach_virtual_scroll(v_scrollbar)
         
         # Pack treeview and scrollbars
         self.tree.pack(side='left', fill='both', expand=True)
@@ -90,45 +96,28 @@ class PropertyManager:
         
     def load_properties(self):
         """Load properties from database"""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                
-                # Get filter status
-                status_filter = self.status_filter.get()
-                
-                if status_filter == 'All':
-                    cursor.execute("""
-                        SELECT id, name, address, type, size, rent_amount, status, created_at
-                        FROM properties ORDER BY created_at DESC
-                    """)
-                else:
-                    cursor.execute("""
-                        SELECT id, name, address, type, size, rent_amount, status, created_at
-                        FROM properties WHERE status = ? ORDER BY created_at DESC
-                    """, (status_filter,))
-                
-                properties = cursor.fetchall()
-                
-                for prop in properties:
-                    # Format the data for display
-                    formatted_prop = list(prop)
-                    if formatted_prop[4]:  # size
-                        formatted_prop[4] = f"{formatted_prop[4]:.0f} sq ft"
-                    if formatted_prop[5]:  # rent_amount
-                        formatted_prop[5] = f"Rs {formatted_prop[5]:.2f}"
-                    if formatted_prop[7]:  # created_at
-                        formatted_prop[7] = formatted_prop[7][:10]  # Just the date part
-                    
-                    self.tree.insert('', 'end', values=formatted_prop)
+            pager = property_pager(self.status_filter.get())
+            self.show_rows(pager, self.format_property, DB_FILE, on_error=self.show_load_error)
                     
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load properties: {str(e)}")
             
+    def show_load_error(self, error):
+        """Report a failed background load"""
+        messagebox.showerror("Error", f"Failed to load properties: {str(error)}")
+        
+    def format_property(self, prop):
+        """Format a property row for display"""
+        formatted_prop = list(prop)
+        if formatted_prop[4]:  # size
+            formatted_prop[4] = f"{formatted_prop[4]:.0f} sq ft"
+        if formatted_prop[5]:  # rent_amount
+            formatted_prop[5] = str(Money(formatted_prop[5]))
+        if formatted_prop[7]:  # created_at
+            formatted_prop[7] = formatted_prop[7][:10]  # Just the date part
+        return formatted_prop
+            
     def filter_properties(self, event=None):
         """Filter properties by status"""
         self.load_properties()
@@ -174,10 +163,8 @@ class PropertyManager:
                               f"Are you sure you want to delete '{property_name}'?\n\n"
                               "This will also delete all associated tenants, leases, and payments."):
             try:
-                with sqlite3.connect(DB_FILE) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("DELETE FROM properties WHERE id = ?", (property_id,))
-                    conn.commit()
+                with write_connection(DB_FILE) as conn:
+                    PropertyRepo(conn).delete(property_id)
                     
                 messagebox.showinfo("Success", "Property deleted successfully")
                 self.load_properties()
@@ -265,25 +252,22 @@ class PropertyDialog:
     def load_property_data(self):
         """Load existing property data for editing"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT name, address, type, size, bedrooms, bathrooms, 
-                           rent_amount, deposit_amount, status, furnished
-                    FROM properties WHERE id = ?
-                """, (self.property_id,))
+            with read_connection(DB_FILE) as conn:
+                prop = PropertyRepo(conn).get(self.property_id)
                 
-                data = cursor.fetchone()
-                if data:
-                    field_names = ['name', 'address', 'type', 'size', 'bedrooms', 'bathrooms',
-                                 'rent_amount', 'deposit_amount', 'status', 'furnished']
-                    
-                    for i, field_name in enumerate(field_names):
-                        if data[i] is not None:
-                            if field_name == 'furnished':
-                                self.entries[field_name].set('Yes' if data[i] else 'No')
-                            else:
-                                self.entries[field_name].set(str(data[i]))
+            if prop:
+                field_names = ['name', 'address', 'type', 'size', 'bedrooms', 'bathrooms',
+                             'rent_amount', 'deposit_amount', 'status', 'furnished']
+                
+                for field_name in field_names:
+                    value = getattr(prop, field_name)
+                    if value is not None:
+                        if field_name == 'furnished':
+                            self.entries[field_name].set('Yes' if value else 'No')
+                        elif field_name in ('rent_amount', 'deposit_amount'):
+                            self.entries[field_name].set(str(value.rupees))
+                        else:
+                            self.entries[field_name].set(str(value))
                                 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load property data: {str(e)}")
@@ -308,39 +292,14 @@ class PropertyDialog:
                 'size': float(self.entries['size'].get()) if self.entries['size'].get().strip() else None,
                 'bedrooms': int(self.entries['bedrooms'].get()) if self.entries['bedrooms'].get().strip() else None,
                 'bathrooms': int(self.entries['bathrooms'].get()) if self.entries['bathrooms'].get().strip() else None,
-                'rent_amount': float(self.entries['rent_amount'].get()),
-                'deposit_amount': float(self.entries['deposit_amount'].get()) if self.entries['deposit_amount'].get().strip() else 0,
+                'rent_amount': Money.parse(self.entries['rent_amount'].get()),
+                'deposit_amount': Money.parse(self.entries['deposit_amount'].get()) if self.entries['deposit_amount'].get().strip() else Money(0),
                 'status': self.entries['status'].get(),
                 'furnished': self.entries['furnished'].get() == 'Yes'
             }
             
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                
-                if self.property_id:
-                    # Update existing property
-                    cursor.execute("""
-                        UPDATE properties SET 
-                        name = ?, address = ?, type = ?, size = ?, bedrooms = ?, 
-                        bathrooms = ?, rent_amount = ?, deposit_amount = ?, 
-                        status = ?, furnished = ?
-                        WHERE id = ?
-                    """, (data['name'], data['address'], data['type'], data['size'],
-                         data['bedrooms'], data['bathrooms'], data['rent_amount'],
-                         data['deposit_amount'], data['status'], data['furnished'],
-                         self.property_id))
-                else:
-                    # Insert new property
-                    cursor.execute("""
-                        INSERT INTO properties 
-                        (name, address, type, size, bedrooms, bathrooms, 
-                         rent_amount, deposit_amount, status, furnished)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (data['name'], data['address'], data['type'], data['size'],
-                         data['bedrooms'], data['bathrooms'], data['rent_amount'],
-                         data['deposit_amount'], data['status'], data['furnished']))
-                
-                conn.commit()
+            with write_connection(DB_FILE) as conn:
+                PropertyRepo(conn).save(self.property_id, **data)
                 
             messagebox.showinfo("Success", "Property saved successfully")
             self.dialog.destroy()
@@ -402,15 +361,11 @@ class PropertyDetailsDialog:
     def load_property_details(self):
         """Load property details and tenants"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
+            with read_connection(DB_FILE) as conn:
                 cursor = conn.cursor()
                 
                 # Get property details
-                cursor.execute("""
-                    SELECT name, address, type, size, bedrooms, bathrooms, 
-                           rent_amount, deposit_amount, status, furnished, created_at
-                    FROM properties WHERE id = ?
-                """, (self.property_id,))
+                statements.run(cursor, 'properties.details', (self.property_id,))
                 
                 prop_data = cursor.fetchone()
                 if prop_data:
@@ -422,8 +377,8 @@ Type: {prop_data[2] or 'N/A'}
 Size: {prop_data[3] or 'N/A'} sq ft
 Bedrooms: {prop_data[4] or 'N/A'}
 Bathrooms: {prop_data[5] or 'N/A'}
-Rent Amount: Rs {prop_data[6]:.2f}
-Deposit Amount: Rs {prop_data[7]:.2f}
+Rent Amount: {Money(prop_data[6])}
+Deposit Amount: {Money(prop_data[7] or 0)}
 Status: {prop_data[8]}
 Furnished: {'Yes' if prop_data[9] else 'No'}
 Created: {prop_data[10][:10] if prop_data[10] else 'N/A'}
@@ -435,10 +390,7 @@ Created: {prop_data[10][:10] if prop_data[10] else 'N/A'}
                     self.info_text.config(state='disabled')
                 
                 # Get current tenants
-                cursor.execute("""
-                    SELECT name, phone, email, emergency_contact
-                    FROM tenants WHERE property_id = ?
-                """, (self.property_id,))
+                statements.run(cursor, 'properties.tenants', (self.property_id,))
                 
                 tenants = cursor.fetchall()
                 
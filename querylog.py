@@ -0,0 +1,324 @@
+"""Per-statement timing for pooled connections, and the slow-query log.
+
+db.ConnectionPool opens its connections with TimedConnection as the
+factory, so every statement run through read_connection() and
+write_connection() is timed.  A query is timed from execute() until its
+cursor is exhausted, closed or dropped, adding the time spent in
+fetchone(), fetchmany() and fetchall().  Rows read by iterating over the
+cursor are only timed and counted with row timing on (RowTimedCursor),
+since that puts a Python call in front of every row.
+
+Statements are grouped by their SQL text with whitespace collapsed, so a
+parameterised query is one entry however many values it has run with.
+Each entry keeps its call count, total and slowest time, a latency
+histogram, the rows it returned (or changed) and the lines that ran it.
+Calls slower than their connection's slow_query_ms are also appended to
+its slow_query_log.  Each call also counts as a hit or a miss in its
+connection's statement cache (see StatementCache).
+"""
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+# Upper bounds of the latency histogram's buckets in milliseconds; a last
+# bucket holds anything slower
+BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+# Distinct statements tracked; any more are counted together under OTHER
+MAX_STATEMENTS = 500
+OTHER = "(other statements)"
+
+_HERE = os.path.abspath(__file__)
+
+
+def call_site():
+    """'file.py:line function' of the nearest caller outside this module"""
+    frame = sys._getframe(1)
+    while frame is not None and os.path.abspath(frame.f_code.co_filename) == _HERE:
+        frame = frame.f_back
+    if frame is None:
+        return '?'
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+class StatementStats:
+    """Totals for one statement"""
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.calls = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.rows = 0
+        self.histogram = [0] * (len(BUCKETS_MS) + 1)
+        self.sites = {}
+        # Calls that reused a compiled statement, and calls that compiled one
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def add(self, seconds, rows, site, cache_hit=None):
+        self.calls += 1
+        if cache_hit is not None:
+            if cache_hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+        self.total += seconds
+        self.slowest = max(self.slowest, seconds)
+        self.rows += max(rows, 0)
+        ms = seconds * 1000
+        self.histogram[next((i for i, bound in enumerate(BUCKETS_MS) if ms <= bound), len(BUCKETS_MS))] += 1
+        self.sites[site] = self.sites.get(site, 0) + 1
+
+    @property
+    def mean_ms(self):
+        return self.total * 1000 / self.calls if self.calls else 0.0
+
+    def percentile_ms(self, fraction):
+        """Upper bound of the bucket holding the `fraction` quantile (None past the last bound)"""
+        wanted = fraction * self.calls
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.histogram):
+            seen += count
+            if seen >= wanted:
+                return bound
+        return None
+
+
+class QueryLog:
+    """Statement statistics shared by every timed connection in the process"""
+
+    def __init__(self):
+        self.statements = {}
+        self._lock = threading.Lock()
+        # Normalised text of each SQL string seen, to avoid re-splitting it per call
+        self._normalised = {}
+
+    def record(self, sql, seconds, rows, site, cache_hit=None):
+        """Add one call to its statement's totals; returns the statement's key"""
+        key = self._normalised.get(sql)
+        if key is None:
+            key = " ".join(sql.split())
+            if len(self._normalised) < MAX_STATEMENTS * 4:
+                self._normalised[sql] = key
+        with self._lock:
+            stats = self.statements.get(key)
+            if stats is None:
+                if len(self.statements) >= MAX_STATEMENTS:
+                    key = OTHER
+                stats = self.statements.setdefault(key, StatementStats(key))
+            stats.add(seconds, rows, site, cache_hit)
+        return key
+
+    def log_slow(self, log_file, sql, seconds, rows, site):
+        """Append one call to the slow-query log"""
+        # Parameter values are left out; they may hold tenants' personal details
+        line = (f"{datetime.now().isoformat(sep=' ', timespec='milliseconds')}  {seconds * 1000:9.1f} ms  "
+                f"{max(rows, 0):7d} rows  {site}  {sql}\n")
+        try:
+            with self._lock, open(log_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+        except OSError as e:
+            print(f"Slow query log failed: {str(e)}")
+
+    def top(self, limit=None):
+        """Snapshot of the statements, most total time first"""
+        with self._lock:
+            statements = sorted(self.statements.values(), key=lambda stats: stats.total, reverse=True)
+            return [_copy(stats) for stats in statements[:limit]]
+
+    def cache_counts(self):
+        """(hits, misses) in the statement caches over every statement"""
+        with self._lock:
+            return (sum(stats.cache_hits for stats in self.statements.values()),
+                    sum(stats.cache_misses for stats in self.statements.values()))
+
+    def reset(self):
+        with self._lock:
+            self.statements = {}
+
+
+def _copy(stats):
+    copy = StatementStats(stats.sql)
+    copy.__dict__.update(stats.__dict__, histogram=list(stats.histogram), sites=dict(stats.sites))
+    return copy
+
+
+_log = QueryLog()
+
+
+def top_statements(limit=None):
+    """The timed statements, most total time first, as StatementStats copies"""
+    return _log.top(limit)
+
+
+def cache_counts():
+    """(hits, misses) in the pooled connections' statement caches since the last reset"""
+    return _log.cache_counts()
+
+
+def reset():
+    """Forget every statement timed so far"""
+    _log.reset()
+
+
+class StatementCache:
+    """Counts hits and misses in one connection's statement cache.
+
+    sqlite3 keeps the last `size` statements a connection compiled, keyed by
+    their exact SQL text, and reuses one when the same text is executed
+    again, but does not report how often that happens.  This keeps the
+    same least-recently-used list of SQL strings to tell.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._recent = OrderedDict()
+
+    def lookup(self, sql):
+        """True if `sql` is still compiled on the connection; it then becomes the most recent"""
+        recent = self._recent
+        if sql in recent:
+            recent.move_to_end(sql)
+            return True
+        recent[sql] = None
+        if len(recent) > self.size:
+            recent.popitem(last=False)
+        return False
+
+
+_clock = time.perf_counter
+_next_row = sqlite3.Cursor.__next__
+
+
+class TimedCursor(sqlite3.Cursor):
+    """A cursor that reports each statement's time and rows to the query log"""
+
+    _pending = None
+
+    def _record(self, sql, seconds, rows, site, cache_hit=None):
+        key = _log.record(sql, seconds, rows, site, cache_hit)
+        conn = self.connection
+        if conn.slow_query_log and conn.slow_query_ms is not None and seconds * 1000 >= conn.slow_query_ms:
+            _log.log_slow(conn.slow_query_log, key, seconds, rows, site)
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending:
+            self._record(*pending)
+
+    def _cache_hit(self, sql):
+        cache = self.connection.statement_cache
+        return cache.lookup(sql) if cache is not None else None
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        site = call_site()
+        cache_hit = self._cache_hit(sql)
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        # [sql, seconds, rows, site, cache_hit]; a query stays pending until its rows are read
+        self._pending = [sql, time.perf_counter() - start, 0, site, cache_hit]
+        if self.description is None:
+            self._pending[2] = self.rowcount
+            self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        site = call_site()
+        cache_hit = self._cache_hit(sql)
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._record(sql, time.perf_counter() - start, self.rowcount, site, cache_hit)
+        return self
+
+    def executescript(self, sql_script):
+        self._finish()
+        site = call_site()
+        start = time.perf_counter()
+        super().executescript(sql_script)
+        self._record(sql_script, time.perf_counter() - start, 0, site)
+        return self
+
+    def _fetched(self, start, rows, done):
+        pending = self._pending
+        if pending:
+            pending[1] += time.perf_counter() - start
+            pending[2] += rows
+            if done:
+                self._finish()
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(start, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # A query whose rows were not all read is recorded when its cursor goes
+        if self._pending:
+            self._finish()
+
+
+class RowTimedCursor(TimedCursor):
+    """A TimedCursor that also times and counts the rows read by iterating over it"""
+
+    def __next__(self):
+        # Runs once per row, so kept to the bare minimum
+        start = _clock()
+        try:
+            row = _next_row(self)
+        except StopIteration:
+            self._fetched(start, 0, True)
+            raise
+        pending = self._pending
+        if pending:
+            pending[1] += _clock() - start
+            pending[2] += 1
+        return row
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection factory whose cursors, including those execute() creates, are timed"""
+
+    # Calls taking at least slow_query_ms are appended to slow_query_log; set by db.ConnectionPool
+    slow_query_ms = None
+    slow_query_log = None
+    # StatementCache sized like the connection's cached_statements, if hits are counted
+    statement_cache = None
+    # RowTimedCursor to time iteration row by row as well
+    cursor_class = TimedCursor
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or self.cursor_class)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
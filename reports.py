@@ -0,0 +1,511 @@
+import os
+import threading
+import time
+from datetime import datetime
+from db import read_connection, write_generation
+from money import Money
+
+
+def property_occupancy_report(conn):
+    """Generate property occupancy report"""
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        SELECT p.id, COALESCE(p.name, 'Property #' || p.id) as property_name,
+               p.address, p.status, p.rent_amount,
+               COALESCE(t.name, 'No Tenant') as tenant_name,
+               l.start_date, l.end_date
+        FROM properties p
+        LEFT JOIN tenants t ON p.id = t.property_id
+        LEFT JOIN leases l ON t.id = l.tenant_id AND l.status = 'Active'
+        ORDER BY p.id
+    """)
+
+    properties = cursor.fetchall()
+
+    report = "PROPERTY OCCUPANCY REPORT\n"
+    report += f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+
+    occupied_count = 0
+    vacant_count = 0
+    total_rent = 0
+
+    for prop in properties:
+        prop_id, name, address, status, rent, tenant, start_date, end_date = prop
+
+        report += f"Property ID: {prop_id}\n"
+        report += f"Name: {name}\n"
+        report += f"Address: {address}\n"
+        report += f"Status: {status}\n"
+        report += f"Rent Amount: RS{Money(rent):.2f}\n"
+        report += f"Current Tenant: {tenant}\n"
+
+        if start_date:
+            report += f"Lease Start: {start_date[:10]}\n"
+        if end_date:
+            report += f"Lease End: {end_date[:10]}\n"
+
+        report += "-" * 50 + "\n"
+
+        if status == 'Occupied':
+            occupied_count += 1
+            total_rent += rent
+        else:
+            vacant_count += 1
+
+    report += f"\nSUMMARY:\n"
+    report += f"Total Properties: {len(properties)}\n"
+    report += f"Occupied: {occupied_count}\n"
+    report += f"Vacant: {vacant_count}\n"
+    occupancy_rate = occupied_count / len(properties) * 100 if properties else 0
+    report += f"Occupancy Rate: {occupancy_rate:.1f}%\n"
+    report += f"Total Monthly Rent: RS{Money(total_rent):.2f}\n"
+    
+    return report
+
+
+def rent_income_report(conn):
+    """Generate rent income report"""
+    cursor = conn.cursor()
+
+    # Income received in each of the last 12 calendar months, this one included
+    cursor.execute("""
+        SELECT paid_month, SUM(amount_paid) as total_paid, SUM(payment_count) as payment_count
+        FROM rent_rollup
+        WHERE status = 'Paid' AND paid_month > strftime('%Y-%m', 'now', 'start of month', '-12 months')
+        GROUP BY paid_month
+        ORDER BY paid_month DESC
+    """)
+
+    monthly_data = cursor.fetchall()
+
+    # Total income by status
+    cursor.execute("""
+        SELECT NULLIF(status, '') as status, SUM(amount_paid) as total, SUM(payment_count) as count
+        FROM rent_rollup
+        GROUP BY status
+    """)
+
+    status_data = cursor.fetchall()
+
+    report = "RENT INCOME REPORT\n"
+    report += f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+
+    report += "MONTHLY INCOME (Last 12 Calendar Months, by Payment Month):\n"
+    report += "-" * 40 + "\n"
+
+    total_monthly_income = 0
+    for month, total, count in monthly_data:
+        report += f"{month}: RS{Money(total):.2f} ({count} payments)\n"
+        total_monthly_income += total
+
+    report += f"\nTotal Monthly Income: RS{Money(total_monthly_income):.2f}\n\n"
+
+    report += "PAYMENT STATUS SUMMARY:\n"
+    report += "-" * 40 + "\n"
+
+    for status, total, count in status_data:
+        report += f"{status}: RS{Money(total):.2f} ({count} payments)\n"
+    
+    return report
+
+
+def expense_analysis_report(conn):
+    """Generate expense analysis report"""
+    cursor = conn.cursor()
+
+    # Expenses by category
+    cursor.execute("""
+        SELECT NULLIF(category, '') as category, SUM(amount) as total, SUM(expense_count) as count
+        FROM expense_rollup
+        GROUP BY category
+        ORDER BY total DESC
+    """)
+
+    category_data = cursor.fetchall()
+
+    # Expenses by property
+    cursor.execute("""
+        SELECT COALESCE(p.name, 'Property #' || p.id) as property_name,
+               SUM(e.amount) as total, SUM(e.expense_count) as count
+        FROM expense_rollup e
+        JOIN properties p ON e.property_id = p.id
+        GROUP BY e.property_id, property_name
+        ORDER BY total DESC
+    """)
+
+    property_data = cursor.fetchall()
+
+    # Monthly expenses for the last 12 calendar months, this one included
+    cursor.execute("""
+        SELECT month, SUM(amount) as total
+        FROM expense_rollup
+        WHERE month > strftime('%Y-%m', 'now', 'start of month', '-12 months')
+        GROUP BY month
+        ORDER BY month DESC
+    """)
+
+    monthly_data = cursor.fetchall()
+
+    report = "EXPENSE ANALYSIS REPORT\n"
+    report += f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+
+    report += "EXPENSES BY CATEGORY:\n"
+    report += "-" * 40 + "\n"
+
+    total_expenses = 0
+    for category, total, count in category_data:
+        report += f"{category or 'Uncategorized'}: RS{Money(total):.2f} ({count} expenses)\n"
+        total_expenses += total
+
+    report += f"\nTotal Expenses: RS{Money(total_expenses):.2f}\n\n"
+
+    report += "EXPENSES BY PROPERTY:\n"
+    report += "-" * 40 + "\n"
+
+    for property_name, total, count in property_data:
+        report += f"{property_name}: RS{Money(total):.2f} ({count} expenses)\n"
+
+    report += "\nMONTHLY EXPENSES (Last 12 Calendar Months):\n"
+    report += "-" * 40 + "\n"
+
+    for month, total in monthly_data:
+        report += f"{month}: RS{Money(total):.2f}\n"
+    
+    return report
+
+
+def overdue_rent_report(conn):
+    """Generate overdue rent report"""
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        SELECT t.name, COALESCE(p.name, 'Property #' || p.id) as property_name,
+               rp.month, rp.due_date, rp.amount_due, rp.amount_paid,
+               (rp.amount_due - COALESCE(rp.amount_paid, 0)) as outstanding
+        FROM rent_payments rp
+        JOIN tenants t ON rp.tenant_id = t.id
+        JOIN properties p ON rp.property_id = p.id
+        WHERE rp.status = 'Overdue' OR (rp.amount_due > rp.amount_paid AND rp.due_date < date('now'))
+        -- The unary + keeps SQLite from walking every payment in due_date order;
+        -- it seeks each side of the OR (idx_rent_payments_unpaid) and sorts the few matches
+        ORDER BY +rp.due_date
+    """)
+
+    overdue_data = cursor.fetchall()
+
+    report = "OVERDUE RENT REPORT\n"
+    report += f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+
+    if not overdue_data:
+        report += "No overdue payments found.\n"
+    else:
+        report += "OVERDUE PAYMENTS:\n"
+        report += "-" * 80 + "\n"
+        report += f"{'Tenant':<20} {'Property':<20} {'Month':<10} {'Due Date':<12} {'Outstanding':<12}\n"
+        report += "-" * 80 + "\n"
+
+        total_outstanding = 0
+        for tenant, property, month, due_date, amount_due, amount_paid, outstanding in overdue_data:
+            report += f"{tenant:<20} {property:<20} {month:<10} {due_date[:10]:<12} RS{Money(outstanding):<11.2f}\n"
+            total_outstanding += outstanding
+
+        report += "-" * 80 + "\n"
+        report += f"Total Outstanding: RS{Money(total_outstanding):.2f}\n"
+    
+    return report
+
+
+def lease_expiration_report(conn):
+    """Generate lease expiration report"""
+    cursor = conn.cursor()
+
+    # Upcoming expirations (next 3 months)
+    cursor.execute("""
+        SELECT t.name, COALESCE(p.name, 'Property #' || p.id) as property_name,
+               l.start_date, l.end_date, l.rent_amount
+        FROM leases l
+        JOIN tenants t ON l.tenant_id = t.id
+        JOIN properties p ON l.property_id = p.id
+        WHERE l.status = 'Active' AND l.end_date BETWEEN date('now') AND date('now', '+3 months')
+        ORDER BY l.end_date
+    """)
+
+    upcoming_data = cursor.fetchall()
+
+    # Recently expired
+    cursor.execute("""
+        SELECT t.name, COALESCE(p.name, 'Property #' || p.id) as property_name,
+               l.start_date, l.end_date, l.rent_amount, l.status
+        FROM leases l
+        JOIN tenants t ON l.tenant_id = t.id
+        JOIN properties p ON l.property_id = p.id
+        WHERE l.end_date < date('now') AND l.status IN ('Active', 'Expired')
+        ORDER BY l.end_date DESC
+    """)
+
+    expired_data = cursor.fetchall()
+
+    report = "LEASE EXPIRATION REPORT\n"
+    report += f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+
+    report += "UPCOMING EXPIRATIONS (Next 3 Months):\n"
+    report += "-" * 80 + "\n"
+
+    if not upcoming_data:
+        report += "No leases expiring in the next 3 months.\n"
+    else:
+        for tenant, property, start_date, end_date, rent in upcoming_data:
+            report += f"Tenant: {tenant}\n"
+            report += f"Property: {property}\n"
+            report += f"Lease Period: {start_date[:10]} to {end_date[:10]}\n"
+            report += f"Rent: RS{Money(rent):.2f}\n"
+            report += "-" * 40 + "\n"
+
+    report += "\nRECENTLY EXPIRED LEASES:\n"
+    report += "-" * 80 + "\n"
+
+    if not expired_data:
+        report += "No recently expired leases.\n"
+    else:
+        for tenant, property, start_date, end_date, rent, status in expired_data:
+            report += f"Tenant: {tenant}\n"
+            report += f"Property: {property}\n"
+            report += f"Lease Period: {start_date[:10]} to {end_date[:10]}\n"
+            report += f"Rent: RS{Money(rent):.2f}\n"
+            report += f"Status: {status}\n"
+            report += "-" * 40 + "\n"
+    
+    return report
+
+
+def maintenance_cost_report(conn):
+    """Generate maintenance cost report"""
+    cursor = conn.cursor()
+
+    # Maintenance costs by property
+    cursor.execute("""
+        SELECT COALESCE(p.name, 'Property #' || p.id) as property_name,
+               COUNT(*) as request_count,
+               SUM(COALESCE(mr.actual_cost, mr.cost_estimate, 0)) as total_cost,
+               AVG(COALESCE(mr.actual_cost, mr.cost_estimate, 0)) as avg_cost
+        FROM maintenance_requests mr
+        JOIN properties p ON mr.property_id = p.id
+        GROUP BY mr.property_id, property_name
+        ORDER BY total_cost DESC
+    """)
+
+    property_data = cursor.fetchall()
+
+    # Maintenance by status
+    cursor.execute("""
+        SELECT status, COUNT(*) as count,
+               SUM(COALESCE(actual_cost, cost_estimate, 0)) as total_cost
+        FROM maintenance_requests
+        GROUP BY status
+    """)
+
+    status_data = cursor.fetchall()
+
+    # Recent maintenance requests
+    cursor.execute("""
+        SELECT mr.description, COALESCE(p.name, 'Property #' || p.id) as property_name,
+               mr.status, mr.actual_cost, mr.cost_estimate, mr.completed_date
+        FROM maintenance_requests mr
+        JOIN properties p ON mr.property_id = p.id
+        ORDER BY COALESCE(mr.request_date, '') DESC
+        LIMIT 10
+    """)
+
+    recent_data = cursor.fetchall()
+
+    report = "MAINTENANCE COST REPORT\n"
+    report += f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+
+    report += "MAINTENANCE COSTS BY PROPERTY:\n"
+    report += "-" * 60 + "\n"
+
+    total_maintenance_cost = 0
+    for property_name, count, total, avg in property_data:
+        report += f"{property_name}:\n"
+        report += f"  Requests: {count}\n"
+        report += f"  Total Cost: RS{Money(total):.2f}\n"
+        report += f"  Average Cost: RS{Money(round(avg)):.2f}\n"
+        report += "-" * 40 + "\n"
+        total_maintenance_cost += total
+
+    report += f"Total Maintenance Cost: RS{Money(total_maintenance_cost):.2f}\n\n"
+
+    report += "MAINTENANCE BY STATUS:\n"
+    report += "-" * 40 + "\n"
+
+    for status, count, total in status_data:
+        report += f"{status}: {count} requests, RS{Money(total):.2f}\n"
+
+    report += "\nRECENT MAINTENANCE REQUESTS:\n"
+    report += "-" * 80 + "\n"
+
+    for description, property, status, actual, estimate, completed in recent_data:
+        cost = actual if actual else estimate
+        report += f"Property: {property}\n"
+        report += f"Description: {description[:50]}...\n"
+        report += f"Status: {status}\n"
+        report += f"Cost: RS{Money(cost or 0):.2f}\n"
+        if completed:
+            report += f"Completed: {completed[:10]}\n"
+        report += "-" * 40 + "\n"
+    
+    return report
+
+
+def financial_summary_report(conn):
+    """Generate comprehensive financial summary report"""
+    cursor = conn.cursor()
+
+    # Total income
+    cursor.execute("SELECT SUM(amount_paid) FROM rent_rollup WHERE status = 'Paid'")
+    total_income = cursor.fetchone()[0] or 0
+
+    # Total expenses
+    cursor.execute("SELECT SUM(amount) FROM expense_rollup")
+    total_expenses = cursor.fetchone()[0] or 0
+
+    # Outstanding rent
+    cursor.execute("SELECT SUM(outstanding) FROM rent_rollup")
+    outstanding_rent = cursor.fetchone()[0] or 0
+
+    # Monthly income (current year)
+    cursor.execute("""
+        SELECT paid_month as month, SUM(amount_paid)
+        FROM rent_rollup
+        WHERE status = 'Paid'
+          AND paid_month >= strftime('%Y-%m', 'now', 'start of year')
+          AND paid_month < strftime('%Y-%m', 'now', 'start of year', '+1 year')
+        GROUP BY month
+        ORDER BY month
+    """)
+    monthly_income = cursor.fetchall()
+
+    # Monthly expenses (current year)
+    cursor.execute("""
+        SELECT month, SUM(amount)
+        FROM expense_rollup
+        WHERE month >= strftime('%Y-%m', 'now', 'start of year')
+          AND month < strftime('%Y-%m', 'now', 'start of year', '+1 year')
+        GROUP BY month
+        ORDER BY month
+    """)
+    monthly_expenses = cursor.fetchall()
+
+    report = "FINANCIAL SUMMARY REPORT\n"
+    report += f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+
+    report += "OVERALL FINANCIAL SUMMARY:\n"
+    report += "-" * 40 + "\n"
+    report += f"Total Income: RS{Money(total_income):.2f}\n"
+    report += f"Total Expenses: RS{Money(total_expenses):.2f}\n"
+    report += f"Net Profit: RS{Money(total_income - total_expenses):.2f}\n"
+    report += f"Outstanding Rent: RS{Money(outstanding_rent):.2f}\n"
+    profit_margin = (total_income - total_expenses) / total_income * 100 if total_income else 0
+    report += f"Profit Margin: {profit_margin:.1f}%\n\n"
+
+    report += "MONTHLY INCOME (Current Year):\n"
+    report += "-" * 40 + "\n"
+
+    for month, income in monthly_income:
+        report += f"{month}: RS{Money(income):.2f}\n"
+
+    report += "\nMONTHLY EXPENSES (Current Year):\n"
+    report += "-" * 40 + "\n"
+
+    for month, expenses in monthly_expenses:
+        report += f"{month}: RS{Money(expenses):.2f}\n"
+    
+    return report
+
+
+# (title, builder) for every report, in the order they are offered
+REPORTS = [
+    ("Property Occupancy Report", property_occupancy_report),
+    ("Rent Income Report", rent_income_report),
+    ("Expense Analysis Report", expense_analysis_report),
+    ("Overdue Rent Report", overdue_rent_report),
+    ("Lease Expiration Report", lease_expiration_report),
+    ("Maintenance Cost Report", maintenance_cost_report),
+    ("Financial Summary Report", financial_summary_report),
+]
+
+
+# Seconds a cached dashboard stays valid when nothing has been written
+# through this process (covers edits made by other programs)
+DASHBOARD_CACHE_TTL = 30
+
+_dashboard_cache = {}
+_dashboard_lock = threading.Lock()
+
+
+def dashboard_summary(conn):
+    """Return the dashboard card values from a single query.
+
+    Each figure is a scalar subquery answered from an index (the status
+    indexes on properties, maintenance_requests and rent_payments) or from
+    the rent and expense rollup tables, so no large table is scanned.
+    """
+    row = conn.execute("""
+        SELECT (SELECT COUNT(*) FROM properties),
+               (SELECT COUNT(*) FROM properties WHERE status = 'Occupied'),
+               (SELECT COUNT(*) FROM tenants),
+               (SELECT COUNT(*) FROM maintenance_requests WHERE status = 'Open'),
+               (SELECT COALESCE(SUM(amount_paid), 0) FROM rent_rollup WHERE status = 'Paid'),
+               (SELECT COALESCE(SUM(amount), 0) FROM expense_rollup),
+               (SELECT COUNT(*) FROM rent_payments WHERE status = 'Overdue')
+    """).fetchone()
+    keys = ('total_properties', 'occupied_properties', 'total_tenants', 'open_maintenance',
+            'total_income', 'total_expenses', 'overdue_payments')
+    return dict(zip(keys, row))
+
+
+def recent_activity(conn, limit=5):
+    """Return (recent payments, recent maintenance requests) for the dashboard"""
+    payments = conn.execute("""
+        SELECT t.name, rp.amount_paid, rp.payment_date, rp.status
+        FROM rent_payments rp
+        JOIN tenants t ON rp.tenant_id = t.id
+        WHERE rp.payment_date IS NOT NULL
+        ORDER BY rp.payment_date DESC
+        LIMIT ?
+    """, (limit,)).fetchall()
+    # Sorting on the same expression as idx_maintenance_list reads the
+    # newest rows straight from the index
+    maintenance = conn.execute("""
+        SELECT mr.description, mr.status, mr.request_date
+        FROM maintenance_requests mr
+        ORDER BY COALESCE(mr.request_date, '') DESC
+        LIMIT ?
+    """, (limit,)).fetchall()
+    return payments, maintenance
+
+
+def dashboard_data(db_file, ttl=DASHBOARD_CACHE_TTL):
+    """Return (summary, payments, maintenance), cached until the next write or `ttl`"""
+    key = os.path.abspath(db_file)
+    # Read the generation first so a write racing with the query below
+    # leaves the entry already stale
+    generation = write_generation(db_file)
+    now = time.monotonic()
+    with _dashboard_lock:
+        cached = _dashboard_cache.get(key)
+    if cached and cached[0] == generation and now - cached[1] < ttl:
+        return cached[2]
+
+    with read_connection(db_file) as conn:
+        data = (dashboard_summary(conn),) + recent_activity(conn)
+    with _dashboard_lock:
+        _dashboard_cache[key] = (generation, now, data)
+    return data
+
+
+def clear_dashboard_cache():
+    """Forget every cached dashboard"""
+    with _dashboard_lock:
+        _dashboard_cache.clear()
@@ -0,0 +1,123 @@
+"""Financial rollup tables.
+
+rent_rollup and expense_rollup hold per-property, per-month totals of
+rent_payments and expenses.  Triggers created by migration 6 keep them in
+step with every insert, update and delete, so the financial reports read
+a few rows per property and month instead of scanning the raw tables.
+
+Run ``python rollups.py check`` to compare the rollups with the raw tables
+and ``python rollups.py rebuild`` to recompute them from scratch.
+"""
+import argparse
+
+# Totals are integer paisa since migration 11, so they must match exactly
+TOLERANCE = 0
+
+RENT_ROLLUP_SELECT = """
+    SELECT property_id, month, COALESCE(strftime('%Y-%m', payment_date), ''), COALESCE(status, ''),
+           COUNT(*), COALESCE(SUM(amount_due), 0), COALESCE(SUM(amount_paid), 0),
+           SUM(CASE WHEN amount_due > amount_paid THEN amount_due - amount_paid ELSE 0 END)
+    FROM rent_payments
+    {where}
+    GROUP BY 1, 2, 3, 4
+"""
+
+EXPENSE_ROLLUP_SELECT = """
+    SELECT property_id, COALESCE(strftime('%Y-%m', date), ''), COALESCE(category, ''),
+           COUNT(*), COALESCE(SUM(amount), 0)
+    FROM expenses
+    {where}
+    GROUP BY 1, 2, 3
+"""
+
+# table -> (key columns, total columns, query computing the rows from scratch;
+# {where} optionally restricts the raw rows)
+ROLLUPS = {
+    'rent_rollup': (('property_id', 'month', 'paid_month', 'status'),
+                    ('payment_count', 'amount_due', 'amount_paid', 'outstanding'),
+                    RENT_ROLLUP_SELECT),
+    'expense_rollup': (('property_id', 'month', 'category'),
+                       ('expense_count', 'amount'),
+                       EXPENSE_ROLLUP_SELECT),
+}
+
+# Raw table -> (its rollup, the trigger adding inserted rows to it)
+SOURCES = {
+    'rent_payments': ('rent_rollup', 'rent_rollup_insert'),
+    'expenses': ('expense_rollup', 'expense_rollup_insert'),
+}
+
+
+def rebuild(conn):
+    """Recompute every rollup table from the raw tables and commit"""
+    counts = {}
+    for table, (keys, totals, select) in ROLLUPS.items():
+        conn.execute(f"DELETE FROM {table}")
+        cursor = conn.execute(f"INSERT INTO {table} ({', '.join(keys + totals)}) {select.format(where='')}")
+        counts[table] = cursor.rowcount
+    conn.commit()
+    return counts
+
+
+def add_rows(conn, source, where, params=()):
+    """Add the rows of `source` matching `where` to its rollup.
+
+    For bulk loads that suspend the insert trigger: one grouped upsert
+    replaces a rollup write per inserted row.  Does not commit.
+    """
+    table, trigger = SOURCES[source]
+    keys, totals, select = ROLLUPS[table]
+    conn.execute(f"""
+        INSERT INTO {table} ({', '.join(keys + totals)}) {select.format(where=f'WHERE {where}')}
+        ON CONFLICT ({', '.join(keys)}) DO UPDATE SET
+            {', '.join(f'{column} = {column} + excluded.{column}' for column in totals)}
+    """, params)
+
+
+def check(conn, tolerance=TOLERANCE):
+    """Compare the rollups with the raw tables.
+
+    Returns a list of (table, key, column, rollup value, actual value) for
+    every total that differs; an empty list means the rollups are correct.
+    """
+    mismatches = []
+    for table, (keys, totals, select) in ROLLUPS.items():
+        width = len(keys)
+        stored = {row[:width]: row[width:] for row in
+                  conn.execute(f"SELECT {', '.join(keys + totals)} FROM {table}")}
+        actual = {row[:width]: row[width:] for row in conn.execute(select.format(where=''))}
+
+        for key in stored.keys() | actual.keys():
+            stored_values = stored.get(key, (0,) * len(totals))
+            actual_values = actual.get(key, (0,) * len(totals))
+            for column, have, want in zip(totals, stored_values, actual_values):
+                if abs((have or 0) - (want or 0)) > tolerance:
+                    mismatches.append((table, key, column, have, want))
+    return mismatches
+
+
+def main(argv=None):
+    import db
+
+    parser = argparse.ArgumentParser(description="Check or rebuild the financial rollup tables")
+    parser.add_argument('command', choices=('check', 'rebuild'))
+    parser.add_argument('--db', default=db.DB_FILE, help="database file (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'rebuild':
+        with db.write_connection(args.db) as conn:
+            counts = rebuild(conn)
+        for table, count in counts.items():
+            print(f"{table}: {count} rows")
+        return 0
+
+    with db.read_connection(args.db) as conn:
+        mismatches = check(conn)
+    for table, key, column, have, want in mismatches:
+        print(f"{table} {key} {column}: rollup {have} != actual {want}")
+    print("Rollups are consistent." if not mismatches else f"{len(mismatches)} mismatches found.")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
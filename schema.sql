@@ -1,3 +1,4 @@
+-- Base schema. Indexes and later changes are applied by MIGRATIONS in db.py.
 
 -- Table: Admin
 CREATE TABLE admin (
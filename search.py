@@ -0,0 +1,81 @@
+"""Global search across tenants, properties, expenses and maintenance requests.
+
+search_index (migration 10) is one FTS5 table over all of them, kept in
+step by triggers.  A match's rowid is the row's id times
+db.SEARCH_ID_SLOTS plus its table's slot, so grouping and counting never
+have to read the indexed text.
+"""
+import re
+
+from db import SEARCH_ID_SLOTS
+
+# Result groups, in the order they are shown, and their slots
+KINDS = ('Tenant', 'Property', 'Expense', 'Maintenance')
+SLOTS = {'Property': 0, 'Tenant': 1, 'Expense': 2, 'Maintenance': 3}
+
+# Results shown per group
+PER_KIND = 5
+
+# Shorter input matches too much of the index to be worth a query
+MIN_QUERY_CHARS = 2
+
+# Ranking scores every match; past this many, a group shows its newest
+# matches instead, which is as useful for a term that common and far cheaper
+RANKED_MATCHES = 2000
+
+_TERM = re.compile(r'\w+')
+
+
+def match_query(text):
+    """Turn what the user typed into an FTS5 query, or None if it has no terms.
+
+    Every term must match, the last one as a prefix so results narrow
+    while the user types.
+    """
+    terms = _TERM.findall(text.lower())
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search(conn, text, per_kind=PER_KIND):
+    """Return [(kind, match count, [(id, title, detail), ...]), ...] for `text`.
+
+    Groups follow KINDS and leave out kinds with no match; each holds its
+    best `per_kind` results, best first.
+    """
+    query = match_query(text)
+    if query is None or len(text.strip()) < MIN_QUERY_CHARS:
+        return []
+
+    counts = dict(conn.execute(f"""
+        SELECT rowid % {SEARCH_ID_SLOTS}, COUNT(*) FROM search_index WHERE search_index MATCH ? GROUP BY 1
+    """, (query,)).fetchall())
+    if not counts:
+        return []
+
+    if sum(counts.values()) <= RANKED_MATCHES:
+        rowids = [rowid for rowid, in conn.execute(f"""
+            SELECT rowid FROM (
+                SELECT rowid, ROW_NUMBER() OVER (PARTITION BY rowid % {SEARCH_ID_SLOTS} ORDER BY rank) AS position
+                FROM search_index WHERE search_index MATCH ?
+            )
+            WHERE position <= ?
+            ORDER BY position
+        """, (query, per_kind))]
+    else:
+        rowids = []
+        for slot in counts:
+            rowids.extend(rowid for rowid, in conn.execute(f"""
+                SELECT rowid FROM search_index WHERE search_index MATCH ? AND rowid % {SEARCH_ID_SLOTS} = ?
+                ORDER BY rowid DESC LIMIT ?
+            """, (query, slot, per_kind)))
+
+    text_by_rowid = {rowid: (title, detail) for rowid, title, detail in conn.execute(
+        f"SELECT rowid, title, detail FROM search_index WHERE rowid IN ({', '.join('?' * len(rowids))})", rowids)}
+    results = {}
+    for rowid in rowids:
+        results.setdefault(rowid % SEARCH_ID_SLOTS, []).append((rowid // SEARCH_ID_SLOTS, *text_by_rowid[rowid]))
+    return [(kind, counts[SLOTS[kind]], results[SLOTS[kind]]) for kind in KINDS if SLOTS[kind] in results]
@@ -0,0 +1,155 @@
+import tkinter as tk
+from tkinter import ttk
+import background
+import search
+from db import DB_FILE, read_connection
+
+# Wait this long after the last keystroke before searching (milliseconds)
+DEBOUNCE_MS = 150
+
+GROUP_LABELS = {'Tenant': 'Tenants', 'Property': 'Properties', 'Expense': 'Expenses', 'Maintenance': 'Maintenance'}
+
+
+class SearchBar:
+    """Typeahead search box with results grouped by kind in a drop-down.
+
+    Typing restarts a short timer; when it fires the query runs in the
+    background, superseding any search still in flight, so only the
+    latest input is ever shown.  Choosing a result calls
+    on_open(kind, record_id).
+    """
+
+    def __init__(self, parent, on_open, db_file=None, **entry_options):
+        self.on_open = on_open
+        self.db_file = db_file or DB_FILE
+        self.pending = None
+        self.popup = None
+        self.results = None
+        self.items = {}  # result item -> (kind, record id)
+
+        self.entry = tk.Entry(parent, **entry_options)
+        self.entry.bind('<KeyRelease>', self.on_key)
+        self.entry.bind('<Down>', self.focus_results)
+        self.entry.bind('<Return>', self.open_first)
+        self.entry.bind('<Escape>', self.hide)
+        self.entry.bind('<FocusOut>', lambda event: self.entry.after(200, self.hide_unless_focused))
+
+    def pack(self, **options):
+        self.entry.pack(**options)
+
+    def on_key(self, event):
+        """Restart the debounce timer unless the key only moves around the results"""
+        if event.keysym in ('Up', 'Down', 'Return', 'Escape'):
+            return
+        if self.pending:
+            self.entry.after_cancel(self.pending)
+        self.pending = self.entry.after(DEBOUNCE_MS, self.run_search)
+
+    def run_search(self):
+        """Search for the current text in the background"""
+        self.pending = None
+        text = self.entry.get()
+        if search.match_query(text) is None or len(text.strip()) < search.MIN_QUERY_CHARS:
+            background.submit(self.entry, (self, 'search'), lambda: [], self.hide)
+            return
+        background.submit(self.entry, (self, 'search'), lambda: self.query(text), self.show_results,
+                          lambda error: print(f"Search failed: {str(error)}"))
+
+    def query(self, text):
+        with read_connection(self.db_file) as conn:
+            return search.search(conn, text)
+
+    def show_results(self, groups):
+        """Show grouped results under the entry"""
+        if not groups:
+            self.show_message("No matches")
+            return
+        self.ensure_popup()
+        self.results.delete(*self.results.get_children())
+        self.items = {}
+        for kind, count, rows in groups:
+            more = f" - showing {len(rows)}" if count > len(rows) else ""
+            group = self.results.insert('', 'end', text=f"{GROUP_LABELS[kind]} ({count}{more})", open=True)
+            for record_id, title, detail in rows:
+                item = self.results.insert(group, 'end', text=f"{title}   {detail}" if detail else title)
+                self.items[item] = (kind, record_id)
+        self.place_popup(sum(len(rows) + 1 for _, _, rows in groups))
+
+    def show_message(self, message):
+        self.ensure_popup()
+        self.results.delete(*self.results.get_children())
+        self.items = {}
+        self.results.insert('', 'end', text=message)
+        self.place_popup(1)
+
+    def ensure_popup(self):
+        if self.popup is not None and self.popup.winfo_exists():
+            return
+        self.popup = tk.Toplevel(self.entry)
+        self.popup.overrideredirect(True)
+        self.results = ttk.Treeview(self.popup, show='tree', selectmode='browse')
+        self.results.pack(fill='both', expand=True)
+        self.results.bind('<Double-1>', self.open_selected)
+        self.results.bind('<Return>', self.open_selected)
+        self.results.bind('<Escape>', self.hide)
+        self.results.bind('<FocusOut>', lambda event: self.entry.after(200, self.hide_unless_focused))
+
+    def place_popup(self, rows):
+        """Size the drop-down to its rows and put it under the entry"""
+        self.results.configure(height=min(rows, 20))
+        width = max(self.entry.winfo_width(), 400)
+        x = self.entry.winfo_rootx()
+        y = self.entry.winfo_rooty() + self.entry.winfo_height()
+        self.popup.geometry(f"{width}x{min(rows, 20) * 20 + 4}+{x}+{y}")
+        self.popup.deiconify()
+        self.popup.lift()
+
+    def focus_results(self, event=None):
+        """Move the keyboard into the results"""
+        if self.popup is None or not self.popup.winfo_exists() or not self.items:
+            return
+        first = next(iter(self.items))
+        self.results.focus_set()
+        self.results.selection_set(first)
+        self.results.focus(first)
+        return 'break'
+
+    def open_first(self, event=None):
+        """Open the top result"""
+        if self.pending:
+            # Enter pressed before the timer fired: search now instead
+            self.entry.after_cancel(self.pending)
+            self.run_search()
+            return 'break'
+        if self.items:
+            self.open_item(next(iter(self.items)))
+        return 'break'
+
+    def open_selected(self, event=None):
+        selection = self.results.selection()
+        if selection and selection[0] in self.items:
+            self.open_item(selection[0])
+        return 'break'
+
+    def open_item(self, item):
+        kind, record_id = self.items[item]
+        self.hide()
+        self.on_open(kind, record_id)
+
+    def hide_unless_focused(self):
+        """Hide the drop-down once focus has left both the entry and the results"""
+        try:
+            focus = self.entry.focus_get()
+        except (KeyError, tk.TclError):
+            focus = None
+        if focus not in (self.entry, self.results):
+            self.hide()
+
+    def hide(self, event=None):
+        if self.popup is not None:
+            try:
+                self.popup.destroy()
+            except tk.TclError:
+                pass
+        self.popup = None
+        self.items = {}
@@ -0,0 +1,16 @@
+"""Data access without Tkinter.
+
+The managers' dialogs only read and validate form fields; what is stored
+goes through these repositories, which scripts, the importer-style batch
+jobs and benchmarks can use directly:
+
+    with write_connection(DB_FILE) as conn:
+        lease_id = LeaseRepo(conn).add(tenant_id=1, property_id=1,
+                                       start_date='2024-01-01', rent_amount=Money(2500000))
+        PaymentRepo(conn).generate_monthly_rent()
+
+The reports are already functions of a connection; see reports.py.
+"""
+from services.records import Expense, Lease, MaintenanceRequest, Payment, Property, Tenant
+from services.repos import (ExpenseRepo, LeaseRepo, MaintenanceRepo, PaymentRepo, PropertyRepo, Repo,
+                            TenantRepo)
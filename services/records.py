@@ -0,0 +1,34 @@
+"""Lightweight records returned by the repositories.
+
+Each is a namedtuple of the row id and the table's editable columns, in
+table order.  Amount columns hold Money (or None), dates ISO strings.
+"""
+from collections import namedtuple
+
+
+def _record(name, fields):
+    # Every field but the id is optional, like the columns behind it
+    fields = fields.split()
+    return namedtuple(name, fields, defaults=(None,) * len(fields))
+
+
+Property = _record('Property', """
+    id name address type size bedrooms bathrooms rent_amount deposit_amount status furnished
+""")
+Tenant = _record('Tenant', """
+    id name property_id phone email national_id emergency_contact notes
+""")
+Lease = _record('Lease', """
+    id tenant_id property_id start_date end_date rent_amount deposit_amount status
+""")
+Payment = _record('Payment', """
+    id lease_id tenant_id property_id month due_date amount_due amount_paid
+    payment_date payment_method status notes
+""")
+Expense = _record('Expense', """
+    id property_id description category amount date paid_by invoice_number notes
+""")
+MaintenanceRequest = _record('MaintenanceRequest', """
+    id property_id tenant_id request_date description status cost_estimate actual_cost
+    completed_date notes
+""")
@@ -0,0 +1,199 @@
+"""Repositories: one class per table, taking plain values and returning records.
+
+A repository wraps a connection the caller owns and never commits, so the
+caller decides what is atomic: the managers open write_connection() for a
+single save, while a script or benchmark can run thousands of add() calls,
+or one add_many(), inside one transaction.
+"""
+import billing
+import statements
+from db import MONEY_COLUMNS
+from money import Money
+from services.records import Expense, Lease, MaintenanceRequest, Payment, Property, Tenant
+
+
+class Repo:
+    """Reads and writes the rows of `table` as `record`s"""
+
+    table = None
+    record = None
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    @property
+    def columns(self):
+        """The editable columns, in table order"""
+        return self.record._fields[1:]
+
+    def _check(self, values):
+        unknown = set(values) - set(self.columns)
+        if unknown:
+            raise TypeError(f"{self.table} has no column {', '.join(sorted(unknown))}")
+
+    def _load(self, row):
+        record = self.record(*row)
+        amounts = {column: Money(getattr(record, column))
+                   for column in MONEY_COLUMNS.get(self.table, ()) if getattr(record, column) is not None}
+        return record._replace(**amounts)
+
+    def get(self, record_id):
+        """The record with this id, or None"""
+        row = self.conn.execute(f"SELECT id, {', '.join(self.columns)} FROM {self.table} WHERE id = ?",
+                                (record_id,)).fetchone()
+        return self._load(row) if row else None
+
+    def add(self, **values):
+        """Insert a row and return its id; columns left out take their defaults"""
+        self._check(values)
+        cursor = self.conn.execute(
+            f"INSERT INTO {self.table} ({', '.join(values)}) VALUES ({', '.join('?' * len(values))})",
+            tuple(values.values()))
+        return cursor.lastrowid
+
+    def add_many(self, rows):
+        """Insert many rows with one executemany and return how many were added.
+
+        Rows are dicts with the same keys, or records (which set every
+        column; their id is ignored).
+        """
+        rows = [row._asdict() if isinstance(row, self.record) else dict(row) for row in rows]
+        if not rows:
+            return 0
+        for row in rows:
+            row.pop('id', None)
+        columns = list(rows[0])
+        self._check(columns)
+        self.conn.executemany(
+            f"INSERT INTO {self.table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            [tuple(row[column] for column in columns) for row in rows])
+        return len(rows)
+
+    def update(self, record_id, **values):
+        """Set the given columns of one row; returns False if there is no such row"""
+        self._check(values)
+        if not values:
+            return self.get(record_id) is not None
+        cursor = self.conn.execute(
+            f"UPDATE {self.table} SET {', '.join(f'{column} = ?' for column in values)} WHERE id = ?",
+            (*values.values(), record_id))
+        return cursor.rowcount == 1
+
+    def save(self, record_id, **values):
+        """update() when `record_id` is set, otherwise add(); returns the row's id"""
+        if record_id:
+            self.update(record_id, **values)
+            return record_id
+        return self.add(**values)
+
+    def delete(self, record_id):
+        """Delete one row; rows referring to it follow their foreign keys' ON DELETE rule"""
+        self.conn.execute(f"DELETE FROM {self.table} WHERE id = ?", (record_id,))
+
+
+class PropertyRepo(Repo):
+    """Properties, and the 'Name - Address' labels the dialogs pick them by"""
+
+    table = 'properties'
+    record = Property
+
+    def labels(self):
+        """A label for every property, ordered by name"""
+        return [f"{name or f'Property #{property_id}'} - {address}"
+                for property_id, name, address in statements.run(self.conn, 'properties.labels')]
+
+    def label(self, property_id):
+        """The label for one property, or None"""
+        row = statements.run(self.conn, 'properties.label', (property_id,)).fetchone()
+        if row is None:
+            return None
+        return f"{row[0] or f'Property #{property_id}'} - {row[1]}"
+
+    def id_for_label(self, label):
+        """The id of the property a label names, or None"""
+        name = label.split(' - ')[0]
+        if name.startswith('Property #'):
+            return int(name.split('#')[1])
+        row = statements.run(self.conn, 'properties.id_by_name', (name,)).fetchone()
+        return row[0] if row else None
+
+
+class TenantRepo(Repo):
+    """Tenants, and the 'Name (ID: n)' labels the dialogs pick them by"""
+
+    table = 'tenants'
+    record = Tenant
+
+    def labels(self):
+        """A label for every tenant, ordered by name"""
+        return [f"{name} (ID: {tenant_id})"
+                for tenant_id, name in statements.run(self.conn, 'tenants.labels')]
+
+    def label(self, tenant_id):
+        """The label for one tenant, or None"""
+        row = statements.run(self.conn, 'tenants.label', (tenant_id,)).fetchone()
+        return f"{row[0]} (ID: {tenant_id})" if row else None
+
+    @staticmethod
+    def id_for_label(label):
+        return int(label.split('(ID: ')[1].rstrip(')'))
+
+
+class LeaseRepo(Repo):
+    table = 'leases'
+    record = Lease
+
+    def terminate(self, lease_id):
+        """Mark a lease Terminated"""
+        return self.update(lease_id, status='Terminated')
+
+    def parties(self, lease_id):
+        """(tenant_id, property_id) of a lease, or None"""
+        return statements.run(self.conn, 'leases.parties', (lease_id,)).fetchone()
+
+    def active_labels(self):
+        """A 'Tenant - Property (Lease ID: n)' label for every active lease, ordered by tenant"""
+        return [f"{tenant} - {property_name} (Lease ID: {lease_id})"
+                for lease_id, tenant, property_name in statements.run(self.conn, 'leases.active_labels')]
+
+    def label(self, lease_id):
+        """The label for one lease, or None"""
+        row = statements.run(self.conn, 'leases.label', (lease_id,)).fetchone()
+        return f"{row[0]} - {row[1]} (Lease ID: {lease_id})" if row else None
+
+    @staticmethod
+    def id_for_label(label):
+        return int(label.split('(Lease ID: ')[1].rstrip(')'))
+
+
+class PaymentRepo(Repo):
+    """Rent rows, and the billing runs that create and age them"""
+
+    table = 'rent_payments'
+    record = Payment
+
+    def generate_monthly_rent(self, today=None):
+        """This month's rent row for every active lease; see billing.generate_monthly_rent"""
+        return billing.generate_monthly_rent(self.conn, today)
+
+    def schedule_rent(self, horizon=None, due_day=None):
+        """Every missing rent row up to `horizon`; see billing.schedule_rent (commits per batch)"""
+        return billing.schedule_rent(self.conn, horizon, due_day)
+
+    def sweep_overdue(self, today=None, full=False):
+        """Mark past-due rows Overdue; see billing.sweep_overdue (commits)"""
+        return billing.sweep_overdue(self.conn, today, full)
+
+
+class ExpenseRepo(Repo):
+    table = 'expenses'
+    record = Expense
+
+
+class MaintenanceRepo(Repo):
+    table = 'maintenance_requests'
+    record = MaintenanceRequest
+
+    def set_status(self, request_id, status, actual_cost=None, completed_date=None):
+        """Move a request to `status`, recording its cost and completion date"""
+        return self.update(request_id, status=status, actual_cost=actual_cost, completed_date=completed_date)
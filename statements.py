@@ -0,0 +1,135 @@
+"""Named, parameterised SQL statements shared by the repositories and dialogs.
+
+sqlite3 compiles a statement once per connection and reuses it while the
+exact same SQL text stays in the connection's statement cache.  Keeping
+each query here, written once, means every caller sends identical text,
+so a dialog opened a hundred times compiles its query once:
+
+    with read_connection(DB_FILE) as conn:
+        row = statements.run(conn, 'properties.label', (property_id,)).fetchone()
+
+Statements built from a table name or a filter's choices (Repo.get(),
+the managers' pagers) are not listed; their text is still stable for each
+table or combination of filters, so they are cached the same way.
+"""
+
+STATEMENTS = {
+    # Admin accounts
+    'admin.find': "SELECT id FROM admin WHERE username = ?",
+    'admin.add': "INSERT INTO admin (username, password_hash) VALUES (?, ?)",
+    'admin.login': "SELECT id, username FROM admin WHERE username = ? AND password_hash = ?",
+
+    # Properties
+    'properties.labels': "SELECT id, name, address FROM properties ORDER BY name",
+    'properties.label': "SELECT name, address FROM properties WHERE id = ?",
+    'properties.id_by_name': "SELECT id FROM properties WHERE name = ?",
+    'properties.details': """
+        SELECT name, address, type, size, bedrooms, bathrooms,
+               rent_amount, deposit_amount, status, furnished, created_at
+        FROM properties WHERE id = ?
+    """,
+    'properties.tenants': """
+        SELECT name, phone, email, emergency_contact
+        FROM tenants WHERE property_id = ?
+    """,
+
+    # Tenants
+    'tenants.labels': "SELECT id, name FROM tenants ORDER BY name",
+    'tenants.label': "SELECT name FROM tenants WHERE id = ?",
+    'tenants.details': """
+        SELECT t.name, t.phone, t.email, t.national_id,
+               t.emergency_contact, t.notes, t.created_at,
+               COALESCE(p.name, 'Property #' || p.id) as property_name,
+               p.address
+        FROM tenants t
+        LEFT JOIN properties p ON t.property_id = p.id
+        WHERE t.id = ?
+    """,
+    'tenants.leases': """
+        SELECT start_date, end_date, rent_amount, status
+        FROM leases WHERE tenant_id = ?
+        ORDER BY start_date DESC
+    """,
+
+    # Leases
+    'leases.parties': "SELECT tenant_id, property_id FROM leases WHERE id = ?",
+    'leases.active_labels': """
+        SELECT l.id, t.name, COALESCE(p.name, 'Property #' || p.id)
+        FROM leases l
+        JOIN tenants t ON l.tenant_id = t.id
+        JOIN properties p ON l.property_id = p.id
+        WHERE l.status = 'Active'
+        ORDER BY t.name
+    """,
+    'leases.label': """
+        SELECT t.name, COALESCE(p.name, 'Property #' || p.id)
+        FROM leases l
+        JOIN tenants t ON l.tenant_id = t.id
+        JOIN properties p ON l.property_id = p.id
+        WHERE l.id = ?
+    """,
+    'leases.details': """
+        SELECT l.start_date, l.end_date, l.rent_amount, l.deposit_amount, l.status, l.created_at,
+               t.name as tenant_name,
+               COALESCE(p.name, 'Property #' || p.id) as property_name,
+               p.address
+        FROM leases l
+        JOIN tenants t ON l.tenant_id = t.id
+        JOIN properties p ON l.property_id = p.id
+        WHERE l.id = ?
+    """,
+    'leases.payments': """
+        SELECT month, due_date, amount_due, amount_paid, status, payment_date
+        FROM rent_payments WHERE lease_id = ?
+        ORDER BY due_date DESC
+    """,
+
+    # Rent payments
+    'payments.details': """
+        SELECT rp.month, rp.due_date, rp.amount_due, rp.amount_paid,
+               rp.payment_date, rp.payment_method, rp.status, rp.notes, rp.created_at,
+               t.name as tenant_name,
+               COALESCE(p.name, 'Property #' || p.id) as property_name,
+               p.address
+        FROM rent_payments rp
+        JOIN tenants t ON rp.tenant_id = t.id
+        JOIN properties p ON rp.property_id = p.id
+        WHERE rp.id = ?
+    """,
+
+    # Expenses
+    'expenses.details': """
+        SELECT e.description, e.category, e.amount, e.date, e.paid_by,
+               e.invoice_number, e.notes, e.created_at,
+               COALESCE(p.name, 'Property #' || p.id) as property_name,
+               p.address
+        FROM expenses e
+        JOIN properties p ON e.property_id = p.id
+        WHERE e.id = ?
+    """,
+
+    # Maintenance requests
+    'maintenance.details': """
+        SELECT mr.request_date, mr.description, mr.status, mr.cost_estimate,
+               mr.actual_cost, mr.completed_date, mr.notes,
+               COALESCE(p.name, 'Property #' || p.id) as property_name,
+               p.address, COALESCE(t.name, 'N/A') as tenant_name
+        FROM maintenance_requests mr
+        JOIN properties p ON mr.property_id = p.id
+        LEFT JOIN tenants t ON mr.tenant_id = t.id
+        WHERE mr.id = ?
+    """,
+}
+
+
+def sql(name):
+    """The SQL text of a named statement"""
+    try:
+        return STATEMENTS[name]
+    except KeyError:
+        raise KeyError(f"No statement named {name!r}") from None
+
+
+def run(conn, name, params=()):
+    """Execute a named statement on a connection or cursor and return the cursor"""
+    return conn.execute(sql(name), params)
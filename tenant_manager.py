@@ -1,10 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
 from datetime import datetime
-from db import DB_FILE
+from db import DB_FILE, read_connection, write_connection
+import statements
+from money import Money
+from services import PropertyRepo, TenantRepo
+from listings import tenant_pager
+from virtual_list import VirtualListMixin
 
-class TenantManager:
+
+class TenantManager(VirtualListMixin):
     def __init__(self, parent_frame):
         self.parent_frame = parent_frame
         self.setup_ui()
@@ -69,7 +74,8 @@ class TenantManager:
         # Scrollbars
         v_scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.tree.yview)
         h_scrollbar = ttk.Scrollbar(list_frame, orient='horizontal', command=self.tree.xview)
-        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.tree.configure(xscrollcommand=h_scrollbar.set)
+        self.attach_virtual_scroll(v_scrollbar)
         
         # Pack treeview and scrollbars
         self.tree.pack(side='left', fill='both', expand=True)
@@ -93,54 +99,33 @@ class TenantManager:
     def load_property_list(self):
         """Load property list for filter dropdown"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, name, address FROM properties ORDER BY name")
-                properties = cursor.fetchall()
-                
-                property_list = ['All Properties']
-                for prop in properties:
-                    prop_name = prop[1] if prop[1] else f"Property #{prop[0]}"
-                    property_list.append(f"{prop_name} - {prop[2]}")
-                
-                self.property_filter['values'] = property_list
+            with read_connection(DB_FILE) as conn:
+                self.property_filter['values'] = ['All Properties'] + PropertyRepo(conn).labels()
                 self.property_filter.set('All Properties')
                 
         except Exception as e:
             print(f"Error loading property list: {e}")
             
-    def load_tenants(self):
-        """Load tenants from database"""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
+    def load_tenants(self, property_id=None):
+        """Load tenants from database, optionally for a single property"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT t.id, t.name, 
-                           COALESCE(p.name, 'Property #' || p.id) as property_name,
-                           t.phone, t.email, t.emergency_contact, t.created_at
-                    FROM tenants t
-                    LEFT JOIN properties p ON t.property_id = p.id
-                    ORDER BY t.created_at DESC
-                """)
-                
-                tenants = cursor.fetchall()
-                
-                for tenant in tenants:
-                    # Format the data for display
-                    formatted_tenant = list(tenant)
-                    if formatted_tenant[6]:  # created_at
-                        formatted_tenant[6] = formatted_tenant[6][:10]  # Just the date part
-                    
-                    self.tree.insert('', 'end', values=formatted_tenant)
+            pager = tenant_pager(property_id)
+            self.show_rows(pager, self.format_tenant, DB_FILE, on_error=self.show_load_error)
                     
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load tenants: {str(e)}")
             
+    def show_load_error(self, error):
+        """Report a failed background load"""
+        messagebox.showerror("Error", f"Failed to load tenants: {str(error)}")
+        
+    def format_tenant(self, tenant):
+        """Format a tenant row for display"""
+        formatted_tenant = list(tenant)
+        if formatted_tenant[6]:  # created_at
+            formatted_tenant[6] = formatted_tenant[6][:10]  # Just the date part
+        return formatted_tenant
+            
     def load_all_tenants(self):
         """Load all tenants (clear filter)"""
         self.property_filter.set('All Properties')
@@ -155,43 +140,12 @@ class TenantManager:
             
         # Extract property ID from selection
         try:
-            property_name = selected.split(' - ')[0]
+            with read_connection(DB_FILE) as conn:
+                property_id = PropertyRepo(conn).id_for_label(selected)
+            if not property_id:
+                return
             
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                
-                # Find property ID
-                if property_name.startswith('Property #'):
-                    property_id = int(property_name.split('#')[1])
-                else:
-                    cursor.execute("SELECT id FROM properties WHERE name = ?", (property_name,))
-                    result = cursor.fetchone()
-                    if not result:
-                        return
-                    property_id = result[0]
-                
-                # Clear existing items
-                for item in self.tree.get_children():
-                    self.tree.delete(item)
-                
-                # Load filtered tenants
-                cursor.execute("""
-                    SELECT t.id, t.name, 
-                           COALESCE(p.name, 'Property #' || p.id) as property_name,
-                           t.phone, t.email, t.emergency_contact, t.created_at
-                    FROM tenants t
-                    LEFT JOIN properties p ON t.property_id = p.id
-                    WHERE t.property_id = ?
-                    ORDER BY t.created_at DESC
-                """, (property_id,))
-                
-                tenants = cursor.fetchall()
-                
-                for tenant in tenants:
-                    formatted_tenant = list(tenant)
-                    if formatted_tenant[6]:  # created_at
-                        formatted_tenant[6] = formatted_tenant[6][:10]
-                    self.tree.insert('', 'end', values=formatted_tenant)
+            self.load_tenants(property_id)
                     
         except Exception as e:
             messagebox.showerror("Error", f"Failed to filter tenants: {str(e)}")
@@ -237,10 +191,8 @@ class TenantManager:
                               f"Are you sure you want to remove '{tenant_name}'?\n\n"
                               "This will also remove all associated leases and payments."):
             try:
-                with sqlite3.connect(DB_FILE) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("DELETE FROM tenants WHERE id = ?", (tenant_id,))
-                    conn.commit()
+                with write_connection(DB_FILE) as conn:
+                    TenantRepo(conn).delete(tenant_id)
                     
                 messagebox.showinfo("Success", "Tenant removed successfully")
                 self.load_tenants()
@@ -319,17 +271,8 @@ class TenantDialog:
     def load_property_options(self, combobox):
         """Load property options for dropdown"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, name, address FROM properties ORDER BY name")
-                properties = cursor.fetchall()
-                
-                property_options = []
-                for prop in properties:
-                    prop_name = prop[1] if prop[1] else f"Property #{prop[0]}"
-                    property_options.append(f"{prop_name} - {prop[2]}")
-                
-                combobox['values'] = property_options
+            with read_connection(DB_FILE) as conn:
+                combobox['values'] = PropertyRepo(conn).labels()
                 
         except Exception as e:
             print(f"Error loading property options: {e}")
@@ -337,25 +280,20 @@ class TenantDialog:
     def load_tenant_data(self):
         """Load existing tenant data for editing"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT t.name, t.property_id, t.phone, t.email, t.national_id, 
-                           t.emergency_contact, t.notes
-                    FROM tenants t WHERE t.id = ?
-                """, (self.tenant_id,))
+            with read_connection(DB_FILE) as conn:
+                tenant = TenantRepo(conn).get(self.tenant_id)
                 
-                data = cursor.fetchone()
-                if data:
-                    field_names = ['name', 'property_id', 'phone', 'email', 'national_id',
-                                 'emergency_contact', 'notes']
-                    
-                    for i, field_name in enumerate(field_names):
-                        if data[i] is not None:
-                            if field_name == 'notes':
-                                self.entries[field_name].insert(1.0, str(data[i]))
-                            else:
-                                self.entries[field_name].set(str(data[i]))
+            if tenant:
+                field_names = ['name', 'property_id', 'phone', 'email', 'national_id',
+                             'emergency_contact', 'notes']
+                
+                for field_name in field_names:
+                    value = getattr(tenant, field_name)
+                    if value is not None:
+                        if field_name == 'notes':
+                            self.entries[field_name].insert(1.0, str(value))
+                        else:
+                            self.entries[field_name].set(str(value))
                                 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load tenant data: {str(e)}")
@@ -374,56 +312,25 @@ class TenantDialog:
                 messagebox.showerror("Error", "Please select a property")
                 return
                 
-            # Extract property ID from selection
-            property_name = property_selection.split(' - ')[0]
-            property_id = None
-            
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-                
-                if property_name.startswith('Property #'):
-                    property_id = int(property_name.split('#')[1])
-                else:
-                    cursor.execute("SELECT id FROM properties WHERE name = ?", (property_name,))
-                    result = cursor.fetchone()
-                    if result:
-                        property_id = result[0]
-                
+            with write_connection(DB_FILE) as conn:
+                # Extract property ID from selection
+                property_id = PropertyRepo(conn).id_for_label(property_selection)
                 if not property_id:
                     messagebox.showerror("Error", "Invalid property selection")
                     return
-            
-            # Get form data
-            data = {
-                'name': self.entries['name'].get().strip(),
-                'property_id': property_id,
-                'phone': self.entries['phone'].get().strip() or None,
-                'email': self.entries['email'].get().strip() or None,
-                'national_id': self.entries['national_id'].get().strip() or None,
-                'emergency_contact': self.entries['emergency_contact'].get().strip() or None,
-                'notes': self.entries['notes'].get(1.0, tk.END).strip() or None
-            }
-            
-            if self.tenant_id:
-                # Update existing tenant
-                cursor.execute("""
-                    UPDATE tenants SET 
-                    name = ?, property_id = ?, phone = ?, email = ?, 
-                    national_id = ?, emergency_contact = ?, notes = ?
-                    WHERE id = ?
-                """, (data['name'], data['property_id'], data['phone'], data['email'],
-                     data['national_id'], data['emergency_contact'], data['notes'],
-                     self.tenant_id))
-            else:
-                # Insert new tenant
-                cursor.execute("""
-                    INSERT INTO tenants 
-                    (name, property_id, phone, email, national_id, emergency_contact, notes)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (data['name'], data['property_id'], data['phone'], data['email'],
-                     data['national_id'], data['emergency_contact'], data['notes']))
-            
-            conn.commit()
+                
+                # Get form data
+                data = {
+                    'name': self.entries['name'].get().strip(),
+                    'property_id': property_id,
+                    'phone': self.entries['phone'].get().strip() or None,
+                    'email': self.entries['email'].get().strip() or None,
+                    'national_id': self.entries['national_id'].get().strip() or None,
+                    'emergency_contact': self.entries['emergency_contact'].get().strip() or None,
+                    'notes': self.entries['notes'].get(1.0, tk.END).strip() or None
+                }
+                
+                TenantRepo(conn).save(self.tenant_id, **data)
             
             messagebox.showinfo("Success", "Tenant saved successfully")
             self.dialog.destroy()
@@ -483,19 +390,11 @@ class TenantDetailsDialog:
     def load_tenant_details(self):
         """Load tenant details and lease history"""
         try:
-            with sqlite3.connect(DB_FILE) as conn:
+            with read_connection(DB_FILE) as conn:
                 cursor = conn.cursor()
                 
                 # Get tenant details
-                cursor.execute("""
-                    SELECT t.name, t.phone, t.email, t.national_id, 
-                           t.emergency_contact, t.notes, t.created_at,
-                           COALESCE(p.name, 'Property #' || p.id) as property_name,
-                           p.address
-                    FROM tenants t
-                    LEFT JOIN properties p ON t.property_id = p.id
-                    WHERE t.id = ?
-                """, (self.tenant_id,))
+                statements.run(cursor, 'tenants.details', (self.tenant_id,))
                 
                 tenant_data = cursor.fetchone()
                 if tenant_data:
@@ -518,11 +417,7 @@ Notes: {tenant_data[5] or 'N/A'}
                     self.info_text.config(state='disabled')
                 
                 # Get lease history
-                cursor.execute("""
-                    SELECT start_date, end_date, rent_amount, status
-                    FROM leases WHERE tenant_id = ?
-                    ORDER BY start_date DESC
-                """, (self.tenant_id,))
+                statements.run(cursor, 'tenants.leases', (self.tenant_id,))
                 
                 leases = cursor.fetchall()
                 
@@ -533,7 +428,7 @@ Notes: {tenant_data[5] or 'N/A'}
                     if formatted_lease[0]:  # start_date
                         formatted_lease[0] = formatted_lease[0][:10]
                     if formatted_lease[2]:  # rent_amount
-                        formatted_lease[2] = f"RS{formatted_lease[2]:.2f}"
+                        formatted_lease[2] = str(Money(formatted_lease[2]))
                     
                     self.lease_tree.insert('', 'end', values=formatted_lease)
                     
@@ -5,6 +5,19 @@ import tempfile
 import shutil
 from unittest.mock import Mock, patch
 import tkinter as tk
+import background
+import db
+
+@pytest.fixture(autouse=True)
+def inline_background_tasks(monkeypatch):
+    """Run background loads synchronously; tests have no Tk main loop to deliver them"""
+    monkeypatch.setattr(background, 'INLINE', True)
+
+@pytest.fixture(autouse=True)
+def close_db_pool():
+    """Close pooled connections after each test so temp databases can be removed"""
+    yield
+    db.close_all()
 
 @pytest.fixture
 def temp_db():
@@ -17,6 +30,8 @@ def temp_db():
     with sqlite3.connect(db_path) as conn:
         with open("schema.sql", 'r') as f:
             conn.executescript(f.read())
+        db.migrate(conn)
+    conn.close()
     
     yield db_path
     
@@ -0,0 +1,127 @@
+import pytest
+import threading
+import background
+from background import TaskRunner
+
+
+class FakeRoot:
+    """Collects root.after callbacks so tests can run the poll loop by hand"""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, delay, callback):
+        self.callbacks.append(callback)
+
+    def run_until_idle(self, runner, timeout=5):
+        """Poll until nothing is pending or the timeout expires"""
+        deadline = threading.Event()
+        timer = threading.Timer(timeout, deadline.set)
+        timer.start()
+        try:
+            while (runner._pending or self.callbacks) and not deadline.is_set():
+                if self.callbacks:
+                    self.callbacks.pop(0)()
+                else:
+                    deadline.wait(0.01)
+        finally:
+            timer.cancel()
+
+
+@pytest.fixture
+def runner():
+    runner = TaskRunner(FakeRoot())
+    yield runner
+    runner.shutdown()
+
+
+class TestTaskRunner:
+    """Test cases for off-thread tasks delivered on the Tk thread"""
+
+    def test_result_delivered_on_poll(self, runner):
+        """Test that on_done runs from the poll, on the calling thread"""
+        results = []
+        runner.submit('k', lambda: threading.get_ident(),
+                      lambda result: results.append((result, threading.get_ident())))
+        assert results == []
+
+        runner.root.run_until_idle(runner)
+        worker_thread, delivery_thread = results[0]
+        assert worker_thread != threading.get_ident()
+        assert delivery_thread == threading.get_ident()
+
+    def test_superseded_task_dropped(self, runner):
+        """Test that only the latest task submitted under a key is delivered"""
+        release = threading.Event()
+        results = []
+        runner.submit('k', lambda: release.wait(5) and 'old', results.append)
+        runner.submit('k', lambda: 'new', results.append)
+        release.set()
+
+        runner.root.run_until_idle(runner)
+        assert results == ['new']
+
+    def test_independent_keys(self, runner):
+        """Test that tasks under different keys do not supersede each other"""
+        results = []
+        runner.submit('a', lambda: 1, results.append)
+        runner.submit('b', lambda: 2, results.append)
+
+        runner.root.run_until_idle(runner)
+        assert sorted(results) == [1, 2]
+
+    def test_error_goes_to_on_error(self, runner):
+        """Test that exceptions are handed to on_error instead of on_done"""
+        done, errors = [], []
+
+        def fail():
+            raise ValueError("boom")
+
+        runner.submit('k', fail, done.append, errors.append)
+        runner.root.run_until_idle(runner)
+        assert done == []
+        assert isinstance(errors[0], ValueError)
+
+    def test_failing_callback_keeps_polling(self, runner, capsys):
+        """Test that a callback raising does not strand the results of other tasks"""
+        release = threading.Event()
+        results = []
+
+        def fail(result):
+            release.set()
+            raise RuntimeError("widget gone")
+
+        runner.submit('a', lambda: 1, fail)
+        runner.submit('b', lambda: release.wait(5) and 2, results.append)
+
+        runner.root.run_until_idle(runner)
+        assert results == [2]
+        assert "Background task callback failed: widget gone" in capsys.readouterr().out
+
+    def test_cancel(self, runner):
+        """Test that a cancelled task is never delivered"""
+        release = threading.Event()
+        results = []
+        runner.submit('k', lambda: release.wait(5), results.append)
+        runner.cancel('k')
+        release.set()
+
+        assert not runner.is_pending('k')
+        runner.root.run_until_idle(runner)
+        assert results == []
+
+
+class TestInlineSubmit:
+    """Test cases for the synchronous mode used by the test suite"""
+
+    def test_inline_runs_immediately(self):
+        """Test that inline submit calls back before returning"""
+        results = []
+        background.submit(None, 'k', lambda: 42, results.append)
+        assert results == [42]
+
+    def test_inline_error(self):
+        """Test that inline submit routes exceptions to on_error"""
+        errors = []
+        background.submit(None, 'k', lambda: 1 / 0, None, errors.append)
+        assert isinstance(errors[0], ZeroDivisionError)
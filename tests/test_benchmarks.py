@@ -0,0 +1,108 @@
+import pytest
+import json
+import sqlite3
+import subprocess
+import sys
+from datetime import date
+import billing
+import exporter
+import rollups
+from benchmarks import dataset, suite
+
+AS_OF = date(2024, 3, 15)
+
+
+def table_rows(path, table):
+    """Every row of `table`, without the timestamps SQLite fills in"""
+    conn = sqlite3.connect(path)
+    try:
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")
+                   if row[1] not in ('created_at', 'updated_at')]
+        return conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def portfolio(tmp_path):
+    """A small generated portfolio and its row counts"""
+    path = str(tmp_path / "portfolio.db")
+    return path, dataset.build(path, 40, years=2, as_of=AS_OF)
+
+
+class TestDataset:
+    """Test cases for the synthetic dataset generator"""
+
+    def test_deterministic(self, portfolio, tmp_path):
+        """Test that the same seed gives the same rows and another seed different ones"""
+        path, counts = portfolio
+        again = str(tmp_path / "again.db")
+        assert dataset.build(again, 40, years=2, as_of=AS_OF) == counts
+        for table in suite.TABLES:
+            assert table_rows(path, table) == table_rows(again, table)
+
+        other = str(tmp_path / "other.db")
+        dataset.build(other, 40, years=2, seed=2, as_of=AS_OF)
+        assert table_rows(path, 'tenants') != table_rows(other, 'tenants')
+
+    def test_consistent(self, portfolio):
+        """Test that the rows satisfy the schema's rules and the rollups match them"""
+        path, counts = portfolio
+        assert counts['properties'] == 40
+        assert counts['rent_payments'] > counts['leases'] >= 40
+        conn = sqlite3.connect(path)
+        try:
+            assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+            assert rollups.check(conn) == []
+            assert conn.execute("SELECT MIN(start_date) FROM leases").fetchone()[0] >= '2022-03-01'
+            assert conn.execute("SELECT MAX(month) FROM rent_payments").fetchone() == ('2024-02',)
+            assert conn.execute("""
+                SELECT COUNT(*) FROM maintenance_requests
+                WHERE request_date > ? OR completed_date > ?
+            """, (AS_OF.isoformat(), AS_OF.isoformat())).fetchone() == (0,)
+            # This month's rent is left for generate_monthly_rent
+            active = conn.execute("SELECT COUNT(*) FROM leases WHERE status = 'Active'").fetchone()[0]
+            assert billing.generate_monthly_rent(conn, AS_OF) == active > 0
+        finally:
+            conn.close()
+
+    def test_existing_file(self, portfolio):
+        """Test that an existing database is never overwritten"""
+        path, counts = portfolio
+        with pytest.raises(FileExistsError):
+            dataset.build(path, 1)
+        assert len(table_rows(path, 'properties')) == 40
+
+
+class TestSuite:
+    """Test cases for the benchmark runner"""
+
+    def test_results(self, portfolio, tmp_path):
+        """Test that every list, report and job is timed and the database is left alone"""
+        path, counts = portfolio
+        output = tmp_path / "results.json"
+        suite.main(['--db', path, '--repeat', '2', '-o', str(output)])
+        document = json.loads(output.read_text())
+
+        assert document['rows'] == counts
+        results = document['results']
+        for name in ('list.payments', 'list.expenses.property_category', 'labels.tenants',
+                     'report.overdue-rent', 'report.financial-summary', 'export.csv', 'export.columnar'):
+            assert results[name]['best_ms'] <= results[name]['median_ms']
+        assert len([name for name in results if name.startswith('report.')]) == 7
+        assert results['list.payments']['runs'] == 2
+        assert results['export.csv']['rows'] >= sum(counts[table] for table in exporter.EXPORT_TABLES)
+        assert results['list.documents.search']['rows'] > 0
+
+        active = len([lease for lease in table_rows(path, 'leases') if 'Active' in lease])
+        assert results['billing.generate_monthly_rent']['rows'] == active > 0
+        assert results['billing.generate_monthly_rent.rerun']['rows'] == 0
+        assert len(table_rows(path, 'rent_payments')) == counts['rent_payments']
+
+    def test_no_tkinter(self):
+        """Test that the benchmarks run on a Python without Tk"""
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import benchmarks.suite'],
+                                capture_output=True, text=True, check=True)
+        imported = [line.split('|')[-1].strip() for line in result.stderr.splitlines()]
+        assert 'listings' in imported
+        assert not [name for name in imported if name.startswith(('tkinter', '_tkinter'))]
@@ -0,0 +1,223 @@
+import pytest
+import sqlite3
+from datetime import date
+import billing
+
+class TestGenerateMonthlyRent:
+    """Test cases for set-based monthly rent generation"""
+
+    def setup_leases(self, conn):
+        """Insert a property, two tenants and a mix of leases"""
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('P', '1 Test St', 1000)")
+        cursor.execute("INSERT INTO tenants (name, property_id) VALUES ('A', 1)")
+        cursor.execute("INSERT INTO tenants (name, property_id) VALUES ('B', 1)")
+        cursor.executemany("""
+            INSERT INTO leases (tenant_id, property_id, start_date, rent_amount, status)
+            VALUES (?, 1, ?, ?, ?)
+        """, [
+            (1, '2024-01-01', 1000, 'Active'),
+            (2, '2024-02-15', 1500, 'Active'),
+            (1, '2023-01-01', 900, 'Terminated'),
+            (2, '2024-06-01', 1100, 'Active'),  # starts after the billing date
+        ])
+        conn.commit()
+
+    def test_generates_rows_for_active_leases(self, temp_db):
+        """Test that one row is created per started, active lease"""
+        with sqlite3.connect(temp_db) as conn:
+            self.setup_leases(conn)
+            count = billing.generate_monthly_rent(conn, date(2024, 3, 10))
+            conn.commit()
+
+            assert count == 2
+            rows = conn.execute("""
+                SELECT lease_id, month, due_date, amount_due, status
+                FROM rent_payments ORDER BY lease_id
+            """).fetchall()
+            assert rows == [
+                (1, '2024-03', '2024-04-01', 1000, 'Pending'),
+                (2, '2024-03', '2024-04-01', 1500, 'Pending'),
+            ]
+
+    def test_rerun_is_noop(self, temp_db):
+        """Test that generating twice for the same month creates nothing new"""
+        with sqlite3.connect(temp_db) as conn:
+            self.setup_leases(conn)
+            assert billing.generate_monthly_rent(conn, date(2024, 3, 10)) == 2
+            assert billing.generate_monthly_rent(conn, date(2024, 3, 20)) == 0
+            assert billing.generate_monthly_rent(conn, date(2024, 4, 1)) == 2
+
+    def test_december_due_date_rolls_over(self, temp_db):
+        """Test that December rent is due on January 1st of the next year"""
+        with sqlite3.connect(temp_db) as conn:
+            self.setup_leases(conn)
+            billing.generate_monthly_rent(conn, date(2024, 12, 5))
+            due_dates = {row[0] for row in conn.execute("SELECT due_date FROM rent_payments")}
+            assert due_dates == {'2025-01-01'}
+
+
+class TestScheduleRent:
+    """Test cases for the multi-month rent schedule engine"""
+
+    def add_lease(self, conn, start_date, end_date=None, rent_amount=3000, status='Active'):
+        """Insert a lease (and its property/tenant) and return its id"""
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('P', '1 Test St', ?)", (rent_amount,))
+        property_id = cursor.lastrowid
+        cursor.execute("INSERT INTO tenants (name, property_id) VALUES ('T', ?)", (property_id,))
+        cursor.execute("""
+            INSERT INTO leases (tenant_id, property_id, start_date, end_date, rent_amount, status)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (cursor.lastrowid, property_id, start_date, end_date, rent_amount, status))
+        conn.commit()
+        return cursor.lastrowid
+
+    def payments(self, conn, lease_id):
+        return conn.execute("""
+            SELECT month, due_date, amount_due FROM rent_payments
+            WHERE lease_id = ? ORDER BY month
+        """, (lease_id,)).fetchall()
+
+    def test_backfills_missing_months(self, temp_db):
+        """Test that every month from lease start to the horizon is created"""
+        with sqlite3.connect(temp_db) as conn:
+            lease_id = self.add_lease(conn, '2024-01-01')
+            # One month was already generated by hand
+            billing.generate_monthly_rent(conn, date(2024, 2, 1))
+
+            count = billing.schedule_rent(conn, horizon=date(2024, 4, 10))
+            assert count == 3
+            assert [row[0] for row in self.payments(conn, lease_id)] == ['2024-01', '2024-02', '2024-03', '2024-04']
+            assert billing.schedule_rent(conn, horizon=date(2024, 4, 10)) == 0
+
+    def test_prorates_partial_first_and_last_months(self, temp_db):
+        """Test that partial months are charged by the day"""
+        with sqlite3.connect(temp_db) as conn:
+            lease_id = self.add_lease(conn, '2024-01-16', '2024-03-10', rent_amount=250000)
+            billing.schedule_rent(conn, horizon=date(2024, 12, 31))
+
+            assert self.payments(conn, lease_id) == [
+                ('2024-01', '2024-02-01', 129032),      # 16 of 31 days: 129032.26 paisa
+                ('2024-02', '2024-03-01', 250000),
+                ('2024-03', '2024-04-01', 80645),       # 10 of 31 days: 80645.16 paisa
+            ]
+            assert all(type(row[2]) is int for row in self.payments(conn, lease_id))
+
+    def test_lease_ending_before_it_starts(self, temp_db):
+        """Test that inverted lease dates produce no periods and no negative rent"""
+        assert list(billing.billing_periods(date(2024, 3, 20), date(2024, 3, 10), date(2024, 12, 31))) == []
+        assert list(billing.billing_periods(date(2024, 3, 20), date(2024, 2, 10), date(2024, 12, 31))) == []
+        with sqlite3.connect(temp_db) as conn:
+            lease_id = self.add_lease(conn, '2024-03-20', '2024-03-10')
+            assert billing.schedule_rent(conn, horizon=date(2024, 12, 31)) == 0
+            assert self.payments(conn, lease_id) == []
+
+    def test_due_day_clamped_to_month_end(self, temp_db):
+        """Test that a due day past the end of a short month falls on its last day"""
+        with sqlite3.connect(temp_db) as conn:
+            lease_id = self.add_lease(conn, '2023-12-01')
+            billing.schedule_rent(conn, horizon=date(2024, 2, 1), due_day=31)
+
+            due_dates = [row[1] for row in self.payments(conn, lease_id)]
+            assert due_dates == ['2023-12-31', '2024-01-31', '2024-02-29']
+
+    def test_skips_inactive_and_future_leases(self, temp_db):
+        """Test that terminated and not-yet-started leases get no rows"""
+        with sqlite3.connect(temp_db) as conn:
+            self.add_lease(conn, '2024-01-01', status='Terminated')
+            self.add_lease(conn, '2025-01-01')
+            assert billing.schedule_rent(conn, horizon=date(2024, 6, 1)) == 0
+
+    def test_batches_commit_all_rows(self, temp_db):
+        """Test that rows spanning several batches are all written"""
+        with sqlite3.connect(temp_db) as conn:
+            lease_id = self.add_lease(conn, '2020-01-01')
+            count = billing.schedule_rent(conn, horizon=date(2024, 12, 1), batch_size=7)
+            assert count == 60
+            assert len(self.payments(conn, lease_id)) == 60
+
+
+class TestSweepOverdue:
+    """Test cases for the overdue status sweeper"""
+
+    def setup_payments(self, conn, rows):
+        """Insert a lease and rent rows given as (month, due_date, amount_paid, status)"""
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('P', '1 Test St', 1000)")
+        cursor.execute("INSERT INTO tenants (name, property_id) VALUES ('T', 1)")
+        cursor.execute("INSERT INTO leases (tenant_id, property_id, start_date, rent_amount) VALUES (1, 1, '2024-01-01', 1000)")
+        self.add_payments(conn, rows)
+
+    def add_payments(self, conn, rows):
+        conn.executemany("""
+            INSERT INTO rent_payments (lease_id, tenant_id, property_id, month, due_date, amount_due, amount_paid, status)
+            VALUES (1, 1, 1, ?, ?, 1000, ?, ?)
+        """, rows)
+        conn.commit()
+
+    def statuses(self, conn):
+        return dict(conn.execute("SELECT month, status FROM rent_payments").fetchall())
+
+    def test_marks_past_due_rows_overdue(self, temp_db):
+        """Test that only unpaid rows past their due date change"""
+        with sqlite3.connect(temp_db) as conn:
+            self.setup_payments(conn, [
+                ('2024-01', '2024-02-01', 0, 'Pending'),
+                ('2024-02', '2024-03-01', 500, 'Partial'),
+                ('2024-03', '2024-04-01', 1000, 'Paid'),
+                ('2024-04', '2024-05-01', 0, 'Pending'),  # not yet due
+            ])
+            result = billing.sweep_overdue(conn, date(2024, 4, 15))
+
+            assert result['rows'] == 2
+            assert self.statuses(conn) == {
+                '2024-01': 'Overdue', '2024-02': 'Overdue', '2024-03': 'Paid', '2024-04': 'Pending',
+            }
+
+    def test_delta_run_picks_up_new_and_newly_due_rows(self, temp_db):
+        """Test that later runs catch rows that became due or were inserted since"""
+        with sqlite3.connect(temp_db) as conn:
+            self.setup_payments(conn, [('2024-04', '2024-05-01', 0, 'Pending')])
+            assert billing.sweep_overdue(conn, date(2024, 4, 15))['rows'] == 0
+
+            # Backfilled row with an old due date, inserted after the last run
+            self.add_payments(conn, [('2024-01', '2024-02-01', 0, 'Pending')])
+            assert billing.sweep_overdue(conn, date(2024, 5, 2))['rows'] == 2
+            assert set(self.statuses(conn).values()) == {'Overdue'}
+
+    def test_delta_run_skips_rows_before_cutoff(self, temp_db):
+        """Test that an incremental run does not revisit rows older than its cutoff"""
+        with sqlite3.connect(temp_db) as conn:
+            self.setup_payments(conn, [('2024-01', '2024-02-01', 1000, 'Paid')])
+            billing.sweep_overdue(conn, date(2024, 4, 15))
+
+            # Unchanged since before the run, so only a full sweep sees it
+            conn.execute("UPDATE rent_payments SET status = 'Pending', amount_paid = 0, updated_at = '2024-01-01'")
+            conn.commit()
+            assert billing.sweep_overdue(conn, date(2024, 4, 16))['rows'] == 0
+            assert billing.sweep_overdue(conn, date(2024, 4, 16), full=True)['rows'] == 1
+
+    def test_delta_run_picks_up_reverted_rows(self, temp_db):
+        """Test that a past-due payment edited back to Pending after a run is swept by the next one"""
+        with sqlite3.connect(temp_db) as conn:
+            self.setup_payments(conn, [('2024-01', '2024-02-01', 1000, 'Paid'),
+                                       ('2024-02', '2024-03-01', 1000, 'Paid')])
+            billing.sweep_overdue(conn, date(2024, 4, 15))
+
+            conn.execute("UPDATE rent_payments SET status = 'Partial', amount_paid = 400 WHERE month = '2024-01'")
+            conn.commit()
+            assert billing.sweep_overdue(conn, date(2024, 4, 16))['rows'] == 1
+            assert self.statuses(conn) == {'2024-01': 'Overdue', '2024-02': 'Paid'}
+
+    def test_records_metrics(self, temp_db):
+        """Test that each run records its row count and duration"""
+        with sqlite3.connect(temp_db) as conn:
+            assert billing.job_metrics(conn) is None
+            self.setup_payments(conn, [('2024-01', '2024-02-01', 0, 'Pending')])
+            billing.sweep_overdue(conn, date(2024, 4, 15))
+
+            metrics = billing.job_metrics(conn)
+            assert metrics['rows'] == 1
+            assert metrics['duration_ms'] >= 0
+            assert metrics['last_run_at'] is not None
@@ -0,0 +1,102 @@
+import pytest
+import os
+import sqlite3
+import subprocess
+import sys
+from landlord.__main__ import main
+
+
+@pytest.fixture
+def lease_db(temp_db):
+    """One active lease, started at the beginning of 2024"""
+    with sqlite3.connect(temp_db) as conn:
+        conn.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('Flat A', '1 Test St', 100000)")
+        conn.execute("INSERT INTO tenants (name, property_id) VALUES ('Tenant A', 1)")
+        conn.execute("""
+            INSERT INTO leases (tenant_id, property_id, start_date, rent_amount, status)
+            VALUES (1, 1, '2024-01-01', 100000, 'Active')
+        """)
+    conn.close()
+    return temp_db
+
+
+def count(db_file, sql):
+    conn = sqlite3.connect(db_file)
+    try:
+        return conn.execute(sql).fetchone()[0]
+    finally:
+        conn.close()
+
+
+class TestCommandLine:
+    """Test cases for python -m landlord"""
+
+    def test_generate_rent_and_sweep(self, lease_db, capsys):
+        """Test that rent is generated for the month and past-due rows are swept"""
+        assert main(['--db', lease_db, 'generate-rent', '--horizon', '2024-03-15']) == 0
+        assert "Generated 1 rent records" in capsys.readouterr().out
+        assert main(['--db', lease_db, 'generate-rent', '--catch-up', '--horizon', '2024-03-15']) == 0
+        assert count(lease_db, "SELECT COUNT(*) FROM rent_payments") == 3
+
+        assert main(['--db', lease_db, 'sweep-overdue', '--full']) == 0
+        assert count(lease_db, "SELECT COUNT(*) FROM rent_payments WHERE status = 'Overdue'") == 3
+
+    def test_due_day_needs_catch_up(self, lease_db, capsys):
+        """Test that --due-day without --catch-up is rejected rather than ignored"""
+        with pytest.raises(SystemExit) as exc:
+            main(['--db', lease_db, 'generate-rent', '--due-day', '5'])
+        assert exc.value.code == 2
+        assert "--due-day needs --catch-up" in capsys.readouterr().err
+        assert count(lease_db, "SELECT COUNT(*) FROM rent_payments") == 0
+
+    def test_report(self, lease_db, tmp_path, capsys):
+        """Test that named reports are printed or written to a file"""
+        assert main(['--db', lease_db, 'report', 'property-occupancy']) == 0
+        out = capsys.readouterr().out
+        assert out.startswith("PROPERTY OCCUPANCY REPORT") and "Tenant A" in out
+
+        output = tmp_path / "all.txt"
+        assert main(['--db', lease_db, 'report', '-o', str(output)]) == 0
+        assert output.read_text().count("Generated on:") == 7
+
+        assert main(['--db', lease_db, 'report', 'nonsense']) == 1
+        assert "Unknown report nonsense" in capsys.readouterr().err
+
+    def test_export_and_import(self, lease_db, tmp_path, capsys):
+        """Test that tables are exported, and that rejected import rows fail the run"""
+        assert main(['--db', lease_db, 'export', str(tmp_path / "out")]) == 0
+        assert sorted(os.listdir(tmp_path / "out"))[:2] == ['expenses.csv', 'leases.csv']
+
+        import_dir = tmp_path / "in"
+        import_dir.mkdir()
+        (import_dir / "properties.csv").write_text("name,address,rent_amount\nFlat B,2 Test St,1500\nFlat C,3 Test St,free\n")
+        assert main(['--db', lease_db, 'import', str(import_dir)]) == 1
+        assert "1 of 2 rows imported, 1 rejected" in capsys.readouterr().out
+        assert count(lease_db, "SELECT rent_amount FROM properties WHERE name = 'Flat B'") == 150000
+
+    def test_backup_and_vacuum(self, lease_db, tmp_path):
+        """Test that the backup is a complete copy and vacuum leaves the data intact"""
+        path = str(tmp_path / "backups" / "copy.db")
+        assert main(['--db', lease_db, 'backup', path]) == 0
+        assert count(path, "SELECT COUNT(*) FROM leases") == 1
+        assert main(['--db', lease_db, 'backup', path]) == 1
+
+        assert main(['--db', lease_db, 'vacuum']) == 0
+        assert count(lease_db, "SELECT COUNT(*) FROM leases") == 1
+
+    def test_missing_database(self, tmp_path, capsys):
+        """Test that a missing database is reported rather than created"""
+        db_file = str(tmp_path / "missing.db")
+        assert main(['--db', db_file, 'vacuum']) == 1
+        assert "No database at" in capsys.readouterr().err
+        assert not os.path.exists(db_file)
+
+    def test_no_tkinter(self, lease_db):
+        """Test that the command line never imports tkinter"""
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-m', 'landlord', '--db', lease_db,
+                                 'report', 'overdue-rent'],
+                                capture_output=True, text=True, check=True)
+        assert "OVERDUE RENT REPORT" in result.stdout
+        imported = [line.split('|')[-1].strip() for line in result.stderr.splitlines()]
+        assert 'reports' in imported
+        assert not [name for name in imported if name.startswith(('tkinter', '_tkinter'))]
@@ -0,0 +1,109 @@
+import pytest
+import os
+import sqlite3
+from datetime import date, datetime
+import columnar
+import exporter
+
+
+@pytest.fixture
+def stdlib_format(monkeypatch):
+    """Use the stdlib format even where pyarrow is installed"""
+    monkeypatch.setattr(columnar, 'pyarrow', None)
+
+
+def add_rent_payments(db_path, count):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('P', 'Columnar St', 100000)")
+        conn.execute("INSERT INTO tenants (name, property_id) VALUES ('T', 1)")
+        conn.execute("INSERT INTO leases (tenant_id, property_id, start_date, rent_amount) VALUES (1, 1, '2024-01-01', 100000)")
+        conn.executemany("""
+            INSERT INTO rent_payments (lease_id, tenant_id, property_id, month, due_date, amount_due,
+                                       amount_paid, status, payment_date)
+            VALUES (1, 1, 1, ?, ?, 100050, ?, ?, ?)
+        """, ((f"m{i}", f"2024-01-{i % 28 + 1:02d}", 100050 if i % 2 else 0, 'Paid' if i % 2 else 'Pending',
+               f"2024-02-{i % 28 + 1:02d}" if i % 2 else None) for i in range(count)))
+    conn.close()
+
+
+class TestColumnar:
+    """Test cases for the columnar export format"""
+
+    def test_round_trip_preserves_types(self, temp_db, tmp_path, stdlib_format):
+        """Test that amount, DATE, DATETIME and NULL values come back typed"""
+        add_rent_payments(temp_db, 50)
+        path = str(tmp_path / "rent_payments.llcol")
+        with sqlite3.connect(temp_db) as conn:
+            assert columnar.export_table(conn, 'rent_payments', path, batch_size=7, row_group_size=20) == 50
+            expected = conn.execute("SELECT id, amount_paid FROM rent_payments ORDER BY id").fetchall()
+        conn.close()
+
+        with columnar.ColumnarReader(path) as reader:
+            assert reader.num_rows == 50
+            assert len(reader.row_groups) == 3
+            types = dict(reader.columns)
+            assert types['amount_due'] == 'int64'
+            assert types['due_date'] == 'date32'
+            assert types['created_at'] == 'timestamp'
+
+            rows = list(reader.rows())
+            amounts = reader.column('amount_paid')
+            payment_dates = reader.column('payment_date')
+            created = reader.column('created_at')
+
+        assert len(rows) == 50
+        assert [row[0] for row in rows] == [row[0] for row in expected]
+        assert amounts == [row[1] for row in expected]
+        assert payment_dates[0] is None
+        assert payment_dates[1] == date(2024, 2, 2)
+        assert isinstance(created[0], datetime)
+        assert reader.table == 'rent_payments'
+
+    def test_mixed_values_kept(self, temp_db, tmp_path, stdlib_format):
+        """Test that values not matching the declared type survive unchanged"""
+        with sqlite3.connect(temp_db) as conn:
+            conn.execute("INSERT INTO properties (name, address, rent_amount, size) VALUES ('A', 'St', 1, 'large')")
+            conn.execute("INSERT INTO properties (name, address, rent_amount, size) VALUES ('B', 'St', 2, 80.5)")
+            columnar.export_table(conn, 'properties', str(tmp_path / "properties.llcol"))
+        conn.close()
+
+        with columnar.ColumnarReader(str(tmp_path / "properties.llcol")) as reader:
+            assert reader.column('size') == ['large', 80.5]
+            assert reader.column('rent_amount') == [1, 2]
+
+    def test_uncompressed_numeric_blocks_are_mapped(self, tmp_path):
+        """Test that uncompressed numeric columns can be summed straight from the mapping"""
+        path = str(tmp_path / "numbers.llcol")
+        with columnar.ColumnarWriter(path, [('id', 'int64'), ('amount', 'float64')], compress=False) as writer:
+            writer.write_rows([(i, i * 1.5) for i in range(10)])
+            writer.write_rows([(i, None) for i in range(10, 15)])
+
+        with columnar.ColumnarReader(path) as reader:
+            blocks = list(reader.numeric_blocks('amount'))
+            assert [block.format for block in blocks] == ['d', 'd']
+            assert sum(sum(block) for block in blocks) == sum(i * 1.5 for i in range(10))
+            for block in blocks:
+                block.release()
+            assert reader.column('amount')[10:] == [None] * 5
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test that a file that isn't a columnar export is refused"""
+        path = tmp_path / "export.csv"
+        path.write_text("id,name\n1,A\n")
+        with pytest.raises(ValueError):
+            columnar.ColumnarReader(str(path))
+
+    @pytest.mark.parametrize("workers", [1, 3])
+    def test_export_all(self, temp_db, tmp_path, stdlib_format, workers):
+        """Test that export_all can write every table in the columnar format"""
+        add_rent_payments(temp_db, 10)
+        results = exporter.export_all(temp_db, str(tmp_path), fmt='columnar', workers=workers)
+        assert results['rent_payments']['rows'] == 10
+        assert sorted(os.listdir(tmp_path)) == sorted(f"{table}.llcol" for table in exporter.EXPORT_TABLES)
+        with columnar.ColumnarReader(str(tmp_path / "tenants.llcol")) as reader:
+            assert reader.column('name') == ['T']
+
+    def test_unknown_format(self, temp_db, tmp_path):
+        """Test that only known export formats are accepted"""
+        with pytest.raises(ValueError):
+            exporter.export_all(temp_db, str(tmp_path), fmt='xlsx')
@@ -3,6 +3,7 @@ import sqlite3
 import os
 import tempfile
 import shutil
+import threading
 from unittest.mock import patch
 import db
 
@@ -210,3 +211,251 @@ class TestDatabase:
         assert 'CREATE TABLE expenses' in schema_content
         assert 'CREATE TABLE documents' in schema_content
         assert 'CREATE TABLE maintenance_requests' in schema_content
+
+
+class TestConnectionPool:
+    """Test cases for the pooled reader and writer connections"""
+    
+    def reader_in_thread(self, pool):
+        """The reader connection a new thread gets, after it has run a query"""
+        found = []
+        def read():
+            with pool.reader() as conn:
+                conn.execute("SELECT COUNT(*) FROM properties").fetchone()
+                found.append(conn)
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join()
+        return found[0]
+    
+    def test_one_reader_per_thread(self, temp_db):
+        """Test that a thread keeps its reader and other threads get their own"""
+        pool = db.ConnectionPool(temp_db)
+        with pool.reader() as first, pool.reader() as again:
+            assert first is again
+        assert self.reader_in_thread(pool) is not first
+        pool.close()
+    
+    def test_one_writer(self, temp_db):
+        """Test that every writer() yields the same connection and commits on success"""
+        pool = db.ConnectionPool(temp_db)
+        with pool.writer() as first:
+            first.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('P', 'A', 100)")
+        with pool.writer() as second:
+            assert second is first
+        with pytest.raises(RuntimeError), pool.writer() as conn:
+            conn.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('Q', 'B', 100)")
+            raise RuntimeError("rolled back")
+        with pool.reader() as conn:
+            assert conn.execute("SELECT name FROM properties").fetchall() == [('P',)]
+        pool.close()
+    
+    def test_passive_checkpoint_skips_writer(self, temp_db):
+        """Test that a passive checkpoint does not wait for a write in progress"""
+        pool = db.ConnectionPool(temp_db)
+        writing = threading.Event()
+        release = threading.Event()
+        def write():
+            with pool.writer() as conn:
+                conn.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('P', 'A', 100)")
+                writing.set()
+                release.wait(timeout=5)
+        thread = threading.Thread(target=write)
+        thread.start()
+        writing.wait()
+        busy, wal_pages, checkpointed = pool.checkpoint()
+        assert thread.is_alive()
+        release.set()
+        thread.join()
+        pool.close()
+    
+    def test_close_closes_other_threads_readers(self, temp_db):
+        """Test that close() closes readers opened on worker threads, and the pool reopens on use"""
+        pool = db.ConnectionPool(temp_db)
+        with pool.reader() as mine:
+            pass
+        theirs = self.reader_in_thread(pool)
+        pool.close()
+        for conn in (mine, theirs):
+            with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+                conn.execute("SELECT 1")
+        with pool.reader() as conn:
+            assert conn is not mine
+            assert conn.execute("SELECT 1").fetchone() == (1,)
+        pool.close()
+
+
+class TestConnectionPragmas:
+    """Test cases for the pooled connection PRAGMA profile"""
+    
+    def test_profile_applied_to_pooled_connections(self, temp_db):
+        """Test that readers and the writer get WAL and the tuned settings"""
+        with db.write_connection(temp_db) as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+            assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+        
+        with db.read_connection(temp_db) as conn:
+            assert conn.execute("PRAGMA cache_size").fetchone()[0] == db.CONNECTION_PRAGMAS['cache_size']
+            assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    
+    def test_reader_not_blocked_by_open_write(self, temp_db):
+        """Test that a reader can query while the writer holds a transaction"""
+        with db.write_connection(temp_db) as conn:
+            conn.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('P', 'A', 100)")
+            
+            # The uncommitted row is not visible, but the read does not block
+            with db.read_connection(temp_db) as reader:
+                count = reader.execute("SELECT COUNT(*) FROM properties").fetchone()[0]
+                assert count == 0
+        
+        with db.read_connection(temp_db) as reader:
+            assert reader.execute("SELECT COUNT(*) FROM properties").fetchone()[0] == 1
+    
+    def test_config_file_override(self, tmp_path):
+        """Test that a [pragmas] section in the config file overrides the profile"""
+        config = tmp_path / "landlord.ini"
+        config.write_text("[pragmas]\ncache_size = -2000\nsynchronous = FULL\n")
+        
+        pragmas = db.load_pragmas(str(config))
+        assert pragmas['cache_size'] == '-2000'
+        assert pragmas['synchronous'] == 'FULL'
+        assert pragmas['journal_mode'] == 'WAL'
+    
+    def test_environment_override(self, monkeypatch):
+        """Test that LANDLORD_PRAGMA_* variables override the profile"""
+        monkeypatch.setenv("LANDLORD_PRAGMA_MMAP_SIZE", "0")
+        pragmas = db.load_pragmas()
+        assert pragmas['mmap_size'] == '0'
+    
+    def test_invalid_override_rejected(self, monkeypatch):
+        """Test that values which are not plain tokens are rejected"""
+        monkeypatch.setenv("LANDLORD_PRAGMA_CACHE_SIZE", "1; DROP TABLE admin")
+        with pytest.raises(ValueError):
+            db.load_pragmas()
+    
+    def test_checkpoint(self, temp_db):
+        """Test WAL checkpointing through the pool"""
+        # No pool yet for this file, so nothing to do
+        assert db.checkpoint(temp_db) is None
+        
+        with db.write_connection(temp_db) as conn:
+            conn.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('P', 'A', 100)")
+        
+        busy, wal_pages, checkpointed = db.checkpoint(temp_db, 'TRUNCATE')
+        assert busy == 0
+        
+        with pytest.raises(ValueError):
+            db.checkpoint(temp_db, 'BOGUS')
+
+
+class TestMigrations:
+    """Test cases for the schema migration engine and index set"""
+    
+    def query_plan(self, db_path, sql, params=()):
+        """Return the EXPLAIN QUERY PLAN detail lines for a statement"""
+        with sqlite3.connect(db_path) as conn:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        return [row[3] for row in rows]
+    
+    def test_migrations_applied_to_new_database(self, temp_db):
+        """Test that a fresh database is at the latest schema version"""
+        with sqlite3.connect(temp_db) as conn:
+            assert db.schema_version(conn) == db.MIGRATIONS[-1][0]
+    
+    def test_migrate_is_idempotent(self, temp_db):
+        """Test that re-running migrations applies nothing"""
+        with sqlite3.connect(temp_db) as conn:
+            assert db.migrate(conn) == []
+            count = conn.execute("SELECT COUNT(*) FROM schema_version").fetchone()[0]
+            assert count == len(db.MIGRATIONS)
+    
+    def test_migrate_existing_database(self):
+        """Test upgrading a pre-migration database, deduplicating unpaid rent rows and storing paisa"""
+        temp_dir = tempfile.mkdtemp()
+        db_path = os.path.join(temp_dir, "legacy.db")
+        try:
+            with sqlite3.connect(db_path) as conn:
+                with open("schema.sql", 'r') as f:
+                    conn.executescript(f.read())
+                conn.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('P', 'A', 1000)")
+                conn.execute("INSERT INTO tenants (name, property_id) VALUES ('T', 1)")
+                conn.execute("INSERT INTO leases (tenant_id, property_id, start_date, rent_amount) VALUES (1, 1, '2024-01-01', 1000)")
+                conn.executemany("""
+                    INSERT INTO rent_payments (lease_id, tenant_id, property_id, month, due_date, amount_due, amount_paid, status)
+                    VALUES (1, 1, 1, '2024-01', '2024-02-01', 1000, ?, ?)
+                """, [(0, 'Pending'), (1000, 'Paid'), (0, 'Pending')])
+                conn.commit()
+            conn.close()
+            
+            with patch('builtins.print') as mock_print:
+                db.init_db(db_path)
+                mock_print.assert_called_with("Database already exists.")
+            
+            with sqlite3.connect(db_path) as conn:
+                rows = conn.execute("SELECT amount_paid, status FROM rent_payments").fetchall()
+                assert rows == [(100000, 'Paid')]
+                
+                with pytest.raises(sqlite3.IntegrityError):
+                    conn.execute("""
+                        INSERT INTO rent_payments (lease_id, tenant_id, property_id, month, due_date, amount_due)
+                        VALUES (1, 1, 1, '2024-01', '2024-02-01', 1000)
+                    """)
+            conn.close()
+        finally:
+            db.close_all()
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def test_unreadable_amounts_cleared(self, temp_db):
+        """Test that amounts migration 11 kept as text are logged and cleared, and the rollups recomputed"""
+        with sqlite3.connect(temp_db) as conn:
+            conn.execute("DELETE FROM schema_version WHERE version >= 13")
+            conn.execute("DROP TABLE unreadable_amounts")
+            conn.execute("INSERT INTO properties (name, address, rent_amount, deposit_amount) VALUES ('P', 'A', 'ask', 'n/a')")
+            conn.execute("INSERT INTO tenants (name, property_id) VALUES ('T', 1)")
+            conn.execute("INSERT INTO leases (tenant_id, property_id, start_date, rent_amount) VALUES (1, 1, '2024-01-01', 100000)")
+            conn.execute("""
+                INSERT INTO rent_payments (lease_id, tenant_id, property_id, month, due_date, amount_due, amount_paid)
+                VALUES (1, 1, 1, '2024-01', '2024-02-01', 100000, '12.5abc')
+            """)
+            conn.commit()
+            
+            assert db.migrate(conn) == [13]
+            assert conn.execute("SELECT rent_amount, deposit_amount FROM properties").fetchone() == (0, None)
+            assert conn.execute("SELECT amount_paid FROM rent_payments").fetchone() == (None,)
+            assert conn.execute("""
+                SELECT table_name, row_id, column_name, value FROM unreadable_amounts ORDER BY id
+            """).fetchall() == [('properties', 1, 'rent_amount', 'ask'),
+                                  ('properties', 1, 'deposit_amount', 'n/a'),
+                                  ('rent_payments', 1, 'amount_paid', '12.5abc')]
+            assert conn.execute("SELECT typeof(amount_paid), typeof(outstanding) FROM rent_rollup").fetchone() == \
+                ('integer', 'integer')
+        conn.close()
+    
+    def test_failed_migration_rolls_back(self, temp_db):
+        """Test that a failing migration leaves the version unchanged"""
+        broken = (99, "Broken", "CREATE INDEX idx_broken ON rent_payments(id); SELECT * FROM missing_table;")
+        with sqlite3.connect(temp_db) as conn:
+            with patch.object(db, 'MIGRATIONS', db.MIGRATIONS + [broken]):
+                with pytest.raises(sqlite3.DatabaseError):
+                    db.migrate(conn)
+            assert db.schema_version(conn) == db.MIGRATIONS[-1][0]
+            index = conn.execute("SELECT name FROM sqlite_master WHERE name = 'idx_broken'").fetchone()
+            assert index is None
+    
+    @pytest.mark.parametrize("sql,index", [
+        ("SELECT id FROM rent_payments WHERE lease_id = 1 AND month = '2024-01'", 'idx_rent_payments_lease_month'),
+        ("SELECT * FROM rent_payments WHERE status = 'Overdue' ORDER BY due_date", 'idx_rent_payments_status_due'),
+        ("SELECT * FROM rent_payments ORDER BY due_date DESC", 'idx_rent_payments_due_date'),
+        ("SELECT * FROM tenants WHERE property_id = 1", 'idx_tenants_property'),
+        ("SELECT * FROM expenses WHERE property_id = 1 AND date >= '2024-01-01'", 'idx_expenses_property_date'),
+        ("SELECT * FROM maintenance_requests WHERE property_id = 1 AND status = 'Open' ORDER BY request_date",
+         'idx_maintenance_property_status_date'),
+        ("SELECT * FROM documents WHERE related_type = 'Lease' AND related_id = 1", 'idx_documents_related'),
+    ])
+    def test_query_uses_index(self, temp_db, sql, index):
+        """Test that hot lookups are index searches rather than table scans"""
+        plan = " | ".join(self.query_plan(temp_db, sql))
+        assert index in plan
+        assert "USE TEMP B-TREE" not in plan
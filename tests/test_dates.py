@@ -0,0 +1,79 @@
+import pytest
+import sqlite3
+import dates
+from test_money import legacy_database, migrate_through
+
+
+class TestDates:
+    """Test cases for reading dates as ISO text"""
+
+    @pytest.mark.parametrize("value,expected", [
+        ("2024-01-15", "2024-01-15"),
+        (" 2024-1-5 ", "2024-01-05"),
+        ("2024-01-15 10:30:00", "2024-01-15"),
+        ("2024-01-15T10:30:00.123", "2024-01-15"),
+        ("15/01/2024", "2024-01-15"),
+        ("5.1.2024", "2024-01-05"),
+        ("29-02-2024", "2024-02-29"),
+    ])
+    def test_to_iso(self, value, expected):
+        """Test that accepted forms come back as YYYY-MM-DD"""
+        assert dates.to_iso(value) == expected
+
+    @pytest.mark.parametrize("value", ["", "2024-13-01", "31/02/2024", "01/15", "Jan 5 2024", "2459580"])
+    def test_to_iso_rejects(self, value):
+        """Test that anything that isn't a real date raises DateError"""
+        with pytest.raises(dates.DateError):
+            dates.to_iso(value)
+
+    def test_optional(self):
+        """Test that a blank entry is no date at all"""
+        assert dates.optional("  ") is None
+        assert dates.optional(None) is None
+        assert dates.optional("1/2/2024") == "2024-02-01"
+
+
+class TestDateMigration:
+    """Test cases for migration 12, which stores every date as ISO text"""
+
+    def test_normalizes_existing_dates(self, tmp_path):
+        """Test that dates in other formats are rewritten and unreadable ones are kept"""
+        conn = legacy_database(str(tmp_path / "legacy.db"), version=11)
+        conn.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('A', 'St', 100)")
+        conn.execute("INSERT INTO tenants (name) VALUES ('T')")
+        conn.execute("""
+            INSERT INTO leases (tenant_id, property_id, start_date, end_date, rent_amount)
+            VALUES (1, 1, '01/02/2024', '2025-01-31 00:00:00', 100)
+        """)
+        conn.executemany("""
+            INSERT INTO rent_payments (lease_id, tenant_id, property_id, month, due_date, amount_due, payment_date)
+            VALUES (1, 1, 1, ?, ?, 100, ?)
+        """, [('2024-02', '1/2/2024', None), ('2024-03', '2024-03-01', "someday")])
+        conn.commit()
+
+        assert migrate_through(conn, 12) == [12]
+        assert conn.execute("SELECT start_date, end_date FROM leases").fetchall() == [('2024-02-01', '2025-01-31')]
+        assert conn.execute("SELECT due_date, payment_date FROM rent_payments ORDER BY id").fetchall() == [
+            ('2024-02-01', None), ('2024-03-01', 'someday')]
+        assert conn.execute("PRAGMA integrity_check").fetchone() == ('ok',)
+        conn.close()
+
+    def test_rejects_non_iso_dates(self, temp_db):
+        """Test that the triggers refuse dates the reports' range filters would miss"""
+        with sqlite3.connect(temp_db) as conn:
+            conn.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('A', 'St', 100)")
+            conn.execute("INSERT INTO expenses (property_id, description, amount, date) VALUES (1, 'x', 100, '2024-01-05')")
+            with pytest.raises(sqlite3.IntegrityError, match="dates must be YYYY-MM-DD"):
+                conn.execute("INSERT INTO expenses (property_id, description, amount, date) VALUES (1, 'y', 100, '5/1/2024')")
+            with pytest.raises(sqlite3.IntegrityError, match="dates must be YYYY-MM-DD"):
+                conn.execute("UPDATE expenses SET date = '2024-1-5' WHERE id = 1")
+            conn.execute("UPDATE expenses SET amount = 200 WHERE id = 1")
+            assert conn.execute("SELECT amount, date FROM expenses").fetchall() == [(200, '2024-01-05')]
+        conn.close()
+
+    def test_report_indexes_exist(self, temp_db):
+        """Test that the indexes the report range filters rely on are created"""
+        with sqlite3.connect(temp_db) as conn:
+            names = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        conn.close()
+        assert {'idx_rent_payments_unpaid', 'idx_leases_status_end', 'idx_expense_rollup_month'} <= names
@@ -0,0 +1,94 @@
+import pytest
+import sqlite3
+import zlib
+import document_search
+import document_store
+
+
+def write_pdf(path, content):
+    """A minimal PDF with one compressed content stream"""
+    stream = zlib.compress(content)
+    path.write_bytes(b"%%PDF-1.4\n1 0 obj\n<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream)
+                     + stream + b"\nendstream\nendobj\n%EOF\n")
+    return str(path)
+
+
+@pytest.fixture
+def documents(temp_db, tmp_path, monkeypatch):
+    """A few uploaded documents with their text extracted"""
+    monkeypatch.setattr(document_search, 'pypdf', None)
+    root = str(tmp_path / "documents")
+    invoice = write_pdf(tmp_path / "scan.pdf", b"BT /F1 12 Tf (Roof repair invoice 2023) Tj ET")
+    notes = tmp_path / "notes.txt"
+    notes.write_text("Boiler serviced; roofer recommended for next year")
+    receipt = tmp_path / "roof_receipt.txt"
+    receipt.write_text("Paid in cash")
+
+    with sqlite3.connect(temp_db) as conn:
+        ids = [document_store.add_document(conn, invoice, 'Expense', 1, "Contractor bill", root=root),
+               document_store.add_document(conn, str(notes), 'Property', 1, None, root=root),
+               document_store.add_document(conn, str(receipt), 'Payment', 2, "March rent", root=root),
+               document_store.add_document(conn, invoice, 'Property', 1, None, root=root)]
+    conn.close()
+    for doc_id in ids:
+        document_search.index_document(temp_db, doc_id)
+    return temp_db, ids
+
+
+def search_ids(db_file, text, related_type=None):
+    with sqlite3.connect(db_file) as conn:
+        results = [row[0] for row in document_search.search(conn, text, related_type)]
+    conn.close()
+    return results
+
+
+class TestDocumentSearch:
+    """Test cases for full-text document search"""
+
+    def test_match_query(self):
+        """Test that every term must match and the last is a prefix"""
+        assert document_search.match_query("Roof  INV") == '"roof" "inv"*'
+        assert document_search.match_query('"); DROP --') == '"drop"*'
+        assert document_search.match_query("  -- ") is None
+
+    def test_extract_pdf_text(self, tmp_path, monkeypatch):
+        """Test the stdlib PDF reader on escaped, split and hex strings"""
+        monkeypatch.setattr(document_search, 'pypdf', None)
+        path = write_pdf(tmp_path / "a.pdf", b"BT (Invoice \\(paid\\)) Tj [(To) -250 (tal)] TJ <FEFF00E9> Tj ET")
+        assert document_search.extract_text(path) == "Invoice (paid) Total é"
+        assert document_search.extract_text(str(tmp_path / "photo.jpg")) == ''
+
+    def test_search_extracted_text(self, documents):
+        """Test that text extracted from files is searchable for every document sharing the file"""
+        db_file, ids = documents
+        assert sorted(search_ids(db_file, "repair 2023")) == [ids[0], ids[3]]
+        assert search_ids(db_file, "repair", 'Expense') == [ids[0]]
+        assert search_ids(db_file, "boiler serv") == [ids[1]]
+        assert search_ids(db_file, "contractor") == [ids[0]]
+
+    def test_file_name_ranks_first(self, documents):
+        """Test that a match in the file name outranks one in the text"""
+        db_file, ids = documents
+        assert search_ids(db_file, "roof")[0] == ids[2]
+        assert set(search_ids(db_file, "roof")) == set(ids)
+
+    def test_index_follows_changes(self, documents):
+        """Test that edits and deletes reach the index"""
+        db_file, ids = documents
+        with sqlite3.connect(db_file) as conn:
+            conn.execute("UPDATE documents SET description = 'Gutter quote' WHERE id = ?", (ids[1],))
+            document_store.delete_document(conn, ids[0])
+        conn.close()
+        assert search_ids(db_file, "gutter") == [ids[1]]
+        assert search_ids(db_file, "contractor") == []
+        assert search_ids(db_file, "repair") == [ids[3]]
+
+    def test_pager_continues_in_rank_order(self, documents):
+        """Test that search results page by rank like any other list"""
+        db_file, ids = documents
+        pager = document_search.search_pager("roof")
+        with sqlite3.connect(db_file) as conn:
+            first = pager.page(conn, limit=2)
+            rest = pager.page(conn, after=first[-1][1], limit=10)
+        conn.close()
+        assert [values[0] for values, key in first + rest] == search_ids(db_file, "roof")
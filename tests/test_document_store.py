@@ -0,0 +1,106 @@
+import pytest
+import hashlib
+import os
+import sqlite3
+import document_store
+
+
+def stored_files(root):
+    return sorted(os.path.relpath(os.path.join(directory, name), root)
+                  for directory, _, files in os.walk(root) for name in files)
+
+
+@pytest.fixture
+def store(temp_db, tmp_path):
+    """A database connection, a document root and a source file to upload"""
+    source = tmp_path / "lease.pdf"
+    source.write_bytes(b"%PDF lease agreement" * 1000)
+    conn = sqlite3.connect(temp_db)
+    yield conn, str(tmp_path / "documents"), str(source)
+    conn.close()
+
+
+class TestDocumentStore:
+    """Test cases for the content-addressed document store"""
+
+    def test_blob_path(self):
+        """Test that blobs fan out over two directory levels"""
+        assert document_store.blob_path("documents", "abcdef0123", ".PDF") == \
+            os.path.join("documents", "ab", "cd", "abcdef0123.pdf")
+
+    def test_duplicates_share_one_blob(self, store):
+        """Test that the same file attached three times is stored once"""
+        conn, root, source = store
+        for related_type in ('Tenant', 'Lease', 'Payment'):
+            document_store.add_document(conn, source, related_type, 1, root=root)
+        conn.commit()
+
+        digest = hashlib.sha256(open(source, 'rb').read()).hexdigest()
+        assert stored_files(root) == [os.path.join(digest[:2], digest[2:4], digest + ".pdf")]
+        assert conn.execute("SELECT hash, size, ref_count FROM document_blobs").fetchall() == \
+            [(digest, os.path.getsize(source), 3)]
+        assert conn.execute("SELECT DISTINCT file_name, content_hash FROM documents").fetchall() == \
+            [("lease.pdf", digest)]
+
+    def test_delete_keeps_shared_blob(self, store):
+        """Test that the file is removed only with the last document using it"""
+        conn, root, source = store
+        first = document_store.add_document(conn, source, 'Lease', 1, root=root)
+        second = document_store.add_document(conn, source, 'Payment', 1, root=root)
+        conn.commit()
+
+        assert document_store.delete_document(conn, first) == []
+        assert len(stored_files(root)) == 1
+        assert conn.execute("SELECT ref_count FROM document_blobs").fetchone() == (1,)
+
+        removed = document_store.delete_document(conn, second)
+        assert len(removed) == 1 and not os.path.exists(removed[0])
+        assert stored_files(root) == []
+        assert conn.execute("SELECT COUNT(*) FROM document_blobs").fetchone() == (0,)
+
+    def test_rolled_back_delete_keeps_file(self, store):
+        """Test that files are left alone until the delete commits"""
+        conn, root, source = store
+        doc_id = document_store.add_document(conn, source, 'Lease', 1, root=root)
+        conn.commit()
+
+        assert len(document_store.remove_document(conn, doc_id)) == 1
+        conn.rollback()
+        assert len(stored_files(root)) == 1
+        assert conn.execute("SELECT ref_count FROM document_blobs").fetchone() == (1,)
+
+    def test_adopt_legacy_documents(self, store, tmp_path):
+        """Test that documents copied before the store are moved in and deduplicated"""
+        conn, root, source = store
+        os.makedirs(root)
+        legacy = []
+        for stamp in ("20240101_120000", "20240101_120001"):
+            path = os.path.join(root, f"{stamp}_lease.pdf")
+            with open(source, 'rb') as src, open(path, 'wb') as dst:
+                dst.write(src.read())
+            conn.execute("INSERT INTO documents (related_type, related_id, file_path) VALUES ('Lease', 1, ?)", (path,))
+            legacy.append(path)
+        conn.commit()
+
+        assert document_store.adopt(conn, root) == (2, 2 * os.path.getsize(source))
+        assert not any(os.path.exists(path) for path in legacy)
+        assert len(stored_files(root)) == 1
+        assert conn.execute("SELECT ref_count FROM document_blobs").fetchone() == (2,)
+        assert conn.execute("SELECT DISTINCT file_name FROM documents").fetchall() == [("lease.pdf",)]
+
+    def test_sweep_removes_orphans(self, store):
+        """Test that sweep removes stray uploads and unknown blobs but keeps used ones"""
+        conn, root, source = store
+        document_store.add_document(conn, source, 'Lease', 1, root=root)
+        conn.rollback()
+        open(os.path.join(root, document_store.TEMP_PREFIX + "x"), 'w').close()
+        kept = document_store.add_document(conn, source, 'Lease', 2, root=root)
+        conn.commit()
+        other = os.path.join(root, "ff", "ff", "ffff.txt")
+        os.makedirs(os.path.dirname(other))
+        open(other, 'w').close()
+
+        removed = document_store.sweep(conn, root)
+        assert sorted(os.path.basename(path) for path in removed) == [document_store.TEMP_PREFIX + "x", "ffff.txt"]
+        path = conn.execute("SELECT file_path FROM documents WHERE id = ?", (kept,)).fetchone()[0]
+        assert os.path.exists(path)
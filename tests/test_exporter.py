@@ -0,0 +1,173 @@
+import pytest
+import csv
+import time
+import os
+import sqlite3
+import db
+import exporter
+
+
+def add_properties(db_path, count):
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany("INSERT INTO properties (name, address, rent_amount) VALUES (?, 'Export St', 1000)",
+                         ((f"Property {i}",) for i in range(count)))
+    conn.close()
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+class TestExporter:
+    """Test cases for the streaming CSV exporter"""
+
+    def test_exports_every_table(self, temp_db, tmp_path):
+        """Test that each table gets a CSV with a header and all of its rows"""
+        add_properties(temp_db, 25)
+        results = exporter.export_all(temp_db, str(tmp_path), batch_size=4)
+
+        assert {table: result['rows'] for table, result in results.items()} == \
+            {table: (25 if table == 'properties' else 0) for table in exporter.EXPORT_TABLES}
+        rows = read_csv(tmp_path / "properties.csv")
+        assert rows[0][:3] == ['id', 'name', 'address']
+        assert [row[1] for row in rows[1:]] == [f"Property {i}" for i in range(25)]
+        assert len(read_csv(tmp_path / "tenants.csv")) == 1
+        # Neither partial files nor the snapshot copy are left behind
+        assert sorted(os.listdir(tmp_path)) == sorted(f"{table}.csv" for table in exporter.EXPORT_TABLES)
+
+    def test_progress(self, temp_db, tmp_path):
+        """Test that progress reaches the total row count"""
+        add_properties(temp_db, 10)
+        progress = exporter.ExportProgress()
+        exporter.export_all(temp_db, str(tmp_path), batch_size=3, progress=progress)
+        assert progress.total == 10
+        assert progress.done == 10
+        assert progress.fraction == 1
+
+    @pytest.mark.parametrize("workers", [1, 3])
+    def test_cancel_leaves_no_partial_file(self, temp_db, tmp_path, workers):
+        """Test that a cancelled export raises and removes the files it was writing"""
+        add_properties(temp_db, 10)
+        progress = exporter.ExportProgress()
+        progress.cancel()
+        with pytest.raises(exporter.ExportCancelled):
+            exporter.export_all(temp_db, str(tmp_path), batch_size=3, progress=progress, workers=workers)
+        assert os.listdir(tmp_path) == []
+
+    def test_sequential_matches_parallel(self, temp_db, tmp_path):
+        """Test that one worker produces the same files as several"""
+        add_properties(temp_db, 30)
+        (tmp_path / "one").mkdir()
+        (tmp_path / "many").mkdir()
+        exporter.export_all(temp_db, str(tmp_path / "one"), batch_size=7, workers=1)
+        exporter.export_all(temp_db, str(tmp_path / "many"), batch_size=7, workers=3)
+        for table in exporter.EXPORT_TABLES:
+            assert read_csv(tmp_path / "one" / f"{table}.csv") == read_csv(tmp_path / "many" / f"{table}.csv")
+
+    def test_snapshot_ignores_later_writes(self, temp_db, tmp_path):
+        """Test that the snapshot copy is unaffected by writes made after it"""
+        add_properties(temp_db, 5)
+        path = str(tmp_path / "snapshot.db")
+        exporter.snapshot(temp_db, path)
+        add_properties(temp_db, 5)
+        with sqlite3.connect(f"file:{path}?mode=ro", uri=True) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM properties").fetchone()[0] == 5
+        conn.close()
+
+    def test_summary(self):
+        """Test the per-table row count and throughput summary"""
+        summary = exporter.format_summary({'tenants': {'rows': 2000, 'duration_ms': 500}})
+        assert summary == "tenants: 2,000 rows in 0.50s (4,000 rows/s)"
+
+    def test_unknown_table(self, temp_db, tmp_path):
+        """Test that only known tables can be exported"""
+        with sqlite3.connect(temp_db) as conn:
+            with pytest.raises(ValueError):
+                exporter.export_table(conn, "users", str(tmp_path / "users.csv"))
+        conn.close()
+
+
+class TestDeltaExport:
+    """Test cases for change tracking and the delta export"""
+
+    def changed_ids(self, path):
+        return [int(row[0]) for row in read_csv(path)[1:]]
+
+    def test_updated_at_maintained(self, temp_db):
+        """Test that inserts and updates stamp updated_at"""
+        with sqlite3.connect(temp_db) as conn:
+            conn.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('P', 'St', 1)")
+            inserted = conn.execute("SELECT updated_at FROM properties").fetchone()[0]
+            assert inserted is not None
+            time.sleep(0.01)
+            conn.execute("UPDATE properties SET rent_amount = 2")
+            assert conn.execute("SELECT updated_at FROM properties").fetchone()[0] > inserted
+        conn.close()
+
+    def test_delta_contains_only_changes(self, temp_db, tmp_path):
+        """Test that a delta run exports changed rows and tombstones only"""
+        add_properties(temp_db, 5)
+        with sqlite3.connect(temp_db) as conn:
+            conn.execute("UPDATE properties SET updated_at = '2020-01-01 00:00:0' || id")
+        conn.close()
+        (tmp_path / "full").mkdir()
+        (tmp_path / "delta").mkdir()
+        first = exporter.export_changes(temp_db, str(tmp_path / "full"))
+        assert first['since'] is None
+        assert first['tables']['properties']['rows'] == 5
+
+        time.sleep(0.01)
+        with sqlite3.connect(temp_db) as conn:
+            conn.execute("UPDATE properties SET rent_amount = 1500 WHERE id = 2")
+            conn.execute("DELETE FROM properties WHERE id = 4")
+            conn.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('New', 'St', 1)")
+        conn.close()
+
+        delta = exporter.export_changes(temp_db, str(tmp_path / "delta"))
+        assert delta['since'] == first['watermark']
+        assert delta['since'] == '2020-01-01 00:00:05'
+        # Property 5 carries the old watermark itself, so it is sent again
+        assert sorted(self.changed_ids(tmp_path / "delta" / "properties.csv")) == [2, 5, 6]
+        deleted = read_csv(tmp_path / "delta" / exporter.DELETED_FILE)
+        assert deleted[0] == ['table_name', 'row_id', 'deleted_at']
+        assert [row[:2] for row in deleted[1:]] == [['properties', '4']]
+        assert delta['deleted'] == 1
+
+    def test_watermark_recorded(self, temp_db, tmp_path):
+        """Test that a run with nothing new exports nothing but repeats the boundary"""
+        add_properties(temp_db, 3)
+        result = exporter.export_changes(temp_db, str(tmp_path))
+        assert exporter.last_watermark(temp_db) == result['watermark']
+
+        again = exporter.export_changes(temp_db, str(tmp_path))
+        # Rows stamped exactly at the watermark are sent again (at-least-once)
+        assert again['tables']['properties']['rows'] <= 3
+        assert again['watermark'] == result['watermark']
+
+    def test_unrecorded_run(self, temp_db, tmp_path):
+        """Test that record=False leaves the stored watermark alone"""
+        add_properties(temp_db, 1)
+        exporter.export_changes(temp_db, str(tmp_path), record=False)
+        assert exporter.last_watermark(temp_db) is None
+
+    def test_migration_backfills_updated_at(self, tmp_path):
+        """Test that existing rows get updated_at from created_at"""
+        path = str(tmp_path / "old.db")
+        with sqlite3.connect(path) as conn:
+            with open("schema.sql", 'r') as f:
+                conn.executescript(f.read())
+            conn.execute("INSERT INTO properties (name, address, rent_amount, created_at) VALUES ('P', 'St', 1, '2020-05-01 10:00:00')")
+            conn.commit()
+            db.migrate(conn)
+            assert conn.execute("SELECT updated_at FROM properties").fetchone()[0] == '2020-05-01 10:00:00'
+        conn.close()
+
+    def test_prune_tombstones(self, temp_db):
+        """Test that old tombstones can be pruned"""
+        add_properties(temp_db, 2)
+        with sqlite3.connect(temp_db) as conn:
+            conn.execute("DELETE FROM properties")
+            assert exporter.prune_tombstones(conn, '9999-12-31') == 2
+            assert conn.execute("SELECT COUNT(*) FROM deleted_rows").fetchone()[0] == 0
+        conn.close()
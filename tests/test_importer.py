@@ -0,0 +1,241 @@
+import pytest
+import csv
+import sqlite3
+import threading
+import exporter
+import importer
+import rollups
+from db import write_connection
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows(rows)
+    return str(path)
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+@pytest.fixture
+def portfolio(tmp_path):
+    """One CSV per table for a small portfolio, with a few bad rows"""
+    return {
+        'properties': write_csv(tmp_path / "properties.csv", [
+            ['name', 'address', 'type', 'rent_amount', 'furnished', 'status'],
+            ['Flat A', '1 Main St', 'apartment', '1000', 'yes', ''],
+            ['Shop B', '2 Market Rd', 'Shop', '2500.50', 'no', 'Occupied'],
+            ['Castle', '3 Hill', 'Castle', '9000', '', ''],
+            ['Cheap', '4 Lane', 'House', 'free', '', ''],
+        ]),
+        'tenants': write_csv(tmp_path / "tenants.csv", [
+            ['name', 'national_id', 'property'],
+            ['Ali', 'N1', 'Flat A'],
+            ['Sara', 'N2', '2 market rd'],
+            ['Dup', 'N1', ''],
+            ['Lost', 'N3', 'Nowhere'],
+        ]),
+        'leases': write_csv(tmp_path / "leases.csv", [
+            ['national_id', 'property', 'start_date', 'rent_amount'],
+            ['N1', 'Flat A', '2024-01-01', '1000'],
+            ['N2', 'Shop B', '2024-02-01', '2500.5'],
+            ['N9', 'Shop B', '2024-02-01', '2500.5'],
+            ['N2', 'Shop B', '01/02/2024', '2500.5'],
+        ]),
+        'rent_payments': write_csv(tmp_path / "rent_payments.csv", [
+            ['national_id', 'property', 'month', 'due_date', 'amount_due', 'amount_paid', 'status'],
+            ['N1', 'Flat A', '2024-01', '2024-02-01', '1000', '1000', 'paid'],
+            ['N1', 'Flat A', '2024-02', '2024-03-01', '1000', '', ''],
+            ['N1', 'Flat A', '2024-02', '2024-03-01', '1000', '', ''],
+            ['N2', 'Flat A', '2024-01', '2024-02-01', '1000', '', ''],
+            ['N2', 'Shop B', '2024-13', '2024-02-01', '1000', '', ''],
+        ]),
+    }
+
+
+class TestImporter:
+    """Test cases for the bulk CSV importer"""
+
+    def test_import_portfolio(self, temp_db, portfolio):
+        """Test that valid rows are imported with references resolved and bad rows rejected"""
+        results = importer.import_files(temp_db, portfolio, chunk_size=2, commit_rows=3)
+
+        assert {table: (r['rows'], r['inserted'], r['rejected']) for table, r in results.items()} == {
+            'properties': (4, 2, 2),
+            'tenants': (4, 2, 2),
+            'leases': (4, 2, 2),
+            'rent_payments': (5, 2, 3),
+        }
+        with sqlite3.connect(temp_db) as conn:
+            assert conn.execute("SELECT name, type, furnished, status, rent_amount FROM properties ORDER BY id").fetchall() == \
+                [('Flat A', 'Apartment', 1, 'Vacant', 100000), ('Shop B', 'Shop', 0, 'Occupied', 250050)]
+            assert conn.execute("SELECT name, property_id FROM tenants ORDER BY id").fetchall() == \
+                [('Ali', 1), ('Sara', 2)]
+            assert conn.execute("""
+                SELECT l.id, p.month, p.status, p.amount_paid FROM rent_payments p JOIN leases l ON p.lease_id = l.id
+                ORDER BY p.id
+            """).fetchall() == [(1, '2024-01', 'Paid', 100000), (1, '2024-02', 'Pending', 0)]
+        conn.close()
+
+    def test_rejects_file(self, temp_db, portfolio):
+        """Test that rejected rows are written with their line and reason"""
+        results = importer.import_files(temp_db, portfolio)
+        rejects = read_csv(results['properties']['rejects_path'])
+        assert rejects[0] == ['name', 'address', 'type', 'rent_amount', 'furnished', 'status', 'line', 'error']
+        assert [row[-2] for row in rejects[1:]] == ['4', '5']
+        assert "not one of Apartment" in rejects[1][-1]
+        assert "'free' is not an amount" in rejects[2][-1]
+
+        errors = {int(row[-2]): row[-1] for row in read_csv(results['rent_payments']['rejects_path'])[1:]}
+        assert sorted(errors) == [4, 5, 6]
+        assert "UNIQUE constraint failed" in errors[4]
+        assert errors[5] == "the tenant has no lease for this property"
+        assert "not a YYYY-MM month" in errors[6]
+        assert "no tenant with national ID 'N9'" in read_csv(results['leases']['rejects_path'])[1][-1]
+
+    def test_rerun_rejects_duplicates(self, temp_db, portfolio):
+        """Test that importing the same files again adds nothing"""
+        importer.import_files(temp_db, portfolio)
+        again = importer.import_files(temp_db, portfolio)
+        assert all(result['inserted'] == 0 for result in again.values())
+        assert "property already exists" in read_csv(again['properties']['rejects_path'])[1][-1]
+
+    def test_corrected_rejects_reimport(self, temp_db, portfolio, tmp_path):
+        """Test that a fixed rejects file can be imported as it is"""
+        results = importer.import_files(temp_db, {'properties': portfolio['properties']})
+        rows = read_csv(results['properties']['rejects_path'])
+        rows[2][3] = '750'
+        fixed = write_csv(tmp_path / "fixed.csv", rows)
+        with sqlite3.connect(temp_db) as conn:
+            result = importer.import_file(conn, 'properties', fixed)
+        conn.close()
+        assert (result['inserted'], result['rejected']) == (1, 1)
+
+    def test_duplicate_after_deleted_ids(self, temp_db, tmp_path):
+        """Test that the failing row is found when deleted rows left a gap before the new ids"""
+        with sqlite3.connect(temp_db) as conn:
+            conn.executemany("INSERT INTO tenants (name, national_id) VALUES (?, ?)",
+                             [(f"Old {i}", f"OLD{i}") for i in range(5)])
+            conn.execute("DELETE FROM tenants WHERE id > 2")
+            conn.commit()
+            path = write_csv(tmp_path / "tenants.csv", [['name', 'national_id'], ['Ali', 'N1'], ['Sara', 'N2'],
+                                                        ['Dup', 'OLD0'], ['Omar', 'N3'], ['Zoe', 'N4']])
+            result = importer.import_file(conn, 'tenants', path, chunk_size=10)
+            assert conn.execute("SELECT name FROM tenants WHERE id > 2 ORDER BY id").fetchall() == \
+                [('Ali',), ('Sara',), ('Omar',), ('Zoe',)]
+        conn.close()
+        assert (result['inserted'], result['rejected']) == (4, 1)
+        assert read_csv(result['rejects_path'])[1][:2] == ['Dup', 'OLD0']
+
+    def test_lease_ending_before_start(self, temp_db, portfolio, tmp_path):
+        """Test that a lease whose end date precedes its start date is rejected"""
+        importer.import_files(temp_db, {'properties': portfolio['properties'], 'tenants': portfolio['tenants']})
+        path = write_csv(tmp_path / "leases.csv", [['national_id', 'property', 'start_date', 'end_date', 'rent_amount'],
+                                                   ['N1', 'Flat A', '2024-03-20', '2024-03-10', '1000'],
+                                                   ['N2', 'Shop B', '2024-03-01', '2024-03-01', '1000']])
+        with sqlite3.connect(temp_db) as conn:
+            result = importer.import_file(conn, 'leases', path)
+        conn.close()
+        assert (result['inserted'], result['rejected']) == (1, 1)
+        assert read_csv(result['rejects_path'])[1][-1] == "end_date is before start_date"
+
+    def test_header_errors(self, temp_db, tmp_path):
+        """Test that unknown or missing required columns stop the import before any row"""
+        with sqlite3.connect(temp_db) as conn:
+            with pytest.raises(ValueError, match="Unknown columns"):
+                importer.import_file(conn, 'properties', write_csv(tmp_path / "a.csv", [['address', 'colour']]))
+            with pytest.raises(ValueError, match="rent_amount"):
+                importer.import_file(conn, 'properties', write_csv(tmp_path / "b.csv", [['address'], ['x']]))
+            with pytest.raises(ValueError, match="property"):
+                importer.import_file(conn, 'leases', write_csv(tmp_path / "c.csv", [['national_id', 'start_date']]))
+        conn.close()
+
+    def test_check_constraints(self, temp_db):
+        """Test that the CHECK lists are read from the schema"""
+        with sqlite3.connect(temp_db) as conn:
+            checks = importer.check_constraints(conn, 'rent_payments')
+        conn.close()
+        assert checks['status'] == ('Pending', 'Paid', 'Partial', 'Overdue')
+        assert checks['payment_method'][0] == 'Cash'
+
+    def test_cancel_keeps_committed_rows(self, temp_db, tmp_path):
+        """Test that a cancelled import stops and keeps only committed work"""
+        path = write_csv(tmp_path / "properties.csv",
+                         [['address', 'rent_amount']] + [[f"{i} Road", '100'] for i in range(10)])
+        progress = exporter.ExportProgress()
+        progress.cancel()
+        with pytest.raises(importer.ImportCancelled):
+            importer.import_files(temp_db, {'properties': path}, progress=progress)
+        with sqlite3.connect(temp_db) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM properties").fetchone()[0] == 0
+        conn.close()
+        assert progress.total == 10
+
+    def test_writer_free_between_transactions(self, temp_db, tmp_path):
+        """Test that another thread can write while an import is running"""
+        path = write_csv(tmp_path / "properties.csv",
+                         [['address', 'rent_amount']] + [[f"{i} Road", '100'] for i in range(30)])
+        written = []
+
+        def write():
+            with write_connection(temp_db) as conn:
+                conn.execute("INSERT INTO properties (address, rent_amount) VALUES ('Other', 1)")
+                written.append(conn.execute("SELECT COUNT(*) FROM properties").fetchone()[0])
+
+        class Progress(exporter.ExportProgress):
+            """Writes from another thread each time the import checks for cancellation"""
+            def __init__(self):
+                super().__init__()
+                self.cancelled = self
+
+            def is_set(self):
+                if self.done:
+                    thread = threading.Thread(target=write)
+                    thread.start()
+                    thread.join(timeout=5)
+                    assert not thread.is_alive(), "the import held the writer between transactions"
+                return False
+
+        progress = Progress()
+        result = importer.import_files(temp_db, {'properties': path}, chunk_size=10, commit_rows=10,
+                                       progress=progress)
+        assert result['properties']['inserted'] == 30
+        assert written == [11, 22, 33]
+
+    def test_bulk_load(self, temp_db, portfolio):
+        """Test that a bulk load restores indexes and triggers and keeps the rollups correct"""
+        with sqlite3.connect(temp_db) as conn:
+            schema = conn.execute("SELECT name FROM sqlite_master ORDER BY name").fetchall()
+        conn.close()
+
+        results = importer.import_files(temp_db, {table: path for table, path in portfolio.items()
+                                                  if table != 'rent_payments'})
+        with sqlite3.connect(temp_db) as conn:
+            result = importer.import_file(conn, 'rent_payments', portfolio['rent_payments'], bulk=True)
+            assert (result['inserted'], result['rejected']) == (2, 3)
+            assert conn.execute("SELECT name FROM sqlite_master ORDER BY name").fetchall() == schema
+            assert rollups.check(conn) == []
+            assert conn.execute("SELECT SUM(payment_count), SUM(amount_paid) FROM rent_rollup").fetchone() == (2, 100000)
+        conn.close()
+        assert results['leases']['inserted'] == 2
+
+    def test_cancelled_bulk_load_rolls_back(self, temp_db, tmp_path):
+        """Test that cancelling a bulk load leaves the table and its indexes as they were"""
+        path = write_csv(tmp_path / "properties.csv",
+                         [['address', 'rent_amount']] + [[f"{i} Road", '100'] for i in range(10)])
+        progress = exporter.ExportProgress()
+        progress.cancel()
+        with sqlite3.connect(temp_db) as conn:
+            indexes = conn.execute("SELECT name FROM sqlite_master WHERE tbl_name = 'properties'").fetchall()
+            with pytest.raises(importer.ImportCancelled):
+                importer.import_file(conn, 'properties', path, progress=progress, bulk=True)
+            assert conn.execute("SELECT name FROM sqlite_master WHERE tbl_name = 'properties'").fetchall() == indexes
+        conn.close()
+
+    def test_summary(self):
+        """Test the per-table import summary"""
+        summary = importer.format_summary({'tenants': {'rows': 3, 'inserted': 2, 'rejected': 1,
+                                                       'rejects_path': '/tmp/tenants.rejects.csv'}})
+        assert summary == "tenants: 2 of 3 rows imported, 1 rejected (see tenants.rejects.csv)"
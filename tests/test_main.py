@@ -311,3 +311,14 @@ class TestPropertyManagementApp:
             
             app.show_reports()
             mock_reports_manager.assert_called_once_with(app.content_frame)
+    
+    def test_show_diagnostics(self, mock_tkinter):
+        """Test diagnostics module loading"""
+        with patch('main.init_db'), \
+             patch('diagnostics_manager.DiagnosticsManager') as mock_diagnostics_manager:
+            app = PropertyManagementApp()
+            app.content_frame = Mock()
+            app.content_frame.winfo_children.return_value = []
+            
+            app.show_diagnostics()
+            mock_diagnostics_manager.assert_called_once_with(app.content_frame)
@@ -0,0 +1,137 @@
+import pytest
+import random
+import sqlite3
+from decimal import Decimal
+import db
+import rollups
+from money import Money, display
+
+
+def migrate_through(conn, version):
+    """Apply pending migrations up to and including `version`"""
+    migrations = db.MIGRATIONS
+    try:
+        db.MIGRATIONS = [migration for migration in migrations if migration[0] <= version]
+        return db.migrate(conn)
+    finally:
+        db.MIGRATIONS = migrations
+
+
+def legacy_database(path, version=10):
+    """A database at `version`; the default is the last that stored amounts as REAL rupees"""
+    conn = sqlite3.connect(path)
+    with open("schema.sql", 'r') as f:
+        conn.executescript(f.read())
+    migrate_through(conn, version)
+    return conn
+
+
+class TestMoney:
+    """Test cases for the Money type"""
+
+    def test_parse_and_format(self):
+        """Test that typed amounts become paisa and format back as rupees"""
+        assert Money.parse("1250.5") == Money(125050)
+        assert Money.parse(" 1,250.50 ") == Money.parse("Rs 1250.5") == Money(125050)
+        assert Money.parse("0.285") == Money(29)
+        assert Money.parse("-3") == Money(-300)
+        assert str(Money(125050)) == "Rs 1250.50"
+        assert f"RS{Money(5):<8.2f}|" == "RS0.05    |"
+        assert display(None) == "N/A"
+        assert display(0) == "Rs 0.00"
+
+    @pytest.mark.parametrize("text", ["free", "", "1.2.3", "nan", "Infinity"])
+    def test_parse_rejects(self, text):
+        """Test that anything but an amount raises ValueError"""
+        with pytest.raises(ValueError):
+            Money.parse(text)
+
+    def test_only_whole_paisa(self):
+        """Test that a float can't slip in as a number of paisa"""
+        with pytest.raises(TypeError):
+            Money(10.5)
+        assert Money.from_rupees(0.29) == Money(29)
+
+    def test_prorate_rounds_half_up(self):
+        """Test that prorating is integer arithmetic rounded to the nearest paisa"""
+        assert Money(310000).prorate(16, 31) == Money(160000)
+        assert Money(100).prorate(1, 3) == Money(33)
+        assert Money(5).prorate(1, 2) == Money(3)
+
+    def test_text_round_trip(self):
+        """Test that any amount survives formatting and parsing unchanged"""
+        rng = random.Random(19)
+        for _ in range(1000):
+            amount = Money(rng.randint(-10 ** 12, 10 ** 12))
+            assert Money.parse(str(amount)) == amount
+            assert Money.parse(f"{amount:,.2f}") == amount
+
+    def test_totals_are_exact(self):
+        """Test that summing paisa matches exact decimal arithmetic where float sums drift"""
+        rng = random.Random(11)
+        drifted = 0
+        for _ in range(200):
+            texts = [f"{rng.randint(0, 500000)}.{rng.randint(0, 99):02d}" for _ in range(rng.randint(1, 300))]
+            exact = sum(Decimal(text) for text in texts)
+            assert sum(Money.parse(text) for text in texts).rupees == exact
+            drifted += Decimal(repr(sum(float(text) for text in texts))) != exact
+        assert drifted
+
+
+class TestMoneyMigration:
+    """Test cases for migration 11, which stores amounts as integer paisa"""
+
+    def test_totals_match_old_totals(self, tmp_path):
+        """Test that after migrating, integer SUMs equal the rounded REAL SUMs they replace"""
+        rng = random.Random(7)
+        conn = legacy_database(str(tmp_path / "legacy.db"))
+        conn.execute("INSERT INTO tenants (name) VALUES ('T')")
+        for i in range(1, 6):
+            conn.execute("INSERT INTO properties (name, address, rent_amount) VALUES (?, 'St', ?)",
+                         (f"P{i}", rng.randint(1000, 90000) + rng.randint(0, 99) / 100))
+            conn.execute("INSERT INTO leases (tenant_id, property_id, start_date, rent_amount) VALUES (1, ?, '2024-01-01', 1)",
+                         (i,))
+        conn.executemany("""
+            INSERT INTO rent_payments (lease_id, tenant_id, property_id, month, due_date, amount_due, amount_paid, status)
+            VALUES (?, 1, ?, ?, '2024-01-01', ?, ?, 'Partial')
+        """, [(i % 5 + 1, i % 5 + 1, f"m{i}", rng.randint(0, 90000) + rng.randint(0, 99) / 100,
+               rng.randint(0, 90000) + rng.randint(0, 99) / 100) for i in range(2000)])
+        conn.executemany("INSERT INTO expenses (property_id, description, amount, category) VALUES (?, 'x', ?, 'Repair')",
+                         [(i % 5 + 1, rng.randint(0, 5000) + rng.randint(0, 99) / 100) for i in range(2000)])
+        conn.commit()
+
+        queries = [
+            "SELECT property_id, SUM(amount_due), SUM(amount_paid) FROM rent_payments GROUP BY 1",
+            "SELECT property_id, SUM(amount) FROM expenses GROUP BY 1",
+            "SELECT property_id, SUM(amount_paid), SUM(outstanding) FROM rent_rollup GROUP BY 1",
+            "SELECT COUNT(*), SUM(rent_amount) FROM properties",
+        ]
+        before = [conn.execute(query).fetchall() for query in queries]
+        assert migrate_through(conn, 11) == [11]
+        after = [conn.execute(query).fetchall() for query in queries]
+
+        for old_rows, new_rows in zip(before, after):
+            for old, new in zip(old_rows, new_rows):
+                assert all(type(value) is int for value in new)
+                assert new[0] == old[0]
+                assert [round(value * 100) for value in old[1:]] == list(new[1:])
+        assert rollups.check(conn) == []
+        assert conn.execute("PRAGMA integrity_check").fetchone() == ('ok',)
+        conn.close()
+
+    def test_rebuild_keeps_schema_and_ids(self, tmp_path):
+        """Test that the rebuilt tables keep their indexes, triggers and AUTOINCREMENT counters"""
+        conn = legacy_database(str(tmp_path / "legacy.db"))
+        conn.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('A', 'St', 10.5)")
+        conn.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('B', 'St', 20)")
+        conn.execute("DELETE FROM properties WHERE id = 2")
+        conn.commit()
+        schema = conn.execute("SELECT type, name FROM sqlite_master ORDER BY name").fetchall()
+
+        migrate_through(conn, 11)
+        assert conn.execute("SELECT type, name FROM sqlite_master ORDER BY name").fetchall() == schema
+        assert conn.execute("SELECT rent_amount FROM properties").fetchall() == [(1050,)]
+        conn.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('C', 'St', ?)", (Money(300),))
+        assert conn.execute("SELECT id, rent_amount FROM properties WHERE name = 'C'").fetchone() == (3, 300)
+        assert conn.execute("SELECT COUNT(*) FROM search_index WHERE search_index MATCH 'C'").fetchone() == (1,)
+        conn.close()
@@ -0,0 +1,154 @@
+import pytest
+import os
+import sqlite3
+from unittest.mock import Mock
+import db
+import querylog
+from diagnostics_manager import DiagnosticsManager, format_details
+
+
+@pytest.fixture(autouse=True)
+def fresh_log():
+    """Start each test with no timings"""
+    querylog.reset()
+    yield
+    querylog.reset()
+
+
+@pytest.fixture
+def people_db(temp_db):
+    with sqlite3.connect(temp_db) as conn:
+        conn.execute("CREATE TABLE people (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.executemany("INSERT INTO people (name) VALUES (?)", [(f"Person {i}",) for i in range(25)])
+    conn.close()
+    return temp_db
+
+
+def stats_for(sql):
+    return next(stats for stats in querylog.top_statements() if stats.sql == sql)
+
+
+class TestQueryLog:
+    """Test cases for statement timing on pooled connections"""
+
+    def read_names(self, conn):
+        for _ in range(3):
+            names = [name for (name,) in conn.execute("""
+                SELECT name
+                FROM people   WHERE id <= ?
+            """, (10,))]
+        assert len(names) == 10
+
+    def test_pooled_connections_are_timed(self, people_db):
+        """Test that execute() through the pool records calls and the calling line, but iterating costs nothing extra"""
+        with db.read_connection(people_db) as conn:
+            assert isinstance(conn, querylog.TimedConnection)
+            assert type(conn.cursor()).__next__ is sqlite3.Cursor.__next__
+            self.read_names(conn)
+
+        stats = stats_for("SELECT name FROM people WHERE id <= ?")
+        assert (stats.calls, stats.rows, sum(stats.histogram)) == (3, 0, 3)
+        assert 0 < stats.slowest <= stats.total
+        [site] = stats.sites
+        assert site.startswith("test_querylog.py:") and site.endswith(" read_names")
+
+    def test_row_timing(self, people_db):
+        """Test that with row_timing on, rows read by iterating are counted too"""
+        pool = db.ConnectionPool(people_db, diagnostics={'timing': True, 'row_timing': True,
+                                                         'slow_query_ms': None, 'slow_query_log': None})
+        with pool.reader() as conn:
+            self.read_names(conn)
+        pool.close()
+        assert stats_for("SELECT name FROM people WHERE id <= ?").rows == 30
+
+    def test_fetch_methods(self, people_db):
+        """Test that rows are counted however they are read, and writes count the rows changed"""
+        with db.write_connection(people_db) as conn:
+            conn.execute("SELECT id FROM people WHERE id > 20").fetchall()
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM people WHERE id > 15")
+            assert len(cursor.fetchmany(3)) + len(cursor.fetchmany(3)) + len(cursor.fetchmany(30)) == 10
+            # Read only the first row; recorded when the cursor is dropped
+            assert conn.execute("SELECT id FROM people ORDER BY id").fetchone() == (1,)
+            conn.execute("UPDATE people SET name = upper(name) WHERE id <= 7")
+            conn.executemany("INSERT INTO people (name) VALUES (?)", [("A",), ("B",)])
+
+        assert stats_for("SELECT id FROM people WHERE id > 20").rows == 5
+        assert stats_for("SELECT id FROM people WHERE id > 15").rows == 10
+        assert stats_for("SELECT id FROM people ORDER BY id").rows == 1
+        assert stats_for("UPDATE people SET name = upper(name) WHERE id <= 7").rows == 7
+        assert stats_for("INSERT INTO people (name) VALUES (?)").rows == 2
+        assert [stats.total for stats in querylog.top_statements()] == \
+            sorted((stats.total for stats in querylog.top_statements()), reverse=True)
+
+    def test_histogram(self):
+        """Test that calls land in the right latency bucket"""
+        stats = querylog.StatementStats("SELECT 1")
+        for seconds in (0.0005, 0.003, 0.003, 0.2, 9):
+            stats.add(seconds, 1, "here")
+        assert stats.histogram == [1, 2, 0, 0, 0, 1, 0, 0, 1]
+        assert (stats.percentile_ms(0.5), stats.percentile_ms(0.8), stats.percentile_ms(1)) == (5, 500, None)
+        assert stats.sites == {"here": 5}
+
+    def test_slow_query_log(self, people_db, tmp_path):
+        """Test that calls over the threshold are logged, without their parameter values"""
+        log_file = tmp_path / "slow.log"
+        pool = db.ConnectionPool(people_db, diagnostics={'timing': True, 'slow_query_ms': 0,
+                                                         'slow_query_log': str(log_file)})
+        with pool.reader() as conn:
+            conn.execute("SELECT id FROM people WHERE name = ?", ("Secret Name",)).fetchall()
+        pool.close()
+        line = log_file.read_text().splitlines()[-1]
+        assert line.endswith("SELECT id FROM people WHERE name = ?")
+        assert "test_slow_query_log" in line and "Secret Name" not in line
+
+        pool = db.ConnectionPool(people_db, diagnostics={'timing': True, 'slow_query_ms': 60000,
+                                                         'slow_query_log': str(log_file)})
+        with pool.reader() as conn:
+            conn.execute("SELECT COUNT(*) FROM people").fetchall()
+        pool.close()
+        assert "COUNT" not in log_file.read_text()
+
+    def test_slow_query_log_beside_database(self, people_db, tmp_path, monkeypatch):
+        """Test that a relative log path is taken from the database's directory, not the working one"""
+        monkeypatch.chdir(tmp_path)
+        pool = db.ConnectionPool(people_db, diagnostics={'timing': True, 'slow_query_ms': 0,
+                                                         'slow_query_log': 'slow.log'})
+        assert pool.slow_query_log == os.path.join(os.path.dirname(people_db), 'slow.log')
+        with pool.reader() as conn:
+            conn.execute("SELECT COUNT(*) FROM people").fetchall()
+        pool.close()
+        assert os.path.exists(pool.slow_query_log)
+        assert not (tmp_path / 'slow.log').exists()
+
+    def test_settings(self, tmp_path, monkeypatch):
+        """Test the [diagnostics] section, the environment override and turning timing off"""
+        config = tmp_path / "landlord.ini"
+        config.write_text("[diagnostics]\ntiming = off\nslow_query_ms = 50\nslow_query_log =\n")
+        assert db.load_diagnostics(str(config)) == {'timing': False, 'row_timing': False, 'slow_query_ms': 50.0,
+                                                    'slow_query_log': None}
+        monkeypatch.setenv(db.SLOW_QUERY_ENV, "12.5")
+        assert db.load_diagnostics(str(config))['slow_query_ms'] == 12.5
+        monkeypatch.setenv(db.SLOW_QUERY_ENV, "soon")
+        with pytest.raises(ValueError):
+            db.load_diagnostics(str(config))
+
+        pool = db.ConnectionPool(str(tmp_path / "plain.db"), diagnostics={'timing': False})
+        with pool.reader() as conn:
+            assert type(conn) is sqlite3.Connection
+        pool.close()
+
+    def test_diagnostics_panel(self, people_db, mock_tkinter):
+        """Test that the panel lists statements by total time and details the selected one"""
+        with db.read_connection(people_db) as conn:
+            conn.execute("SELECT name FROM people").fetchall()
+        manager = DiagnosticsManager(Mock())
+        assert [stats.sql for stats in manager.statements] == [
+            stats.sql for stats in querylog.top_statements(len(manager.statements))]
+
+        stats = stats_for("SELECT name FROM people")
+        row = manager.format_statement(stats)
+        assert (row[1], row[5], row[7]) == (1, 25, "SELECT name FROM people")
+        details = format_details(stats)
+        assert details.startswith("SELECT name FROM people") and "Latency:" in details
+        assert "test_diagnostics_panel" in details
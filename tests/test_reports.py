@@ -0,0 +1,200 @@
+import pytest
+import re
+import sqlite3
+import db
+import reports
+
+
+def populate(conn):
+    """Insert one of everything the reports look at; amounts are in paisa"""
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO properties (name, address, rent_amount, status) VALUES ('Flat A', '1 Test St', 100000, 'Occupied')")
+    cursor.execute("INSERT INTO tenants (name, property_id) VALUES ('Tenant A', 1)")
+    cursor.execute("""
+        INSERT INTO leases (tenant_id, property_id, start_date, end_date, rent_amount, status)
+        VALUES (1, 1, '2024-01-01', date('now', '+30 days'), 100000, 'Active')
+    """)
+    cursor.execute("""
+        INSERT INTO rent_payments (lease_id, tenant_id, property_id, month, due_date, amount_due, amount_paid, status, payment_date)
+        VALUES (1, 1, 1, '2024-01', '2024-02-01', 100000, 100000, 'Paid', '2024-01-15'),
+               (1, 1, 1, '2024-02', '2024-03-01', 100000, 0, 'Overdue', NULL)
+    """)
+    cursor.execute("INSERT INTO expenses (property_id, description, category, amount, date) VALUES (1, 'Plumber', 'Repair', 25000, '2024-01-20')")
+    cursor.execute("""
+        INSERT INTO maintenance_requests (property_id, description, status, cost_estimate, actual_cost, request_date)
+        VALUES (1, 'Leaking tap', 'Completed', 8000, 7550, '2024-01-05'),
+               (1, 'Broken window', 'Open', NULL, NULL, '2024-01-06')
+    """)
+    conn.commit()
+
+
+# Tables the reports filter by date; a SCAN of one means a date predicate can't use an index
+RANGED_TABLES = {'rent_payments', 'expenses', 'leases'}
+ROLLUP_TABLES = {'rent_rollup', 'expense_rollup'}
+TABLE_ALIAS = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|JOIN\b|GROUP\b|ORDER\b|LEFT\b)(\w+))?',
+                         re.IGNORECASE)
+
+
+def scanned_tables(conn, sql):
+    """Tables the plan for `sql` reads in full, with or without an index to walk"""
+    aliases = {}
+    for table, alias in TABLE_ALIAS.findall(sql):
+        aliases[table] = aliases[alias or table] = table
+    scanned = set()
+    for row in conn.execute("EXPLAIN QUERY PLAN " + sql):
+        match = re.match(r'SCAN (\w+)', row[3])
+        if match and match.group(1) in aliases:
+            scanned.add(aliases[match.group(1)])
+    return scanned
+
+
+def report_queries(conn):
+    """Every SELECT the reports and the dashboard run"""
+    queries = []
+    conn.set_trace_callback(lambda sql: queries.append(sql) if sql.lstrip().upper().startswith('SELECT') else None)
+    try:
+        for title, builder in reports.REPORTS:
+            builder(conn)
+        reports.dashboard_summary(conn)
+        reports.recent_activity(conn)
+    finally:
+        conn.set_trace_callback(None)
+    return queries
+
+
+class TestReportBuilders:
+    """Test cases for the report builders used by the reports screen"""
+
+    @pytest.mark.parametrize("title,builder", reports.REPORTS)
+    def test_empty_database(self, temp_db, title, builder):
+        """Test that every report builds on an empty database"""
+        with sqlite3.connect(temp_db) as conn:
+            report = builder(conn)
+        assert report.startswith(title.upper())
+
+    @pytest.mark.parametrize("title,builder", reports.REPORTS)
+    def test_populated_database(self, temp_db, title, builder):
+        """Test that every report builds with data present"""
+        with sqlite3.connect(temp_db) as conn:
+            populate(conn)
+            report = builder(conn)
+        assert report.startswith(title.upper())
+
+    def test_maintenance_costs(self, temp_db):
+        """Test that maintenance costs fall back to the estimate and default to zero"""
+        with sqlite3.connect(temp_db) as conn:
+            populate(conn)
+            report = reports.maintenance_cost_report(conn)
+        assert "Total Maintenance Cost: RS75.50" in report
+        assert "Cost: RS0.00" in report
+
+    def test_last_12_calendar_months(self, temp_db):
+        """Test that the monthly sections cover this month and the 11 before it, not a 13th"""
+        with sqlite3.connect(temp_db) as conn:
+            populate(conn)
+            conn.execute("""
+                INSERT INTO rent_payments (lease_id, tenant_id, property_id, month, due_date, amount_due,
+                                           amount_paid, status, payment_date)
+                VALUES (1, 1, 1, '2000-01', '2000-02-01', 100000, 100000, 'Paid', date('now', 'start of month', '-12 months')),
+                       (1, 1, 1, '2000-02', '2000-03-01', 100000, 70000, 'Paid', date('now', 'start of month', '-11 months'))
+            """)
+            conn.execute("""
+                INSERT INTO expenses (property_id, description, amount, date)
+                VALUES (1, 'Old', 100000, date('now', 'start of month', '-12 months')),
+                       (1, 'Recent', 40000, date('now', 'start of month', '-11 months'))
+            """)
+            paid_month = conn.execute("SELECT strftime('%Y-%m', 'now', 'start of month', '-11 months')").fetchone()[0]
+            income = reports.rent_income_report(conn)
+            expenses = reports.expense_analysis_report(conn)
+        conn.close()
+        assert "Total Monthly Income: RS700.00" in income
+        # Listed under the month it was paid in, not the rent month
+        assert f"\n{paid_month}: RS700.00 (1 payments)" in income
+        assert "2000-01" not in income and "2000-02" not in income
+        monthly = expenses.split("MONTHLY EXPENSES")[1]
+        assert "RS400.00" in monthly and "RS1000.00" not in monthly
+
+    def test_occupancy_rate(self, temp_db):
+        """Test the occupancy summary"""
+        with sqlite3.connect(temp_db) as conn:
+            populate(conn)
+            report = reports.property_occupancy_report(conn)
+        assert "Tenant A" in report
+
+
+class TestDashboard:
+    """Test cases for the dashboard summary and its cache"""
+
+    @pytest.fixture(autouse=True)
+    def empty_cache(self):
+        reports.clear_dashboard_cache()
+        yield
+        reports.clear_dashboard_cache()
+
+    def test_summary_values(self, temp_db):
+        """Test that the single summary query matches the data"""
+        with sqlite3.connect(temp_db) as conn:
+            populate(conn)
+            summary = reports.dashboard_summary(conn)
+        assert summary == {
+            'total_properties': 1, 'occupied_properties': 1, 'total_tenants': 1,
+            'open_maintenance': 1, 'total_income': 100000, 'total_expenses': 25000,
+            'overdue_payments': 1,
+        }
+
+    def test_recent_activity_skips_unpaid(self, temp_db):
+        """Test that rent rows without a payment date are not listed as payments"""
+        with sqlite3.connect(temp_db) as conn:
+            populate(conn)
+            payments, maintenance = reports.recent_activity(conn)
+        assert payments == [('Tenant A', 100000, '2024-01-15', 'Paid')]
+        assert [row[0] for row in maintenance] == ['Broken window', 'Leaking tap']
+
+    def test_cached_until_write(self, temp_db):
+        """Test that the cache is reused until the application writes"""
+        with sqlite3.connect(temp_db) as conn:
+            populate(conn)
+        first = reports.dashboard_data(temp_db)
+        assert reports.dashboard_data(temp_db) is first
+
+        with db.write_connection(temp_db) as conn:
+            conn.execute("INSERT INTO tenants (name) VALUES ('Tenant B')")
+        refreshed = reports.dashboard_data(temp_db)
+        assert refreshed is not first
+        assert refreshed[0]['total_tenants'] == 2
+
+    def test_ttl_expiry(self, temp_db):
+        """Test that an expired entry is reloaded even without a write"""
+        first = reports.dashboard_data(temp_db)
+        assert reports.dashboard_data(temp_db, ttl=0) is not first
+
+
+class TestQueryPlans:
+    """Regression tests that keep report date filters answerable from indexes"""
+
+    def test_date_filters_use_indexes(self, temp_db):
+        """Test that no report scans a dated table, or a rollup it filters by month"""
+        with sqlite3.connect(temp_db) as conn:
+            populate(conn)
+            queries = report_queries(conn)
+            assert len(queries) > len(reports.REPORTS)
+            for sql in queries:
+                scanned = scanned_tables(conn, sql)
+                assert not scanned & RANGED_TABLES, sql
+                if re.search(r'\bmonth\s*[<>=]', sql):
+                    assert not scanned & ROLLUP_TABLES, sql
+        conn.close()
+
+    def test_detects_scans(self, temp_db):
+        """Test that the plan check catches a filter written as a function of the column"""
+        with sqlite3.connect(temp_db) as conn:
+            assert scanned_tables(conn, """
+                SELECT SUM(e.amount) FROM expenses e WHERE strftime('%Y', e.date) = '2024'
+            """) == {'expenses'}
+            assert scanned_tables(conn, """
+                SELECT SUM(e.amount) FROM expenses e WHERE e.date >= '2024-01-01' AND e.date < '2025-01-01'
+            """) == set()
+            assert scanned_tables(conn, """
+                SELECT month FROM expense_rollup WHERE substr(month, 1, 4) = '2024'
+            """) == {'expense_rollup'}
+        conn.close()
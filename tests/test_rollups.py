@@ -0,0 +1,130 @@
+import pytest
+import sqlite3
+import db
+import rollups
+
+
+def setup_property(conn):
+    """Insert two properties with a tenant and lease each"""
+    cursor = conn.cursor()
+    for i in (1, 2):
+        cursor.execute("INSERT INTO properties (name, address, rent_amount) VALUES (?, 'Test St', 1000)", (f"P{i}",))
+        cursor.execute("INSERT INTO tenants (name, property_id) VALUES (?, ?)", (f"T{i}", i))
+        cursor.execute("INSERT INTO leases (tenant_id, property_id, start_date, rent_amount) VALUES (?, ?, '2024-01-01', 1000)", (i, i))
+    conn.commit()
+
+
+def add_payment(conn, lease, month, amount_paid=0, status='Pending', payment_date=None):
+    cursor = conn.execute("""
+        INSERT INTO rent_payments (lease_id, tenant_id, property_id, month, due_date,
+                                   amount_due, amount_paid, status, payment_date)
+        VALUES (?, ?, ?, ?, ?, 1000, ?, ?, ?)
+    """, (lease, lease, lease, month, f"{month}-28", amount_paid, status, payment_date))
+    return cursor.lastrowid
+
+
+def rent_rollup(conn):
+    return conn.execute("""
+        SELECT property_id, month, paid_month, status, payment_count, amount_paid, outstanding
+        FROM rent_rollup ORDER BY 1, 2, 3, 4
+    """).fetchall()
+
+
+class TestRollupTriggers:
+    """Test cases for rollups kept current by triggers"""
+
+    def test_insert_update_delete_payments(self, temp_db):
+        """Test that rent_rollup follows every kind of change to rent_payments"""
+        with sqlite3.connect(temp_db) as conn:
+            setup_property(conn)
+            first = add_payment(conn, 1, '2024-01')
+            add_payment(conn, 1, '2024-02')
+            add_payment(conn, 2, '2024-01', 400, 'Partial', '2024-01-20')
+            assert rent_rollup(conn) == [
+                (1, '2024-01', '', 'Pending', 1, 0, 1000),
+                (1, '2024-02', '', 'Pending', 1, 0, 1000),
+                (2, '2024-01', '2024-01', 'Partial', 1, 400, 600),
+            ]
+
+            conn.execute("UPDATE rent_payments SET amount_paid = 1000, status = 'Paid', payment_date = '2024-02-03' WHERE id = ?", (first,))
+            conn.execute("DELETE FROM rent_payments WHERE property_id = 2")
+            assert rent_rollup(conn) == [
+                (1, '2024-01', '2024-02', 'Paid', 1, 1000, 0),
+                (1, '2024-02', '', 'Pending', 1, 0, 1000),
+            ]
+            assert rollups.check(conn) == []
+
+    def test_expenses(self, temp_db):
+        """Test that expense_rollup follows changes to expenses"""
+        with sqlite3.connect(temp_db) as conn:
+            setup_property(conn)
+            conn.executemany("INSERT INTO expenses (property_id, description, category, amount, date) VALUES (?, 'x', ?, ?, ?)", [
+                (1, 'Repair', 100, '2024-01-05'),
+                (1, 'Repair', 50, '2024-01-20'),
+                (2, None, 75, '2024-02-01'),
+            ])
+            conn.execute("UPDATE expenses SET property_id = 2 WHERE amount = 50")
+            rows = conn.execute("SELECT * FROM expense_rollup ORDER BY 1, 2, 3").fetchall()
+            assert rows == [
+                (1, '2024-01', 'Repair', 1, 100),
+                (2, '2024-01', 'Repair', 1, 50),
+                (2, '2024-02', '', 1, 75),
+            ]
+            assert rollups.check(conn) == []
+
+    def test_cascade_delete(self, temp_db):
+        """Test that rows removed by a property cascade also leave the rollups"""
+        with sqlite3.connect(temp_db) as conn:
+            conn.execute("PRAGMA foreign_keys = ON")
+            setup_property(conn)
+            add_payment(conn, 1, '2024-01')
+            conn.execute("INSERT INTO expenses (property_id, description, amount, date) VALUES (1, 'x', 10, '2024-01-01')")
+            conn.execute("DELETE FROM properties WHERE id = 1")
+            assert conn.execute("SELECT COUNT(*) FROM rent_rollup").fetchone()[0] == 0
+            assert conn.execute("SELECT COUNT(*) FROM expense_rollup").fetchone()[0] == 0
+
+
+class TestRebuildAndCheck:
+    """Test cases for the rebuild command and the consistency checker"""
+
+    def test_check_reports_and_rebuild_fixes_drift(self, temp_db):
+        """Test that a corrupted rollup is detected and repaired"""
+        with sqlite3.connect(temp_db) as conn:
+            setup_property(conn)
+            add_payment(conn, 1, '2024-01', 1000, 'Paid', '2024-01-02')
+            conn.execute("UPDATE rent_rollup SET amount_paid = 5")
+            conn.execute("DELETE FROM expense_rollup")
+            conn.execute("INSERT INTO expense_rollup VALUES (9, '2024-01', '', 1, 1)")
+            conn.commit()
+
+            mismatches = rollups.check(conn)
+            assert ('rent_rollup', (1, '2024-01', '2024-01', 'Paid'), 'amount_paid', 5, 1000) in mismatches
+            assert any(m[0] == 'expense_rollup' and m[1][0] == 9 for m in mismatches)
+
+            assert rollups.rebuild(conn) == {'rent_rollup': 1, 'expense_rollup': 0}
+            assert rollups.check(conn) == []
+
+    def test_migration_backfills_existing_rows(self, tmp_path):
+        """Test that upgrading a database with data fills the rollups in paisa"""
+        path = str(tmp_path / "old.db")
+        with sqlite3.connect(path) as conn:
+            with open("schema.sql", 'r') as f:
+                conn.executescript(f.read())
+            setup_property(conn)
+            add_payment(conn, 1, '2024-01', 1000, 'Paid', '2024-01-02')
+            add_payment(conn, 2, '2024-01')
+            conn.execute("INSERT INTO expenses (property_id, description, amount, date) VALUES (1, 'x', 10, '2024-01-01')")
+            conn.commit()
+
+            db.migrate(conn)
+            assert conn.execute("SELECT SUM(payment_count) FROM rent_rollup").fetchone()[0] == 2
+            assert conn.execute("SELECT amount FROM expense_rollup").fetchone()[0] == 1000
+            assert rollups.check(conn) == []
+        conn.close()
+
+    def test_cli(self, temp_db, capsys):
+        """Test the check and rebuild commands"""
+        assert rollups.main(['check', '--db', temp_db]) == 0
+        assert "consistent" in capsys.readouterr().out
+        assert rollups.main(['rebuild', '--db', temp_db]) == 0
+        assert "rent_rollup: 0 rows" in capsys.readouterr().out
@@ -0,0 +1,116 @@
+import pytest
+import sqlite3
+from unittest.mock import Mock
+import search
+import search_bar
+
+
+@pytest.fixture
+def search_db(temp_db):
+    """Tenants, properties, expenses and a maintenance request to search"""
+    with sqlite3.connect(temp_db) as conn:
+        conn.execute("INSERT INTO properties (name, address, rent_amount) VALUES ('Rose Villa', '12 Canal Road', 1000)")
+        conn.execute("INSERT INTO properties (name, address, rent_amount) VALUES (NULL, '7 Khan Street', 800)")
+        conn.executemany("INSERT INTO tenants (name, phone, email, national_id) VALUES (?, ?, ?, ?)", [
+            ('Ali Khan', '0300-123 4567', 'ali@example.com', '35202-1234567-1'),
+            ('Sara Malik', None, 'sara@example.com', None),
+        ])
+        conn.execute("""
+            INSERT INTO expenses (property_id, description, amount, invoice_number)
+            VALUES (1, 'Roof repair', 500, 'INV-2023/045')
+        """)
+        conn.execute("INSERT INTO maintenance_requests (property_id, description) VALUES (1, 'Leaking roof in kitchen')")
+    conn.close()
+    return temp_db
+
+
+def run(db_file, text, per_kind=search.PER_KIND):
+    with sqlite3.connect(db_file) as conn:
+        results = search.search(conn, text, per_kind)
+    conn.close()
+    return results
+
+
+class TestSearch:
+    """Test cases for global search"""
+
+    def test_results_grouped_by_kind(self, search_db):
+        """Test that matches come back grouped in display order with their ids"""
+        assert run(search_db, "kha") == [
+            ('Tenant', 1, [(1, 'Ali Khan', '0300-123 4567  ali@example.com')]),
+            ('Property', 1, [(2, '7 Khan Street', '7 Khan Street')]),
+        ]
+        assert [(kind, count) for kind, count, rows in run(search_db, "roof")] == [('Expense', 1), ('Maintenance', 1)]
+
+    def test_phone_id_and_invoice_variants(self, search_db):
+        """Test that phone numbers, national IDs and invoice numbers match with or without punctuation"""
+        for text in ("03001234567", "0300-123", "3520212345671", "35202-1234567"):
+            assert run(search_db, text)[0][2][0][0] == 1
+        assert run(search_db, "INV2023045")[0][:2] == ('Expense', 1)
+        assert run(search_db, "sara@example")[0][2] == [(2, 'Sara Malik', 'sara@example.com')]
+
+    def test_index_follows_changes(self, search_db):
+        """Test that the triggers keep the index in step with edits and deletes"""
+        with sqlite3.connect(search_db) as conn:
+            conn.execute("UPDATE tenants SET name = 'Ali Raza' WHERE id = 1")
+            conn.execute("DELETE FROM properties WHERE id = 2")
+            conn.execute("UPDATE expenses SET amount = 600 WHERE id = 1")
+        conn.close()
+        assert run(search_db, "khan") == []
+        assert run(search_db, "raza")[0][2][0][:2] == (1, 'Ali Raza')
+        assert run(search_db, "roof repair")[0][0] == 'Expense'
+
+    def test_short_or_empty_input(self, search_db):
+        """Test that input too short to narrow anything runs no query"""
+        assert run(search_db, "k") == []
+        assert run(search_db, " -- ") == []
+
+    def test_common_terms_show_newest(self, search_db, monkeypatch):
+        """Test that past RANKED_MATCHES a group lists its newest matches with the full count"""
+        with sqlite3.connect(search_db) as conn:
+            conn.executemany("INSERT INTO tenants (name) VALUES (?)", [(f"Khan {i}",) for i in range(10)])
+        conn.close()
+        monkeypatch.setattr(search, 'RANKED_MATCHES', 5)
+        kind, count, rows = run(search_db, "khan", per_kind=3)[0]
+        assert (kind, count) == ('Tenant', 11)
+        assert [record_id for record_id, title, detail in rows] == [12, 11, 10]
+
+
+@pytest.fixture
+def mock_entry(monkeypatch):
+    """Replace the Tk entry so the search box can be driven without a display"""
+    monkeypatch.setattr(search_bar.tk, 'Entry', lambda parent, **options: Mock())
+
+
+class TestSearchBar:
+    """Test cases for the typeahead search box"""
+
+    def test_typing_restarts_debounce(self, mock_entry):
+        """Test that each keystroke cancels the pending search and schedules a new one"""
+        bar = search_bar.SearchBar(Mock(), Mock())
+        bar.entry.after.side_effect = ['job1', 'job2']
+        bar.on_key(Mock(keysym='a'))
+        bar.on_key(Mock(keysym='l'))
+        bar.entry.after_cancel.assert_called_once_with('job1')
+        assert bar.pending == 'job2'
+        bar.on_key(Mock(keysym='Down'))
+        assert bar.entry.after.call_count == 2
+
+    def test_search_shows_groups(self, mock_entry, search_db):
+        """Test that a finished search fills the drop-down and opens the chosen result"""
+        on_open = Mock()
+        bar = search_bar.SearchBar(Mock(), on_open, db_file=search_db)
+        bar.entry.get.return_value = "roof"
+        bar.results = Mock()
+        bar.popup = Mock()
+        bar.popup.winfo_exists.return_value = True
+        bar.entry.winfo_width.return_value = bar.entry.winfo_height.return_value = 300
+        bar.entry.winfo_rootx.return_value = bar.entry.winfo_rooty.return_value = 0
+        bar.results.get_children.return_value = ()
+        bar.results.insert.side_effect = ['expenses', 'expense', 'maintenance', 'request']
+        bar.run_search()
+
+        assert [call.kwargs['text'] for call in bar.results.insert.call_args_list] == [
+            'Expenses (1)', 'Roof repair   INV-2023/045', 'Maintenance (1)', 'Leaking roof in kitchen']
+        bar.open_first()
+        on_open.assert_called_once_with('Expense', 1)
@@ -0,0 +1,111 @@
+import pytest
+import sqlite3
+from datetime import date
+from money import Money
+from services import (ExpenseRepo, LeaseRepo, MaintenanceRepo, PaymentRepo, Property, PropertyRepo,
+                      TenantRepo)
+
+
+@pytest.fixture
+def conn(temp_db):
+    conn = sqlite3.connect(temp_db)
+    conn.execute("PRAGMA foreign_keys = ON")
+    yield conn
+    conn.close()
+
+
+class TestRepos:
+    """Test cases for the headless repositories"""
+
+    def test_add_and_get(self, conn):
+        """Test that plain values go in and a record with Money amounts comes back"""
+        properties = PropertyRepo(conn)
+        property_id = properties.add(name='Flat A', address='1 Test St', rent_amount=Money(2500000))
+        prop = properties.get(property_id)
+        assert isinstance(prop, Property)
+        assert (prop.id, prop.name, prop.rent_amount) == (property_id, 'Flat A', Money(2500000))
+        # Columns left out take their defaults
+        assert (prop.status, prop.deposit_amount) == ('Vacant', Money(0))
+        assert properties.get(property_id + 1) is None
+
+    def test_update_save_and_delete(self, conn):
+        """Test that update() sets only the given columns and delete() follows the foreign keys"""
+        property_id = PropertyRepo(conn).add(address='1 Test St', rent_amount=100)
+        tenants = TenantRepo(conn)
+        tenant_id = tenants.save(None, name='Ali', property_id=property_id, phone='0300')
+        assert tenants.save(tenant_id, phone='0301') == tenant_id
+        assert tenants.get(tenant_id)[1:4] == ('Ali', property_id, '0301')
+        assert tenants.update(tenant_id + 1, phone='x') is False
+
+        PropertyRepo(conn).delete(property_id)
+        assert tenants.get(tenant_id).property_id is None
+
+    def test_unknown_column(self, conn):
+        """Test that a misspelt column is refused before any SQL is built"""
+        with pytest.raises(TypeError, match="no column rent"):
+            PropertyRepo(conn).add(address='1 Test St', rent=100)
+        with pytest.raises(TypeError):
+            PropertyRepo(conn).update(1, id=2)
+
+    def test_add_many(self, conn):
+        """Test that dicts and records are inserted by one executemany"""
+        properties = PropertyRepo(conn)
+        rows = [{'address': f'{i} Test St', 'rent_amount': Money(i * 100)} for i in range(1, 501)]
+        assert properties.add_many(rows) == 500
+        assert properties.add_many([Property(id=99, address='Last St', rent_amount=5, status='Vacant',
+                                             deposit_amount=0, furnished=0)]) == 1
+        assert properties.add_many([]) == 0
+        assert conn.execute("SELECT COUNT(*), SUM(rent_amount) FROM properties").fetchone() == (501, 12525005)
+        assert conn.execute("SELECT id FROM properties WHERE address = 'Last St'").fetchone() == (501,)
+
+    def test_labels(self, conn):
+        """Test that the dialogs' combobox labels map back to ids"""
+        properties = PropertyRepo(conn)
+        named = properties.add(name='Rose Villa', address='12 Canal Road', rent_amount=100)
+        unnamed = properties.add(address='7 Khan Street', rent_amount=100)
+        tenant_id = TenantRepo(conn).add(name='Ali', property_id=named)
+        lease_id = LeaseRepo(conn).add(tenant_id=tenant_id, property_id=unnamed, start_date='2024-01-01',
+                                       rent_amount=100)
+
+        for label in properties.labels():
+            assert properties.label(properties.id_for_label(label)) == label
+        assert properties.id_for_label(f'Property #{unnamed} - 7 Khan Street') == unnamed
+        assert properties.id_for_label('Nowhere - 1 St') is None
+        assert TenantRepo.id_for_label(TenantRepo(conn).labels()[0]) == tenant_id
+        assert LeaseRepo(conn).active_labels() == [f'Ali - Property #{unnamed} (Lease ID: {lease_id})']
+        assert LeaseRepo.id_for_label(LeaseRepo(conn).label(lease_id)) == lease_id
+
+    def test_rent_and_status_operations(self, conn):
+        """Test the operations the managers run through the lease, payment and maintenance repos"""
+        property_id = PropertyRepo(conn).add(address='1 Test St', rent_amount=100)
+        tenant_id = TenantRepo(conn).add(name='Ali', property_id=property_id)
+        leases = LeaseRepo(conn)
+        lease_id = leases.add(tenant_id=tenant_id, property_id=property_id, start_date='2024-01-01',
+                              rent_amount=Money(2500000))
+        assert leases.parties(lease_id) == (tenant_id, property_id)
+
+        payments = PaymentRepo(conn)
+        assert payments.generate_monthly_rent(today=date(2024, 3, 10)) == 1
+        payment = payments.get(conn.execute("SELECT id FROM rent_payments").fetchone()[0])
+        assert (payment.month, payment.due_date, payment.amount_due, payment.status) == (
+            '2024-03', '2024-04-01', Money(2500000), 'Pending')
+
+        leases.terminate(lease_id)
+        assert leases.get(lease_id).status == 'Terminated'
+
+        expense_id = ExpenseRepo(conn).add(property_id=property_id, description='Paint', amount=Money(500))
+        assert ExpenseRepo(conn).get(expense_id).amount == Money(500)
+
+        maintenance = MaintenanceRepo(conn)
+        request_id = maintenance.add(property_id=property_id, description='Tap', cost_estimate=Money(900))
+        maintenance.set_status(request_id, 'Completed', Money(750), '2024-03-11')
+        request = maintenance.get(request_id)
+        assert (request.status, request.cost_estimate, request.actual_cost, request.completed_date) == (
+            'Completed', Money(900), Money(750), '2024-03-11')
+
+    def test_no_commit(self, conn):
+        """Test that repositories leave the transaction to the caller"""
+        PropertyRepo(conn).add(address='1 Test St', rent_amount=100)
+        assert conn.in_transaction
+        conn.rollback()
+        assert conn.execute("SELECT COUNT(*) FROM properties").fetchone() == (0,)
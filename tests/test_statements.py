@@ -0,0 +1,57 @@
+import pytest
+import sqlite3
+import db
+import querylog
+import statements
+from services import PropertyRepo
+
+
+@pytest.fixture(autouse=True)
+def fresh_log():
+    """Start each test with no timings"""
+    querylog.reset()
+    yield
+    querylog.reset()
+
+
+class TestStatements:
+    """Test cases for the named statement registry and statement cache counts"""
+
+    def test_every_statement_compiles(self, temp_db):
+        """Test that each registered statement is valid against the schema"""
+        conn = sqlite3.connect(temp_db)
+        try:
+            for name, sql in statements.STATEMENTS.items():
+                conn.execute(f"EXPLAIN {sql}", (None,) * sql.count('?'))
+        finally:
+            conn.close()
+
+    def test_unknown_name(self):
+        """Test that a misspelt name fails with the name in the message"""
+        with pytest.raises(KeyError, match="properties.lables"):
+            statements.sql('properties.lables')
+
+    def test_cache_hits(self, temp_db):
+        """Test that a repeated statement is compiled once per connection, and the cache's size is kept"""
+        pool = db.ConnectionPool(temp_db, diagnostics={'timing': True, 'slow_query_ms': None,
+                                                       'slow_query_log': None}, cached_statements=2)
+        with pool.writer() as conn:
+            PropertyRepo(conn).add(name="Flat", address="1 Road", rent_amount=2500000)
+        for _ in range(3):
+            with pool.reader() as conn:
+                assert PropertyRepo(conn).labels() == ["Flat - 1 Road"]
+        labels = next(stats for stats in querylog.top_statements()
+                      if stats.sql == statements.sql('properties.labels'))
+        assert (labels.cache_hits, labels.cache_misses) == (2, 1)
+
+        # Two other statements push it out of a two-statement cache
+        with pool.reader() as conn:
+            statements.run(conn, 'properties.label', (1,)).fetchone()
+            statements.run(conn, 'tenants.labels').fetchall()
+            PropertyRepo(conn).labels()
+        labels = next(stats for stats in querylog.top_statements()
+                      if stats.sql == statements.sql('properties.labels'))
+        assert (labels.cache_hits, labels.cache_misses) == (2, 2)
+        hits, misses = querylog.cache_counts()
+        assert hits >= 2 and misses >= 4
+        pool.close()
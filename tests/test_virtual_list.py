@@ -0,0 +1,181 @@
+import pytest
+import sqlite3
+from unittest.mock import Mock
+import background
+from listings import KeysetPager
+from virtual_list import VirtualListMixin
+
+
+class FakeTree:
+    """Minimal stand-in for ttk.Treeview that keeps items in order"""
+
+    def __init__(self):
+        self.items = []
+        self.values = {}
+        self.next_id = 0
+        self.moved_to = None
+
+    def get_children(self):
+        return tuple(self.items)
+
+    def insert(self, parent, index, values):
+        self.next_id += 1
+        item = f"I{self.next_id}"
+        if index == 'end':
+            self.items.append(item)
+        else:
+            self.items.insert(index, item)
+        self.values[item] = values
+        return item
+
+    def delete(self, *items):
+        for item in items:
+            self.items.remove(item)
+            del self.values[item]
+
+    def configure(self, **kwargs):
+        pass
+
+    def yview(self):
+        return (self.moved_to or 0.0, 1.0)
+
+    def yview_moveto(self, fraction):
+        self.moved_to = fraction
+
+    def ids(self):
+        return [self.values[item][0] for item in self.items]
+
+
+class Lister(VirtualListMixin):
+    page_size = 10
+    window_pages = 3
+
+    def __init__(self):
+        self.tree = FakeTree()
+        self.attach_virtual_scroll(Mock())
+
+
+@pytest.fixture
+def rows_db(tmp_path):
+    """A database with 100 rows whose sort key has many duplicates"""
+    path = str(tmp_path / "rows.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, day TEXT)")
+        conn.executemany("INSERT INTO items (id, day) VALUES (?, ?)",
+                         [(i, f"2024-01-{i % 7 + 1:02d}") for i in range(1, 101)])
+    conn.close()
+    return path
+
+
+def expected_order():
+    return [i for i, day in sorted(((i, f"2024-01-{i % 7 + 1:02d}") for i in range(1, 101)),
+                                   key=lambda r: (r[1], r[0]), reverse=True)]
+
+
+class TestKeysetPager:
+    """Test cases for keyset pagination"""
+
+    def test_forward_pages_cover_every_row_once(self, rows_db):
+        """Test that walking forward visits all rows in order despite duplicate keys"""
+        pager = KeysetPager("id", "items", ("day", "id"))
+        seen = []
+        key = None
+        with sqlite3.connect(rows_db) as conn:
+            while True:
+                page = pager.page(conn, after=key, limit=13)
+                if not page:
+                    break
+                seen.extend(values[0] for values, key in page)
+                key = page[-1][1]
+        assert seen == expected_order()
+
+    def test_backward_page_precedes_key(self, rows_db):
+        """Test that a backward page returns the rows just before a key, in display order"""
+        pager = KeysetPager("id", "items", ("day", "id"))
+        order = expected_order()
+        with sqlite3.connect(rows_db) as conn:
+            page = pager.page(conn, after=None, limit=50)
+            middle_key = page[40][1]
+            before = pager.page(conn, before=middle_key, limit=5)
+        assert [values[0] for values, key in before] == order[35:40]
+
+    def test_where_and_ascending(self, rows_db):
+        """Test filters combined with ascending order"""
+        pager = KeysetPager("id", "items", ("id",), where=["day = ?"], params=["2024-01-01"],
+                            descending=False)
+        with sqlite3.connect(rows_db) as conn:
+            first = pager.page(conn, limit=3)
+            second = pager.page(conn, after=first[-1][1], limit=3)
+        assert [values[0] for values, key in first + second] == [7, 14, 21, 28, 35, 42]
+
+    def test_sql_built_once(self, rows_db):
+        """Test that pages send the same statement text, so it is compiled once"""
+        pager = KeysetPager("id", "items", ("day", "id"))
+        with sqlite3.connect(rows_db) as conn:
+            first = pager.page(conn, limit=5)
+            pager.page(conn, after=first[-1][1], limit=5)
+        assert pager.sql(True, False) is pager.sql(True, False)
+        assert len({pager.sql(False, False), pager.sql(True, False), pager.sql(True, True)}) == 3
+        assert pager.sql(False, False).endswith("ORDER BY day DESC, id DESC LIMIT ?")
+
+
+class TestVirtualListMixin:
+    """Test cases for the sliding Treeview window"""
+
+    def test_first_page_only(self, rows_db):
+        """Test that only the first page is materialized initially"""
+        lister = Lister()
+        lister.show_rows(KeysetPager("id", "items", ("day", "id")), list, rows_db)
+        assert lister.tree.ids() == expected_order()[:10]
+
+    def test_scrolling_down_slides_window(self, rows_db):
+        """Test that scrolling near the bottom appends pages and drops old ones"""
+        lister = Lister()
+        lister.show_rows(KeysetPager("id", "items", ("day", "id")), list, rows_db)
+        for _ in range(5):
+            lister.on_tree_scroll(0.7, 1.0)
+
+        order = expected_order()
+        assert len(lister.tree.items) == 30
+        assert lister.tree.ids() == order[30:60]
+        assert lister.tree.moved_to is not None
+
+        # Scrolling back up restores the earlier rows and trims the bottom
+        lister.on_tree_scroll(0.0, 0.3)
+        assert lister.tree.ids() == order[20:50]
+
+    def test_scrolling_stops_at_end(self, rows_db):
+        """Test that no queries are made once the last page is loaded"""
+        lister = Lister()
+        lister.show_rows(KeysetPager("id", "items", ("day", "id")), list, rows_db)
+        for _ in range(20):
+            lister.on_tree_scroll(0.9, 1.0)
+        assert lister.tree.ids() == expected_order()[70:]
+        assert lister._vl_more_after is False
+
+    def test_reload_clears_tree(self, rows_db):
+        """Test that showing new rows replaces the current window"""
+        lister = Lister()
+        pager = KeysetPager("id", "items", ("day", "id"))
+        lister.show_rows(pager, list, rows_db)
+        lister.show_rows(KeysetPager("id", "items", ("id",), where=["id <= 3"]), list, rows_db)
+        assert lister.tree.ids() == [3, 2, 1]
+
+    def test_pages_load_in_background(self, rows_db, monkeypatch):
+        """Test that scrolling queues one page fetch at a time and adds it when delivered"""
+        lister = Lister()
+        lister.show_rows(KeysetPager("id", "items", ("day", "id")), list, rows_db)
+        queued = []
+        monkeypatch.setattr(background, 'submit',
+                            lambda widget, key, func, on_done, on_error=None: queued.append((key, func, on_done)))
+
+        lister.on_tree_scroll(0.9, 1.0)
+        lister.on_tree_scroll(0.95, 1.0)
+        assert [key for key, func, on_done in queued] == [(lister, 'page')]
+        assert lister.tree.ids() == expected_order()[:10]
+
+        key, func, on_done = queued.pop()
+        on_done(func())
+        assert lister.tree.ids() == expected_order()[:20]
+        lister.on_tree_scroll(0.9, 1.0)
+        assert len(queued) == 1
@@ -0,0 +1,139 @@
+import background
+from db import read_connection
+from listings import PAGE_SIZE
+
+# Pages kept in the Treeview at once; rows outside this window are dropped
+WINDOW_PAGES = 5
+# Fetch the next page once the view is this close to either window edge
+PREFETCH_FRACTION = 0.2
+
+
+def query_page(pager, db_file, after=None, before=None, limit=PAGE_SIZE):
+    """Run one page of a KeysetPager on a pooled reader connection"""
+    with read_connection(db_file) as conn:
+        return pager.page(conn, after=after, before=before, limit=limit)
+
+
+class VirtualListMixin:
+    """Shows a KeysetPager through `self.tree`, one window of rows at a time.
+
+    Only `window_pages` pages are ever inserted into the Treeview; as the
+    user scrolls towards either edge the adjacent page is fetched in the
+    background and, once it arrives, the page at the far end is dropped.
+    """
+
+    page_size = PAGE_SIZE
+    window_pages = WINDOW_PAGES
+
+    def attach_virtual_scroll(self, scrollbar):
+        """Route the tree's vertical scroll updates through the virtual list"""
+        self._vl_scrollbar = scrollbar
+        self.tree.configure(yscrollcommand=self.on_tree_scroll)
+
+    def show_rows(self, pager, format_row, db_file, on_error=None):
+        """Replace the tree contents with the first page of `pager`.
+
+        The query runs in the background; the current rows stay on screen
+        until it finishes, and a newer call supersedes an older one.
+        """
+        def failed(error):
+            # Keep paging the rows already shown, if any
+            self._vl_loading = not getattr(self, '_vl_items', None)
+            if on_error:
+                on_error(error)
+        
+        self._vl_loading = True
+        # A page still loading belongs to the rows being replaced
+        background.cancel((self, 'page'))
+        background.submit(self.tree, (self, 'rows'),
+                          lambda: query_page(pager, db_file, limit=self.page_size + 1),
+                          lambda rows: self._show_first_page(pager, format_row, db_file, rows),
+                          failed)
+
+    def _show_first_page(self, pager, format_row, db_file, rows):
+        self._vl_pager = pager
+        self._vl_format = format_row
+        self._vl_db_file = db_file
+        self._vl_items = []  # (item id, key) in display order
+        self._vl_more_before = False
+        self._vl_more_after = False
+
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        self._append_rows(rows)
+        self._vl_loading = False
+
+    def _append_rows(self, rows):
+        """Add a page after the window; returns the rows dropped from the top"""
+        self._vl_more_after = len(rows) > self.page_size
+        for values, key in rows[:self.page_size]:
+            item = self.tree.insert('', 'end', values=self._vl_format(values))
+            self._vl_items.append((item, key))
+        return self._trim_window(from_top=True)
+
+    def _prepend_rows(self, rows):
+        """Add a page before the window; returns the rows added"""
+        self._vl_more_before = len(rows) > self.page_size
+        rows = rows[-self.page_size:]
+        for index, (values, key) in enumerate(rows):
+            item = self.tree.insert('', index, values=self._vl_format(values))
+            self._vl_items.insert(index, (item, key))
+        self._trim_window(from_top=False)
+        return len(rows)
+
+    def on_tree_scroll(self, first, last):
+        """Scrollbar callback: update the scrollbar and page in rows near the edges"""
+        self._vl_scrollbar.set(first, last)
+        if getattr(self, '_vl_loading', True) or not getattr(self, '_vl_items', None):
+            return
+
+        first, last = float(first), float(last)
+        if last >= 1 - PREFETCH_FRACTION and self._vl_more_after:
+            self.load_page(after=self._vl_items[-1][1])
+        elif first <= PREFETCH_FRACTION and self._vl_more_before:
+            self.load_page(before=self._vl_items[0][1])
+
+    def load_page(self, after=None, before=None):
+        """Fetch the page after or before the window in the background and add it when it arrives.
+
+        No other page is requested until it has been added.
+        """
+        pager, db_file = self._vl_pager, self._vl_db_file
+
+        def loaded(rows):
+            try:
+                # Keep the rows the user is looking at in place
+                top = int(round(float(self.tree.yview()[0]) * len(self._vl_items)))
+                if before is None:
+                    removed = self._append_rows(rows)
+                    if removed:
+                        self.tree.yview_moveto((top - removed) / len(self._vl_items))
+                else:
+                    added = self._prepend_rows(rows)
+                    self.tree.yview_moveto((top + added) / len(self._vl_items))
+            finally:
+                self._vl_loading = False
+
+        def failed(error):
+            self._vl_loading = False
+            print(f"Error loading rows: {error}")
+
+        self._vl_loading = True
+        # One extra row tells us whether there is more beyond this page
+        background.submit(self.tree, (self, 'page'),
+                          lambda: query_page(pager, db_file, after=after, before=before, limit=self.page_size + 1),
+                          loaded, failed)
+
+    def _trim_window(self, from_top):
+        excess = len(self._vl_items) - self.page_size * self.window_pages
+        if excess <= 0:
+            return 0
+        if from_top:
+            dropped, self._vl_items = self._vl_items[:excess], self._vl_items[excess:]
+            self._vl_more_before = True
+        else:
+            dropped, self._vl_items = self._vl_items[-excess:], self._vl_items[:-excess]
+            self._vl_more_after = True
+        self.tree.delete(*[item for item, key in dropped])
+        return excess